@@ -72,10 +72,43 @@ class Settings(BaseSettings):
     OPENAI_TTS_MODEL: str = Field(default="tts-1")
     OPENAI_TTS_VOICE: str = Field(default="alloy")
     
+    # Text-to-speech pipeline
+    TTS_MAX_CONCURRENCY: int = Field(default=3)  # parallel TTS requests per tour
+    TTS_PIPELINE_ENABLED: bool = Field(default=False)  # synthesize narration while the LLM is still writing
+    TTS_PIPELINE_FIRST_CHUNK_CHARS: int = Field(default=200)  # small first chunk for fast time-to-first-audio
+    TTS_PIPELINE_MIN_CHUNK_CHARS: int = Field(default=600)
+    TTS_STREAM_PASSTHROUGH: bool = Field(default=True)  # stream TTS bytes to listeners while synthesizing
+    TTS_TIMEOUT_SECONDS: int = Field(default=300)  # give up waiting for a tour's audio (stored segments are kept for repair)
+    TTS_CHUNK_RETRIES: int = Field(default=3)  # retries of a failed segment before the tour's audio fails
+    TTS_RETRY_BACKOFF_SECONDS: float = Field(default=1.0)  # doubled after every retry
+    TTS_PROVIDERS: str = Field(default="openai,google,local")  # failover order; google needs GOOGLE_APPLICATION_CREDENTIALS, local needs LOCAL_TTS_MODEL
+    TTS_CIRCUIT_FAILURES: int = Field(default=3)  # consecutive failures that take a provider out of rotation
+    TTS_CIRCUIT_COOLDOWN_SECONDS: int = Field(default=60)
+    TTS_HEDGE_BUDGET_SECONDS: float = Field(default=0.0)  # per 1k chars; slower chunks are also sent to the next provider (0 = off)
+    LOCAL_TTS_MODEL: Optional[str] = Field(default=None)  # Piper .onnx voice for offline CPU synthesis
+    LOCAL_TTS_WORKERS: int = Field(default=2)  # synthesis processes
+    
+    # Audio delivery (bitrate ladder)
+    AUDIO_TRANSCODE_ENABLED: bool = Field(default=True)  # requires ffmpeg with libopus/libmp3lame
+    AUDIO_TRANSCODE_CONCURRENCY: int = Field(default=2)  # parallel ffmpeg processes
+    FFMPEG_PATH: str = Field(default="ffmpeg")
+    AUDIO_OPUS_BITRATE: str = Field(default="24k")
+    AUDIO_MP3_LOW_BITRATE: str = Field(default="48k")
+    AUDIO_DEFAULT_VARIANT: str = Field(default="mp3-low")  # served when the client does not ask: original, mp3-low or opus
+    AUDIO_TIME_STRETCH_ENABLED: bool = Field(default=True)  # derive other speeds from the canonical synthesis instead of paying for TTS again
+    TTS_CANONICAL_SPEED: float = Field(default=1.2)  # speed narration is synthesized at; other speeds are stretched from it
+    
     # Anthropic
     ANTHROPIC_API_KEY: Optional[str] = Field(default=None, description="Anthropic API key")
     ANTHROPIC_MODEL: str = Field(default="claude-3-haiku-20240307")
     
+    # Tour translation and shorter variants (derived from an existing tour with a smaller model)
+    TOUR_TRANSLATION_ENABLED: bool = Field(default=True)
+    TOUR_VARIANTS_ENABLED: bool = Field(default=True)
+    OPENAI_TRANSLATION_MODEL: str = Field(default="gpt-4o-mini")
+    ANTHROPIC_TRANSLATION_MODEL: str = Field(default="claude-3-haiku-20240307")
+    TRANSLATION_CONCURRENCY: int = Field(default=4)  # parallel per-stop translation requests
+    
     # Google Cloud (for Vision API)
     GOOGLE_CLOUD_PROJECT: Optional[str] = Field(default=None)
     GOOGLE_APPLICATION_CREDENTIALS: Optional[str] = Field(default=None)
@@ -93,8 +126,32 @@ class Settings(BaseSettings):
     # Caching
     CACHE_TTL_DEFAULT: int = Field(default=3600)  # 1 hour
     CACHE_TTL_TOUR_CONTENT: int = Field(default=86400 * 7)  # 7 days
-    CACHE_TTL_LOCATION_SEARCH: int = Field(default=86400 * 3)  # 3 days
+    CACHE_TTL_LOCATION_SEARCH: int = Field(default=86400 * 3)  # 3 days; stale results are served and refreshed after the soft TTL
+    CACHE_SOFT_TTL_LOCATION_SEARCH: int = Field(default=3600)  # 1 hour
+    CACHE_TTL_NEARBY: int = Field(default=86400)  # 1 day
+    CACHE_SOFT_TTL_NEARBY: int = Field(default=1800)  # 30 minutes
+    CACHE_REFRESH_LOCK_SECONDS: int = Field(default=30)  # one background refresh per key across workers in this window
     CACHE_TTL_IMAGE_RECOGNITION: int = Field(default=86400)  # 1 day
+    CACHE_MEMORY_MAX_BYTES: int = Field(default=256 * 1024 * 1024)  # in-memory backend budget; least recently used entries are evicted above it
+    CACHE_SWEEP_INTERVAL_SECONDS: float = Field(default=60.0)  # how often expired in-memory entries are removed (0 = only on read)
+    CACHE_COMPRESS_MIN_BYTES: int = Field(default=1024)  # compress cache values at least this large (0 = off)
+    CACHE_COMPRESS_CODEC: str = Field(default="zstd")  # zstd (needs the zstandard package) or zlib
+    CACHE_COMPRESS_LEVEL: int = Field(default=3)
+    CACHE_L1_ENABLED: bool = Field(default=False)  # in-process tier in front of Redis for hot keys
+    CACHE_L1_MAX_BYTES: int = Field(default=64 * 1024 * 1024)  # per worker
+    CACHE_L1_POLICIES: str = Field(
+        default="location_search=300,nearby=300,tour:content=600,tour:translation=600,tour:condensed=600,usage=5"
+    )  # key prefix=L1 TTL in seconds; other keys always go to Redis
+    CACHE_L1_CHANNEL: str = Field(default="cache:l1:invalidate")  # pub/sub channel shared by all workers
+    CACHE_PERSIST_ENABLED: bool = Field(default=True)  # durable copy of expensive entries in cache_entries (PostgreSQL only)
+    CACHE_PERSIST_PREFIXES: str = Field(
+        default="audio:tts,audio:tour,tour:content,tour:translation,tour:condensed"
+    )  # key prefixes read through from the database after a Redis eviction
+    CACHE_PERSIST_MIN_TTL_SECONDS: int = Field(default=3600)  # shorter-lived entries are not worth a row
+    CACHE_PERSIST_FLUSH_SECONDS: float = Field(default=2.0)  # write-behind interval for entries and hit counts
+    CACHE_PERSIST_BATCH_SIZE: int = Field(default=200)  # rows per upsert/sweep statement; a full queue flushes early
+    CACHE_PERSIST_SWEEP_INTERVAL_SECONDS: float = Field(default=300.0)  # one partition of expired rows per tick (0 = off)
+    CACHE_PERSIST_SWEEP_PARTITIONS: int = Field(default=16)
     
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = Field(default=60)
@@ -9,6 +9,8 @@ import time
 from app.database import init_db, close_db
 from app.routers import auth_router, health_router, locations_router, tours_router, admin_router
 from app.config import settings
+from app.services.ai_service import ai_service
+from app.services.cache_service import cache_service
 
 # ----------------------- Logging Setup -----------------------
 # Configure root logger based on settings.LOG_LEVEL (default INFO)
@@ -50,6 +52,8 @@ async def lifespan(app: FastAPI):
     await init_db()
     yield
     # Shutdown
+    ai_service.tts.shutdown()
+    await cache_service.close()
     await close_db()
 
 app = FastAPI(
@@ -89,6 +93,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the web player read seek results and partial content ranges
+    expose_headers=["Content-Range", "X-Seek-Time", "X-Audio-Variant"],
 )
 
 # Include routers
@@ -0,0 +1,8 @@
+-- Migration: Index cache entry tags
+-- Date: 2026-10-18
+-- Description: CacheService.invalidate_tag deletes persisted cache entries by tag;
+-- a GIN index on the split tags column keeps that proportional to the entries in the tag
+
+CREATE INDEX IF NOT EXISTS idx_cache_entries_tags ON cache_entries USING GIN (string_to_array(tags, ','));
+
+COMMENT ON COLUMN cache_entries.tags IS 'Comma-separated invalidation tags, e.g. location:<id>';
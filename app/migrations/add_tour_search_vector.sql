@@ -0,0 +1,74 @@
+-- Migration: Add full-text search to tours
+-- Date: 2026-10-18
+-- Description: tsvector column maintained by a trigger over title, description,
+-- content and transcript text, plus the index used by GET /tours/search
+
+-- Text search configuration for a tour's ISO 639-1 language code
+CREATE OR REPLACE FUNCTION tour_search_config(language TEXT)
+RETURNS regconfig
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT (CASE language
+        WHEN 'en' THEN 'english'
+        WHEN 'es' THEN 'spanish'
+        WHEN 'fr' THEN 'french'
+        WHEN 'de' THEN 'german'
+        WHEN 'it' THEN 'italian'
+        WHEN 'pt' THEN 'portuguese'
+        WHEN 'nl' THEN 'dutch'
+        WHEN 'sv' THEN 'swedish'
+        WHEN 'da' THEN 'danish'
+        WHEN 'no' THEN 'norwegian'
+        WHEN 'fi' THEN 'finnish'
+        WHEN 'ru' THEN 'russian'
+        WHEN 'tr' THEN 'turkish'
+        ELSE 'simple'
+    END)::regconfig
+$$;
+
+-- Plain text of a transcript segment array
+CREATE OR REPLACE FUNCTION tour_transcript_text(transcript JSONB)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT coalesce(string_agg(segment->>'text', ' '), '')
+    FROM jsonb_array_elements(
+        CASE WHEN jsonb_typeof(transcript) = 'array' THEN transcript ELSE '[]'::jsonb END
+    ) AS segment
+$$;
+
+ALTER TABLE tours ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+-- Title outranks the description, which outranks the narration. The transcript
+-- is cut from the content, so it is only indexed when the content is missing;
+-- indexing both would double every posting without changing which tours match.
+CREATE OR REPLACE FUNCTION tours_search_vector_update()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    config regconfig := tour_search_config(NEW.language);
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector(config, coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector(config, coalesce(NEW.description, '')), 'B') ||
+        setweight(to_tsvector(config, coalesce(
+            nullif(NEW.content, ''),
+            tour_transcript_text(NEW.transcript::jsonb)
+        )), 'C');
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS tours_search_vector_trigger ON tours;
+CREATE TRIGGER tours_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, content, transcript, language ON tours
+    FOR EACH ROW EXECUTE FUNCTION tours_search_vector_update();
+
+-- Searches are always scoped to one user and one language, so those columns lead
+-- the GIN index and a search never touches postings of other users' tours
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+CREATE INDEX IF NOT EXISTS idx_tours_search
+    ON tours USING GIN (user_id, language, search_vector);
+
+-- Populate existing rows (touching title fires the trigger)
+UPDATE tours SET title = title WHERE search_vector IS NULL;
+
+COMMENT ON COLUMN tours.search_vector IS 'Weighted full-text vector over title, description and narration, maintained by tours_search_vector_trigger';
@@ -0,0 +1,11 @@
+-- Migration: Link derived tours to their source tour
+-- Date: 2026-10-18
+-- Description: Translations and shorter variants reuse an existing tour's stops and audio;
+-- source_tour_id records where they came from so they can be found when the source changes
+
+ALTER TABLE tours ADD COLUMN IF NOT EXISTS source_tour_id UUID REFERENCES tours(id) ON DELETE SET NULL;
+
+-- Only derived tours have a source, so a partial index stays small
+CREATE INDEX IF NOT EXISTS idx_tours_source_tour_id ON tours (source_tour_id) WHERE source_tour_id IS NOT NULL;
+
+COMMENT ON COLUMN tours.source_tour_id IS 'Tour this one was translated or shortened from (NULL for generated tours)';
@@ -40,6 +40,8 @@ class Tour(BaseModel):
     # Foreign keys
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     location_id = Column(UUID(as_uuid=True), ForeignKey("locations.id"), nullable=False)
+    # Tour this one was derived from (translation or shorter variant)
+    source_tour_id = Column(UUID(as_uuid=True), ForeignKey("tours.id", ondelete="SET NULL"), nullable=True)
     
     # Relationships
     user = relationship("app.models.user.User", back_populates="tours")
@@ -3,15 +3,18 @@ Admin routes for monitoring usage, costs, and system health.
 These endpoints provide insights into AI service usage and costs.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any
+import uuid
 
 from app.database import get_db
 from app.auth import get_current_active_user
 from app.models.user import User
 from app.services.usage_tracker import usage_tracker
 from app.services.ai_service import ai_service
+from app.services.cache_service import cache_service
+from app.services.generation_ledger import generation_ledger
 
 router = APIRouter()
 
@@ -75,6 +78,64 @@ async def get_provider_status(
             detail=f"Failed to get provider status: {str(e)}"
         )
 
+@router.get("/cache")
+async def get_cache_stats(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get cache backend occupancy, eviction counters and per-prefix hit rate, latency and value sizes"""
+    try:
+        return cache_service.stats()
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get cache stats: {str(e)}"
+        )
+
+@router.get("/cache/keyspace")
+async def inspect_cache_keyspace(
+    sample: int = Query(1000, ge=10, le=10000, description="Keys to sample"),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Estimate cache memory use per key prefix from a SCAN sample sized with MEMORY USAGE"""
+    try:
+        return await cache_service.inspect_keyspace(sample)
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to inspect cache keyspace: {str(e)}"
+        )
+
+@router.post("/cache/invalidate")
+async def invalidate_cache_tag(
+    tag: str,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Drop every cache entry stored with a tag.
+    
+    Query parameters:
+    - tag: e.g. "location:<id>" after a location was corrected
+    """
+    try:
+        deleted = await cache_service.invalidate_tag(tag)
+        return {"tag": tag, "deleted": deleted}
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to invalidate cache tag: {str(e)}"
+        )
+
 @router.post("/reset-usage")
 async def reset_usage_counters(
     period: str = "today",
@@ -105,4 +166,50 @@ async def reset_usage_counters(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to reset usage: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/generations/in-flight")
+async def get_in_flight_generations(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """List tour generations still running, with their current stage and age"""
+    try:
+        generations = await generation_ledger.list_in_flight()
+        return {"generations": generations, "count": len(generations)}
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to list in-flight generations: {str(e)}"
+        )
+
+@router.get("/generations/latency")
+async def get_generation_latency(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get p50/p90/p95/p99 latency in milliseconds per generation stage"""
+    try:
+        return await generation_ledger.get_stage_percentiles()
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get generation latency: {str(e)}"
+        )
+
+@router.get("/generations/{tour_id}")
+async def get_generation_ledger(
+    tour_id: uuid.UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the per-stage ledger of a single tour generation"""
+    ledger = await generation_ledger.get_ledger(tour_id)
+    if not ledger:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Generation ledger not found"
+        )
+    return ledger
\ No newline at end of file
@@ -1,10 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status, Response
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import uuid
 import io
-import base64
 
 from app.database import get_db
 from app.auth import get_current_active_user
@@ -12,10 +11,19 @@ from app.models.user import User
 from app.schemas.tour import (
     TourGenerationRequest,
     TourGenerationResponse,
-    TourResponse
+    TourResponse,
+    TourSearchResponse
 )
 from app.services.tour_service import tour_service, TourServiceError, TourNotFoundError
-from app.services.cache_service import cache_service
+from app.services.search_service import InvalidSearchCursor, search_service
+from app.services.audio_broadcast import audio_broadcaster
+from app.services.audio_storage import audio_storage
+from app.services.audio_transcoder import (
+    ORIGINAL, VARIANTS, audio_transcoder, negotiate_variant, normalize_speed, speed_variant_name
+)
+from app.config import settings
+from app.utils.http_range import RangeNotSatisfiable, etag_matches, parse_range
+from app.utils.mp3 import mp3_duration, seek_offset
 
 router = APIRouter()
 
@@ -46,6 +54,30 @@ async def generate_tour(
             detail=f"Failed to generate tour: {str(e)}"
         )
 
+@router.get("/search", response_model=TourSearchResponse)
+async def search_tours(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms"),
+    language: str = Query("en", pattern="^[a-z]{2}$"),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, max_length=200),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Full-text search over the current user's tours, ranked, with keyset pagination"""
+    try:
+        return await search_service.search_tours(db, current_user, q, language, limit, cursor)
+        
+    except InvalidSearchCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search tours: {str(e)}"
+        )
+
 @router.get("/{tour_id}", response_model=TourResponse)
 async def get_tour(
     tour_id: uuid.UUID,
@@ -125,16 +157,238 @@ async def get_tour_status(
 
 @router.get("/{tour_id}/audio", include_in_schema=False)
 @router.head("/{tour_id}/audio", include_in_schema=False)
-async def get_tour_audio_public(tour_id: uuid.UUID):
-    """Stream tour audio if it exists in Redis cache. No authentication required."""
-    # Try Redis first; fall back to 404. We purposely skip user-ownership checks
-    audio_key = f"audio:tour:{tour_id}"
-    audio_b64 = await cache_service.get(audio_key)
+async def get_tour_audio_public(
+    request: Request,
+    tour_id: uuid.UUID,
+    format: Optional[str] = Query(None, description="original, mp3-low or opus"),
+    t: Optional[float] = Query(None, ge=0, description="Start playback at this many seconds"),
+    speed: Optional[float] = Query(None, ge=0.5, le=2.0, description="Playback speed relative to the narration"),
+    accept: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="Range")
+):
+    """
+    Stream tour audio if it exists in Redis cache. No authentication required.
+
+    While the audio is still being synthesized, listeners are attached to the
+    live TTS stream. Otherwise a compact variant is chosen from the ``format``
+    query parameter or the ``Accept`` header; the original MP3 is served if
+    no variant can be made.
+
+    ``t`` seeks: the stored seek index resolves it to the byte offset of the
+    frame playing at that time, which is served as a ``206`` starting there
+    (``X-Seek-Time`` holds the exact start time of that frame).
+
+    ``speed`` serves the narration time-stretched without a pitch change
+    (an MP3 variant derived on first request and cached). ``t`` and
+    ``X-Seek-Time`` stay on the narration timeline, so transcript times can
+    be used as they are.
+    """
+    live = audio_broadcaster.get(tour_id)
+    if live:
+        # Still being synthesized: stream it as chunked transfer while TTS bytes arrive
+        headers = {"Cache-Control": "no-store", "X-Audio-Variant": "live"}
+        if request.method == "HEAD":
+            return Response(media_type="audio/mpeg", headers=headers)
+        return StreamingResponse(
+            live.iter_bytes(),
+            media_type="audio/mpeg",
+            headers=headers,
+        )
 
-    if not audio_b64:
+    variant_name = negotiate_variant(format, accept)
+    if t is not None and variant_name != ORIGINAL and VARIANTS[variant_name].media_type != "audio/mpeg":
+        variant_name = ORIGINAL  # byte offsets can only be resolved for MP3
+
+    audio_bytes = None
+    media_type = "audio/mpeg"
+    playback_speed = normalize_speed(speed) if speed else 1.0
+    if playback_speed != 1.0:
+        audio_bytes = await audio_transcoder.get_or_create_speed(tour_id, playback_speed)
+        if audio_bytes:
+            variant_name = speed_variant_name(playback_speed)
+        else:
+            playback_speed = 1.0
+    if not audio_bytes and variant_name != ORIGINAL:
+        audio_bytes = await audio_transcoder.get_or_create(tour_id, variant_name)
+        media_type = VARIANTS[variant_name].media_type
+    if not audio_bytes:
+        # Try Redis first; fall back to 404. We purposely skip user-ownership checks
+        variant_name = ORIGINAL
+        media_type = "audio/mpeg"
+        audio_bytes = await audio_storage.get_tour_audio(tour_id)
+
+    if not audio_bytes:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio not found")
 
-    return StreamingResponse(io.BytesIO(base64.b64decode(audio_b64)), media_type="audio/mpeg", headers={"Accept-Ranges": "bytes"})
+    size = len(audio_bytes)
+    headers = {"Accept-Ranges": "bytes", "Vary": "Accept", "X-Audio-Variant": variant_name}
+    if playback_speed != 1.0:
+        headers["X-Audio-Speed"] = f"{playback_speed:g}"
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+
+    if t is not None:
+        index = await audio_storage.get_seek_index(
+            tour_id, None if variant_name == ORIGINAL else variant_name, audio_bytes
+        )
+        if index:
+            offset, seek_time = seek_offset(index, t / playback_speed, audio_bytes)
+            end = byte_range[1] if byte_range and byte_range[1] >= offset else size - 1
+            byte_range = (offset, end)
+            headers["X-Seek-Time"] = f"{seek_time * playback_speed:.3f}"
+
+    start, end = byte_range or (0, size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    status_code = status.HTTP_200_OK
+    if byte_range:
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    if request.method == "HEAD":
+        return Response(status_code=status_code, media_type=media_type, headers=headers)
+    return StreamingResponse(
+        io.BytesIO(audio_bytes[start:end + 1]),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
+
+def _segment_url(tour_id: uuid.UUID, segment: dict) -> str:
+    return f"{settings.API_BASE_URL}/tours/{tour_id}/audio/segments/{segment['index']}.mp3"
+
+@router.get("/{tour_id}/audio/playlist.m3u8", include_in_schema=False)
+async def get_tour_audio_playlist(tour_id: uuid.UUID):
+    """HLS playlist of the tour audio, one or more segments per walkable stop. No authentication required."""
+    manifest = await audio_storage.get_manifest(tour_id)
+
+    if manifest:
+        complete = manifest.get("complete", False)
+        segments = audio_storage.ready_prefix(manifest)
+        playlist = audio_storage.build_playlist(segments, complete, lambda segment: _segment_url(tour_id, segment))
+    else:
+        # Tours generated before segmentation only have the full MP3
+        audio_bytes = await audio_storage.get_tour_audio(tour_id)
+        if not audio_bytes:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio not found")
+        complete = True
+        playlist = audio_storage.build_playlist(
+            [{"index": 0, "duration": mp3_duration(audio_bytes)}],
+            complete,
+            lambda segment: f"{settings.API_BASE_URL}/tours/{tour_id}/audio",
+        )
+
+    return Response(
+        content=playlist,
+        media_type="application/vnd.apple.mpegurl",
+        headers={"Cache-Control": "public, max-age=3600" if complete else "no-cache"},
+    )
+
+@router.get("/{tour_id}/audio/segments", include_in_schema=False)
+async def get_tour_audio_segments(tour_id: uuid.UUID):
+    """List audio segments of a tour, including while it is still being synthesized."""
+    manifest = await audio_storage.get_manifest(tour_id)
+
+    if not manifest:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio segments not found")
+
+    playable = audio_storage.ready_prefix(manifest)
+    return {
+        "tour_id": tour_id,
+        "complete": manifest.get("complete", False),
+        "total": len(manifest.get("segments", [])),
+        "playlist_url": f"{settings.API_BASE_URL}/tours/{tour_id}/audio/playlist.m3u8",
+        "stops": audio_storage.stop_markers(manifest.get("segments", [])),
+        "playable": [{**segment, "url": _segment_url(tour_id, segment)} for segment in playable],
+    }
+
+# The ".mp3" routes are registered first so "{index}" does not swallow "0.mp3"
+@router.get("/{tour_id}/audio/segments/{index}", include_in_schema=False)
+@router.head("/{tour_id}/audio/segments/{index}", include_in_schema=False)
+@router.get("/{tour_id}/audio/segments/{index}.mp3", include_in_schema=False)
+@router.head("/{tour_id}/audio/segments/{index}.mp3", include_in_schema=False)
+async def get_tour_audio_segment(tour_id: uuid.UUID, index: int):
+    """Stream a single audio segment. No authentication required."""
+    segment_bytes = await audio_storage.get_segment(tour_id, index)
+
+    if not segment_bytes:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio segment not found")
+
+    return StreamingResponse(io.BytesIO(segment_bytes), media_type="audio/mpeg", headers={"Accept-Ranges": "bytes"})
+
+@router.get("/{tour_id}/bundle")
+@router.head("/{tour_id}/bundle", include_in_schema=False)
+async def get_tour_bundle(
+    request: Request,
+    tour_id: uuid.UUID,
+    format: Optional[str] = Query(None, description="Audio variant: original, mp3-low or opus"),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Download the tour for offline use as a single ZIP archive.
+
+    Contains tour.json, the audio, transcript.json and stops.geojson. The
+    archive is streamed without being assembled in memory and supports
+    resuming with ``Range``/``If-Range`` and revalidation with ``ETag``.
+    """
+    try:
+        archive = await tour_service.get_tour_bundle(db, tour_id, current_user, audio_format=format)
+    except TourNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tour not found"
+        )
+    except TourServiceError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    headers = {
+        "ETag": archive.etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f'attachment; filename="tour-{tour_id}.zip"',
+    }
+    if etag_matches(if_none_match, archive.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # A stale If-Range means the archive changed: send all of it again
+    byte_range = None
+    if not if_range or if_range.strip() == archive.etag:
+        try:
+            byte_range = parse_range(range_header, archive.size)
+        except RangeNotSatisfiable:
+            raise HTTPException(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{archive.size}"},
+            )
+
+    start, end = byte_range or (0, archive.size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    status_code = status.HTTP_200_OK
+    if byte_range:
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{archive.size}"
+
+    if request.method == "HEAD":
+        return Response(status_code=status_code, media_type="application/zip", headers=headers)
+    return StreamingResponse(
+        archive.iter_bytes(start, end),
+        status_code=status_code,
+        media_type="application/zip",
+        headers=headers,
+    )
 
 @router.post("/{tour_id}/regenerate-audio")
 async def regenerate_tour_audio(
@@ -163,6 +417,33 @@ async def regenerate_tour_audio(
             detail=f"Failed to regenerate audio: {str(e)}"
         )
 
+@router.post("/{tour_id}/repair-audio", status_code=status.HTTP_202_ACCEPTED)
+async def repair_tour_audio(
+    tour_id: uuid.UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Resume audio generation for a tour that is ready without audio"""
+    try:
+        await tour_service.start_audio_repair(db, tour_id, current_user)
+        return {"message": "Audio repair started"}
+        
+    except TourNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tour not found"
+        )
+    except TourServiceError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start audio repair: {str(e)}"
+        )
+
 @router.delete("/{tour_id}")
 async def delete_tour(
     tour_id: uuid.UUID,
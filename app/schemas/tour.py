@@ -47,6 +47,7 @@ class TourResponse(TourBase, IDMixin, TimestampMixin):
     estimated_walking_time: Optional[str] = Field(None, description="Estimated walking time (e.g., '15 minutes')")
     difficulty_level: Optional[str] = Field("easy", description="Walking difficulty level")
     route_type: Optional[str] = Field("walkable", description="Type of tour route")
+    source_tour_id: Optional[uuid.UUID] = Field(None, description="Tour this one was translated or shortened from")
     
     class Config:
         from_attributes = True
@@ -63,4 +64,20 @@ class TourGenerationResponse(BaseModel):
     tour_id: uuid.UUID
     status: str
     message: str
-    estimated_completion: Optional[datetime] = None
\ No newline at end of file
+    estimated_completion: Optional[datetime] = None
+
+class TourSearchHit(BaseModel):
+    tour_id: uuid.UUID
+    title: str
+    description: Optional[str] = None
+    status: str
+    duration_minutes: int
+    created_at: datetime
+    rank: float
+    snippet: Optional[str] = Field(None, description="Narration excerpt with matches wrapped in <mark>")
+    transcript_matches: List[TranscriptSegment] = Field(default=[], description="Transcript segments containing the match, for seeking")
+
+class TourSearchResponse(BaseModel):
+    query: str
+    results: List[TourSearchHit]
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to fetch the next page")
@@ -9,7 +9,7 @@ import json
 import logging
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, AsyncIterator, Awaitable, Callable
 
 from openai import AsyncOpenAI
 from anthropic import AsyncAnthropic
@@ -17,11 +17,31 @@ import aiohttp
 import time
 
 from .cache_service import cache_service
+from .location_service import location_service
 from .usage_tracker import usage_tracker
+from .audio_transcoder import TranscodeError, audio_transcoder
+from .tts_providers import GoogleTTSProvider, LocalTTSProvider, OpenAITTSProvider, TTSProviderError, TTSRouter
 from app.config import settings, LLMProvider
+from app.utils.tts_text import NarrationStreamExtractor, segment_hash, split_tts_segments
 
 logger = logging.getLogger(__name__)
 
+TOUR_SYSTEM_PROMPT = (
+    "You are an expert travel guide. Create engaging audio tour content. "
+    "Return only valid JSON with the exact structure requested in the prompt, including all required fields "
+    "like 'title', 'content', 'walkable_stops', 'total_walking_distance', 'estimated_walking_time', and 'difficulty_level'."
+)
+
+CONDENSE_SYSTEM_PROMPT = (
+    "You are an expert travel guide editing audio tour scripts. Shorten narration while keeping its voice, "
+    "the most interesting facts and clear walking directions. Return only the narration text."
+)
+
+TRANSLATION_SYSTEM_PROMPT = (
+    "You are a professional translator of audio tour scripts. Translate faithfully and naturally for "
+    "listeners, keep proper names of places and people, keep paragraph breaks, and return only the translation."
+)
+
 class AIServiceError(Exception):
     """Base exception for AI service errors"""
     pass
@@ -51,7 +71,13 @@ class AIService:
         self.anthropic_client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
         self.cache = cache_service
         self.usage_tracker = usage_tracker
+        self.audio_transcoder = audio_transcoder
         self.default_provider = settings.DEFAULT_LLM_PROVIDER
+        self.tts = TTSRouter([
+            OpenAITTSProvider(lambda: self.openai_client),
+            GoogleTTSProvider(),
+            LocalTTSProvider(),
+        ])
         
         # Provider configurations
         self.provider_configs = {
@@ -61,12 +87,14 @@ class AIService:
                 "temperature": 0.7,
                 "top_p": 0.9,
                 "cost_per_1k_tokens": 0.000765,  # GPT-4o-mini average
+                "translation_model": settings.OPENAI_TRANSLATION_MODEL,
             },
             LLMProvider.ANTHROPIC: {
                 "model": settings.ANTHROPIC_MODEL,
                 "max_tokens": 8000,  # Increased from 4000 to prevent truncation of 15+ minute tours
                 "temperature": 0.7,
                 "cost_per_1k_tokens": 0.001375,  # Claude Haiku average
+                "translation_model": settings.ANTHROPIC_TRANSLATION_MODEL,
             }
         }
     
@@ -138,7 +166,9 @@ class AIService:
                 )
         
         # Cache the result for 7 days
-        await self.cache.set_json(cache_key, content, ttl=settings.CACHE_TTL_TOUR_CONTENT)
+        await self.cache.set_json(
+            cache_key, content, ttl=settings.CACHE_TTL_TOUR_CONTENT, tags=location_service.cache_tags([location])
+        )
         
         # Track usage
         await self.usage_tracker.record_api_usage(
@@ -175,23 +205,164 @@ class AIService:
             tour_data = self._parse_tour_response(content)
             
             # Add metadata
-            tour_data["metadata"] = {
-                "actual_provider": provider,
-                "model": self.provider_configs[provider]["model"],
-                "generation_timestamp": datetime.utcnow().isoformat(),
-                "location_id": location["id"],
-                "duration_minutes": duration_minutes,
-                "interests": interests,
-                "language": language,
-                "narration_style": narration_style,
-                "fallback_used": False,
-            }
+            tour_data["metadata"] = self._create_content_metadata(
+                location, interests, duration_minutes, language, narration_style, provider
+            )
             
             return tour_data
             
         except Exception as e:
             raise AIProviderError(f"Provider {provider} failed: {str(e)}")
     
+    def _create_content_metadata(
+        self,
+        location: Dict[str, Any],
+        interests: List[str],
+        duration_minutes: int,
+        language: str,
+        narration_style: str,
+        provider: LLMProvider
+    ) -> Dict[str, Any]:
+        """Generation metadata stored alongside tour content"""
+        return {
+            "actual_provider": provider,
+            "model": self.provider_configs[provider]["model"],
+            "generation_timestamp": datetime.utcnow().isoformat(),
+            "location_id": location["id"],
+            "duration_minutes": duration_minutes,
+            "interests": interests,
+            "language": language,
+            "narration_style": narration_style,
+            "fallback_used": False,
+        }
+    
+    async def generate_tour_content_streaming(
+        self,
+        location: Dict[str, Any],
+        interests: List[str],
+        duration_minutes: int,
+        on_narration: Callable[[str], Awaitable[None]],
+        language: str = "en",
+        narration_style: str = "conversational",
+        provider: Optional[LLMProvider] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate tour content while streaming the narration as it is written.
+        
+        The narration (the ``content`` field) is decoded from the streamed JSON
+        and passed to ``on_narration`` in arrival order, so callers can start
+        working on it before the response is complete. There is no provider
+        fallback here; callers fall back to ``generate_tour_content``.
+        
+        Returns:
+            Dict with tour content, metadata, and generation info
+        """
+        provider = provider or self.default_provider
+        
+        cache_key = self._create_content_cache_key(
+            location, interests, duration_minutes, language, narration_style, provider
+        )
+        
+        cached_result = await self.cache.get_json(cache_key)
+        if cached_result:
+            logger.info(f"Tour content cache hit for location {location['id']}")
+            await self.usage_tracker.record_cache_hit("tour_content", provider)
+            await on_narration(cached_result["content"])
+            return cached_result
+        
+        prompt = self._create_optimized_prompt(location, interests, duration_minutes, language, narration_style)
+        extractor = NarrationStreamExtractor()
+        raw_parts = []
+        
+        try:
+            if provider == LLMProvider.OPENAI:
+                stream = self._stream_with_openai(prompt)
+            elif provider == LLMProvider.ANTHROPIC:
+                stream = self._stream_with_anthropic(prompt)
+            else:
+                raise AIProviderError(f"Unsupported provider: {provider}")
+            
+            async for delta in stream:
+                raw_parts.append(delta)
+                narration = extractor.feed(delta)
+                if narration:
+                    await on_narration(narration)
+            
+            content = self._parse_tour_response("".join(raw_parts).strip())
+        except Exception as e:
+            raise AIProviderError(f"Provider {provider} streaming failed: {str(e)}")
+        
+        # The narration was not where we expected it – hand it over in one piece
+        if not extractor.started:
+            await on_narration(content["content"])
+        
+        content["metadata"] = self._create_content_metadata(
+            location, interests, duration_minutes, language, narration_style, provider
+        )
+        
+        await self.cache.set_json(
+            cache_key, content, ttl=settings.CACHE_TTL_TOUR_CONTENT, tags=location_service.cache_tags([location])
+        )
+        await self.usage_tracker.record_api_usage(
+            "tour_content",
+            self._estimate_tokens(content),
+            provider
+        )
+        
+        return content
+    
+    async def _stream_with_openai(self, prompt: str) -> AsyncIterator[str]:
+        """Stream content deltas from OpenAI"""
+        config = self.provider_configs[LLMProvider.OPENAI]
+        
+        t0 = time.perf_counter()
+        first_token_ms = None
+        stream = await self.openai_client.chat.completions.create(
+            model=config["model"],
+            messages=[
+                {"role": "system", "content": TOUR_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=config["max_tokens"],
+            temperature=config["temperature"],
+            top_p=config["top_p"],
+            stream=True,
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if first_token_ms is None:
+                    first_token_ms = int((time.perf_counter() - t0) * 1000)
+                yield delta
+        
+        latency_ms = int((time.perf_counter() - t0) * 1000)
+        logger.info(f"LLM OpenAI stream latency {latency_ms} ms (first token {first_token_ms} ms) | model={config['model']}")
+    
+    async def _stream_with_anthropic(self, prompt: str) -> AsyncIterator[str]:
+        """Stream content deltas from Anthropic"""
+        config = self.provider_configs[LLMProvider.ANTHROPIC]
+        
+        t0 = time.perf_counter()
+        first_token_ms = None
+        async with self.anthropic_client.messages.stream(
+            model=config["model"],
+            max_tokens=config["max_tokens"],
+            temperature=config["temperature"],
+            system=TOUR_SYSTEM_PROMPT,
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        ) as stream:
+            async for delta in stream.text_stream:
+                if first_token_ms is None:
+                    first_token_ms = int((time.perf_counter() - t0) * 1000)
+                yield delta
+        
+        latency_ms = int((time.perf_counter() - t0) * 1000)
+        logger.info(f"LLM Anthropic stream latency {latency_ms} ms (first token {first_token_ms} ms) | model={config['model']}")
+    
     async def _generate_with_openai(self, prompt: str) -> str:
         """Generate content using OpenAI"""
         config = self.provider_configs[LLMProvider.OPENAI]
@@ -202,7 +373,7 @@ class AIService:
             messages=[
                 {
                     "role": "system",
-                    "content": "You are an expert travel guide. Create engaging audio tour content. Return only valid JSON with the exact structure requested in the prompt, including all required fields like 'title', 'content', 'walkable_stops', 'total_walking_distance', 'estimated_walking_time', and 'difficulty_level'."
+                    "content": TOUR_SYSTEM_PROMPT
                 },
                 {"role": "user", "content": prompt}
             ],
@@ -224,7 +395,7 @@ class AIService:
             model=config["model"],
             max_tokens=config["max_tokens"],
             temperature=config["temperature"],
-            system="You are an expert travel guide. Create engaging audio tour content. Return only valid JSON with the exact structure requested in the prompt, including all required fields like 'title', 'content', 'walkable_stops', 'total_walking_distance', 'estimated_walking_time', and 'difficulty_level'.",
+            system=TOUR_SYSTEM_PROMPT,
             messages=[
                 {"role": "user", "content": prompt}
             ]
@@ -355,22 +526,305 @@ CONTENT GUIDELINES:
         # Rough estimation: 1 token ≈ 4 characters
         return len(content + title) // 4
     
+    async def translate_text(
+        self,
+        text: str,
+        source_language: str,
+        target_language: str,
+        json_values: bool = False,
+        provider: Optional[LLMProvider] = None
+    ) -> Tuple[str, LLMProvider]:
+        """
+        Translate tour text with the smaller translation model, with caching and fallback.
+        
+        Args:
+            text: Text to translate
+            source_language: Language code of the text
+            target_language: Language code to translate to
+            json_values: ``text`` is a JSON document; only its string values are translated
+            provider: Preferred provider (optional)
+            
+        Returns:
+            Tuple of (translated text, provider used)
+        """
+        provider = provider or self.default_provider
+        if not text.strip():
+            return text, provider
+        
+        cache_key = self._create_translation_cache_key(text, source_language, target_language, json_values)
+        cached = await self.cache.get_json(cache_key)
+        if cached:
+            await self.usage_tracker.record_cache_hit("translation", cached["provider"])
+            return cached["text"], cached["provider"]
+        
+        prompt = self._create_translation_prompt(text, source_language, target_language, json_values)
+        try:
+            translated = await self._generate_with_small_model(prompt, provider, TRANSLATION_SYSTEM_PROMPT)
+        except Exception as e:
+            logger.warning(f"Translation with {provider} failed: {str(e)}")
+            fallback_provider = (
+                LLMProvider.ANTHROPIC if provider == LLMProvider.OPENAI 
+                else LLMProvider.OPENAI
+            )
+            try:
+                translated = await self._generate_with_small_model(prompt, fallback_provider, TRANSLATION_SYSTEM_PROMPT)
+                provider = fallback_provider
+            except Exception as fallback_error:
+                raise ContentGenerationError(
+                    f"Failed to translate with both providers: {str(e)}, {str(fallback_error)}"
+                )
+        
+        await self.cache.set_json(cache_key, {"text": translated, "provider": provider}, ttl=settings.CACHE_TTL_TOUR_CONTENT)
+        await self.usage_tracker.record_api_usage("translation", (len(text) + len(translated)) // 4, provider)
+        return translated, provider
+    
+    async def translate_tour(
+        self,
+        title: str,
+        sections: List[Dict[str, Any]],
+        stops: List[Dict[str, Any]],
+        source_language: str,
+        target_language: str
+    ) -> Dict[str, Any]:
+        """
+        Translate an existing tour, one request per stop section in parallel.
+        
+        Stop names and coordinates are kept; the title and the stop
+        descriptions/highlights are translated together in one extra request.
+        
+        Args:
+            title: Source tour title
+            sections: Narration split by stop (``split_narration_by_stops``)
+            stops: Source walkable stops
+            source_language: Language code of the source tour
+            target_language: Language code to translate to
+            
+        Returns:
+            Dict with ``title``, ``content``, ``sections``, ``walkable_stops`` and ``metadata``
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.TRANSLATION_CONCURRENCY))
+        
+        async def translate(text: str, json_values: bool = False) -> Tuple[str, LLMProvider]:
+            async with semaphore:
+                return await self.translate_text(text, source_language, target_language, json_values=json_values)
+        
+        details = json.dumps({
+            "title": title,
+            "stops": [
+                {"description": stop.get("description", ""), "highlights": stop.get("highlights") or []}
+                for stop in stops
+            ],
+        }, ensure_ascii=False)
+        t0 = time.perf_counter()
+        results = await asyncio.gather(
+            translate(details, json_values=True),
+            *(translate(section["text"]) for section in sections)
+        )
+        (details_text, _), narration = results[0], results[1:]
+        
+        translated_details = self._parse_translated_details(details_text, len(stops))
+        translated_stops = []
+        for stop, stop_details in zip(stops, translated_details["stops"] if translated_details else [{}] * len(stops)):
+            translated_stops.append({
+                **stop,
+                "description": stop_details.get("description") or stop.get("description"),
+                "highlights": stop_details.get("highlights") or stop.get("highlights"),
+            })
+        
+        translated_sections = [
+            {**section, "text": text.strip()}
+            for section, (text, _) in zip(sections, narration)
+        ]
+        providers = [provider for _, provider in results]
+        actual_provider = max(set(providers), key=providers.count)
+        latency_ms = int((time.perf_counter() - t0) * 1000)
+        logger.info(f"Translated {len(sections)} sections {source_language}->{target_language} in {latency_ms} ms")
+        
+        return {
+            "title": (translated_details or {}).get("title") or title,
+            "content": "\n\n".join(section["text"] for section in translated_sections),
+            "sections": translated_sections,
+            "walkable_stops": translated_stops,
+            "metadata": {
+                "actual_provider": actual_provider,
+                "model": self.provider_configs[actual_provider]["translation_model"],
+                "generation_timestamp": datetime.utcnow().isoformat(),
+                "language": target_language,
+                "source_language": source_language,
+                "translated_sections": len(translated_sections),
+                "translation_ms": latency_ms,
+                "fallback_used": any(provider != self.default_provider for provider in providers),
+            },
+        }
+    
+    async def condense_section(
+        self,
+        text: str,
+        target_chars: int,
+        language: str,
+        next_stop: Optional[str] = None,
+        provider: Optional[LLMProvider] = None
+    ) -> Tuple[str, LLMProvider]:
+        """
+        Shorten the narration of one stop for a shorter variant of a tour.
+        
+        Args:
+            text: Narration of the stop
+            target_chars: Approximate length to shorten to
+            language: Language code of the narration
+            next_stop: Name of the stop to walk to next (None: end the tour here)
+            provider: Preferred provider (optional)
+            
+        Returns:
+            Tuple of (condensed narration, provider used)
+        """
+        provider = provider or self.default_provider
+        cache_str = json.dumps({
+            "text": text,
+            "target_chars": target_chars,
+            "language": language,
+            "next_stop": next_stop,
+            "model": self.provider_configs[provider]["translation_model"],
+        }, sort_keys=True)
+        cache_key = f"tour:condensed:{hashlib.md5(cache_str.encode()).hexdigest()}"
+        cached = await self.cache.get_json(cache_key)
+        if cached:
+            await self.usage_tracker.record_cache_hit("tour_content", cached["provider"])
+            return cached["text"], cached["provider"]
+        
+        ending = (
+            f"End by directing the listener to walk to {next_stop}."
+            if next_stop else
+            "This is now the last stop: end by wrapping up the tour."
+        )
+        prompt = (
+            f"Shorten this walking tour narration (language '{language}') to about {target_chars} characters. "
+            f"Keep the language. {ending}\n\n{text}"
+        )
+        try:
+            condensed = await self._generate_with_small_model(prompt, provider, CONDENSE_SYSTEM_PROMPT)
+        except Exception as e:
+            logger.warning(f"Condensing with {provider} failed: {str(e)}")
+            provider = LLMProvider.ANTHROPIC if provider == LLMProvider.OPENAI else LLMProvider.OPENAI
+            condensed = await self._generate_with_small_model(prompt, provider, CONDENSE_SYSTEM_PROMPT)
+        
+        await self.cache.set_json(cache_key, {"text": condensed, "provider": provider}, ttl=settings.CACHE_TTL_TOUR_CONTENT)
+        await self.usage_tracker.record_api_usage("tour_content", (len(text) + len(condensed)) // 4, provider)
+        return condensed, provider
+    
+    async def _generate_with_small_model(self, prompt: str, provider: LLMProvider, system_prompt: str) -> str:
+        """Run a prompt on the provider's smaller, faster model (translation and condensing)"""
+        model = self.provider_configs[provider]["translation_model"]
+        t0 = time.perf_counter()
+        if provider == LLMProvider.OPENAI:
+            response = await self.openai_client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=4000,
+                temperature=0.3,
+            )
+            text = response.choices[0].message.content
+        elif provider == LLMProvider.ANTHROPIC:
+            response = await self.anthropic_client.messages.create(
+                model=model,
+                max_tokens=4000,
+                temperature=0.3,
+                system=system_prompt,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            text = response.content[0].text
+        else:
+            raise AIProviderError(f"Unsupported provider: {provider}")
+        latency_ms = int((time.perf_counter() - t0) * 1000)
+        logger.info(f"LLM small model latency {latency_ms} ms | provider={provider} | model={model}")
+        return text.strip()
+    
+    def _create_translation_prompt(
+        self,
+        text: str,
+        source_language: str,
+        target_language: str,
+        json_values: bool
+    ) -> str:
+        """Prompt for translating narration or a JSON document of short fields"""
+        if json_values:
+            return (
+                f"Translate the string values of this JSON from language '{source_language}' to '{target_language}'. "
+                f"Keep the keys and structure unchanged and return only valid JSON.\n\n{text}"
+            )
+        return (
+            f"Translate this walking tour narration from language '{source_language}' to '{target_language}'. "
+            f"It will be read aloud, so keep walking directions clear.\n\n{text}"
+        )
+    
+    def _parse_translated_details(self, text: str, stop_count: int) -> Optional[Dict[str, Any]]:
+        """Parse the translated title/stops JSON; None if it does not match the source shape"""
+        start = text.find('{')
+        end = text.rfind('}') + 1
+        try:
+            details = json.loads(text[start:end]) if start != -1 and end > start else None
+        except json.JSONDecodeError:
+            details = None
+        if not isinstance(details, dict) or not isinstance(details.get("stops"), list) or len(details["stops"]) != stop_count:
+            logger.warning("Translated tour details did not match the source – keeping original stop details")
+            return None
+        details["stops"] = [stop if isinstance(stop, dict) else {} for stop in details["stops"]]
+        return details
+    
+    def _create_translation_cache_key(
+        self,
+        text: str,
+        source_language: str,
+        target_language: str,
+        json_values: bool
+    ) -> str:
+        """Create deterministic cache key for a translation"""
+        cache_str = json.dumps({
+            "text": text,
+            "source": source_language,
+            "target": target_language,
+            "json": json_values,
+            "models": [config["translation_model"] for config in self.provider_configs.values()],
+        }, sort_keys=True)
+        return f"tour:translation:{hashlib.md5(cache_str.encode()).hexdigest()}"
+    
     async def generate_audio(
         self,
         text: str,
         voice: str = None,
-        speed: float = 1.0
+        speed: float = 1.0,
+        language: str = "en"
     ) -> bytes:
+        """Generate audio as bytes; see ``synthesize_audio``."""
+        audio_data, _ = await self.synthesize_audio(text, voice, speed, language)
+        return audio_data
+    
+    async def synthesize_audio(
+        self,
+        text: str,
+        voice: str = None,
+        speed: float = 1.0,
+        language: str = "en"
+    ) -> Tuple[bytes, Optional[str]]:
         """
-        Generate audio using OpenAI TTS with caching.
+        Generate audio with caching, failing over between TTS providers.
+        
+        Speeds other than TTS_CANONICAL_SPEED are time-stretched from the
+        canonical synthesis when ffmpeg is available, so every speed of the
+        same text costs at most one TTS call.
         
         Args:
             text: Text to convert to speech
-            voice: Voice to use (default from settings)
+            voice: Voice to use (default from settings; mapped per provider)
             speed: Speech speed (0.25-4.0)
+            language: Language of the text; only providers with a voice for it are used
             
         Returns:
-            Audio data as bytes
+            Tuple of (audio data, name of the TTS provider that synthesized it,
+            None if it came from the cache)
         """
         voice = voice or settings.OPENAI_TTS_VOICE
         
@@ -381,52 +835,222 @@ CONTENT GUIDELINES:
         cached_audio_b64 = await self.cache.get(cache_key)
         if cached_audio_b64:
             logger.info("Audio cache hit")
-            await self.usage_tracker.record_cache_hit("audio_generation", LLMProvider.OPENAI)
+            await self.usage_tracker.record_cache_hit("audio_generation", self.tts.primary)
             import base64
-            return base64.b64decode(cached_audio_b64)
+            return base64.b64decode(cached_audio_b64), None
+        
+        if self._can_stretch(speed):
+            stretched = await self._generate_stretched(cache_key, text, voice, speed, language)
+            if stretched:
+                return stretched
         
+        return await self._synthesize_and_store(cache_key, text, voice, speed, language)
+    
+    async def _synthesize_and_store(
+        self, cache_key: str, text: str, voice: str, speed: float, language: str = "en"
+    ) -> Tuple[bytes, str]:
+        """Synthesize text with the provider router and cache the result; returns (audio, provider)."""
         try:
-            import time
             t0 = time.perf_counter()
-            response = await self.openai_client.audio.speech.create(
-                model=settings.OPENAI_TTS_MODEL,
-                voice=voice,
-                input=text,
-                speed=speed
-            )
+            audio_data, provider = await self.tts.synthesize(text, voice, speed, language)
+            
+            latency_ms = int((time.perf_counter() - t0) * 1000)
+            logger.info(f"TTS latency {latency_ms} ms | provider={provider} | voice={voice}")
+            
+            await self._store_audio(cache_key, text, audio_data, provider)
+            return audio_data, provider
+            
+        except TTSProviderError as e:
+            logger.error(f"Audio generation failed: {str(e)}")
+            raise AIServiceError(f"Failed to generate audio: {str(e)}")
+    
+    def _can_stretch(self, speed: float) -> bool:
+        """Whether ``speed`` can be derived from the canonical synthesis instead of synthesized."""
+        canonical = settings.TTS_CANONICAL_SPEED
+        if not settings.AUDIO_TIME_STRETCH_ENABLED or speed == canonical:
+            return False
+        # Beyond a factor of two WSOLA artifacts become audible; synthesize those natively
+        return 0.5 <= speed / canonical <= 2.0 and self.audio_transcoder.available
+    
+    async def _generate_stretched(
+        self, cache_key: str, text: str, voice: str, speed: float, language: str = "en"
+    ) -> Optional[Tuple[bytes, Optional[str]]]:
+        """
+        Derive audio at ``speed`` from the canonical-speed synthesis of the same text.
+        
+        Returns (audio, provider of the canonical synthesis, None if it was
+        cached), or None if the time-stretch fails, so the caller synthesizes
+        natively.
+        """
+        canonical = settings.TTS_CANONICAL_SPEED
+        canonical_key = self._create_audio_cache_key(text, voice, canonical)
+        cached_audio_b64 = await self.cache.get(canonical_key)
+        synthesized_by = None
+        if cached_audio_b64:
+            import base64
+            canonical_audio, provider = base64.b64decode(cached_audio_b64), self.tts.primary
+        else:
+            canonical_audio, provider = await self._synthesize_and_store(canonical_key, text, voice, canonical, language)
+            synthesized_by = provider
+        
+        try:
+            t0 = time.perf_counter()
+            audio_data = await self.audio_transcoder.time_stretch(canonical_audio, speed / canonical)
+        except TranscodeError as e:
+            logger.warning(f"Time-stretch to speed {speed} failed, synthesizing instead: {e}")
+            return None
+        
+        latency_ms = int((time.perf_counter() - t0) * 1000)
+        logger.info(f"Audio stretched {canonical} -> {speed} in {latency_ms} ms | voice={voice}")
+        if provider == self.tts.primary:
+            # Same voice rules as synthesized audio: failover output is not cached
+            import base64
+            await self.cache.set(cache_key, base64.b64encode(audio_data).decode('utf-8'), ttl=86400 * 30)
+        return audio_data, synthesized_by
+    
+    async def generate_audio_streaming(
+        self,
+        text: str,
+        on_chunk: Callable[[bytes], Awaitable[None]],
+        voice: str = None,
+        speed: float = 1.0,
+        language: str = "en"
+    ) -> bytes:
+        """Generate audio as bytes, passing them on as they are received; see ``synthesize_audio_streaming``."""
+        audio_data, _ = await self.synthesize_audio_streaming(text, on_chunk, voice, speed, language)
+        return audio_data
+    
+    async def synthesize_audio_streaming(
+        self,
+        text: str,
+        on_chunk: Callable[[bytes], Awaitable[None]],
+        voice: str = None,
+        speed: float = 1.0,
+        language: str = "en"
+    ) -> Tuple[bytes, Optional[str]]:
+        """
+        Generate audio, passing bytes on as they are received.
+        
+        Args:
+            text: Text to convert to speech
+            on_chunk: Awaited with every chunk of MP3 bytes in order
+            voice: Voice to use (default from settings)
+            speed: Speech speed (0.25-4.0)
+            language: Language of the text
+            
+        Returns:
+            Tuple of (complete audio data, TTS provider or None if cached),
+            cached like ``synthesize_audio``
+        """
+        voice = voice or settings.OPENAI_TTS_VOICE
+        cache_key = self._create_audio_cache_key(text, voice, speed)
+        
+        cached_audio_b64 = await self.cache.get(cache_key)
+        if cached_audio_b64:
+            logger.info("Audio cache hit")
+            await self.usage_tracker.record_cache_hit("audio_generation", self.tts.primary)
+            import base64
+            audio_data = base64.b64decode(cached_audio_b64)
+            await on_chunk(audio_data)
+            return audio_data, None
+        
+        if self._can_stretch(speed):
+            # A stretch needs the whole canonical audio, so there is nothing to stream early
+            stretched = await self._generate_stretched(cache_key, text, voice, speed, language)
+            if stretched:
+                await on_chunk(stretched[0])
+                return stretched
+        
+        try:
+            t0 = time.perf_counter()
+            first_byte = True
+            
+            async def forward(chunk: bytes) -> None:
+                nonlocal first_byte
+                if first_byte:
+                    first_byte = False
+                    ttfb_ms = int((time.perf_counter() - t0) * 1000)
+                    logger.info(f"TTS first byte {ttfb_ms} ms | voice={voice}")
+                await on_chunk(chunk)
+            
+            audio_data, provider = await self.tts.stream(text, voice, speed, forward, language)
             
             latency_ms = int((time.perf_counter() - t0) * 1000)
-            logger.info(f"TTS latency {latency_ms} ms | model={settings.OPENAI_TTS_MODEL} | voice={voice}")
+            logger.info(f"TTS latency {latency_ms} ms | provider={provider} | voice={voice}")
             
-            audio_data = response.content
+            await self._store_audio(cache_key, text, audio_data, provider)
+            return audio_data, provider
             
-            # Cache audio for 30 days (expensive to regenerate)
+        except TTSProviderError as e:
+            logger.error(f"Streaming audio generation failed: {str(e)}")
+            raise AIServiceError(f"Failed to generate audio: {str(e)}")
+    
+    async def _store_audio(self, cache_key: str, text: str, audio_data: bytes, provider: str) -> None:
+        """Cache synthesized audio and record its cost with the provider that produced it."""
+        if provider == self.tts.primary:
+            # Failover audio is not cached: once the primary is back, the same
+            # text is synthesized in the usual voice again
             import base64
             audio_b64 = base64.b64encode(audio_data).decode('utf-8')
             await self.cache.set(
                 cache_key, 
                 audio_b64,
-                ttl=86400 * 30
+                ttl=86400 * 30  # expensive to regenerate
             )
-            
-            # Track usage
-            await self.usage_tracker.record_api_usage(
-                "audio_generation",
-                len(text),
-                LLMProvider.OPENAI,
-                len(text) * 0.015 / 1000  # TTS cost per 1k characters
-            )
-            
-            return audio_data
-            
-        except Exception as e:
-            logger.error(f"Audio generation failed: {str(e)}")
-            raise AIServiceError(f"Failed to generate audio: {str(e)}")
+        
+        await self.usage_tracker.record_api_usage(
+            "audio_generation",
+            len(text),
+            provider,
+            len(text) * self.tts.providers[provider].cost_per_1k_chars / 1000
+        )
+    
+    async def generate_audio_chunked(
+        self,
+        text: str,
+        voice: str = None,
+        speed: float = 1.0,
+        language: str = "en"
+    ) -> bytes:
+        """
+        Generate audio for text longer than the TTS input limit.
+        
+        The text is split into paragraph-aligned segments (see
+        ``split_tts_segments``), each cached under its own hash, so after an
+        edit only new or changed paragraphs are synthesized and the rest of
+        the audio is assembled from cache. Repeated segments are synthesized
+        once. Misses run concurrently (bounded by TTS_MAX_CONCURRENCY) and the
+        MP3 parts are concatenated in order.
+        """
+        segments = split_tts_segments(text)
+        semaphore = asyncio.Semaphore(settings.TTS_MAX_CONCURRENCY)
+        tasks: Dict[str, asyncio.Task] = {}
+        
+        async def synthesize(segment: str) -> bytes:
+            async with semaphore:
+                return await self.generate_audio(text=segment, voice=voice, speed=speed, language=language)
+        
+        for segment in segments:
+            key = segment_hash(segment)
+            if key not in tasks:
+                tasks[key] = asyncio.ensure_future(synthesize(segment))
+        
+        t0 = time.perf_counter()
+        try:
+            parts = await asyncio.gather(*(tasks[segment_hash(segment)] for segment in segments))
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        latency_ms = int((time.perf_counter() - t0) * 1000)
+        logger.info(f"Segmented TTS: {len(segments)} segments ({len(tasks)} unique) for {len(text)} characters in {latency_ms} ms")
+        return b"".join(parts)
     
     def _create_audio_cache_key(self, text: str, voice: str, speed: float) -> str:
         """Create cache key for audio generation"""
         cache_data = {
-            "text_hash": hashlib.md5(text.encode()).hexdigest(),
+            # Whitespace-insensitive, so reflowed narration still hits the cache
+            "text_hash": segment_hash(text),
             "voice": voice,
             "speed": speed,
             "model": settings.OPENAI_TTS_MODEL,
@@ -464,6 +1088,7 @@ CONTENT GUIDELINES:
             except Exception as e:
                 status[provider] = {"available": False, "error": str(e)}
         
+        status["tts"] = self.tts.status()
         return status
     
     async def estimate_generation_cost(
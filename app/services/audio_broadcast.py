@@ -0,0 +1,121 @@
+"""
+Live fan-out of tour audio while it is being synthesized.
+TTS bytes are buffered per segment as they arrive and replayed in segment
+order to every listener, so playback can start before the audio is stored.
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class AudioBroadcast:
+    """
+    In-progress audio of one tour.
+
+    Segments may be synthesized concurrently; listeners always receive them
+    in index order, each segment streamed as soon as its bytes arrive. A
+    listener joining late gets everything from the start of the tour.
+    """
+
+    def __init__(self, tour_id: Any):
+        self.tour_id = tour_id
+        self._segments: Dict[int, List[bytes]] = {}
+        self._finished: set = set()
+        self._total: Optional[int] = None  # known once no more segments will be added
+        self._failed = False
+        self._changed = asyncio.Condition()
+        self.listeners = 0
+
+    @property
+    def failed(self) -> bool:
+        return self._failed
+
+    @property
+    def closed(self) -> bool:
+        return self._failed or self._total is not None
+
+    async def write(self, index: int, data: bytes) -> None:
+        """Append bytes to segment ``index``."""
+        async with self._changed:
+            self._segments.setdefault(index, []).append(data)
+            self._changed.notify_all()
+
+    async def finish_segment(self, index: int) -> None:
+        """Mark segment ``index`` as complete."""
+        async with self._changed:
+            self._segments.setdefault(index, [])
+            self._finished.add(index)
+            self._changed.notify_all()
+
+    async def complete(self, total: int) -> None:
+        """Declare that the tour has exactly ``total`` segments."""
+        async with self._changed:
+            self._total = total
+            self._changed.notify_all()
+
+    async def fail(self) -> None:
+        """End the broadcast early; listeners stop after what they have received."""
+        async with self._changed:
+            self._failed = True
+            self._changed.notify_all()
+
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        """Yield the tour audio from the beginning, waiting for bytes that are still being synthesized."""
+        self.listeners += 1
+        try:
+            index, position = 0, 0
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: self._has_progress(index, position))
+                    if self._failed or (self._total is not None and index >= self._total):
+                        return
+                    parts = self._segments.get(index, [])
+                    pending = parts[position:]
+                    segment_done = index in self._finished and position + len(pending) == len(parts)
+
+                for data in pending:
+                    yield data
+                position += len(pending)
+                if segment_done:
+                    index, position = index + 1, 0
+        finally:
+            self.listeners -= 1
+
+    def _has_progress(self, index: int, position: int) -> bool:
+        if self._failed or (self._total is not None and index >= self._total):
+            return True
+        return len(self._segments.get(index, [])) > position or index in self._finished
+
+class AudioBroadcaster:
+    """Registry of live broadcasts, one per tour being synthesized in this process."""
+
+    def __init__(self):
+        self._broadcasts: Dict[str, AudioBroadcast] = {}
+
+    def open(self, tour_id: Any) -> AudioBroadcast:
+        """Start a broadcast for a tour, replacing any previous one."""
+        broadcast = AudioBroadcast(tour_id)
+        self._broadcasts[str(tour_id)] = broadcast
+        return broadcast
+
+    def get(self, tour_id: Any) -> Optional[AudioBroadcast]:
+        """Live broadcast of a tour, or None if its audio is not being synthesized here."""
+        broadcast = self._broadcasts.get(str(tour_id))
+        if broadcast and broadcast.failed:
+            return None
+        return broadcast
+
+    async def release(self, tour_id: Any) -> None:
+        """
+        Unregister a tour once its audio is stored (or generation failed).
+
+        Listeners that are already attached keep streaming the buffered bytes.
+        """
+        broadcast = self._broadcasts.pop(str(tour_id), None)
+        if broadcast and not broadcast.closed:
+            await broadcast.fail()
+
+# Global audio broadcaster instance
+audio_broadcaster = AudioBroadcaster()
@@ -0,0 +1,290 @@
+"""
+Pipelined text-to-speech for tour narration.
+Synthesizes narration chunks while the LLM is still writing, so the first
+audio segment is playable long before the full tour has been generated.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from .ai_service import ai_service
+from .audio_broadcast import audio_broadcaster
+from .audio_storage import audio_storage
+from app.config import settings
+from app.utils.mp3 import mp3_duration
+from app.utils.stop_sections import locate_stop_sections, section_at
+from app.utils.tour_variants import segment_texts
+from app.utils.tts_text import SentenceChunker, segment_hash, split_tts_segments
+
+logger = logging.getLogger(__name__)
+
+class TTSPipeline:
+    """
+    Feeds streamed narration to a pool of TTS workers.
+
+    Narration is grouped into sentence-complete chunks; each chunk is
+    synthesized as soon as it is complete (bounded by TTS_MAX_CONCURRENCY)
+    and stored as an ordered segment. ``finish`` returns the concatenated
+    audio once every segment is done.
+
+    Segments can also be submitted directly (one or more per walkable stop)
+    when the narration is already complete, or copied from another tour's
+    stored segments when their text is unchanged.
+
+    With TTS_STREAM_PASSTHROUGH the TTS response is read as a stream and
+    fanned out to listeners of the tour's live broadcast as it arrives.
+
+    Every finished segment is stored with the manifest right away, so it
+    doubles as a checkpoint: a pipeline given the manifest of an earlier,
+    interrupted run (``checkpoint``) takes segments whose text, voice and
+    speed are unchanged from storage and only synthesizes the missing ones.
+    Failed segments are retried individually with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        tour_id: uuid.UUID,
+        voice: str,
+        speed: float = 1.0,
+        checkpoint: Optional[Dict[str, Any]] = None,
+        language: str = "en"
+    ):
+        self.tour_id = tour_id
+        self.voice = voice
+        self.speed = speed
+        self.language = language
+        self.ai_service = ai_service
+        self.storage = audio_storage
+        self.chunker = SentenceChunker(
+            first_min_chars=settings.TTS_PIPELINE_FIRST_CHUNK_CHARS,
+            min_chars=settings.TTS_PIPELINE_MIN_CHUNK_CHARS,
+        )
+        self.chunks: List[str] = []
+        self.manifest: Dict[str, Any] = {"segments": [], "complete": False, "voice": voice, "speed": speed}
+        self.first_audio_ms: Optional[int] = None
+        self.retries = 0
+        self.resumed = 0  # segments taken from the checkpoint
+        self.providers: Dict[str, int] = {}  # synthesized segments per TTS provider ("cache" for cache hits)
+        self._checkpoint = self._checkpoint_segments(checkpoint)
+        self._streamed: set = set()  # segments listeners have received bytes of
+        self._semaphore = asyncio.Semaphore(settings.TTS_MAX_CONCURRENCY)
+        self._tasks: List[asyncio.Task] = []
+        self._t0 = time.perf_counter()
+        self.broadcast = audio_broadcaster.open(tour_id) if settings.TTS_STREAM_PASSTHROUGH else None
+
+    async def feed(self, narration: str) -> None:
+        """Add streamed narration; complete chunks are sent to the TTS workers."""
+        for chunk in self.chunker.feed(narration):
+            self.submit(chunk)
+
+    def submit_sections(self, sections: List[Dict[str, Any]]) -> None:
+        """
+        Submit narration split by stop; a section becomes one segment per
+        paragraph, so unchanged paragraphs hit the TTS cache on regeneration.
+        """
+        for section in sections:
+            for chunk in split_tts_segments(section["text"]):
+                self.submit(chunk, stop_index=section["stop_index"], title=section["title"])
+
+    def submit(self, text: str, stop_index: Optional[int] = None, title: Optional[str] = None) -> None:
+        """Queue a narration chunk for synthesis as the next segment."""
+        index = self._add_segment(text, stop_index, title)
+        self._tasks.append(asyncio.create_task(self._synthesize(index, text)))
+
+    def submit_reused(
+        self,
+        text: str,
+        source_tour_id: Any,
+        source_index: int,
+        stop_index: Optional[int] = None,
+        title: Optional[str] = None
+    ) -> None:
+        """Queue a segment whose audio is copied from a segment of another tour (synthesized if that is gone)."""
+        index = self._add_segment(text, stop_index, title)
+        self.manifest["segments"][index]["source"] = {"tour_id": str(source_tour_id), "index": source_index}
+        self._tasks.append(asyncio.create_task(self._copy_segment(index, text, source_tour_id, source_index)))
+
+    def resubmit(self, content: str, segments: List[Dict[str, Any]]) -> bool:
+        """
+        Submit the same chunks as an earlier run of this tour, so each of them
+        can be resumed from its checkpoint.
+
+        Returns:
+            False (nothing submitted) if the content no longer matches the
+            recorded segments
+        """
+        texts = segment_texts(content, segments)
+        if not texts or any(
+            not text or ("hash" in segment and segment["hash"] != segment_hash(text))
+            for text, segment in zip(texts, segments)
+        ):
+            return False
+        for text, segment in zip(texts, segments):
+            self.submit(text, stop_index=segment.get("stop_index"), title=segment.get("title"))
+        return True
+
+    def _add_segment(self, text: str, stop_index: Optional[int], title: Optional[str]) -> int:
+        index = len(self.chunks)
+        self.chunks.append(text)
+        self.manifest["segments"].append({
+            "index": index,
+            "chars": len(text),
+            "hash": segment_hash(text),
+            "stop_index": stop_index,
+            "title": title,
+            "bytes": None,
+            "duration": None,
+            "ready": False,
+        })
+        return index
+
+    def assign_stops(self, content: str, stops: List[Dict[str, Any]]) -> None:
+        """
+        Label streamed segments with the walkable stop they start in.
+
+        Streamed chunks are cut before the stops are known, so a chunk may
+        straddle a stop boundary; it is attributed to the stop it starts in.
+        """
+        sections = locate_stop_sections(content, stops)
+        position = 0
+        for segment, chunk in zip(self.manifest["segments"], self.chunks):
+            found = content.find(chunk[:80], position)
+            if found != -1:
+                position = found
+            section = section_at(sections, position)
+            segment["stop_index"] = section["stop_index"]
+            segment["title"] = section["title"]
+
+    async def finish(self) -> bytes:
+        """Flush the remaining narration and wait for all segments in order."""
+        for chunk in self.chunker.flush():
+            self.submit(chunk)
+
+        try:
+            parts = await asyncio.gather(*self._tasks)
+        except BaseException:
+            self.cancel()
+            raise
+
+        if self.broadcast:
+            await self.broadcast.complete(len(parts))
+        self.manifest["complete"] = True
+        await self.storage.put_manifest(self.tour_id, self.manifest)
+        return b"".join(parts)
+
+    @property
+    def provider(self) -> Optional[str]:
+        """TTS provider that synthesized most segments; None if none had to be synthesized."""
+        synthesized = {name: count for name, count in self.providers.items() if name != "cache"}
+        return max(synthesized, key=synthesized.get) if synthesized else None
+
+    def cancel(self) -> None:
+        """Cancel outstanding synthesis, e.g. when falling back to standard generation."""
+        for task in self._tasks:
+            task.cancel()
+        if self.broadcast:
+            # Cut listeners off; nothing more will be written to this broadcast
+            asyncio.ensure_future(self.broadcast.fail())
+
+    async def _synthesize(self, index: int, text: str) -> bytes:
+        audio_data = await self._resume_segment(index, text)
+        if audio_data:
+            if self.broadcast:
+                await self.broadcast.write(index, audio_data)
+                await self.broadcast.finish_segment(index)
+            return await self._store_segment(index, audio_data, stored=True)
+
+        async with self._semaphore:
+            attempt = 0
+            while True:
+                try:
+                    audio_data = await self._synthesize_once(index, text)
+                    break
+                except Exception as e:
+                    attempt += 1
+                    if attempt > settings.TTS_CHUNK_RETRIES:
+                        raise
+                    if index in self._streamed and not self.broadcast.failed:
+                        # Listeners already got part of this segment; cut them off,
+                        # they get the stored audio once the tour is ready
+                        await self.broadcast.fail()
+                    delay = settings.TTS_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+                    self.retries += 1
+                    logger.warning(f"TTS segment {index} of tour {self.tour_id} failed ({e}) – retry {attempt} in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+        return await self._store_segment(index, audio_data)
+
+    async def _synthesize_once(self, index: int, text: str) -> bytes:
+        if self.broadcast and not self.broadcast.failed:
+            audio_data, provider = await self.ai_service.synthesize_audio_streaming(
+                text=text,
+                on_chunk=lambda chunk: self._on_audio_chunk(index, chunk),
+                voice=self.voice,
+                speed=self.speed,
+                language=self.language,
+            )
+            await self.broadcast.finish_segment(index)
+        else:
+            audio_data, provider = await self.ai_service.synthesize_audio(
+                text=text, voice=self.voice, speed=self.speed, language=self.language
+            )
+        provider = provider or "cache"
+        self.providers[provider] = self.providers.get(provider, 0) + 1
+        return audio_data
+
+    def _checkpoint_segments(self, checkpoint: Optional[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        if not checkpoint or checkpoint.get("voice", self.voice) != self.voice or checkpoint.get("speed", self.speed) != self.speed:
+            return {}
+        return {
+            segment["index"]: segment
+            for segment in checkpoint.get("segments", [])
+            if segment.get("ready") and segment.get("hash")
+        }
+
+    async def _resume_segment(self, index: int, text: str) -> Optional[bytes]:
+        """Stored audio of segment ``index`` from the checkpoint, if its text is unchanged."""
+        segment = self._checkpoint.get(index)
+        if not segment or segment["hash"] != segment_hash(text):
+            return None
+        audio_data = await self.storage.get_segment(self.tour_id, index)
+        if not audio_data or len(audio_data) != segment.get("bytes"):
+            return None
+        self.resumed += 1
+        return audio_data
+
+    async def _copy_segment(self, index: int, text: str, source_tour_id: Any, source_index: int) -> bytes:
+        audio_data = await self.storage.get_segment(source_tour_id, source_index)
+        if not audio_data:
+            logger.info(f"Segment {source_index} of tour {source_tour_id} is gone – synthesizing segment {index}")
+            self.manifest["segments"][index].pop("source", None)
+            return await self._synthesize(index, text)
+        if self.broadcast:
+            await self.broadcast.write(index, audio_data)
+            await self.broadcast.finish_segment(index)
+        return await self._store_segment(index, audio_data)
+
+    async def _store_segment(self, index: int, audio_data: bytes, stored: bool = False) -> bytes:
+        if not stored:
+            await self.storage.put_segment(self.tour_id, index, audio_data)
+        self.manifest["segments"][index].update(
+            bytes=len(audio_data),
+            duration=round(mp3_duration(audio_data), 3),
+            ready=True,
+        )
+        if index == 0:
+            ready_ms = int((time.perf_counter() - self._t0) * 1000)
+            self.first_audio_ms = self.first_audio_ms or ready_ms
+            logger.info(f"🔊 First audio segment ready for tour {self.tour_id} after {ready_ms}ms")
+        await self.storage.put_manifest(self.tour_id, self.manifest)
+        return audio_data
+
+    async def _on_audio_chunk(self, index: int, chunk: bytes) -> None:
+        if index == 0 and self.first_audio_ms is None:
+            # Listeners can start playing now, long before the segment is stored
+            self.first_audio_ms = int((time.perf_counter() - self._t0) * 1000)
+            logger.info(f"🔊 First audio bytes streamed for tour {self.tour_id} after {self.first_audio_ms}ms")
+        self._streamed.add(index)
+        await self.broadcast.write(index, chunk)
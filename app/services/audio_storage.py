@@ -0,0 +1,235 @@
+"""
+Audio storage for tour narration.
+Keeps the full tour MP3 and its ordered segments in the cache (base64 encoded)
+together with a manifest describing the segments and a seek index per MP3.
+"""
+
+import asyncio
+import base64
+import logging
+import math
+from typing import Any, Callable, Dict, List, Optional
+
+from app.utils.mp3 import build_seek_index, looks_like_mp3, rebuild_vbr_header
+from .cache_service import cache_service
+
+logger = logging.getLogger(__name__)
+
+class AudioStorage:
+    """
+    Storage layout for tour audio.
+
+    Keys:
+    - ``audio:tour:{id}``: complete tour MP3
+    - ``audio:tour:{id}:seg:{n}``: segment ``n`` of the tour audio
+    - ``audio:tour:{id}:segments``: manifest of the segments
+    - ``audio:tour:{id}:variant:{name}``: transcoded variant of the tour audio
+    - ``audio:tour:{id}:variants``: names of the stored variants
+    - ``{audio key}:seek``: time -> byte offset index of a stored MP3
+
+    MP3s are stored with a single rebuilt Xing header (see
+    ``rebuild_vbr_header``) so players compute duration and seek positions
+    from the whole file rather than from its first TTS chunk.
+
+    Each manifest segment records its ``index``, ``chars``, text ``hash``, ``bytes``,
+    ``duration`` (seconds), ``ready`` flag and the walkable stop it belongs to
+    (``stop_index``/``title``; ``stop_index`` is None for the introduction).
+    """
+
+    def __init__(self):
+        self.cache = cache_service
+        self.ttl = 86400 * 30  # audio is expensive to regenerate
+
+    def tour_key(self, tour_id: Any) -> str:
+        return f"audio:tour:{tour_id}"
+
+    def segment_key(self, tour_id: Any, index: int) -> str:
+        return f"audio:tour:{tour_id}:seg:{index}"
+
+    def manifest_key(self, tour_id: Any) -> str:
+        return f"audio:tour:{tour_id}:segments"
+
+    def variant_key(self, tour_id: Any, name: str) -> str:
+        return f"audio:tour:{tour_id}:variant:{name}"
+
+    def variants_key(self, tour_id: Any) -> str:
+        return f"audio:tour:{tour_id}:variants"
+
+    def seek_index_key(self, audio_key: str) -> str:
+        return f"{audio_key}:seek"
+
+    def audio_key(self, tour_id: Any, variant: Optional[str] = None) -> str:
+        """Key of the tour audio, or of one of its variants."""
+        return self.variant_key(tour_id, variant) if variant else self.tour_key(tour_id)
+
+    async def get_tour_audio(self, tour_id: Any) -> Optional[bytes]:
+        """Get the complete tour audio, or None if it is not stored."""
+        return await self._get_bytes(self.tour_key(tour_id))
+
+    async def put_tour_audio(self, tour_id: Any, audio_data: bytes) -> bytes:
+        """Store the complete tour audio; returns the bytes as stored."""
+        return await self._put_audio(self.tour_key(tour_id), audio_data)
+
+    async def get_segment(self, tour_id: Any, index: int) -> Optional[bytes]:
+        """Get a single audio segment."""
+        return await self._get_bytes(self.segment_key(tour_id, index))
+
+    async def put_segment(self, tour_id: Any, index: int, audio_data: bytes) -> None:
+        """Store a single audio segment."""
+        await self._set_bytes(self.segment_key(tour_id, index), audio_data)
+
+    async def get_manifest(self, tour_id: Any) -> Optional[Dict[str, Any]]:
+        """Get the segment manifest of a tour."""
+        return await self.cache.get_json(self.manifest_key(tour_id))
+
+    async def put_manifest(self, tour_id: Any, manifest: Dict[str, Any]) -> None:
+        """Store the segment manifest of a tour."""
+        await self.cache.set_json(self.manifest_key(tour_id), manifest, ttl=self.ttl)
+
+    async def get_variant(self, tour_id: Any, name: str) -> Optional[bytes]:
+        """Get a transcoded variant of the tour audio."""
+        return await self._get_bytes(self.variant_key(tour_id, name))
+
+    async def put_variant(self, tour_id: Any, name: str, audio_data: bytes) -> bytes:
+        """Store a transcoded variant of the tour audio; returns the bytes as stored."""
+        audio_data = await self._put_audio(self.variant_key(tour_id, name), audio_data)
+        index = await self.cache.get_json(self.variants_key(tour_id)) or {"names": []}
+        if name not in index["names"]:
+            index["names"].append(name)
+            await self.cache.set_json(self.variants_key(tour_id), index, ttl=self.ttl)
+        return audio_data
+
+    async def variant_names(self, tour_id: Any) -> List[str]:
+        """Names of the stored variants of the tour audio."""
+        index = await self.cache.get_json(self.variants_key(tour_id)) or {}
+        return list(index.get("names", []))
+
+    async def delete_variant(self, tour_id: Any, name: str) -> None:
+        """Delete one variant of the tour audio with its seek index."""
+        await self.cache.delete(self.variant_key(tour_id, name))
+        await self.cache.delete(self.seek_index_key(self.variant_key(tour_id, name)))
+        index = await self.cache.get_json(self.variants_key(tour_id)) or {"names": []}
+        if name in index["names"]:
+            index["names"].remove(name)
+            await self.cache.set_json(self.variants_key(tour_id), index, ttl=self.ttl)
+
+    async def get_seek_index(
+        self,
+        tour_id: Any,
+        variant: Optional[str] = None,
+        audio_data: Optional[bytes] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Seek index of the tour audio or a variant.
+
+        Audio stored before indexes existed gets one built from ``audio_data``
+        (the stored bytes) on first use.
+        """
+        key = self.seek_index_key(self.audio_key(tour_id, variant))
+        index = await self.cache.get_json(key)
+        if index is None and audio_data and looks_like_mp3(audio_data):
+            index = await asyncio.to_thread(build_seek_index, audio_data)
+            await self.cache.set_json(key, index, ttl=self.ttl)
+        return index
+
+    async def delete_tour_audio(self, tour_id: Any) -> None:
+        """Delete the tour audio together with all of its segments and variants."""
+        manifest = await self.get_manifest(tour_id) or {}
+        for segment in manifest.get("segments", []):
+            await self.cache.delete(self.segment_key(tour_id, segment["index"]))
+        await self.cache.delete(self.manifest_key(tour_id))
+        variants = await self.cache.get_json(self.variants_key(tour_id)) or {}
+        for name in variants.get("names", []):
+            await self.cache.delete(self.variant_key(tour_id, name))
+            await self.cache.delete(self.seek_index_key(self.variant_key(tour_id, name)))
+        await self.cache.delete(self.variants_key(tour_id))
+        await self.cache.delete(self.seek_index_key(self.tour_key(tour_id)))
+        await self.cache.delete(self.tour_key(tour_id))
+
+    @staticmethod
+    def ready_prefix(manifest: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Segments that are ready and contiguous from the start – safe to play in order."""
+        prefix = []
+        for segment in sorted(manifest.get("segments", []), key=lambda s: s["index"]):
+            if not segment.get("ready"):
+                break
+            prefix.append(segment)
+        return prefix
+
+    @staticmethod
+    def stop_markers(segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        First segment and start time of every stop in a list of ordered segments.
+
+        ``start_time`` is None when an earlier segment has no known duration yet.
+        """
+        markers = []
+        elapsed: Optional[float] = 0.0
+        previous = object()
+        for segment in segments:
+            stop_index = segment.get("stop_index")
+            if stop_index != previous:
+                markers.append({
+                    "stop_index": stop_index,
+                    "title": segment.get("title"),
+                    "first_segment": segment["index"],
+                    "start_time": round(elapsed, 3) if elapsed is not None else None,
+                })
+                previous = stop_index
+            duration = segment.get("duration")
+            elapsed = elapsed + duration if elapsed is not None and duration is not None else None
+        return markers
+
+    @staticmethod
+    def build_playlist(
+        segments: List[Dict[str, Any]],
+        complete: bool,
+        segment_url: Callable[[Dict[str, Any]], str]
+    ) -> str:
+        """
+        Build an HLS media playlist (m3u8) for ordered MP3 segments.
+
+        Incomplete tours get an EVENT playlist without ``#EXT-X-ENDLIST`` so
+        players keep polling for segments that are still being synthesized.
+        """
+        durations = [segment.get("duration") or 0.0 for segment in segments]
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{max([1] + [math.ceil(d) for d in durations])}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            f"#EXT-X-PLAYLIST-TYPE:{'VOD' if complete else 'EVENT'}",
+        ]
+        for segment, duration in zip(segments, durations):
+            title = " ".join((segment.get("title") or "").split())
+            lines.append(f"#EXTINF:{duration:.3f},{title}")
+            lines.append(segment_url(segment))
+        if complete:
+            lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    async def _put_audio(self, key: str, audio_data: bytes) -> bytes:
+        """Store a full audio file; MP3s get a rebuilt Xing header and a seek index."""
+        if looks_like_mp3(audio_data):
+            audio_data = await asyncio.to_thread(rebuild_vbr_header, audio_data)
+            index = await asyncio.to_thread(build_seek_index, audio_data)
+            await self.cache.set_json(self.seek_index_key(key), index, ttl=self.ttl)
+        await self._set_bytes(key, audio_data)
+        return audio_data
+
+    async def _get_bytes(self, key: str) -> Optional[bytes]:
+        audio_b64 = await self.cache.get(key)
+        if not audio_b64:
+            return None
+        try:
+            return base64.b64decode(audio_b64)
+        except Exception as e:
+            logger.error(f"Failed to decode audio stored under {key}: {e}")
+            return None
+
+    async def _set_bytes(self, key: str, audio_data: bytes) -> None:
+        audio_b64 = base64.b64encode(audio_data).decode('utf-8')
+        await self.cache.set(key, audio_b64, ttl=self.ttl)
+
+# Global audio storage instance
+audio_storage = AudioStorage()
@@ -0,0 +1,283 @@
+"""
+Audio transcoding for mobile playback.
+Encodes the original TTS MP3 into compact speech-optimized variants with a
+local ffmpeg binary and caches them next to the original audio. Alternate
+playback speeds are derived the same way with a pitch-preserving time-stretch,
+so a speed change never costs another TTS call.
+"""
+
+import asyncio
+import logging
+import shutil
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .audio_storage import audio_storage
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+ORIGINAL = "original"
+
+class AudioVariant(NamedTuple):
+    """A rung of the bitrate ladder."""
+    name: str
+    media_type: str
+    ffmpeg_args: Tuple[str, ...]
+
+# Speech needs far less than the TTS output bitrate: mono, low sample rate.
+VARIANTS: Dict[str, AudioVariant] = {
+    "opus": AudioVariant(
+        name="opus",
+        media_type="audio/ogg",
+        ffmpeg_args=(
+            "-ac", "1", "-c:a", "libopus", "-b:a", settings.AUDIO_OPUS_BITRATE,
+            "-application", "voip", "-f", "ogg",
+        ),
+    ),
+    "mp3-low": AudioVariant(
+        name="mp3-low",
+        media_type="audio/mpeg",
+        ffmpeg_args=(
+            "-ac", "1", "-ar", "22050", "-c:a", "libmp3lame", "-b:a", settings.AUDIO_MP3_LOW_BITRATE,
+            "-f", "mp3",
+        ),
+    ),
+}
+
+# Media types accepted in ``Accept`` that select a variant
+_ACCEPT_VARIANTS = {
+    "audio/ogg": "opus",
+    "audio/opus": "opus",
+}
+
+# atempo handles 0.5-2.0 per filter instance; larger factors are chained
+_ATEMPO_MIN = 0.5
+_ATEMPO_MAX = 2.0
+
+# Time-stretched narration is re-encoded as speech MP3 so seek indexes keep working
+_STRETCH_ARGS = ("-ac", "1", "-c:a", "libmp3lame", "-b:a", "64k", "-f", "mp3")
+SPEED_VARIANT_PREFIX = "speed-"
+
+class TranscodeError(Exception):
+    """Raised when the local encoder fails."""
+    pass
+
+def parse_accept(accept: Optional[str]) -> List[Tuple[str, float]]:
+    """Parse an ``Accept`` header into ``(media_type, q)`` pairs, best first."""
+    entries = []
+    for position, part in enumerate((accept or "").split(",")):
+        params = [p.strip() for p in part.split(";")]
+        media_type = params[0].lower()
+        if not media_type:
+            continue
+        q = 1.0
+        for param in params[1:]:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        entries.append((position, media_type, q))
+    entries.sort(key=lambda e: (-e[2], e[0]))
+    return [(media_type, q) for _, media_type, q in entries]
+
+def negotiate_variant(requested: Optional[str], accept: Optional[str]) -> str:
+    """
+    Choose the audio variant to serve.
+
+    An explicit ``format`` query parameter wins; otherwise Opus is served to
+    clients that list an Ogg/Opus media type in ``Accept`` and everyone else
+    gets ``AUDIO_DEFAULT_VARIANT``.
+    """
+    if requested:
+        requested = requested.lower()
+        if requested == ORIGINAL or requested in VARIANTS:
+            return requested
+    for media_type, q in parse_accept(accept):
+        if q <= 0:
+            continue
+        if media_type in _ACCEPT_VARIANTS:
+            return _ACCEPT_VARIANTS[media_type]
+        if media_type == "audio/mpeg":
+            break  # explicitly prefers MP3 over Opus
+    default = settings.AUDIO_DEFAULT_VARIANT
+    return default if default in VARIANTS else ORIGINAL
+
+def normalize_speed(speed: float) -> float:
+    """Round a playback speed to the 0.05 steps variants are stored at."""
+    return round(round(speed * 20) / 20, 2)
+
+def speed_variant_name(speed: float) -> str:
+    """Variant name of the tour audio time-stretched to ``speed``, e.g. ``speed-1.5``."""
+    return f"{SPEED_VARIANT_PREFIX}{normalize_speed(speed):g}"
+
+def atempo_filter(factor: float) -> str:
+    """
+    ffmpeg filter chain that changes the tempo by ``factor`` without changing pitch.
+
+    ``atempo`` (WSOLA) only accepts 0.5-2.0, so other factors are split into a
+    chain of stages whose product is ``factor``.
+    """
+    if factor <= 0:
+        raise ValueError(f"Invalid tempo factor {factor}")
+    stages = []
+    while factor > _ATEMPO_MAX:
+        stages.append(_ATEMPO_MAX)
+        factor /= _ATEMPO_MAX
+    while factor < _ATEMPO_MIN:
+        stages.append(_ATEMPO_MIN)
+        factor /= _ATEMPO_MIN
+    stages.append(factor)
+    return ",".join(f"atempo={stage:.6g}" for stage in stages)
+
+class AudioTranscoder:
+    """
+    Produces and caches the bitrate ladder of a tour.
+
+    Variants are encoded once per tour (after generation, or lazily on first
+    request for older tours) and stored under ``audio:tour:{id}:variant:{name}``.
+    Speed variants (``speed-1.5``) are stretched from the original on first
+    request and stored the same way.
+    """
+
+    def __init__(self):
+        self.storage = audio_storage
+        self.ffmpeg = settings.FFMPEG_PATH
+        self.timeout = 120  # seconds per encode
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.AUDIO_TRANSCODE_CONCURRENCY)
+        return self._semaphore
+
+    @property
+    def available(self) -> bool:
+        """Whether transcoding is enabled and the encoder binary can be found."""
+        return settings.AUDIO_TRANSCODE_ENABLED and shutil.which(self.ffmpeg) is not None
+
+    async def transcode(self, audio_data: bytes, variant: AudioVariant) -> bytes:
+        """Encode MP3 bytes into ``variant`` using ffmpeg over pipes."""
+        return await self._run_ffmpeg(audio_data, list(variant.ffmpeg_args), variant.name)
+
+    async def time_stretch(self, audio_data: bytes, factor: float) -> bytes:
+        """
+        Change the tempo of MP3 bytes by ``factor`` keeping the pitch (1.5 = 50% faster).
+
+        Runs in an ffmpeg process like every other encode, so the event loop
+        only waits on pipes.
+        """
+        args = ["-filter:a", atempo_filter(factor)] + list(_STRETCH_ARGS)
+        return await self._run_ffmpeg(audio_data, args, f"x{factor:.3g} stretch")
+
+    async def _run_ffmpeg(self, audio_data: bytes, output_args: List[str], label: str) -> bytes:
+        args = [self.ffmpeg, "-hide_banner", "-loglevel", "error", "-i", "pipe:0", "-vn", "-map_metadata", "-1"]
+        args += output_args + ["pipe:1"]
+
+        async with self.semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(audio_data), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise TranscodeError(f"{label} encode timed out after {self.timeout}s")
+
+        if process.returncode != 0 or not stdout:
+            raise TranscodeError(f"{label} encode failed: {stderr.decode(errors='replace').strip()[:500]}")
+        return stdout
+
+    async def get_or_create(self, tour_id: Any, name: str) -> Optional[bytes]:
+        """
+        Get a cached variant, encoding it from the original audio if needed.
+
+        Returns None when the original audio is missing or encoding is not possible.
+        """
+        cached = await self.storage.get_variant(tour_id, name)
+        if cached:
+            return cached
+        if name not in VARIANTS or not self.available:
+            return None
+        return await self._shared_encode(tour_id, name, lambda: self._encode_and_store(tour_id, VARIANTS[name]))
+
+    async def get_or_create_speed(self, tour_id: Any, speed: float) -> Optional[bytes]:
+        """
+        Get the tour audio at ``speed`` times its narrated pace, stretching it if needed.
+
+        Returns None when the original audio is missing or stretching is not possible.
+        """
+        name = speed_variant_name(speed)
+        cached = await self.storage.get_variant(tour_id, name)
+        if cached:
+            return cached
+        if not self.available:
+            return None
+        return await self._shared_encode(tour_id, name, lambda: self._stretch_and_store(tour_id, normalize_speed(speed)))
+
+    async def _shared_encode(self, tour_id: Any, name: str, encode: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        # Concurrent first plays share one encode
+        key = (str(tour_id), name)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(encode())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        try:
+            return await asyncio.shield(task)
+        except TranscodeError as e:
+            logger.error(f"Transcoding tour {tour_id} to {name} failed: {e}")
+            return None
+
+    async def create_variants(self, tour_id: Any, audio_data: bytes) -> Dict[str, int]:
+        """
+        Encode and store every variant; returns the encoded size per variant.
+
+        Speed variants of earlier audio are dropped and re-stretched on request.
+        """
+        sizes: Dict[str, int] = {}
+        if not self.available:
+            logger.info("Audio transcoding disabled or ffmpeg not found – serving original audio only")
+            return sizes
+        for name in await self.storage.variant_names(tour_id):
+            if name.startswith(SPEED_VARIANT_PREFIX):
+                await self.storage.delete_variant(tour_id, name)
+        for variant in VARIANTS.values():
+            try:
+                encoded = await self.transcode(audio_data, variant)
+            except TranscodeError as e:
+                logger.error(f"Transcoding tour {tour_id} to {variant.name} failed: {e}")
+                continue
+            await self.storage.put_variant(tour_id, variant.name, encoded)
+            sizes[variant.name] = len(encoded)
+        return sizes
+
+    async def _encode_and_store(self, tour_id: Any, variant: AudioVariant) -> Optional[bytes]:
+        original = await self.storage.get_tour_audio(tour_id)
+        if not original:
+            return None
+        encoded = await self.transcode(original, variant)
+        # Serve what was stored: MP3 variants get their Xing header rebuilt on the way in
+        stored = await self.storage.put_variant(tour_id, variant.name, encoded)
+        logger.info(f"🗜️ Encoded {variant.name} for tour {tour_id}: {len(original)} -> {len(encoded)} bytes")
+        return stored
+
+    async def _stretch_and_store(self, tour_id: Any, speed: float) -> Optional[bytes]:
+        original = await self.storage.get_tour_audio(tour_id)
+        if not original:
+            return None
+        stretched = await self.time_stretch(original, speed)
+        stored = await self.storage.put_variant(tour_id, speed_variant_name(speed), stretched)
+        logger.info(f"⏩ Stretched tour {tour_id} to x{speed:g}: {len(original)} -> {len(stretched)} bytes")
+        return stored
+
+# Global audio transcoder instance
+audio_transcoder = AudioTranscoder()
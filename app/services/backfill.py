@@ -0,0 +1,357 @@
+"""
+Backfill framework for recomputing derived tour data in bulk.
+Streams tours in keyset-paginated batches, runs the CPU-bound work in a
+process pool and writes results back with bulk UPDATEs, checkpointing after
+every batch so an interrupted run can resume where it stopped.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.sql import Select
+
+from app.config import settings
+from app.models.location import Location
+from app.models.tour import Tour
+from app.utils.geo import format_distance, format_walking_time, route_distance_m
+from app.utils.mp3 import mp3_duration
+from app.utils.tour_variants import segment_texts
+from app.utils.transcript_generator import TranscriptGenerator
+from .audio_storage import audio_storage
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Worker functions. They run in child processes, so they must be top-level
+# and only receive plain, picklable rows.
+# ---------------------------------------------------------------------------
+
+def _chunks_from_manifest(content: str, segments: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+    """``(text, duration)`` of every TTS chunk of the stored audio."""
+    return [(text, segment["duration"]) for text, segment in zip(segment_texts(content, segments), segments)]
+
+def compute_transcript(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Re-time the transcript against the stored audio (MP3 frame parsing and segmentation)."""
+    content = row.get("content")
+    if not content:
+        return None
+
+    segments = row.get("audio_segments")
+    if segments:
+        audio_chunks = _chunks_from_manifest(content, segments)
+        method = "mp3_frames"
+    elif row.get("audio"):
+        audio_chunks = [(content, mp3_duration(row["audio"]))]
+        method = "mp3_frames"
+    else:
+        audio_chunks = [(content, TranscriptGenerator.estimate_audio_duration(content, words_per_minute=int(150 * settings.TTS_CANONICAL_SPEED)))]
+        method = "estimate"
+
+    transcript, alignment = TranscriptGenerator.align_transcript_segments(content, audio_chunks)
+    if not transcript:
+        return None
+    alignment["method"] = method
+    alignment["backfilled_at"] = datetime.utcnow().isoformat()
+    generation_params = dict(row.get("generation_params") or {})
+    generation_params["transcript_alignment"] = alignment
+    return {"transcript": transcript, "generation_params": generation_params}
+
+def compute_walking_metrics(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Recompute route distance and walking time from the geocoded stops."""
+    stops = row.get("walkable_stops") or []
+    points = []
+    if row.get("start_latitude") is not None and row.get("start_longitude") is not None:
+        points.append((float(row["start_latitude"]), float(row["start_longitude"])))
+    for stop in stops:
+        if stop.get("latitude") is not None and stop.get("longitude") is not None:
+            points.append((float(stop["latitude"]), float(stop["longitude"])))
+    if len(points) < 2:
+        return None
+
+    meters = route_distance_m(points)
+    values = {
+        "total_walking_distance": format_distance(meters),
+        "estimated_walking_time": format_walking_time(meters),
+    }
+    if all(row.get(column) == value for column, value in values.items()):
+        return None  # already up to date
+    return values
+
+def _process_rows(process: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]], rows: List[Dict[str, Any]]):
+    """Run ``process`` over a slice of a batch; errors are reported per row."""
+    results = []
+    for row in rows:
+        try:
+            results.append((row["id"], process(row), None))
+        except Exception as e:
+            results.append((row["id"], None, f"{type(e).__name__}: {e}"))
+    return results
+
+# ---------------------------------------------------------------------------
+# Jobs
+# ---------------------------------------------------------------------------
+
+class BackfillJob:
+    """
+    A backfill over the ``tours`` table.
+
+    Subclasses define the rows to load (``query``), optional I/O to attach
+    extra data in the main process (``prepare``) and a top-level, picklable
+    ``process`` function returning the column values to update (or None).
+    """
+
+    name: str = ""
+    description: str = ""
+    process: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+    def __init__(self, only_missing: bool = False):
+        self.only_missing = only_missing
+
+    def query(self) -> Select:
+        raise NotImplementedError
+
+    async def prepare(self, rows: List[Dict[str, Any]]) -> None:
+        """Load non-database inputs for a batch (runs in the main process)."""
+        return None
+
+class TranscriptBackfill(BackfillJob):
+    name = "transcript"
+    description = "Re-time transcripts against the stored audio"
+    process = staticmethod(compute_transcript)
+
+    def query(self) -> Select:
+        query = select(Tour.id, Tour.content, Tour.generation_params).where(Tour.status == "ready")
+        if self.only_missing:
+            query = query.where(Tour.transcript.is_(None))
+        return query
+
+    async def prepare(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            manifest = await audio_storage.get_manifest(row["id"])
+            segments = (manifest or {}).get("segments") or []
+            if manifest and manifest.get("complete") and all(s.get("duration") for s in segments):
+                row["audio_segments"] = [{"chars": s["chars"], "duration": s["duration"]} for s in segments]
+            else:
+                # Only tours without measured segments need their audio parsed
+                row["audio"] = await audio_storage.get_tour_audio(row["id"])
+
+class WalkingMetricsBackfill(BackfillJob):
+    name = "walking-metrics"
+    description = "Recompute walking distance and time from geocoded stops"
+    process = staticmethod(compute_walking_metrics)
+
+    def query(self) -> Select:
+        query = (
+            select(
+                Tour.id,
+                Tour.walkable_stops,
+                Tour.total_walking_distance,
+                Tour.estimated_walking_time,
+                Location.latitude.label("start_latitude"),
+                Location.longitude.label("start_longitude"),
+            )
+            .join(Location, Tour.location_id == Location.id)
+            .where(Tour.walkable_stops.isnot(None))
+        )
+        if self.only_missing:
+            query = query.where(Tour.total_walking_distance.is_(None))
+        return query
+
+JOBS = {job.name: job for job in (TranscriptBackfill, WalkingMetricsBackfill)}
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+class BackfillStats:
+    """Counters and per-phase timings for the throughput report."""
+
+    def __init__(self):
+        self.batches = 0
+        self.rows = 0
+        self.updated = 0
+        self.skipped = 0
+        self.failed = 0
+        self.fetch_seconds = 0.0
+        self.compute_seconds = 0.0
+        self.write_seconds = 0.0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "elapsed_seconds": round(self.elapsed, 2),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "fetch_seconds": round(self.fetch_seconds, 2),
+            "compute_seconds": round(self.compute_seconds, 2),
+            "write_seconds": round(self.write_seconds, 2),
+        }
+
+    def report(self) -> str:
+        return (
+            f"{self.rows} rows in {self.batches} batches, {self.rows_per_second:.1f} rows/s "
+            f"({self.updated} updated, {self.skipped} unchanged, {self.failed} failed) | "
+            f"fetch {self.fetch_seconds:.1f}s, compute {self.compute_seconds:.1f}s, write {self.write_seconds:.1f}s"
+        )
+
+class BackfillRunner:
+    """
+    Runs a BackfillJob over the tours table.
+
+    The next batch is fetched while the current one is being processed, the
+    CPU-bound ``process`` runs across a ProcessPoolExecutor and each batch is
+    written with a single bulk UPDATE by primary key.
+    """
+
+    def __init__(
+        self,
+        job: BackfillJob,
+        session_factory,
+        batch_size: int = 200,
+        workers: Optional[int] = None,
+        checkpoint_dir: Path = Path(".backfill"),
+        dry_run: bool = False,
+        limit: Optional[int] = None,
+    ):
+        self.job = job
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.checkpoint_path = Path(checkpoint_dir) / f"{job.name}.json"
+        self.dry_run = dry_run
+        self.limit = limit
+        self.stats = BackfillStats()
+        self.failures: List[Dict[str, str]] = []
+
+    def load_checkpoint(self) -> Optional[uuid.UUID]:
+        """Last committed tour id of a previous run, if any."""
+        if not self.checkpoint_path.exists():
+            return None
+        checkpoint = json.loads(self.checkpoint_path.read_text())
+        last_id = checkpoint.get("last_id")
+        return uuid.UUID(last_id) if last_id else None
+
+    def save_checkpoint(self, last_id: Optional[uuid.UUID], done: bool = False) -> None:
+        """Write the checkpoint atomically so a crash never leaves a torn file."""
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        checkpoint = {
+            "job": self.job.name,
+            "last_id": str(last_id) if last_id else None,
+            "done": done,
+            "dry_run": self.dry_run,
+            "updated_at": datetime.utcnow().isoformat(),
+            "stats": self.stats.to_dict(),
+            "failures": self.failures[-50:],
+        }
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(checkpoint, indent=2))
+        os.replace(tmp_path, self.checkpoint_path)
+
+    async def run(self, resume: bool = False) -> BackfillStats:
+        """Process every matching tour; returns the final statistics."""
+        last_id = self.load_checkpoint() if resume else None
+        if last_id:
+            logger.info(f"Resuming {self.job.name} backfill after tour {last_id}")
+
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            next_batch = asyncio.ensure_future(self._fetch(last_id, self._next_batch_size(0)))
+            try:
+                while True:
+                    rows = await next_batch
+                    if not rows:
+                        break
+                    last_id = rows[-1]["id"]
+                    # Overlap the next read with this batch's compute and write
+                    next_size = self._next_batch_size(self.stats.rows + len(rows))
+                    next_batch = asyncio.ensure_future(self._fetch(last_id, next_size))
+
+                    updates = await self._compute(loop, pool, rows)
+                    await self._write(updates)
+
+                    self.stats.batches += 1
+                    self.stats.rows += len(rows)
+                    self.save_checkpoint(last_id)
+                    logger.info(f"[{self.job.name}] batch {self.stats.batches}: {self.stats.report()}")
+            finally:
+                if not next_batch.done():
+                    next_batch.cancel()
+
+        self.save_checkpoint(last_id, done=True)
+        return self.stats
+
+    def _next_batch_size(self, rows_so_far: int) -> int:
+        if self.limit is None:
+            return self.batch_size
+        return max(0, min(self.batch_size, self.limit - rows_so_far))
+
+    async def _fetch(self, after_id: Optional[uuid.UUID], batch_size: int) -> List[Dict[str, Any]]:
+        if batch_size <= 0:
+            return []
+        t0 = time.perf_counter()
+        query = self.job.query()
+        if after_id is not None:
+            query = query.where(Tour.id > after_id)
+        query = query.order_by(Tour.id).limit(batch_size)
+
+        async with self.session_factory() as db:
+            result = await db.execute(query)
+            rows = [dict(row._mapping) for row in result]
+        await self.job.prepare(rows)
+        self.stats.fetch_seconds += time.perf_counter() - t0
+        return rows
+
+    async def _compute(self, loop, pool: ProcessPoolExecutor, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        t0 = time.perf_counter()
+        # One task per worker keeps pickling overhead per batch, not per row
+        slice_size = max(1, -(-len(rows) // self.workers))
+        slices = [rows[i:i + slice_size] for i in range(0, len(rows), slice_size)]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(pool, _process_rows, self.job.process, rows_slice) for rows_slice in slices
+        ))
+
+        updates = []
+        for tour_id, values, error in (item for chunk in results for item in chunk):
+            if error:
+                self.stats.failed += 1
+                self.failures.append({"id": str(tour_id), "error": error})
+                logger.warning(f"[{self.job.name}] tour {tour_id} failed: {error}")
+            elif values:
+                updates.append({"id": tour_id, **values})
+            else:
+                self.stats.skipped += 1
+        self.stats.compute_seconds += time.perf_counter() - t0
+        return updates
+
+    async def _write(self, updates: List[Dict[str, Any]]) -> None:
+        if not updates:
+            return
+        t0 = time.perf_counter()
+        if not self.dry_run:
+            async with self.session_factory() as db:
+                # ORM bulk UPDATE by primary key: one executemany per batch
+                await db.execute(update(Tour), updates)
+                await db.commit()
+        self.stats.updated += len(updates)
+        self.stats.write_seconds += time.perf_counter() - t0
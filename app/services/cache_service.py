@@ -2,59 +2,343 @@
 
 import json
 import asyncio
-from typing import Any, Optional
-from datetime import datetime, timedelta
+import heapq
+import random
+import sys
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 import logging
 
+from .persistent_cache import PersistentCache
+
 # Lazy import to avoid hard dependency when Redis not required
 try:
     import aioredis  # type: ignore
 except ImportError:  # pragma: no cover
     aioredis = None  # will be checked at runtime
 
-# For now, we'll use a simple in-memory cache
-# In production, this would use Redis or similar
+# Optional faster codec; zlib is always available
+try:
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# Per-entry bookkeeping (dict slot, entry tuple, heap item) on top of key and value
+_ENTRY_OVERHEAD = 128
+
+def _entry_size(key: str, value: Any) -> int:
+    """Approximate memory held by a cache entry, in bytes."""
+    if isinstance(value, (str, bytes, bytearray)):
+        value_size = sys.getsizeof(value)
+    elif isinstance(value, set):
+        value_size = sys.getsizeof(value) + sum(sys.getsizeof(member) for member in value)
+    else:
+        try:
+            value_size = len(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            value_size = sys.getsizeof(value)
+    return sys.getsizeof(key) + value_size + _ENTRY_OVERHEAD
+
+def _to_number(value: Any) -> Union[int, float]:
+    """Counter value as a number; counters may have been stored as text."""
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, bytes):
+        value = value.decode("utf-8")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return float(value)
+
 class InMemoryCache:
-    """Simple in-memory cache implementation."""
+    """
+    Bounded in-memory LRU cache.
+
+    Entries are kept in recency order in an ``OrderedDict``, so reads, writes
+    and evictions are O(1). Their approximate size is tracked and the least
+    recently used entries are evicted once ``max_bytes`` is exceeded. Expiry
+    times go on a min-heap that a background task sweeps every
+    ``sweep_interval`` seconds, so entries that are never read again still
+    free their memory.
+    """
     
-    def __init__(self):
-        self._cache = {}
-        self._expiry = {}
+    def __init__(self, max_bytes: Optional[int] = None, sweep_interval: Optional[float] = None):
+        from app.config import settings
+        
+        self.max_bytes = settings.CACHE_MEMORY_MAX_BYTES if max_bytes is None else max_bytes
+        self.sweep_interval = settings.CACHE_SWEEP_INTERVAL_SECONDS if sweep_interval is None else sweep_interval
+        # key -> (value, monotonic expiry or None, size in bytes)
+        self._cache: "OrderedDict[str, Tuple[Any, Optional[float], int]]" = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._bytes = 0
+        self._sweeper: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejected = 0
     
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache."""
-        if key in self._cache:
-            # Check if expired
-            if key in self._expiry and datetime.now() > self._expiry[key]:
-                await self.delete(key)
-                return None
-            return self._cache[key]
-        return None
+        return self._lookup(key)
     
     async def set(self, key: str, value: Any, ttl: int = 3600) -> None:
         """Set value in cache with TTL in seconds."""
-        self._cache[key] = value
-        if ttl > 0:
-            self._expiry[key] = datetime.now() + timedelta(seconds=ttl)
+        self._store(key, value, time.monotonic() + ttl if ttl > 0 else None)
+    
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values, in the order of ``keys``."""
+        return [self._lookup(key) for key in keys]
+    
+    async def set_many(self, mapping: Dict[str, Any], ttl: int = 3600) -> None:
+        """Set several values with the same TTL."""
+        expires_at = time.monotonic() + ttl if ttl > 0 else None
+        for key, value in mapping.items():
+            self._store(key, value, expires_at)
+    
+    async def execute_pipeline(self, ops: List[Tuple[str, tuple]], transaction: bool = True) -> List[Any]:
+        """
+        Run queued commands; returns their results in order.
+        
+        Nothing awaits between commands, so a batch is always applied
+        atomically with respect to other coroutines.
+        """
+        return [getattr(self, f"_op_{name}")(*args) for name, args in ops]
     
     async def delete(self, key: str) -> None:
         """Delete value from cache."""
-        self._cache.pop(key, None)
-        self._expiry.pop(key, None)
+        self._remove(key)
     
     async def clear(self) -> None:
         """Clear all cache entries."""
         self._cache.clear()
-        self._expiry.clear()
+        self._expiry_heap.clear()
+        self._bytes = 0
     
     def size(self) -> int:
         """Get cache size."""
         return len(self._cache)
+    
+    async def sample_keys(self, limit: int) -> Tuple[List[Tuple[str, int, Optional[int]]], int]:
+        """Up to ``limit`` random ``(key, bytes, ttl)`` and the number of keys."""
+        now = time.monotonic()
+        keys = list(self._cache)
+        samples = []
+        for key in random.sample(keys, min(limit, len(keys))):
+            _, expires_at, size = self._cache[key]
+            samples.append((key, size, max(0, int(expires_at - now)) if expires_at is not None else None))
+        return samples, len(keys)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Occupancy and hit/eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "rejected": self.rejected,
+        }
+    
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Remove expired entries; returns how many were removed."""
+        now = time.monotonic() if now is None else now
+        removed = 0
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            entry = self._cache.get(key)
+            # Overwritten or deleted keys leave stale heap items behind
+            if entry is not None and entry[1] == expires_at:
+                self._remove(key)
+                removed += 1
+        self.expirations += removed
+        
+        if len(self._expiry_heap) > 2 * len(self._cache) + 1024:
+            self._expiry_heap = [
+                (expires_at, key) for key, (_, expires_at, _) in self._cache.items() if expires_at is not None
+            ]
+            heapq.heapify(self._expiry_heap)
+        return removed
+    
+    async def close(self) -> None:
+        """Stop the expiry sweeper."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+    
+    def _lookup(self, key: str) -> Optional[Any]:
+        entry = self._cache.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at, _ = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._cache.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def _store(self, key: str, value: Any, expires_at: Optional[float]) -> None:
+        self._remove(key)
+        size = _entry_size(key, value)
+        if self.max_bytes and size > self.max_bytes:
+            # Storing it would evict everything else
+            self.rejected += 1
+            return
+        self._cache[key] = (value, expires_at, size)
+        self._bytes += size
+        if expires_at is not None:
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+        self._evict()
+        self._ensure_sweeper()
+    
+    def _expires_at(self, key: str) -> Optional[float]:
+        entry = self._cache.get(key)
+        return entry[1] if entry is not None else None
+    
+    def _remove(self, key: str) -> None:
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+    
+    # Pipeline commands, with Redis semantics: counters and hashes keep their expiry
+    
+    def _op_get(self, key: str) -> Optional[Any]:
+        return self._lookup(key)
+    
+    def _op_set(self, key: str, value: Any, ttl: int = 3600) -> bool:
+        self._store(key, value, time.monotonic() + ttl if ttl > 0 else None)
+        return True
+    
+    def _op_set_nx(self, key: str, value: Any, ttl: int) -> Optional[bool]:
+        if self._lookup(key) is not None:
+            return None
+        return self._op_set(key, value, ttl)
+    
+    def _op_delete(self, key: str) -> int:
+        existed = self._lookup(key) is not None
+        self._remove(key)
+        return int(existed)
+    
+    def _op_incr(self, key: str, amount: Union[int, float] = 1) -> Union[int, float]:
+        value = _to_number(self._lookup(key) or 0) + amount
+        self._store(key, value, self._expires_at(key))
+        return value
+    
+    def _op_hincr(self, key: str, field: str, amount: Union[int, float] = 1) -> Union[int, float]:
+        fields = self._hash(key)
+        fields[field] = _to_number(fields.get(field, 0)) + amount
+        self._store(key, fields, self._expires_at(key))
+        return fields[field]
+    
+    def _op_hset(self, key: str, mapping: Dict[str, Any]) -> int:
+        fields = self._hash(key)
+        added = len(set(mapping) - set(fields))
+        fields.update(mapping)
+        self._store(key, fields, self._expires_at(key))
+        return added
+    
+    def _op_hgetall(self, key: str) -> Dict[str, Any]:
+        return self._hash(key)
+    
+    def _op_hdel(self, key: str, *fields: str) -> int:
+        current = self._hash(key)
+        removed = len(set(fields) & set(current))
+        for field in fields:
+            current.pop(field, None)
+        if current:
+            self._store(key, current, self._expires_at(key))
+        else:
+            self._remove(key)  # like Redis, a hash without fields does not exist
+        return removed
+    
+    def _op_expire(self, key: str, ttl: int) -> bool:
+        entry = self._cache.get(key)
+        if entry is None:
+            return False
+        self._store(key, entry[0], time.monotonic() + ttl)
+        return True
+    
+    def _op_expire_gt(self, key: str, ttl: int) -> bool:
+        entry = self._cache.get(key)
+        if entry is None or (entry[1] is not None and entry[1] >= time.monotonic() + ttl):
+            return False
+        self._store(key, entry[0], time.monotonic() + ttl)
+        return True
+    
+    def _op_sadd(self, key: str, *members: str) -> int:
+        value = self._lookup(key)
+        if value is not None and not isinstance(value, set):
+            raise TypeError(f"{key} does not hold a set")
+        current = set(value or ())
+        added = len(set(members) - current)
+        self._store(key, current | set(members), self._expires_at(key))
+        return added
+    
+    def _op_sscan(self, key: str, cursor: int = 0, count: int = 10) -> Tuple[int, List[str]]:
+        # Members in sorted order, the cursor being a position in it
+        value = self._lookup(key)
+        if value is not None and not isinstance(value, set):
+            raise TypeError(f"{key} does not hold a set")
+        members = sorted(value or ())
+        page = members[cursor:cursor + count]
+        next_cursor = cursor + count if cursor + count < len(members) else 0
+        return next_cursor, page
+    
+    def _hash(self, key: str) -> Dict[str, Any]:
+        value = self._lookup(key)
+        if value is None:
+            return {}
+        if not isinstance(value, dict):
+            raise TypeError(f"{key} does not hold a hash")
+        return dict(value)  # callers never see the stored dict
+    
+    def _evict(self) -> None:
+        while self.max_bytes and self._bytes > self.max_bytes and self._cache:
+            _, (_, _, size) = self._cache.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+    
+    def _ensure_sweeper(self) -> None:
+        # Started lazily so it binds to the running event loop
+        if self.sweep_interval <= 0 or (self._sweeper is not None and not self._sweeper.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._sweeper = loop.create_task(self._sweep_loop())
+    
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            removed = self.sweep()
+            if removed:
+                logging.getLogger(__name__).debug("Expired %d in-memory cache entries", removed)
 
 # ------------------------------------------------------------
 # Redis backend (production)
 # ------------------------------------------------------------
 
+# EXPIRE ... GT for Redis versions before 7: only ever extends the expiry of a key
+_EXPIRE_GT_SCRIPT = """
+local ttl = redis.call('TTL', KEYS[1])
+if ttl ~= -2 and ttl < tonumber(ARGV[1]) then
+    return redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return 0
+"""
+
 class RedisCache:  # pragma: no cover – heavy I/O, tested via integration
     """Thin async wrapper around aioredis for the cache interface."""
 
@@ -71,21 +355,715 @@ class RedisCache:  # pragma: no cover – heavy I/O, tested via integration
         return await self._pool.get(key)
 
     async def set(self, key: str, value: Any, ttl: int = 3600):
-        # Redis requires bytes, str, int or float.
-        if isinstance(value, (dict, list)):
-            value = json.dumps(value)
-        elif not isinstance(value, (str, bytes, int, float)):
-            value = str(value)
-        await self._pool.set(key, value, ex=ttl)
+        await self._pool.set(key, self._encode(value), ex=ttl if ttl > 0 else None)
 
     async def delete(self, key: str):
         await self._pool.delete(key)
 
+    async def get_many(self, keys: List[str]) -> List[Any]:
+        return await self._pool.mget(keys)
+
+    async def set_many(self, mapping: Dict[str, Any], ttl: int = 3600) -> None:
+        # MSET has no expiry, so SETs are pipelined instead: still one round trip
+        async with self._pool.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, self._encode(value), ex=ttl)
+            await pipe.execute()
+
+    async def execute_pipeline(self, ops: List[Tuple[str, tuple]], transaction: bool = True) -> List[Any]:
+        """Send queued commands in one round trip (wrapped in MULTI/EXEC when ``transaction``)."""
+        async with self._pool.pipeline(transaction=transaction) as pipe:
+            for name, args in ops:
+                if name == "set":
+                    key, value, ttl = args
+                    pipe.set(key, self._encode(value), ex=ttl if ttl > 0 else None)
+                elif name == "set_nx":
+                    key, value, ttl = args
+                    pipe.set(key, self._encode(value), ex=ttl, nx=True)
+                elif name == "incr":
+                    key, amount = args
+                    pipe.incrbyfloat(key, amount) if isinstance(amount, float) else pipe.incrby(key, amount)
+                elif name == "hincr":
+                    key, field, amount = args
+                    pipe.hincrbyfloat(key, field, amount) if isinstance(amount, float) else pipe.hincrby(key, field, amount)
+                elif name == "hset":
+                    key, mapping = args
+                    pipe.hset(key, mapping={field: self._encode(value) for field, value in mapping.items()})
+                elif name == "sscan":
+                    key, cursor, count = args
+                    pipe.sscan(key, cursor=cursor, count=count)
+                elif name == "expire_gt":
+                    key, ttl = args
+                    pipe.eval(_EXPIRE_GT_SCRIPT, 1, key, ttl)
+                else:  # get, delete, hgetall, hdel, expire, sadd map onto the command of the same name
+                    getattr(pipe, name)(*args)
+            return await pipe.execute()
+
+    @staticmethod
+    def _encode(value: Any):
+        # Redis requires bytes, str, int or float.
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        if not isinstance(value, (str, bytes, int, float)):
+            return str(value)
+        return value
+
     async def clear(self):
         await self._pool.flushdb()
 
     async def size(self) -> int:  # not part of original interface but used internally
         return await self._pool.dbsize()
+    
+    async def sample_keys(self, limit: int) -> Tuple[List[Tuple[str, int, Optional[int]]], int]:
+        """Up to ``limit`` keys found by SCAN with their MEMORY USAGE and TTL, and DBSIZE."""
+        keys: List[bytes] = []
+        cursor = 0
+        while len(keys) < limit:
+            cursor, batch = await self._pool.scan(cursor, count=min(limit, 1000))
+            keys.extend(batch)
+            if not cursor:
+                break
+        keys = keys[:limit]
+        async with self._pool.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.memory_usage(key)
+                pipe.ttl(key)
+            results = await pipe.execute()
+        samples = []
+        for i, key in enumerate(keys):
+            size, ttl = results[2 * i], results[2 * i + 1]
+            if ttl == -2:  # expired since the scan
+                continue
+            samples.append((key.decode("utf-8", "replace"), size or 0, ttl if ttl >= 0 else None))
+        return samples, await self._pool.dbsize()
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self._pool.publish(channel, message)
+
+    def pubsub(self):
+        return self._pool.pubsub()
+
+# ------------------------------------------------------------
+# Two-tier cache: in-process L1 in front of Redis
+# ------------------------------------------------------------
+
+def parse_l1_policies(spec: str) -> List[Tuple[str, float]]:
+    """
+    Parse ``"location_search=300,tour:content=600"`` into ``(prefix, ttl)`` pairs.
+
+    Longest prefixes come first so the most specific policy wins.
+    """
+    policies = []
+    for item in (spec or "").split(","):
+        prefix, _, ttl = item.strip().partition("=")
+        if not prefix or not ttl:
+            continue
+        try:
+            policies.append((prefix.strip(), float(ttl)))
+        except ValueError:
+            logging.getLogger(__name__).warning("Ignoring invalid L1 cache policy %r", item)
+    return sorted(policies, key=lambda policy: len(policy[0]), reverse=True)
+
+class TieredCache:
+    """
+    Redis with a bounded in-process L1 tier for hot keys.
+
+    Only keys matching a prefix policy are kept in L1, for at most the
+    policy's TTL. Writes and deletes drop the key from L1 and publish it on
+    ``channel``, and every worker drops keys published by the others. L1 is
+    only consulted while that subscription is live: after a disconnect it is
+    cleared, because invalidations may have been missed.
+    """
+
+    def __init__(self, redis: RedisCache, policies: List[Tuple[str, float]], l1: InMemoryCache, channel: str):
+        self.redis = redis
+        self.policies = policies
+        self.l1 = l1
+        self.channel = channel
+        self.instance_id = uuid.uuid4().hex
+        self.invalidations_received = 0
+        self._generation = 0  # bumped by every invalidation
+        self._subscribed = False
+        self._subscriber: Optional[asyncio.Task] = None
+
+    def policy_ttl(self, key: str) -> Optional[float]:
+        """L1 TTL of ``key``, or None if it is not cached in-process."""
+        for prefix, ttl in self.policies:
+            if key.startswith(prefix):
+                return ttl
+        return None
+
+    async def get(self, key: str):
+        ttl = self.policy_ttl(key)
+        self._ensure_subscriber()
+        if ttl is None or not self._subscribed:
+            return await self.redis.get(key)
+        value = await self.l1.get(key)
+        if value is not None:
+            return value
+        generation = self._generation
+        value = await self.redis.get(key)
+        # A value read before an invalidation arrived may already be stale
+        if value is not None and generation == self._generation:
+            await self.l1.set(key, value, ttl=ttl)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int = 3600):
+        await self.redis.set(key, value, ttl)
+        await self._invalidate(key)
+
+    async def delete(self, key: str):
+        await self.redis.delete(key)
+        await self._invalidate(key)
+
+    async def get_many(self, keys: List[str]) -> List[Any]:
+        self._ensure_subscriber()
+        values: Dict[str, Any] = {}
+        if self._subscribed:
+            for key in keys:
+                if self.policy_ttl(key) is not None:
+                    value = await self.l1.get(key)
+                    if value is not None:
+                        values[key] = value
+        missing = [key for key in keys if key not in values]
+        if missing:
+            generation = self._generation
+            for key, value in zip(missing, await self.redis.get_many(missing)):
+                values[key] = value
+                ttl = self.policy_ttl(key)
+                if value is not None and ttl is not None and self._subscribed and generation == self._generation:
+                    await self.l1.set(key, value, ttl=ttl)
+        return [values.get(key) for key in keys]
+
+    async def set_many(self, mapping: Dict[str, Any], ttl: int = 3600) -> None:
+        await self.redis.set_many(mapping, ttl)
+        for key in mapping:
+            await self._invalidate(key)
+
+    async def execute_pipeline(self, ops: List[Tuple[str, tuple]], transaction: bool = True) -> List[Any]:
+        results = await self.redis.execute_pipeline(ops, transaction)
+        # Hashes are never held in L1; plain values written by the batch are
+        for name, args in ops:
+            if name in ("set", "delete", "incr"):
+                await self._invalidate(args[0])
+        return results
+
+    async def clear(self):
+        await self.redis.clear()
+        self._generation += 1
+        await self.l1.clear()
+        await self._publish("*")
+
+    async def size(self) -> int:
+        return await self.redis.size()
+    
+    async def sample_keys(self, limit: int) -> Tuple[List[Tuple[str, int, Optional[int]]], int]:
+        return await self.redis.sample_keys(limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "l1": self.l1.stats(),
+            "l1_subscribed": self._subscribed,
+            "l1_invalidations_received": self.invalidations_received,
+        }
+
+    async def close(self) -> None:
+        if self._subscriber is not None:
+            self._subscriber.cancel()
+            self._subscriber = None
+        self._subscribed = False
+        await self.l1.close()
+
+    async def _invalidate(self, key: str) -> None:
+        if self.policy_ttl(key) is None:
+            return
+        self._generation += 1
+        await self.l1.delete(key)
+        await self._publish(key)
+
+    async def _publish(self, key: str) -> None:
+        try:
+            await self.redis.publish(self.channel, f"{self.instance_id} {key}")
+        except Exception as e:
+            # Other workers keep serving the old value until their L1 TTL runs out
+            logging.getLogger(__name__).warning("L1 invalidation of %s not published: %s", key, e)
+
+    async def handle_invalidation(self, message: str) -> None:
+        """Apply an invalidation published by any worker."""
+        sender, _, key = message.partition(" ")
+        if sender == self.instance_id:
+            return
+        self.invalidations_received += 1
+        self._generation += 1
+        if key == "*":
+            await self.l1.clear()
+        else:
+            await self.l1.delete(key)
+
+    def _ensure_subscriber(self) -> None:
+        # Started lazily so it binds to the running event loop
+        if self._subscriber is not None and not self._subscriber.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._subscriber = loop.create_task(self._subscribe_loop())
+
+    async def _subscribe_loop(self) -> None:
+        logger = logging.getLogger(__name__)
+        backoff = 1.0
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                self._subscribed = True
+                backoff = 1.0
+                logger.info("L1 cache subscribed to %s", self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    data = message["data"]
+                    await self.handle_invalidation(data.decode("utf-8") if isinstance(data, bytes) else data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("L1 cache invalidation channel lost (%s) – bypassing L1 until resubscribed", e)
+            finally:
+                self._subscribed = False
+                await self.l1.clear()
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+# ------------------------------------------------------------
+# Compression codec
+# ------------------------------------------------------------
+
+# Header byte of a compressed value. 0xC0, 0xC1 and 0xF5-0xFF never occur in
+# valid UTF-8, so plain text and JSON values (everything written before
+# compression) are told apart without a header of their own and stay
+# readable. The rare uncompressed value that starts with one of them gets
+# _RAW_HEADER.
+_RAW_HEADER = 0xC0
+_ZLIB_HEADER = 0xC1
+_ZSTD_HEADER = 0xF5
+_HEADERS = (_RAW_HEADER, _ZLIB_HEADER, _ZSTD_HEADER)
+# zstd values used to be written with 0xC2, which does start UTF-8 ("«", "£");
+# those are recognised by the zstd frame magic, which UTF-8 cannot follow 0xC2 with
+_LEGACY_ZSTD_HEADER = 0xC2
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Values this large are compressed in a worker thread
+_COMPRESS_IN_THREAD_BYTES = 256 * 1024
+
+# Key namespaces reported on their own; other keys are grouped by their first segment
+KEY_NAMESPACES = (
+    "audio:tts", "audio:tour", "tour:content", "tour:translation", "tour:condensed",
+    "usage:counters", "cache_hits:counters", "generation:ledger", "generation:samples", "cache:tag",
+)
+
+def key_prefix(key: str) -> str:
+    """Namespace of a cache key for reporting, e.g. ``audio:tts`` or ``location_search``."""
+    for namespace in KEY_NAMESPACES:
+        if key.startswith(namespace + ":"):
+            return namespace
+    return key.split(":", 1)[0]
+
+def decompress_value(value: Any) -> Any:
+    """Undo ``CacheCodec.encode``; values without a codec header are returned as they are."""
+    if not isinstance(value, (bytes, bytearray)) or not value:
+        return value
+    if value[0] == _RAW_HEADER:
+        return value[1:]
+    if value[0] == _ZLIB_HEADER:
+        return zlib.decompress(value[1:])
+    if value[0] == _ZSTD_HEADER or (value[0] == _LEGACY_ZSTD_HEADER and value[1:5] == _ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read this cache value")
+        return zstandard.ZstdDecompressor().decompress(value[1:])
+    return value
+
+class CacheCodec:
+    """
+    Compresses large text and binary values on their way into the cache.
+
+    Values of at least ``min_bytes`` are compressed with zstd when the
+    ``zstandard`` package is installed (zlib otherwise) and prefixed with a
+    header byte naming the codec. Values that do not shrink by at least 10%
+    are stored as they are. Sizes before and after are counted per key prefix.
+    """
+    
+    def __init__(self, min_bytes: int, codec: str = "zstd", level: int = 3):
+        self.min_bytes = min_bytes
+        self.codec = "zstd" if codec == "zstd" and zstandard is not None else "zlib"
+        self.level = level
+        self.prefix_stats: Dict[str, Dict[str, int]] = {}
+    
+    def encode(self, key: str, value: Any) -> Any:
+        """Value to store for ``key``: compressed with a header byte, or unchanged."""
+        stored, raw_size = self.compress(value)
+        self.record(key, stored, raw_size)
+        return stored
+    
+    def compress(self, value: Any) -> Tuple[Any, int]:
+        """Compressed value (or ``value`` itself) and the uncompressed size; 0 if not considered."""
+        if not isinstance(value, (str, bytes)):
+            return value, 0
+        raw = value.encode("utf-8") if isinstance(value, str) else value
+        if not self.min_bytes or len(raw) < self.min_bytes:
+            return self._escape(value, raw), 0
+        if self.codec == "zstd":
+            compressed = bytes([_ZSTD_HEADER]) + zstandard.ZstdCompressor(level=self.level).compress(raw)
+        else:
+            compressed = bytes([_ZLIB_HEADER]) + zlib.compress(raw, self.level)
+        return (compressed if len(compressed) <= len(raw) * 0.9 else self._escape(value, raw)), len(raw)
+    
+    @staticmethod
+    def _escape(value: Any, raw: bytes) -> Any:
+        # Any value whose first stored bytes (``raw``) read like a header gets an
+        # explicit "raw" one (with the headers above, only binary values can)
+        if raw[:1] and (raw[0] in _HEADERS or raw[:5] == bytes([_LEGACY_ZSTD_HEADER]) + _ZSTD_MAGIC):
+            return bytes([_RAW_HEADER]) + raw
+        return value
+    
+    def record(self, key: str, stored: Any, raw_size: int) -> None:
+        """Count a value considered for compression under its key prefix."""
+        if not raw_size:
+            return
+        compressed = isinstance(stored, bytes) and stored[:1] != b"" and stored[0] in (_ZLIB_HEADER, _ZSTD_HEADER)
+        stats = self.prefix_stats.setdefault(
+            key_prefix(key), {"values": 0, "compressed": 0, "raw_bytes": 0, "stored_bytes": 0}
+        )
+        stats["values"] += 1
+        stats["compressed"] += int(compressed)
+        stats["raw_bytes"] += raw_size
+        stats["stored_bytes"] += len(stored) if compressed else raw_size
+    
+    def stats(self) -> Dict[str, Any]:
+        """Compression ratio (raw / stored bytes) of large values per key prefix."""
+        return {
+            "codec": self.codec,
+            "min_bytes": self.min_bytes,
+            "prefixes": {
+                prefix: {**stats, "ratio": round(stats["raw_bytes"] / stats["stored_bytes"], 2) if stats["stored_bytes"] else None}
+                for prefix, stats in sorted(self.prefix_stats.items())
+            },
+        }
+
+# ------------------------------------------------------------
+# Metrics
+# ------------------------------------------------------------
+
+# Upper bounds of the latency (milliseconds) and value size (bytes) histogram buckets
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, float("inf"))
+SIZE_BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, float("inf"))
+
+class Histogram:
+    """Fixed-bucket histogram; percentiles are reported as bucket upper bounds."""
+    
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+    
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return self.max if bound == float("inf") else bound
+        return self.max
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 3) if self.count else None,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": round(self.max, 3),
+            "buckets": {
+                ("+Inf" if bound == float("inf") else str(bound)): count
+                for bound, count in zip(self.bounds, self.counts)
+            },
+        }
+
+class CacheMetrics:
+    """
+    Per key prefix counters for ``CacheService``: lookups, errors, backend
+    latency by operation and the size of the values written.
+    """
+    
+    def __init__(self):
+        self.prefixes: Dict[str, Dict[str, Any]] = {}
+    
+    def _prefix(self, key: str) -> Dict[str, Any]:
+        prefix = key_prefix(key)
+        metrics = self.prefixes.get(prefix)
+        if metrics is None:
+            metrics = self.prefixes[prefix] = {
+                "hits": 0, "misses": 0, "errors": 0, "writes": 0, "bytes_written": 0,
+                "latency_ms": {}, "value_bytes": Histogram(SIZE_BUCKETS_BYTES),
+            }
+        return metrics
+    
+    def lookup(self, key: str, hit: bool) -> None:
+        self._prefix(key)["hits" if hit else "misses"] += 1
+    
+    def error(self, key: str) -> None:
+        self._prefix(key)["errors"] += 1
+    
+    def write(self, key: str, value: Any) -> None:
+        size = len(value) if isinstance(value, (str, bytes, bytearray)) else 0
+        metrics = self._prefix(key)
+        metrics["writes"] += 1
+        metrics["bytes_written"] += size
+        metrics["value_bytes"].observe(size)
+    
+    def latency(self, operation: str, key: str, seconds: float) -> None:
+        latency = self._prefix(key)["latency_ms"]
+        if operation not in latency:
+            latency[operation] = Histogram(LATENCY_BUCKETS_MS)
+        latency[operation].observe(seconds * 1000)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters, latency percentiles (ms) and value sizes per key prefix."""
+        report = {}
+        for prefix, metrics in sorted(self.prefixes.items()):
+            lookups = metrics["hits"] + metrics["misses"]
+            report[prefix] = {
+                "hits": metrics["hits"],
+                "misses": metrics["misses"],
+                "hit_rate": round(metrics["hits"] / lookups, 4) if lookups else None,
+                "errors": metrics["errors"],
+                "writes": metrics["writes"],
+                "bytes_written": metrics["bytes_written"],
+                "value_bytes": metrics["value_bytes"].stats(),
+                "latency_ms": {operation: histogram.stats() for operation, histogram in sorted(metrics["latency_ms"].items())},
+            }
+        return report
+
+def summarize_keyspace(samples: List[Tuple[str, int, Optional[int]]], total_keys: int) -> Dict[str, Any]:
+    """
+    Group sampled ``(key, bytes, ttl)`` by key prefix.
+    
+    Key counts and bytes are extrapolated to ``total_keys``; ``ttl`` is the
+    remaining lifetime in seconds or None for keys without expiry.
+    """
+    scale = total_keys / len(samples) if samples else 0
+    groups: Dict[str, Dict[str, Any]] = {}
+    for key, size, ttl in samples:
+        group = groups.setdefault(key_prefix(key), {"sampled_keys": 0, "sampled_bytes": 0, "max_bytes": 0, "no_expiry": 0, "ttls": []})
+        group["sampled_keys"] += 1
+        group["sampled_bytes"] += size
+        group["max_bytes"] = max(group["max_bytes"], size)
+        if ttl is None:
+            group["no_expiry"] += 1
+        else:
+            group["ttls"].append(ttl)
+    prefixes = {}
+    for prefix, group in sorted(groups.items(), key=lambda item: -item[1]["sampled_bytes"]):
+        ttls = group.pop("ttls")
+        prefixes[prefix] = {
+            **group,
+            "avg_bytes": group["sampled_bytes"] // group["sampled_keys"],
+            "estimated_keys": round(group["sampled_keys"] * scale),
+            "estimated_bytes": round(group["sampled_bytes"] * scale),
+            "avg_ttl_seconds": round(sum(ttls) / len(ttls)) if ttls else None,
+        }
+    return {"total_keys": total_keys, "sampled_keys": len(samples), "prefixes": prefixes}
+
+# ------------------------------------------------------------
+# Tags
+# ------------------------------------------------------------
+
+# Field of a get_or_refresh envelope holding its soft expiry (epoch seconds)
+_SOFT_EXPIRY_FIELD = "__soft_expiry__"
+
+# Members deleted per SSCAN page when a tag is invalidated
+_TAG_SCAN_COUNT = 500
+
+def tag_key(tag: str) -> str:
+    """Key of the set holding the cache keys stored with ``tag``."""
+    if not tag or "," in tag:
+        # Tags are kept comma-separated in cache_entries.tags
+        raise ValueError(f"Invalid cache tag: {tag!r}")
+    return f"cache:tag:{tag}"
+
+# ------------------------------------------------------------
+# Service facade
+# ------------------------------------------------------------
+
+def _decode(value: Any) -> Any:
+    """Decompress, then decode bytes to str for convenience; binary values (e.g. audio) stay bytes."""
+    value = decompress_value(value)
+    if isinstance(value, (bytes, bytearray)):
+        try:
+            return bytes(value).decode("utf-8")
+        except UnicodeDecodeError:
+            return value
+    return value
+
+def _parse_json(value: Any) -> Optional[Any]:
+    if not value:
+        return None
+    if isinstance(value, (bytes, bytearray)):
+        try:
+            value = value.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+    try:
+        return json.loads(value) if isinstance(value, str) else value
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+class CachePipeline:
+    """Cache commands queued by ``CacheService.pipeline()`` and sent to the backend together."""
+    
+    def __init__(
+        self,
+        backend: Any,
+        transaction: bool = True,
+        codec: Optional[CacheCodec] = None,
+        persistent: Any = None,
+        metrics: Optional[CacheMetrics] = None,
+    ):
+        self._backend = backend
+        self.transaction = transaction
+        self._codec = codec
+        self._persistent = persistent
+        self._metrics = metrics
+        self._ops: List[Tuple[str, tuple]] = []
+        self._tags: Dict[str, List[str]] = {}
+        self.results: List[Any] = []
+    
+    def get(self, key: str) -> "CachePipeline":
+        self._ops.append(("get", (key,)))
+        return self
+    
+    def set(self, key: str, value: Any, ttl: int = 3600, tags: Optional[List[str]] = None) -> "CachePipeline":
+        if self._codec:
+            value = self._codec.encode(key, value)
+        self._ops.append(("set", (key, value, ttl)))
+        if tags:
+            self._tags[key] = list(tags)
+            for tag in tags:
+                self._ops.append(("sadd", (tag_key(tag), key)))
+                if ttl > 0:
+                    # The tag set lives as long as its longest-lived member
+                    self._ops.append(("expire_gt", (tag_key(tag), ttl)))
+        return self
+    
+    def set_nx(self, key: str, value: Any, ttl: int) -> "CachePipeline":
+        """Set only if ``key`` does not exist; the result is True when it was set."""
+        self._ops.append(("set_nx", (key, value, ttl)))
+        return self
+    
+    def delete(self, key: str) -> "CachePipeline":
+        self._ops.append(("delete", (key,)))
+        return self
+    
+    def incr(self, key: str, amount: Union[int, float] = 1) -> "CachePipeline":
+        self._ops.append(("incr", (key, amount)))
+        return self
+    
+    def hincr(self, key: str, field: str, amount: Union[int, float] = 1) -> "CachePipeline":
+        self._ops.append(("hincr", (key, field, amount)))
+        return self
+    
+    def hset(self, key: str, mapping: Dict[str, Any]) -> "CachePipeline":
+        self._ops.append(("hset", (key, mapping)))
+        return self
+    
+    def hgetall(self, key: str) -> "CachePipeline":
+        self._ops.append(("hgetall", (key,)))
+        return self
+    
+    def hdel(self, key: str, *fields: str) -> "CachePipeline":
+        self._ops.append(("hdel", (key, *fields)))
+        return self
+    
+    def expire(self, key: str, ttl: int) -> "CachePipeline":
+        self._ops.append(("expire", (key, ttl)))
+        return self
+    
+    def sscan(self, key: str, cursor: int = 0, count: int = _TAG_SCAN_COUNT) -> "CachePipeline":
+        self._ops.append(("sscan", (key, cursor, count)))
+        return self
+    
+    async def execute(self) -> List[Any]:
+        """Send the queued commands; failures leave None results, like single-key errors."""
+        ops, self._ops = self._ops, []
+        tags, self._tags = self._tags, {}
+        if not ops:
+            return []
+        if self._persistent is not None:
+            for name, args in ops:
+                if name == "set":
+                    self._persistent.put(*args, tags=tags.get(args[0]))
+                elif name == "delete":
+                    self._persistent.remove(args[0])
+        started = time.perf_counter()
+        failed = False
+        try:
+            raw = await self._backend.execute_pipeline(ops, self.transaction)
+        except Exception as e:
+            print(f"Cache pipeline error ({len(ops)} commands): {e}")
+            raw = [None] * len(ops)
+            failed = True
+        if self._metrics is not None:
+            self._record(ops, raw, time.perf_counter() - started, failed)
+        self.results = [self._normalize(name, value) for (name, _), value in zip(ops, raw)]
+        return self.results
+    
+    def _record(self, ops: List[Tuple[str, tuple]], raw: List[Any], elapsed: float, failed: bool) -> None:
+        # One round trip, so its latency is counted once, under the first key
+        first_key = ops[0][1][0]
+        self._metrics.latency("pipeline", first_key, elapsed)
+        if failed:
+            self._metrics.error(first_key)
+            return
+        for (name, args), value in zip(ops, raw):
+            if name == "get":
+                self._metrics.lookup(args[0], value is not None)
+            elif name == "set":
+                self._metrics.write(args[0], args[1])
+    
+    @staticmethod
+    def _normalize(name: str, value: Any) -> Any:
+        if name == "hgetall" and value is not None:
+            return {_decode(field): _decode(field_value) for field, field_value in value.items()}
+        if name == "get":
+            return _decode(value)
+        if name == "sscan" and value is not None:
+            cursor, members = value
+            return int(cursor), [_decode(member) for member in members]
+        return value
+    
+    async def __aenter__(self) -> "CachePipeline":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self.execute()
 
 class CacheService:
     """Cache service wrapper that can switch between different cache backends."""
@@ -102,11 +1080,32 @@ class CacheService:
 
         # Auto-detect backend
         chosen = backend or ("redis" if settings.REDIS_URL else "memory")
+        self.codec = CacheCodec(
+            settings.CACHE_COMPRESS_MIN_BYTES, settings.CACHE_COMPRESS_CODEC, settings.CACHE_COMPRESS_LEVEL
+        )
+        # Durable copy of expensive entries (audio, LLM content) in cache_entries
+        self.persistent = PersistentCache()
+        self.metrics = CacheMetrics()
+        self.refresh_lock_seconds = settings.CACHE_REFRESH_LOCK_SECONDS
+        # get_or_refresh loads in flight in this worker, by key
+        self._loads: Dict[str, asyncio.Future] = {}
+        self._refreshes: Dict[str, asyncio.Task] = {}
+        self.stale_served = 0
+        self.refreshes_started = 0
+        self.refresh_failures = 0
 
         if chosen == "redis":
             try:
                 self._cache = RedisCache(settings.REDIS_URL, settings.REDIS_MAX_CONNECTIONS)
                 logging.getLogger(__name__).info("Redis cache initialised")
+                if settings.CACHE_L1_ENABLED:
+                    self._cache = TieredCache(
+                        self._cache,
+                        parse_l1_policies(settings.CACHE_L1_POLICIES),
+                        InMemoryCache(max_bytes=settings.CACHE_L1_MAX_BYTES),
+                        settings.CACHE_L1_CHANNEL,
+                    )
+                    logging.getLogger(__name__).info("In-process L1 cache enabled in front of Redis")
             except Exception as e:
                 logging.getLogger(__name__).warning(
                     "Failed to connect to Redis – falling back to in-memory cache (%s)",
@@ -120,54 +1119,301 @@ class CacheService:
             raise ValueError(f"Unsupported cache backend: {chosen}")
     
     async def get(self, key: str) -> Optional[Any]:
-        """Get value from cache."""
+        """Get value from cache; persisted keys missing from the backend are read from the database."""
+        started = time.perf_counter()
         try:
-            val = await self._cache.get(key)
-            # Decode bytes to str for convenience
-            if isinstance(val, bytes):
-                try:
-                    return val.decode("utf-8")
-                except UnicodeDecodeError:
-                    return val  # binary (e.g., audio)
-            return val
+            value = await self._cache.get(key)
         except Exception as e:
             print(f"Cache get error for key {key}: {e}")
-            return None
+            self.metrics.error(key)
+            value = None
+        self.metrics.latency("get", key, time.perf_counter() - started)
+        if value is None and self.persistent.handles(key):
+            value = (await self._read_through([key])).get(key)
+        self.metrics.lookup(key, value is not None)
+        return _decode(value)
     
-    async def set(self, key: str, value: Any, ttl: int = 3600) -> None:
-        """Set value in cache with TTL in seconds."""
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values in one round trip, in the order of ``keys`` (None if missing)."""
+        if not keys:
+            return []
+        started = time.perf_counter()
+        try:
+            values = await self._cache.get_many(keys)
+        except Exception as e:
+            print(f"Cache get_many error for {len(keys)} keys: {e}")
+            self.metrics.error(keys[0])
+            values = [None] * len(keys)
+        self.metrics.latency("get_many", keys[0], time.perf_counter() - started)
+        missing = [key for key, value in zip(keys, values) if value is None and self.persistent.handles(key)]
+        if missing:
+            found = await self._read_through(missing)
+            values = [found.get(key) if value is None else value for key, value in zip(keys, values)]
+        for key, value in zip(keys, values):
+            self.metrics.lookup(key, value is not None)
+        return [_decode(value) for value in values]
+    
+    async def _read_through(self, keys: List[str]) -> Dict[str, Any]:
+        """Stored values of ``keys`` from the persistent tier, copied back into the backend with their tags."""
+        found = await self.persistent.get_many(keys)
+        if found:
+            # Already written to the persistent tier, so not queued there again
+            pipe = CachePipeline(self._cache, transaction=False)
+            for key, (value, ttl, tags) in found.items():
+                pipe.set(key, value, ttl or 0, tags)
+            await pipe.execute()
+        return {key: value for key, (value, _, _) in found.items()}
+    
+    async def get_many_json(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several JSON values in one round trip."""
+        return [_parse_json(value) for value in await self.get_many(keys)]
+    
+    async def set_many(self, mapping: Dict[str, Any], ttl: int = 3600) -> None:
+        """Set several values with the same TTL in one round trip."""
+        if not mapping:
+            return
+        first_key = next(iter(mapping))
+        try:
+            encoded = {key: await self._encode(key, value) for key, value in mapping.items()}
+            for key, value in encoded.items():
+                self.persistent.put(key, value, ttl)
+                self.metrics.write(key, value)
+            started = time.perf_counter()
+            await self._cache.set_many(encoded, ttl)
+            self.metrics.latency("set_many", first_key, time.perf_counter() - started)
+        except Exception as e:
+            print(f"Cache set_many error for {len(mapping)} keys: {e}")
+            self.metrics.error(first_key)
+    
+    async def set_many_json(self, mapping: Dict[str, Any], ttl: int = 3600) -> None:
+        """Set several JSON values with the same TTL in one round trip."""
+        await self.set_many({key: json.dumps(value) for key, value in mapping.items()}, ttl)
+    
+    async def incr(self, key: str, amount: Union[int, float] = 1, ttl: Optional[int] = None) -> Optional[Union[int, float]]:
+        """
+        Atomically add ``amount`` to a counter and return the new value.
+        
+        ``ttl`` (re)sets the counter's expiry in the same round trip.
+        """
+        async with self.pipeline() as pipe:
+            pipe.incr(key, amount)
+            if ttl:
+                pipe.expire(key, ttl)
+        return pipe.results[0]
+    
+    async def hincr(self, key: str, field: str, amount: Union[int, float] = 1) -> Optional[Union[int, float]]:
+        """Atomically add ``amount`` to a hash field and return the new value."""
+        async with self.pipeline() as pipe:
+            pipe.hincr(key, field, amount)
+        return pipe.results[0]
+    
+    async def hset(self, key: str, mapping: Dict[str, Any]) -> None:
+        """Set fields of a hash."""
+        async with self.pipeline() as pipe:
+            pipe.hset(key, mapping)
+    
+    async def hgetall(self, key: str) -> Dict[str, Any]:
+        """All fields of a hash (empty if it does not exist)."""
+        async with self.pipeline() as pipe:
+            pipe.hgetall(key)
+        return pipe.results[0] or {}
+    
+    async def hdel(self, key: str, *fields: str) -> None:
+        """Delete fields of a hash."""
+        async with self.pipeline() as pipe:
+            pipe.hdel(key, *fields)
+    
+    async def expire(self, key: str, ttl: int) -> None:
+        """Set the expiry of an existing key."""
+        async with self.pipeline() as pipe:
+            pipe.expire(key, ttl)
+    
+    async def _encode(self, key: str, value: Any) -> Any:
+        """Compress a value for storage; big ones (audio) off the event loop."""
+        size = len(value) if isinstance(value, (str, bytes)) else 0
+        if size >= _COMPRESS_IN_THREAD_BYTES:
+            stored, raw_size = await asyncio.to_thread(self.codec.compress, value)
+        else:
+            stored, raw_size = self.codec.compress(value)
+        self.codec.record(key, stored, raw_size)
+        return stored
+    
+    def pipeline(self, transaction: bool = True) -> "CachePipeline":
+        """
+        Queue commands and send them in one round trip.
+        
+        Use as ``async with cache_service.pipeline() as pipe:``; the results
+        are in ``pipe.results`` after the block. With ``transaction`` Redis
+        applies the batch atomically (MULTI/EXEC).
+        """
+        return CachePipeline(self._cache, transaction, self.codec, self.persistent, self.metrics)
+    
+    async def set(self, key: str, value: Any, ttl: int = 3600, tags: Optional[List[str]] = None) -> None:
+        """
+        Set value in cache with TTL in seconds (large values are compressed).
+        
+        ``tags`` name what the value was derived from (e.g. ``location:<id>``);
+        ``invalidate_tag`` drops every entry stored with a tag.
+        """
         try:
-            await self._cache.set(key, value, ttl)
+            stored = await self._encode(key, value)
+            self.metrics.write(key, stored)
+            started = time.perf_counter()
+            if tags:
+                # Value, tag membership and tag expiry in one round trip
+                async with CachePipeline(self._cache, persistent=self.persistent) as pipe:
+                    pipe.set(key, stored, ttl, tags)
+            else:
+                self.persistent.put(key, stored, ttl)
+                await self._cache.set(key, stored, ttl)
+            self.metrics.latency("set", key, time.perf_counter() - started)
         except Exception as e:
             print(f"Cache set error for key {key}: {e}")
+            self.metrics.error(key)
+    
+    async def set_if_absent(self, key: str, value: Any, ttl: int) -> bool:
+        """Set ``key`` only if it does not exist (SET NX); True if this call set it."""
+        async with self.pipeline() as pipe:
+            pipe.set_nx(key, value, ttl)
+        return bool(pipe.results[0])
+    
+    async def get_or_refresh(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        soft_ttl: int,
+        hard_ttl: int,
+        tags: Optional[Callable[[Any], List[str]]] = None,
+    ) -> Any:
+        """
+        JSON value of ``key`` with stale-while-revalidate semantics.
+        
+        The value is stored for ``hard_ttl`` seconds, wrapped with the time
+        its ``soft_ttl`` runs out. Until then it is returned as is; after it
+        the stale value is still returned at once and ``loader`` runs in the
+        background. A SET NX lock makes sure only one worker refreshes a key
+        at a time. Only a miss awaits ``loader``; concurrent misses in a worker
+        share one call, and its errors are raised to every caller. Values
+        stored without the wrapper (plain ``set_json``) count as stale.
+        
+        ``tags`` maps a loaded value to its cache tags.
+        """
+        cached = await self.get_json(key)
+        if cached is not None:
+            soft_expiry = cached.get(_SOFT_EXPIRY_FIELD) if isinstance(cached, dict) else None
+            if soft_expiry is not None and time.time() < soft_expiry:
+                return cached["value"]
+            self.stale_served += 1
+            self._refresh_in_background(key, loader, soft_ttl, hard_ttl, tags)
+            return cached["value"] if soft_expiry is not None else cached
+        
+        load = self._loads.get(key)
+        if load is None:
+            load = asyncio.ensure_future(self._load(key, loader, soft_ttl, hard_ttl, tags))
+            self._loads[key] = load
+            load.add_done_callback(lambda _: self._loads.pop(key, None))
+        # Shielded so one caller giving up does not cancel the load for the others
+        return await asyncio.shield(load)
+    
+    async def _load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        soft_ttl: int,
+        hard_ttl: int,
+        tags: Optional[Callable[[Any], List[str]]],
+    ) -> Any:
+        value = await loader()
+        if value is not None:
+            envelope = {_SOFT_EXPIRY_FIELD: time.time() + soft_ttl, "value": value}
+            await self.set_json(key, envelope, ttl=hard_ttl, tags=tags(value) if tags else None)
+        return value
+    
+    def _refresh_in_background(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        soft_ttl: int,
+        hard_ttl: int,
+        tags: Optional[Callable[[Any], List[str]]],
+    ) -> None:
+        if key in self._refreshes:
+            return
+        task = asyncio.ensure_future(self._refresh(key, loader, soft_ttl, hard_ttl, tags))
+        self._refreshes[key] = task
+        task.add_done_callback(lambda _: self._refreshes.pop(key, None))
+    
+    async def _refresh(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        soft_ttl: int,
+        hard_ttl: int,
+        tags: Optional[Callable[[Any], List[str]]],
+    ) -> None:
+        # Never released: a successful refresh moves the soft expiry anyway, and
+        # after a failed one the lock spaces out the retries of all workers
+        if not await self.set_if_absent(f"lock:refresh:{key}", "1", self.refresh_lock_seconds):
+            return
+        self.refreshes_started += 1
+        try:
+            await self._load(key, loader, soft_ttl, hard_ttl, tags)
+        except Exception as e:
+            self.refresh_failures += 1
+            logging.getLogger(__name__).warning("Background refresh of %s failed, serving stale value: %s", key, e)
+    
+    async def invalidate_tag(self, tag: str) -> int:
+        """
+        Delete every entry stored with ``tag``; returns the number of keys deleted.
+        
+        The tag's set is walked with SSCAN and its members deleted page by
+        page, so the cost is proportional to the entries in the tag. Persisted
+        entries are deleted from cache_entries by their ``tags`` column too,
+        which also covers a tag set that Redis has evicted.
+        """
+        key = tag_key(tag)
+        deleted = 0
+        cursor = 0
+        while True:
+            async with self.pipeline(transaction=False) as pipe:
+                pipe.sscan(key, cursor, _TAG_SCAN_COUNT)
+            if pipe.results[0] is None:
+                break
+            cursor, members = pipe.results[0]
+            if members:
+                async with self.pipeline(transaction=False) as pipe:
+                    for member in members:
+                        pipe.delete(member)
+                deleted += sum(result or 0 for result in pipe.results)
+            if not cursor:
+                break
+        await self.delete(key)
+        persisted = await self.persistent.invalidate_tag(tag)
+        logging.getLogger(__name__).info(
+            "Invalidated cache tag %s: %d cached and %d persisted entries", tag, deleted, persisted
+        )
+        return deleted
     
     async def delete(self, key: str) -> None:
         """Delete value from cache."""
+        self.persistent.remove(key)
+        started = time.perf_counter()
         try:
             await self._cache.delete(key)
         except Exception as e:
             print(f"Cache delete error for key {key}: {e}")
+            self.metrics.error(key)
+        self.metrics.latency("delete", key, time.perf_counter() - started)
     
     async def get_json(self, key: str) -> Optional[dict]:
         """Get JSON value from cache."""
-        value = await self.get(key)
-        if value:
-            if isinstance(value, (bytes, bytearray)):
-                try:
-                    value = value.decode("utf-8")
-                except UnicodeDecodeError:
-                    return None
-            try:
-                return json.loads(value) if isinstance(value, str) else value
-            except (json.JSONDecodeError, TypeError):
-                return None
-        return None
+        return _parse_json(await self.get(key))
     
-    async def set_json(self, key: str, value: dict, ttl: int = 3600) -> None:
+    async def set_json(self, key: str, value: dict, ttl: int = 3600, tags: Optional[List[str]] = None) -> None:
         """Set JSON value in cache."""
         try:
             json_str = json.dumps(value) if not isinstance(value, str) else value
-            await self.set(key, json_str, ttl)
+            await self.set(key, json_str, ttl, tags)
         except Exception as e:
             print(f"Cache set JSON error for key {key}: {e}")
     
@@ -190,6 +1436,46 @@ class CacheService:
             return self._cache.size()
         except Exception:
             return 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Backend name, its occupancy and eviction counters where it keeps any,
+        compression ratios, and hit/miss/error counts, latency and value sizes per key prefix.
+        """
+        stats: Dict[str, Any] = {"backend": type(self._cache).__name__}
+        backend_stats = getattr(self._cache, "stats", None)
+        if backend_stats:
+            stats.update(backend_stats())
+        stats["compression"] = self.codec.stats()
+        stats["persistent"] = self.persistent.stats()
+        stats["prefixes"] = self.metrics.stats()
+        stats["stale_while_revalidate"] = {
+            "stale_served": self.stale_served,
+            "refreshes_started": self.refreshes_started,
+            "refresh_failures": self.refresh_failures,
+            "refreshing": len(self._refreshes),
+        }
+        return stats
+    
+    async def inspect_keyspace(self, sample_size: int = 1000) -> Dict[str, Any]:
+        """
+        Memory use of the backend by key prefix, from a sample of its keys.
+        
+        On Redis the sample is taken with SCAN and sized with MEMORY USAGE, so
+        it is safe to run against a busy server; counts and bytes are
+        extrapolated from the sample to DBSIZE.
+        """
+        samples, total_keys = await self._cache.sample_keys(sample_size)
+        return summarize_keyspace(samples, total_keys)
+    
+    async def close(self) -> None:
+        """Stop background refreshes and backend work, and flush pending persistent writes."""
+        for task in list(self._refreshes.values()):
+            task.cancel()
+        close = getattr(self._cache, "close", None)
+        if close:
+            await close()
+        await self.persistent.close()
 
 # Global cache instance
 _cache_instance = None
@@ -0,0 +1,290 @@
+"""
+Generation ledger for per-stage timing of tour generation.
+Records start/end times, provider, bytes, tokens and retries for every stage
+of the background pipeline and keeps rolling latency samples per stage.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .cache_service import cache_service
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stages in execution order
+STAGES = ("llm", "geocode", "tts", "transcript", "db", "transcode")
+
+class GenerationLedger:
+    """
+    Tracks each tour generation as a list of stage records.
+
+    Features:
+    - Structured per-tour stage ledger persisted in the cache
+    - In-flight index with current stage and age, one hash field per tour
+      so concurrent generations never overwrite each other's entries
+    - Rolling per-stage latency samples for percentile reporting
+    """
+
+    def __init__(self):
+        self.cache = cache_service
+        self.ledger_ttl = 86400 * 30  # keep ledgers for 30 days
+        self.sample_limit = 500  # rolling window of samples per stage
+        self.stale_after = timedelta(hours=2)  # drop in-flight entries of dead workers
+        self.inflight_key = "generation:inflight:started_at"  # tour id -> started_at
+        self.inflight_stage_key = "generation:inflight:stage"  # tour id -> current stage (JSON)
+        # Serialises read-modify-write updates of ledgers and samples within this process
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # Created lazily so it binds to the running event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _ledger_key(self, tour_id: Any) -> str:
+        return f"generation:ledger:{tour_id}"
+
+    def _samples_key(self, stage: str) -> str:
+        return f"generation:samples:{stage}"
+
+    async def start(self, tour_id: Any, **context) -> None:
+        """Open a ledger for a tour and register it as in-flight."""
+        now = datetime.utcnow().isoformat()
+        ledger = {
+            "tour_id": str(tour_id),
+            "started_at": now,
+            "ended_at": None,
+            "status": "generating",
+            "context": context,
+            "stages": [],
+        }
+        await self.cache.set_json(self._ledger_key(tour_id), ledger, ttl=self.ledger_ttl)
+        await self._register_inflight(tour_id, now)
+
+    async def start_repair(self, tour_id: Any, repair: str, **context) -> None:
+        """
+        Open a repair run on the existing ledger of a tour.
+
+        The original generation record is kept; the repair is appended to
+        ``repairs`` and the stages it runs are tagged with its name.
+        """
+        now = datetime.utcnow().isoformat()
+        try:
+            async with self.lock:
+                ledger = await self.cache.get_json(self._ledger_key(tour_id)) or {
+                    # The original ledger expired, keep the repair on its own
+                    "tour_id": str(tour_id),
+                    "started_at": None,
+                    "ended_at": None,
+                    "status": None,
+                    "context": {},
+                    "stages": [],
+                }
+                ledger.setdefault("repairs", []).append({
+                    "repair": repair,
+                    "started_at": now,
+                    "ended_at": None,
+                    "status": "generating",
+                    "context": context,
+                })
+                await self.cache.set_json(self._ledger_key(tour_id), ledger, ttl=self.ledger_ttl)
+        except Exception as e:
+            logger.error(f"Failed to record {repair} repair for tour {tour_id}: {str(e)}")
+        await self._register_inflight(tour_id, now)
+
+    @asynccontextmanager
+    async def stage(
+        self,
+        tour_id: Any,
+        stage: str,
+        provider: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Time a pipeline stage.
+
+        The yielded record can be annotated by the caller with ``bytes``,
+        ``tokens``, ``retries`` or any extra detail before the block exits.
+        """
+        record: Dict[str, Any] = {
+            "stage": stage,
+            "provider": provider,
+            "started_at": datetime.utcnow().isoformat(),
+            "ended_at": None,
+            "duration_ms": None,
+            "bytes": None,
+            "tokens": None,
+            "retries": 0,
+            "status": "running",
+        }
+        await self._set_inflight_stage(tour_id, stage, record["started_at"])
+        t0 = time.perf_counter()
+        try:
+            yield record
+            record["status"] = "ok"
+        except BaseException as e:
+            record["status"] = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+            record["error"] = str(e)[:255]
+            raise
+        finally:
+            record["duration_ms"] = int((time.perf_counter() - t0) * 1000)
+            record["ended_at"] = datetime.utcnow().isoformat()
+            try:
+                await self._append_stage(tour_id, record)
+            except Exception as e:
+                logger.error(f"Failed to record stage {stage} for tour {tour_id}: {str(e)}")
+
+    async def finish(self, tour_id: Any, status: str) -> None:
+        """Close the ledger and remove the tour from the in-flight index."""
+        try:
+            async with self.lock:
+                ledger = await self.cache.get_json(self._ledger_key(tour_id))
+                if ledger:
+                    ledger["status"] = status
+                    ledger["ended_at"] = datetime.utcnow().isoformat()
+                    await self.cache.set_json(self._ledger_key(tour_id), ledger, ttl=self.ledger_ttl)
+
+            await self._unregister_inflight(tour_id)
+        except Exception as e:
+            logger.error(f"Failed to finish ledger for tour {tour_id}: {str(e)}")
+
+    async def finish_repair(self, tour_id: Any, status: str) -> None:
+        """Close the open repair run, leaving the original generation status alone."""
+        try:
+            async with self.lock:
+                ledger = await self.cache.get_json(self._ledger_key(tour_id))
+                repair = self._open_repair(ledger)
+                if repair:
+                    repair["status"] = status
+                    repair["ended_at"] = datetime.utcnow().isoformat()
+                    await self.cache.set_json(self._ledger_key(tour_id), ledger, ttl=self.ledger_ttl)
+
+            await self._unregister_inflight(tour_id)
+        except Exception as e:
+            logger.error(f"Failed to finish repair for tour {tour_id}: {str(e)}")
+
+    async def get_ledger(self, tour_id: Any) -> Optional[Dict[str, Any]]:
+        """Get the stage ledger for a single tour."""
+        return await self.cache.get_json(self._ledger_key(tour_id))
+
+    async def list_in_flight(self) -> List[Dict[str, Any]]:
+        """List generations that have not finished, with current stage and age."""
+        now = datetime.utcnow()
+        async with self.cache.pipeline() as pipe:
+            pipe.hgetall(self.inflight_key)
+            pipe.hgetall(self.inflight_stage_key)
+        inflight, stages = (result or {} for result in pipe.results)
+
+        generations = []
+        stale = []
+        for tour_id, started in inflight.items():
+            started_at = datetime.fromisoformat(started)
+            if now - started_at > self.stale_after:
+                stale.append(tour_id)
+                continue
+
+            entry = json.loads(stages[tour_id]) if tour_id in stages else {}
+            stage_age = None
+            if entry.get("stage_started_at"):
+                stage_age = (now - datetime.fromisoformat(entry["stage_started_at"])).total_seconds()
+
+            generations.append({
+                "tour_id": tour_id,
+                "stage": entry.get("stage"),
+                "started_at": started,
+                "age_seconds": round((now - started_at).total_seconds(), 1),
+                "stage_age_seconds": round(stage_age, 1) if stage_age is not None else None,
+            })
+
+        if stale:
+            # Their workers died without finishing
+            async with self.cache.pipeline() as pipe:
+                pipe.hdel(self.inflight_key, *stale)
+                pipe.hdel(self.inflight_stage_key, *stale)
+
+        # Oldest first – those are the ones worth looking at
+        generations.sort(key=lambda g: g["age_seconds"], reverse=True)
+        return generations
+
+    async def get_stage_percentiles(self) -> Dict[str, Any]:
+        """Report p50/p90/p95/p99 latency in milliseconds for every stage."""
+        report = {}
+        for stage in STAGES:
+            samples = await self.cache.get_json(self._samples_key(stage)) or []
+            report[stage] = {
+                "count": len(samples),
+                "p50": self._percentile(samples, 50),
+                "p90": self._percentile(samples, 90),
+                "p95": self._percentile(samples, 95),
+                "p99": self._percentile(samples, 99),
+                "max": max(samples) if samples else None,
+            }
+        return report
+
+    async def _append_stage(self, tour_id: Any, record: Dict[str, Any]) -> None:
+        """Persist a finished stage record and feed the latency samples."""
+        async with self.lock:
+            ledger = await self.cache.get_json(self._ledger_key(tour_id))
+            if ledger:
+                repair = self._open_repair(ledger)
+                if repair:
+                    record["repair"] = repair["repair"]
+                ledger["stages"].append(record)
+                await self.cache.set_json(self._ledger_key(tour_id), ledger, ttl=self.ledger_ttl)
+
+            # Only successful stages are meaningful latency samples
+            if record["status"] == "ok":
+                key = self._samples_key(record["stage"])
+                samples = await self.cache.get_json(key) or []
+                samples.append(record["duration_ms"])
+                await self.cache.set_json(key, samples[-self.sample_limit:], ttl=self.ledger_ttl)
+
+    @staticmethod
+    def _open_repair(ledger: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """The repair run still in progress on a ledger, if any."""
+        repairs = (ledger or {}).get("repairs") or []
+        if repairs and repairs[-1]["ended_at"] is None:
+            return repairs[-1]
+        return None
+
+    async def _register_inflight(self, tour_id: Any, started_at: str) -> None:
+        """Add a tour to the in-flight index, clearing any stale current stage."""
+        try:
+            async with self.cache.pipeline() as pipe:
+                pipe.hset(self.inflight_key, {str(tour_id): started_at})
+                pipe.hdel(self.inflight_stage_key, str(tour_id))
+                pipe.expire(self.inflight_key, self.ledger_ttl)
+        except Exception as e:
+            logger.error(f"Failed to register tour {tour_id} as in-flight: {str(e)}")
+
+    async def _unregister_inflight(self, tour_id: Any) -> None:
+        async with self.cache.pipeline() as pipe:
+            pipe.hdel(self.inflight_key, str(tour_id))
+            pipe.hdel(self.inflight_stage_key, str(tour_id))
+
+    async def _set_inflight_stage(self, tour_id: Any, stage: str, started_at: str) -> None:
+        """Record the current stage of an in-flight tour (a single HSET, no read)."""
+        try:
+            async with self.cache.pipeline() as pipe:
+                pipe.hset(self.inflight_stage_key, {str(tour_id): json.dumps({"stage": stage, "stage_started_at": started_at})})
+                pipe.expire(self.inflight_stage_key, self.ledger_ttl)
+        except Exception as e:
+            logger.error(f"Failed to update in-flight index for tour {tour_id}: {str(e)}")
+
+    @staticmethod
+    def _percentile(samples: List[int], percentile: float) -> Optional[int]:
+        """Nearest-rank percentile of the samples."""
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        rank = max(1, math.ceil(percentile / 100 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
+
+# Global generation ledger instance
+generation_ledger = GenerationLedger()
@@ -49,74 +49,15 @@ class LocationService:
         # Generate cache key
         cache_key = f"location_search:{query}:{coordinates}:{radius}:{limit}"
         
-        # Try cache first
-        cached_result = await self.cache.get_json(cache_key)
-        if cached_result:
-            return cached_result
-        
         try:
-            # Build search parameters
-            params = {
-                "q": query,
-                "format": "json",
-                "addressdetails": 1,
-                "extratags": 1,
-                "limit": min(limit, 50),  # Cap at 50 for API limits
-                "dedupe": 1
-            }
-            
-            # Add viewbox for proximity search if coordinates provided
-            if coordinates:
-                lat, lng = coordinates
-                # Create a small bounding box around the coordinates
-                delta = radius / 111320  # Rough conversion from meters to degrees
-                params["viewbox"] = f"{lng-delta},{lat+delta},{lng+delta},{lat-delta}"
-                # Use bounded=1 for walkable tours (radius <= 2500m) to prevent distant matches
-                if radius <= 2500:
-                    params["bounded"] = 1
-            
-            # Make API request
-            url = f"{self.base_url}/search?" + urlencode(params)
-            
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(url, headers=self.headers)
-                response.raise_for_status()
-                
-                nominatim_results = response.json()
-                
-            # Process results
-            locations = []
-            suggestions = set()
-            
-            for item in nominatim_results:
-                # Extract location data
-                location_data = self._parse_nominatim_result(item)
-                if location_data:
-                    locations.append(location_data)
-                    
-                # Extract suggestions for autocomplete
-                if "display_name" in item:
-                    parts = item["display_name"].split(",")
-                    for part in parts[:3]:  # Take first 3 parts for suggestions
-                        cleaned = part.strip()
-                        if cleaned and len(cleaned) > 2:
-                            suggestions.add(cleaned)
-            
-            # Sort locations by relevance (Nominatim provides them sorted by importance)
-            # If coordinates provided, sort by distance
-            if coordinates and locations:
-                locations = self._sort_by_distance(locations, coordinates)
-            
-            result = {
-                "locations": locations[:limit],
-                "suggestions": list(suggestions)[:10],  # Limit suggestions
-                "total": len(locations)
-            }
-            
-            # Cache the result for 1 hour
-            await self.cache.set_json(cache_key, result, ttl=3600)
-            
-            return result
+            # Stale results are served at once and refreshed in the background
+            return await self.cache.get_or_refresh(
+                cache_key,
+                lambda: self._search_nominatim(query, coordinates, radius, limit),
+                soft_ttl=settings.CACHE_SOFT_TTL_LOCATION_SEARCH,
+                hard_ttl=settings.CACHE_TTL_LOCATION_SEARCH,
+                tags=lambda result: self.cache_tags(result["locations"]),
+            )
             
         except httpx.RequestError as e:
             # Return fallback results from database if API fails
@@ -148,95 +89,190 @@ class LocationService:
         lat, lng = coordinates
         cache_key = f"nearby:{lat}:{lng}:{radius}:{limit}"
         
-        # Try cache first
-        cached_result = await self.cache.get_json(cache_key)
-        if cached_result:
-            return cached_result
-        
         try:
-            # Use reverse geocoding to get the area info
-            reverse_params = {
-                "lat": lat,
-                "lon": lng,
-                "format": "json",
-                "addressdetails": 1,
-                "extratags": 1,
-                "zoom": 16  # Detailed level
-            }
-            
-            reverse_url = f"{self.base_url}/reverse?" + urlencode(reverse_params)
-            
-            # Search for nearby POIs
-            search_params = {
-                "format": "json",
-                "addressdetails": 1,
-                "extratags": 1,
-                "limit": limit * 2,  # Get more to filter
-                "viewbox": f"{lng-0.01},{lat+0.01},{lng+0.01},{lat-0.01}",
-                "bounded": 1
-            }
-            
-            # Search for common POI types
-            poi_types = [
-                "tourism=attraction",
-                "historic=monument",
-                "amenity=restaurant",
-                "tourism=museum",
-                "leisure=park"
-            ]
-            
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # Get reverse geocoding info
-                reverse_response = await client.get(reverse_url, headers=self.headers)
-                
-                # Search for POIs
-                poi_results = []
-                for poi_type in poi_types:
-                    search_params["q"] = f"[{poi_type}]"
-                    search_url = f"{self.base_url}/search?" + urlencode(search_params)
-                    
-                    try:
-                        poi_response = await client.get(search_url, headers=self.headers)
-                        if poi_response.status_code == 200:
-                            poi_results.extend(poi_response.json())
-                    except:
-                        continue  # Skip failed POI type searches
-            
-            # Process and filter results
-            locations = []
-            seen_locations = set()
-            
-            for item in poi_results:
-                location_data = self._parse_nominatim_result(item)
-                if location_data and location_data["name"] not in seen_locations:
-                    # Check if within radius
-                    item_lat = float(item.get("lat", 0))
-                    item_lng = float(item.get("lon", 0))
-                    distance = self._calculate_distance(lat, lng, item_lat, item_lng)
-                    
-                    if distance <= radius:
-                        location_data["distance"] = round(distance)
-                        locations.append(location_data)
-                        seen_locations.add(location_data["name"])
-            
-            # Sort by distance and limit results
-            locations = sorted(locations, key=lambda x: x.get("distance", float("inf")))[:limit]
-            
-            result = {
-                "locations": locations,
-                "center": coordinates,
-                "radius": radius
-            }
-            
-            # Cache for 30 minutes (nearby locations change less frequently)
-            await self.cache.set_json(cache_key, result, ttl=1800)
-            
-            return result
+            return await self.cache.get_or_refresh(
+                cache_key,
+                lambda: self._detect_nearby(coordinates, radius, limit),
+                soft_ttl=settings.CACHE_SOFT_TTL_NEARBY,
+                hard_ttl=settings.CACHE_TTL_NEARBY,
+                tags=lambda result: self.cache_tags(result["locations"]),
+            )
             
         except Exception as e:
             print(f"Nearby detection error: {e}")
             return {"locations": [], "center": coordinates, "radius": radius}
     
+    async def _search_nominatim(
+        self,
+        query: str,
+        coordinates: Optional[Tuple[float, float]],
+        radius: int,
+        limit: int
+    ) -> Dict[str, Any]:
+        """Uncached search; request errors are left to the caller."""
+        # Build search parameters
+        params = {
+            "q": query,
+            "format": "json",
+            "addressdetails": 1,
+            "extratags": 1,
+            "limit": min(limit, 50),  # Cap at 50 for API limits
+            "dedupe": 1
+        }
+
+        # Add viewbox for proximity search if coordinates provided
+        if coordinates:
+            lat, lng = coordinates
+            # Create a small bounding box around the coordinates
+            delta = radius / 111320  # Rough conversion from meters to degrees
+            params["viewbox"] = f"{lng-delta},{lat+delta},{lng+delta},{lat-delta}"
+            # Use bounded=1 for walkable tours (radius <= 2500m) to prevent distant matches
+            if radius <= 2500:
+                params["bounded"] = 1
+
+        # Make API request
+        url = f"{self.base_url}/search?" + urlencode(params)
+
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.get(url, headers=self.headers)
+            response.raise_for_status()
+
+            nominatim_results = response.json()
+
+        # Process results
+        locations = []
+        suggestions = set()
+
+        for item in nominatim_results:
+            # Extract location data
+            location_data = self._parse_nominatim_result(item)
+            if location_data:
+                locations.append(location_data)
+
+            # Extract suggestions for autocomplete
+            if "display_name" in item:
+                parts = item["display_name"].split(",")
+                for part in parts[:3]:  # Take first 3 parts for suggestions
+                    cleaned = part.strip()
+                    if cleaned and len(cleaned) > 2:
+                        suggestions.add(cleaned)
+
+        # Sort locations by relevance (Nominatim provides them sorted by importance)
+        # If coordinates provided, sort by distance
+        if coordinates and locations:
+            locations = self._sort_by_distance(locations, coordinates)
+
+        result = {
+            "locations": locations[:limit],
+            "suggestions": list(suggestions)[:10],  # Limit suggestions
+            "total": len(locations)
+        }
+
+        return result
+    
+    async def _detect_nearby(
+        self,
+        coordinates: Tuple[float, float],
+        radius: int,
+        limit: int
+    ) -> Dict[str, Any]:
+        """Uncached nearby detection: reverse geocoding plus one search per POI type."""
+        lat, lng = coordinates
+        
+        # Use reverse geocoding to get the area info
+        reverse_params = {
+            "lat": lat,
+            "lon": lng,
+            "format": "json",
+            "addressdetails": 1,
+            "extratags": 1,
+            "zoom": 16  # Detailed level
+        }
+
+        reverse_url = f"{self.base_url}/reverse?" + urlencode(reverse_params)
+
+        # Search for nearby POIs
+        search_params = {
+            "format": "json",
+            "addressdetails": 1,
+            "extratags": 1,
+            "limit": limit * 2,  # Get more to filter
+            "viewbox": f"{lng-0.01},{lat+0.01},{lng+0.01},{lat-0.01}",
+            "bounded": 1
+        }
+
+        # Search for common POI types
+        poi_types = [
+            "tourism=attraction",
+            "historic=monument",
+            "amenity=restaurant",
+            "tourism=museum",
+            "leisure=park"
+        ]
+
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            # Get reverse geocoding info
+            reverse_response = await client.get(reverse_url, headers=self.headers)
+
+            # Search for POIs
+            poi_results = []
+            for poi_type in poi_types:
+                search_params["q"] = f"[{poi_type}]"
+                search_url = f"{self.base_url}/search?" + urlencode(search_params)
+
+                try:
+                    poi_response = await client.get(search_url, headers=self.headers)
+                    if poi_response.status_code == 200:
+                        poi_results.extend(poi_response.json())
+                except:
+                    continue  # Skip failed POI type searches
+
+        # Process and filter results
+        locations = []
+        seen_locations = set()
+
+        for item in poi_results:
+            location_data = self._parse_nominatim_result(item)
+            if location_data and location_data["name"] not in seen_locations:
+                # Check if within radius
+                item_lat = float(item.get("lat", 0))
+                item_lng = float(item.get("lon", 0))
+                distance = self._calculate_distance(lat, lng, item_lat, item_lng)
+
+                if distance <= radius:
+                    location_data["distance"] = round(distance)
+                    locations.append(location_data)
+                    seen_locations.add(location_data["name"])
+
+        # Sort by distance and limit results
+        locations = sorted(locations, key=lambda x: x.get("distance", float("inf")))[:limit]
+
+        result = {
+            "locations": locations,
+            "center": coordinates,
+            "radius": radius
+        }
+
+        return result
+    
+    @staticmethod
+    def cache_tags(locations: List[Dict[str, Any]]) -> List[str]:
+        """
+        Cache tags of results that show ``locations``.
+        
+        ``location:<id>`` for stored locations and ``osm:<type>:<id>`` for
+        OpenStreetMap places, so correcting a place drops every cached
+        search, nearby and tour content result that shows it.
+        """
+        tags = []
+        for location in locations:
+            if location.get("id"):
+                tags.append(f"location:{location['id']}")
+            metadata = location.get("location_metadata") or {}
+            if metadata.get("osm_type") and metadata.get("osm_id"):
+                tags.append(f"osm:{metadata['osm_type']}:{metadata['osm_id']}")
+        return list(dict.fromkeys(tags))
+    
     def _parse_nominatim_result(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Parse a Nominatim result item into our location format."""
         try:
@@ -0,0 +1,340 @@
+"""
+Durable cache tier on the ``cache_entries`` table.
+
+Redis runs with ``allkeys-lru``, so tour audio and week-long LLM content can
+be evicted at any time. Keys under the configured prefixes are also kept in
+Postgres: ``CacheService`` writes them behind (batched upserts every
+``CACHE_PERSIST_FLUSH_SECONDS``) and reads them through on a Redis miss, so
+an eviction costs one indexed row read instead of an LLM or TTS call.
+
+Tags given to ``CacheService.set`` go to the ``tags`` column, so
+``invalidate_tag`` also removes persisted entries that are no longer in Redis.
+
+Hits are counted in memory and written as one batched ``hit_count`` /
+``last_accessed`` update per flush. Expired rows are deleted by a background
+sweep that visits one hash partition of the key space per tick, in small
+``SKIP LOCKED`` batches, so no sweep scans or locks the whole table and
+several workers can sweep side by side.
+"""
+
+import asyncio
+import base64
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Stand-in for a pending delete in the write-behind queue
+_DELETE = object()
+
+_SELECT_SQL = """
+SELECT cache_key, cache_value, cache_type, expires_at, tags
+FROM cache_entries
+WHERE cache_key = ANY(:keys)
+  AND is_active
+  AND (expires_at IS NULL OR expires_at > now())
+"""
+
+_UPSERT_SQL = """
+INSERT INTO cache_entries (id, cache_key, cache_value, cache_type, ttl_seconds, expires_at, tags, hit_count, is_active)
+VALUES (gen_random_uuid(), :cache_key, :cache_value, :cache_type, :ttl_seconds, :expires_at, :tags, 0, true)
+ON CONFLICT (cache_key) DO UPDATE SET
+    cache_value = EXCLUDED.cache_value,
+    cache_type = EXCLUDED.cache_type,
+    ttl_seconds = EXCLUDED.ttl_seconds,
+    expires_at = EXCLUDED.expires_at,
+    tags = EXCLUDED.tags,
+    is_active = true,
+    updated_at = now()
+"""
+
+_DELETE_SQL = "DELETE FROM cache_entries WHERE cache_key = ANY(:keys)"
+
+# Matches the GIN index from migrations/add_cache_entry_tags_index.sql
+_DELETE_TAG_SQL = "DELETE FROM cache_entries WHERE string_to_array(tags, ',') @> ARRAY[CAST(:tag AS text)]"
+
+_HITS_SQL = """
+UPDATE cache_entries
+SET hit_count = hit_count + :hits, last_accessed = now()
+WHERE cache_key = :cache_key
+"""
+
+_SWEEP_SQL = """
+DELETE FROM cache_entries
+WHERE id IN (
+    SELECT id FROM cache_entries
+    WHERE expires_at < now()
+      AND abs(hashtext(cache_key)) % :partitions = :partition
+    LIMIT :batch
+    FOR UPDATE SKIP LOCKED
+)
+"""
+
+def encode_row_value(value: Any) -> Tuple[str, str]:
+    """``(cache_value, cache_type)`` for a cache value as stored in Redis (text, or bytes as base64)."""
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(bytes(value)).decode("ascii"), "binary"
+    return str(value), "text"
+
+def decode_row_value(cache_value: str, cache_type: str) -> Any:
+    """Inverse of ``encode_row_value``."""
+    if cache_type == "binary":
+        return base64.b64decode(cache_value)
+    return cache_value
+
+class PersistentCache:
+    """Write-behind, read-through cache tier on ``cache_entries``."""
+
+    def __init__(self):
+        self.enabled = settings.CACHE_PERSIST_ENABLED and "postgresql" in settings.DATABASE_URL.lower()
+        self.prefixes = tuple(
+            prefix.strip() for prefix in settings.CACHE_PERSIST_PREFIXES.split(",") if prefix.strip()
+        )
+        self.min_ttl = settings.CACHE_PERSIST_MIN_TTL_SECONDS
+        self.flush_interval = settings.CACHE_PERSIST_FLUSH_SECONDS
+        self.batch_size = settings.CACHE_PERSIST_BATCH_SIZE
+        self.sweep_partitions = max(1, settings.CACHE_PERSIST_SWEEP_PARTITIONS)
+        # key -> (stored value, ttl, tags) or _DELETE; a later write replaces an unflushed one
+        self._pending: Dict[str, Any] = {}
+        self._flushing: Dict[str, Any] = {}  # batch being written; still answers reads
+        self._hits: Dict[str, int] = {}
+        self._partition = 0
+        self._flusher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_sweep = 0.0
+        self.reads = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.deletes = 0
+        self.swept = 0
+        self.errors = 0
+
+    def handles(self, key: str) -> bool:
+        """Whether ``key`` belongs to a persisted prefix."""
+        return self.enabled and key.startswith(self.prefixes)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Tuple[Any, Optional[int], Optional[List[str]]]]:
+        """
+        Stored values of the persisted ``keys`` found in the table.
+
+        Returns ``key -> (value, remaining ttl in seconds or None, tags)``;
+        writes that have not been flushed yet are answered from the queue.
+        """
+        found: Dict[str, Tuple[Any, Optional[int], Optional[List[str]]]] = {}
+        lookup = []
+        for key in dict.fromkeys(keys):
+            if not self.handles(key):
+                continue
+            pending = self._pending.get(key, self._flushing.get(key))
+            if pending is _DELETE:
+                continue
+            if pending is not None:
+                found[key] = pending
+            else:
+                lookup.append(key)
+        if lookup:
+            self.reads += 1
+            try:
+                rows = await self._select(lookup)
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Persistent cache read of %d keys failed: %s", len(lookup), e)
+                rows = []
+            now = datetime.now(timezone.utc)
+            for row in rows:
+                ttl = None
+                if row["expires_at"] is not None:
+                    ttl = max(1, int((row["expires_at"] - now).total_seconds()))
+                tags = row["tags"].split(",") if row["tags"] else None
+                found[row["cache_key"]] = (decode_row_value(row["cache_value"], row["cache_type"]), ttl, tags)
+                self._hits[row["cache_key"]] = self._hits.get(row["cache_key"], 0) + 1
+            self.hits += len(rows)
+            self.misses += len(lookup) - len(rows)
+            self._ensure_flusher()
+        return found
+
+    async def get(self, key: str) -> Optional[Tuple[Any, Optional[int], Optional[List[str]]]]:
+        """``(value, remaining ttl, tags)`` of a persisted key, or None."""
+        return (await self.get_many([key])).get(key)
+
+    def put(self, key: str, value: Any, ttl: int, tags: Optional[List[str]] = None) -> None:
+        """Queue a write of an already encoded value; short-lived entries are not persisted."""
+        if not self.handles(key) or (0 < ttl < self.min_ttl):
+            return
+        self._queue(key, (value, ttl if ttl > 0 else None, list(tags) if tags else None))
+
+    def remove(self, key: str) -> None:
+        """Queue a delete."""
+        if self.handles(key):
+            self._queue(key, _DELETE)
+
+    def _queue(self, key: str, entry: Any) -> None:
+        self._pending[key] = entry
+        self._ensure_flusher()
+        if len(self._pending) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def invalidate_tag(self, tag: str) -> int:
+        """Delete persisted entries with ``tag``, queued ones included; returns the rows deleted."""
+        if not self.enabled:
+            return 0
+        # A batch being written right now is deleted again by the next flush
+        for queue in (self._pending, self._flushing):
+            for key, entry in list(queue.items()):
+                if entry is not _DELETE and entry[2] and tag in entry[2]:
+                    self._queue(key, _DELETE)
+        try:
+            return await self._delete_tag(tag)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Persistent cache invalidation of tag %s failed: %s", tag, e)
+            return 0
+
+    async def flush(self) -> int:
+        """Write queued entries and hit counts; returns the number of entries written or deleted."""
+        pending, self._pending = self._pending, {}
+        hits, self._hits = self._hits, {}
+        if not pending and not hits:
+            return 0
+        upserts = {key: entry for key, entry in pending.items() if entry is not _DELETE}
+        deletes = [key for key, entry in pending.items() if entry is _DELETE]
+        self._flushing = pending
+        try:
+            await self._write(upserts, deletes, hits)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Persistent cache flush of %d entries failed: %s", len(pending), e)
+            # Requeue, but never over a newer write made while this one was in flight
+            for key, entry in pending.items():
+                self._pending.setdefault(key, entry)
+            for key, count in hits.items():
+                self._hits[key] = self._hits.get(key, 0) + count
+            return 0
+        finally:
+            self._flushing = {}
+        self.writes += len(upserts)
+        self.deletes += len(deletes)
+        return len(pending)
+
+    async def sweep(self) -> int:
+        """Delete expired rows of the next key partition; returns the number deleted."""
+        partition = self._partition
+        self._partition = (self._partition + 1) % self.sweep_partitions
+        removed = 0
+        try:
+            while True:
+                deleted = await self._delete_expired(partition)
+                removed += deleted
+                if deleted < self.batch_size:
+                    break
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Persistent cache sweep of partition %d failed: %s", partition, e)
+        self.swept += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Read/write counters and the size of the write-behind queue."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "prefixes": list(self.prefixes),
+            "pending": len(self._pending),
+            "reads": self.reads,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "writes": self.writes,
+            "deletes": self.deletes,
+            "swept": self.swept,
+            "errors": self.errors,
+        }
+
+    async def close(self) -> None:
+        """Stop the background task and flush what is still queued."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    def _ensure_flusher(self) -> None:
+        # Created lazily so it binds to the running event loop
+        if self._flusher is not None and not self._flusher.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._wakeup = asyncio.Event()
+        self._flusher = loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+            sweep_interval = settings.CACHE_PERSIST_SWEEP_INTERVAL_SECONDS
+            if sweep_interval > 0 and time.monotonic() - self._last_sweep >= sweep_interval:
+                self._last_sweep = time.monotonic()
+                removed = await self.sweep()
+                if removed:
+                    logger.debug("Swept %d expired persistent cache entries", removed)
+
+    async def _select(self, keys: List[str]) -> List[Any]:
+        from app.database import AsyncSessionLocal
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(text(_SELECT_SQL), {"keys": keys})).mappings().all()
+
+    async def _write(self, upserts: Dict[str, Tuple[Any, Optional[int], Optional[List[str]]]], deletes: List[str], hits: Dict[str, int]) -> None:
+        from app.database import AsyncSessionLocal
+        now = datetime.now(timezone.utc)
+        rows = []
+        for key, (value, ttl, tags) in upserts.items():
+            cache_value, cache_type = encode_row_value(value)
+            rows.append({
+                "cache_key": key,
+                "cache_value": cache_value,
+                "cache_type": cache_type,
+                "ttl_seconds": ttl,
+                "expires_at": now + timedelta(seconds=ttl) if ttl else None,
+                "tags": ",".join(tags) if tags else None,
+            })
+        async with AsyncSessionLocal() as db:
+            for start in range(0, len(rows), self.batch_size):
+                await db.execute(text(_UPSERT_SQL), rows[start:start + self.batch_size])
+            if deletes:
+                await db.execute(text(_DELETE_SQL), {"keys": deletes})
+            if hits:
+                await db.execute(text(_HITS_SQL), [{"cache_key": key, "hits": count} for key, count in hits.items()])
+            await db.commit()
+
+    async def _delete_expired(self, partition: int) -> int:
+        from app.database import AsyncSessionLocal
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                text(_SWEEP_SQL),
+                {"partitions": self.sweep_partitions, "partition": partition, "batch": self.batch_size},
+            )
+            await db.commit()
+            return result.rowcount or 0
+
+    async def _delete_tag(self, tag: str) -> int:
+        from app.database import AsyncSessionLocal
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(text(_DELETE_TAG_SQL), {"tag": tag})
+            await db.commit()
+            return result.rowcount or 0
@@ -0,0 +1,179 @@
+"""
+Full-text search over a user's tours.
+Matches against the trigger-maintained ``tours.search_vector`` column (see
+migrations/add_tour_search_vector.sql), ranks with ``ts_rank_cd`` and pages
+by keyset on ``(rank, id)`` so deep pages cost the same as the first one.
+"""
+
+import base64
+import binascii
+import json
+import logging
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Kept inline (not in a CTE) so the planner sees a constant and uses the GIN index
+_TSQUERY = "websearch_to_tsquery(tour_search_config(:language), :query)"
+_RANK = f"ts_rank_cd(t.search_vector, {_TSQUERY}, 32)"
+
+_SEARCH_SQL = f"""
+WITH page AS (
+    SELECT t.id, {_RANK} AS rank
+    FROM tours t
+    WHERE t.user_id = :user_id
+      AND t.language = :language
+      AND t.search_vector @@ {_TSQUERY}
+      {{after}}
+    ORDER BY rank DESC, t.id DESC
+    LIMIT :limit
+)
+SELECT
+    t.id, t.title, t.description, t.status, t.duration_minutes, t.created_at, page.rank,
+    ts_headline(
+        tour_search_config(:language), coalesce(nullif(t.content, ''), t.title),
+        {_TSQUERY}, :headline_options
+    ) AS snippet,
+    (
+        SELECT coalesce(jsonb_agg(m.segment ORDER BY m.position), '[]'::jsonb)
+        FROM (
+            SELECT s.position, jsonb_build_object(
+                'startTime', s.segment->'startTime',
+                'endTime', s.segment->'endTime',
+                'text', s.segment->>'text'
+            ) AS segment
+            FROM jsonb_array_elements(
+                CASE WHEN jsonb_typeof(t.transcript::jsonb) = 'array' THEN t.transcript::jsonb ELSE '[]'::jsonb END
+            ) WITH ORDINALITY AS s(segment, position)
+            WHERE to_tsvector(tour_search_config(:language), coalesce(s.segment->>'text', '')) @@ {_TSQUERY}
+            ORDER BY s.position
+            LIMIT :max_matches
+        ) m
+    ) AS matches
+FROM page
+JOIN tours t ON t.id = page.id
+ORDER BY page.rank DESC, page.id DESC
+"""
+
+_AFTER_SQL = f"AND ({_RANK}, t.id) < (:after_rank, :after_id)"
+
+class InvalidSearchCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+    pass
+
+def encode_cursor(rank: float, tour_id: Any) -> str:
+    """Opaque cursor pointing just after the result ``(rank, tour_id)``."""
+    payload = json.dumps([rank, str(tour_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[float, uuid.UUID]:
+    """Inverse of :func:`encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, tour_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(rank), uuid.UUID(tour_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidSearchCursor(f"Invalid search cursor: {cursor}") from e
+
+class SearchService:
+    """
+    Ranked tour search.
+
+    Features:
+    - Weighted title/description/narration matching via websearch syntax
+    - Highlighted snippets built only for the returned page
+    - Transcript segments containing the match, with timestamps for seeking
+    - Keyset pagination with opaque cursors
+    """
+
+    def __init__(self):
+        self.max_limit = 50
+        self.max_transcript_matches = 5
+        self.headline_options = (
+            "MaxFragments=2, MinWords=12, MaxWords=30, "
+            'FragmentDelimiter=" … ", StartSel=<mark>, StopSel=</mark>'
+        )
+
+    async def search_tours(
+        self,
+        db: AsyncSession,
+        user: User,
+        query: str,
+        language: str = "en",
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Search the user's tours.
+
+        Args:
+            db: Database session
+            user: Current user
+            query: Search terms (quotes, ``or`` and ``-`` are supported)
+            language: Tour language; selects the stemming configuration
+            limit: Page size
+            cursor: ``next_cursor`` of the previous page
+
+        Returns:
+            Dict with ``results`` in rank order and ``next_cursor`` (None on the last page)
+
+        Raises:
+            InvalidSearchCursor: if ``cursor`` is malformed
+        """
+        limit = max(1, min(limit, self.max_limit))
+        params: Dict[str, Any] = {
+            "user_id": user.id,
+            "query": query,
+            "language": language,
+            "limit": limit + 1,  # one extra row tells us whether there is a next page
+            "max_matches": self.max_transcript_matches,
+            "headline_options": self.headline_options,
+        }
+        binds = [bindparam("user_id", type_=UUID(as_uuid=True))]
+        after = ""
+        if cursor:
+            params["after_rank"], params["after_id"] = decode_cursor(cursor)
+            binds.append(bindparam("after_id", type_=UUID(as_uuid=True)))
+            after = _AFTER_SQL
+
+        statement = text(_SEARCH_SQL.format(after=after)).bindparams(*binds)
+        rows = (await db.execute(statement, params)).mappings().all()
+
+        results = [self._format_hit(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last["rank"], last["id"])
+
+        logger.info(f"Search '{query}' for user {user.id}: {len(results)} results{' (more)' if next_cursor else ''}")
+        return {"query": query, "results": results, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _format_hit(row: Any) -> Dict[str, Any]:
+        matches = row["matches"]
+        if isinstance(matches, str):
+            matches = json.loads(matches)
+        return {
+            "tour_id": str(row["id"]),
+            "title": row["title"],
+            "description": row["description"],
+            "status": row["status"],
+            "duration_minutes": row["duration_minutes"],
+            "created_at": row["created_at"],
+            "rank": row["rank"],
+            "snippet": row["snippet"],
+            "transcript_matches": [
+                match for match in (matches or [])
+                if match.get("text") and match.get("startTime") is not None
+            ],
+        }
+
+# Global search service instance
+search_service = SearchService()
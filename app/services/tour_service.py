@@ -4,13 +4,14 @@ Handles the complete tour lifecycle from generation to audio creation.
 """
 
 import asyncio
+import json
 import logging
 import uuid
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, update, and_
 from sqlalchemy.orm import selectinload
 
 from app.models.tour import Tour
@@ -20,8 +21,18 @@ from app.schemas.tour import TourCreate, TourUpdate, TourResponse, TourGeneratio
 from .ai_service import ai_service
 from .cache_service import cache_service
 from .location_service import location_service
+from .generation_ledger import generation_ledger
+from .audio_storage import audio_storage
+from .audio_broadcast import audio_broadcaster
+from .audio_pipeline import TTSPipeline
+from .audio_transcoder import ORIGINAL, audio_transcoder, negotiate_variant
+from .variant_service import variant_service
 from app.config import settings
 from app.utils.transcript_generator import TranscriptGenerator
+from app.utils.geo import haversine_m
+from app.utils.stop_sections import split_narration_by_stops
+from app.utils.tts_text import chunk_text_for_tts
+from app.utils.zip_stream import StreamingZip, ZipEntry
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +63,12 @@ class TourService:
     def __init__(self):
         self.ai_service = ai_service
         self.cache = cache_service
+        self.ledger = generation_ledger
+        self.audio_storage = audio_storage
+        self.audio_transcoder = audio_transcoder
+        self.audio_broadcaster = audio_broadcaster
+        self.variant_service = variant_service
+        self._repairing: set = set()  # tours whose audio is being repaired in this process
     
     async def generate_tour(
         self,
@@ -88,6 +105,15 @@ class TourService:
                 logger.info(f"Found existing tour {existing_tour.id} for user {user.id}, location {request.location_id}")
                 return existing_tour
             
+            # A longer tour in the same language can be shortened, and the same tour
+            # in another language translated, instead of writing one from scratch
+            variant_source = None
+            translation_source = None
+            if settings.TOUR_VARIANTS_ENABLED:
+                variant_source = await self._find_variant_source(db, request)
+            if not variant_source and settings.TOUR_TRANSLATION_ENABLED:
+                translation_source = await self._find_translation_source(db, request)
+            
             # Create tour record with generating status
             tour_data = TourCreate(
                 title="Generating...",  # Placeholder that meets min_length=1
@@ -102,13 +128,22 @@ class TourService:
             
             tour = Tour(**tour_data.model_dump())
             tour.status = "generating"
+            source = variant_source or translation_source
+            tour.source_tour_id = source.id if source else None
             
             db.add(tour)
             await db.commit()
             await db.refresh(tour)
             
             # Start background generation
-            asyncio.create_task(self._generate_tour_content_background(tour.id, location, request))
+            if variant_source:
+                logger.info(f"✂️ Deriving {request.duration_minutes}-minute variant of tour {variant_source.id} ({variant_source.duration_minutes} min)")
+                asyncio.create_task(self._derive_variant_background(tour.id, variant_source.id, location, request))
+            elif translation_source:
+                logger.info(f"🌐 Translating tour {translation_source.id} ({translation_source.language} -> {request.language})")
+                asyncio.create_task(self._translate_tour_background(tour.id, translation_source.id, location, request))
+            else:
+                asyncio.create_task(self._generate_tour_content_background(tour.id, location, request))
             
             logger.info(f"Tour generation started for user {user.id}, tour {tour.id}")
             return tour
@@ -227,6 +262,258 @@ class TourService:
             logger.error(f"Error checking for existing tours: {str(e)}")
             return None
     
+    async def _find_translation_source(
+        self,
+        db: AsyncSession,
+        request: TourGenerationRequest
+    ) -> Optional[Tour]:
+        """
+        Find a ready tour of the same location and duration in another language.
+        
+        Only tours with the requested interests qualify, so the translation
+        covers what the user asked for; tours of any user qualify since the
+        narration is about a public place. Tours store no narration style, so
+        it cannot be matched here.
+        
+        Args:
+            db: Database session
+            request: Tour generation request
+            
+        Returns:
+            Source tour to translate, None if there is none
+        """
+        try:
+            result = await db.execute(
+                select(Tour)
+                .where(
+                    and_(
+                        Tour.location_id == request.location_id,
+                        Tour.duration_minutes == request.duration_minutes,
+                        Tour.language != request.language,
+                        Tour.status == "ready"
+                    )
+                )
+                .order_by(Tour.created_at.desc())
+                .limit(20)
+            )
+            normalized_interests = sorted(set(request.interests))
+            for tour in result.scalars().all():
+                if tour.content and tour.audio_url and sorted(set(tour.interests or [])) == normalized_interests:
+                    return tour
+            return None
+            
+        except Exception as e:
+            logger.error(f"Error checking for translation sources: {str(e)}")
+            return None
+    
+    async def _find_variant_source(
+        self,
+        db: AsyncSession,
+        request: TourGenerationRequest
+    ) -> Optional[Tour]:
+        """
+        Find a ready, longer tour of the same location and language to shorten.
+        
+        Only tours with the requested interests qualify; of those, the shortest
+        tour that is still longer than requested wins (least to cut).
+        
+        Args:
+            db: Database session
+            request: Tour generation request
+            
+        Returns:
+            Source tour to derive a variant from, None if there is none
+        """
+        try:
+            result = await db.execute(
+                select(Tour)
+                .where(
+                    and_(
+                        Tour.location_id == request.location_id,
+                        Tour.language == request.language,
+                        Tour.duration_minutes > request.duration_minutes,
+                        Tour.status == "ready"
+                    )
+                )
+                .order_by(Tour.duration_minutes.asc(), Tour.created_at.desc())
+                .limit(20)
+            )
+            normalized_interests = sorted(set(request.interests))
+            for tour in result.scalars().all():
+                if tour.content and tour.walkable_stops and sorted(set(tour.interests or [])) == normalized_interests:
+                    return tour
+            return None
+            
+        except Exception as e:
+            logger.error(f"Error checking for variant sources: {str(e)}")
+            return None
+    
+    async def _derive_variant_background(
+        self,
+        tour_id: uuid.UUID,
+        source_tour_id: uuid.UUID,
+        location: Dict[str, Any],
+        request: TourGenerationRequest
+    ) -> None:
+        """
+        Background task to derive a shorter tour from a longer one.
+        
+        Stops are selected and condensed per stop in parallel; geocoded stops
+        are reused, and stops whose narration is unchanged reuse the source
+        tour's audio segments instead of being synthesized again.
+        """
+        from app.database import AsyncSessionLocal
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Tour).where(Tour.id == source_tour_id))
+            source = result.scalar_one_or_none()
+        if not source:
+            logger.warning(f"Variant source {source_tour_id} disappeared – generating tour {tour_id} from scratch")
+            await self._generate_tour_content_background(tour_id, location, request)
+            return
+        
+        final_status = "error"
+        await self.ledger.start(
+            tour_id,
+            location_id=str(request.location_id),
+            duration_minutes=request.duration_minutes,
+            language=request.language,
+            derived_from=str(source_tour_id),
+        )
+        try:
+            voice = request.voice if hasattr(request, "voice") and request.voice else settings.OPENAI_TTS_VOICE
+            
+            # ----------------- 1. Select and condense stops -----------------
+            try:
+                async with self.ledger.stage(tour_id, "llm", provider=self.ai_service.default_provider) as stage:
+                    variant = await self.variant_service.derive(source, location, request.duration_minutes)
+                    stage["sections"] = len(variant["sections"])
+                    stage["rewritten"] = variant["metadata"]["rewritten_sections"]
+                    stage["bytes"] = len(variant["content"].encode("utf-8"))
+            except Exception as e:
+                logger.exception("❌ Variant derivation failed")
+                await self._set_tour_error(tour_id, f"Variant error: {str(e)}")
+                return
+            
+            variant["metadata"].update({
+                "location_id": str(request.location_id),
+                "duration_minutes": request.duration_minutes,
+                "interests": request.interests,
+            })
+            await self._save_content(tour_id, variant, status="content_ready")
+            
+            # ----------------- 2. Reuse the geocoded stops -----------------
+            if variant["walkable_stops"]:
+                try:
+                    await self._save_walkable_stops(tour_id, variant, variant["walkable_stops"])
+                except Exception as save_error:
+                    logger.error(f"❌ Failed to save walkable stops: {save_error}")
+            
+            # ----------------- 3. Audio: copy unchanged segments, synthesize the rest -----------------
+            pipeline = TTSPipeline(tour_id, voice=voice, speed=settings.TTS_CANONICAL_SPEED, language=request.language)
+            reused = self.variant_service.submit(pipeline, variant)
+            logger.info(f"♻️ Reusing {reused}/{len(pipeline.chunks)} audio segments from tour {source_tour_id}")
+            
+            final_status = await self._finalize_tour(
+                tour_id, variant, variant["walkable_stops"], voice, pipeline=pipeline, sections=variant["sections"]
+            )
+            
+        except Exception as e:
+            logger.exception(f"Background variant derivation failed for tour {tour_id}")
+            await self._set_tour_error(tour_id, f"Variant derivation failed: {str(e)}")
+        finally:
+            await self.audio_broadcaster.release(tour_id)
+            await self.ledger.finish(tour_id, final_status)
+    
+    async def _translate_tour_background(
+        self,
+        tour_id: uuid.UUID,
+        source_tour_id: uuid.UUID,
+        location: Dict[str, Any],
+        request: TourGenerationRequest
+    ) -> None:
+        """
+        Background task to translate an existing tour into the requested language.
+        
+        The source tour's geocoded stops and stop structure are reused as-is, so
+        there is no creative generation and no geocoding; only the narration is
+        translated (per stop, in parallel) and synthesized.
+        """
+        from app.database import AsyncSessionLocal
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Tour).where(Tour.id == source_tour_id))
+            source = result.scalar_one_or_none()
+        if not source:
+            logger.warning(f"Translation source {source_tour_id} disappeared – generating tour {tour_id} from scratch")
+            await self._generate_tour_content_background(tour_id, location, request)
+            return
+        
+        final_status = "error"
+        await self.ledger.start(
+            tour_id,
+            location_id=str(request.location_id),
+            duration_minutes=request.duration_minutes,
+            language=request.language,
+            translated_from=str(source_tour_id),
+        )
+        try:
+            voice = request.voice if hasattr(request, "voice") and request.voice else settings.OPENAI_TTS_VOICE
+            stops = source.walkable_stops or []
+            sections = split_narration_by_stops(source.content, stops)
+            
+            # ----------------- 1. Translate the narration per stop -----------------
+            try:
+                async with self.ledger.stage(tour_id, "llm", provider=self.ai_service.default_provider) as stage:
+                    content_data = await self.ai_service.translate_tour(
+                        title=source.title,
+                        sections=sections,
+                        stops=stops,
+                        source_language=source.language,
+                        target_language=request.language,
+                    )
+                    stage["provider"] = content_data["metadata"]["actual_provider"]
+                    stage["sections"] = len(sections)
+                    stage["tokens"] = self.ai_service._estimate_tokens(content_data)
+                    stage["bytes"] = len(content_data["content"].encode("utf-8"))
+                if not content_data["content"].strip():
+                    raise TourGenerationError("Translation returned no narration")
+            except Exception as e:
+                logger.exception("❌ Tour translation failed")
+                await self._set_tour_error(tour_id, f"Translation error: {str(e)}")
+                return
+            
+            content_data["metadata"].update({
+                "location_id": str(request.location_id),
+                "duration_minutes": request.duration_minutes,
+                "interests": request.interests,
+                "translated_from": str(source_tour_id),
+            })
+            await self._save_content(tour_id, content_data, status="content_ready")
+            
+            # ----------------- 2. Reuse the geocoded stops -----------------
+            translated_stops = content_data["walkable_stops"]
+            if translated_stops:
+                walking = {
+                    "total_walking_distance": source.total_walking_distance,
+                    "estimated_walking_time": source.estimated_walking_time,
+                    "difficulty_level": source.difficulty_level or "easy",
+                }
+                try:
+                    await self._save_walkable_stops(tour_id, walking, translated_stops)
+                    logger.info(f"💾 Reused {len(translated_stops)} geocoded stops from tour {source_tour_id}")
+                except Exception as save_error:
+                    logger.error(f"❌ Failed to save walkable stops: {save_error}")
+            
+            final_status = await self._finalize_tour(
+                tour_id, content_data, translated_stops, voice, sections=content_data["sections"], language=request.language
+            )
+            
+        except Exception as e:
+            logger.exception(f"Background translation failed for tour {tour_id}")
+            await self._set_tour_error(tour_id, f"Translation failed: {str(e)}")
+        finally:
+            await self.audio_broadcaster.release(tour_id)
+            await self.ledger.finish(tour_id, final_status)
+    
     async def _generate_tour_content_background(
         self,
         tour_id: uuid.UUID,
@@ -234,26 +521,66 @@ class TourService:
         request: TourGenerationRequest
     ) -> None:
         """Background task to generate tour content and audio"""
+        final_status = "error"
+        await self.ledger.start(
+            tour_id,
+            location_id=str(request.location_id),
+            duration_minutes=request.duration_minutes,
+            language=request.language,
+        )
         try:
             logger.info(f"🚀 Starting background generation for tour {tour_id}")
             coords = location.get('coordinates', [0, 0])
             logger.info(f"📍 Location: {location.get('name', 'Unknown')} ({coords[0]}, {coords[1]})")
             logger.info(f"⚙️  Parameters: interests={request.interests}, duration={request.duration_minutes}min, language={request.language}")
 
+            voice = request.voice if hasattr(request, "voice") and request.voice else settings.OPENAI_TTS_VOICE
+            narration_style = request.narration_style if hasattr(request, "narration_style") else "conversational"
+
             # ----------------- 1. Generate textual content -----------------
             logger.info(f"🤖 Step 1: Starting LLM content generation...")
+            pipeline: Optional[TTSPipeline] = None
             try:
-                content_data = await self.ai_service.generate_tour_content(
-                    location=location,
-                    interests=request.interests,
-                    duration_minutes=request.duration_minutes,
-                    language=request.language,
-                    narration_style=request.narration_style if hasattr(request, "narration_style") else "conversational",
-                )
+                async with self.ledger.stage(tour_id, "llm", provider=self.ai_service.default_provider) as stage:
+                    content_data = None
+                    if settings.TTS_PIPELINE_ENABLED:
+                        # Synthesize narration chunks while the LLM is still writing
+                        pipeline = TTSPipeline(tour_id, voice=voice, speed=settings.TTS_CANONICAL_SPEED, language=request.language)
+                        try:
+                            content_data = await self.ai_service.generate_tour_content_streaming(
+                                location=location,
+                                interests=request.interests,
+                                duration_minutes=request.duration_minutes,
+                                on_narration=pipeline.feed,
+                                language=request.language,
+                                narration_style=narration_style,
+                            )
+                            logger.info(f"🔀 Pipelined generation: {len(pipeline.chunks)} TTS chunks started while streaming")
+                        except Exception as e:
+                            logger.warning(f"⚠️  Pipelined generation failed ({e}) – falling back to standard generation")
+                            pipeline.cancel()
+                            pipeline = None
+                            stage["retries"] += 1
+
+                    if content_data is None:
+                        content_data = await self.ai_service.generate_tour_content(
+                            location=location,
+                            interests=request.interests,
+                            duration_minutes=request.duration_minutes,
+                            language=request.language,
+                            narration_style=narration_style,
+                        )
+                    stage["provider"] = content_data["metadata"]["actual_provider"]
+                    stage["tokens"] = self.ai_service._estimate_tokens(content_data)
+                    stage["bytes"] = len(content_data["content"].encode("utf-8"))
+                    if content_data["metadata"].get("fallback_used"):
+                        stage["retries"] += 1
                 logger.info(f"✅ LLM content generated successfully: {len(content_data['content'])} chars, provider={content_data['metadata']['actual_provider']}")
             except Exception as e:
                 # Capture stack-trace for easier debugging
                 logger.exception("❌ LLM content generation failed")
+                if pipeline:
+                    pipeline.cancel()
                 await self._set_tour_error(tour_id, f"LLM error: {str(e)}")
                 return
 
@@ -268,7 +595,10 @@ class TourService:
             logger.info(f"🗺️  Step 2: Processing walkable stops...")
             geocoded_stops = []
             try:
-                geocoded_stops = await self._process_walkable_tour_content(content_data, location)
+                async with self.ledger.stage(tour_id, "geocode", provider="nominatim") as stage:
+                    geocoded_stops = await self._process_walkable_tour_content(content_data, location)
+                    stage["stops_requested"] = len(content_data.get("walkable_stops") or [])
+                    stage["stops_geocoded"] = len(geocoded_stops)
                 if geocoded_stops:
                     logger.info(f"✅ Successfully geocoded {len(geocoded_stops)} walkable stops")
                     
@@ -285,107 +615,177 @@ class TourService:
                 logger.error(f"❌ Walkable stops processing failed: {e}")
                 # Continue with tour generation even if walkable stops fail
             
-            logger.info("🎵 Step 3: Starting audio generation...")
-
-            # ----------------- 2. Generate audio (TTS) ---------------------
-            audio_data: Optional[bytes] = None
+            # Geocoded stops keep the route order; fall back to the raw LLM stops
+            stops = geocoded_stops or content_data.get("walkable_stops") or []
+            final_status = await self._finalize_tour(
+                tour_id, content_data, stops, voice, pipeline=pipeline, language=request.language
+            )
+                    
+        except Exception as e:
+            logger.exception(f"Background generation failed for tour {tour_id}")
+            
+            # Update tour status to error
             try:
-                import asyncio, time
-                full_text = content_data["content"]
-                
-                # Use chunked generation for long content, simple generation for short content
-                if len(full_text) > 4000:
-                    logger.info(f"📝 Long content detected: {len(full_text)} chars - using chunked TTS generation")
-                    audio_text = full_text  # Use full text with chunking
-                else:
-                    logger.info(f"📝 Short content: {len(full_text)} chars - using standard TTS generation")
-                    audio_text = self._truncate_for_tts(full_text)
-                
-                voice = request.voice if hasattr(request, "voice") and request.voice else settings.OPENAI_TTS_VOICE
-                logger.info(f"🎤 Generating audio: voice={voice}, speed=1.2")
-                
-                t0 = time.perf_counter()
-                if len(full_text) > 4000:
-                    # Use chunked generation with longer timeout for multiple API calls
-                    audio_data = await asyncio.wait_for(
-                        self.ai_service.generate_audio_chunked(
-                            text=audio_text,
-                            voice=voice,
-                            speed=1.2,
-                        ),
-                        timeout=300,  # 5 minutes for chunked generation
-                    )
+                from app.database import AsyncSessionLocal
+                async with AsyncSessionLocal() as db:
+                    result = await db.execute(select(Tour).where(Tour.id == tour_id))
+                    tour = result.scalar_one_or_none()
+                    
+                    if tour:
+                        tour.status = "error"
+                        tour.description = f"Generation failed: {str(e)}"
+                        await db.commit()
+                        
+            except Exception as update_error:
+                logger.error(f"Failed to update tour status to error: {str(update_error)}")
+        finally:
+            await self.audio_broadcaster.release(tour_id)
+            await self.ledger.finish(tour_id, final_status)
+    
+    async def _finalize_tour(
+        self,
+        tour_id: uuid.UUID,
+        content_data: Dict[str, Any],
+        stops: List[Dict[str, Any]],
+        voice: str,
+        pipeline: Optional[TTSPipeline] = None,
+        sections: Optional[List[Dict[str, Any]]] = None,
+        language: str = "en"
+    ) -> str:
+        """
+        Synthesize audio for finished content, align the transcript, mark the
+        tour ready and encode the audio variants.
+        
+        Args:
+            tour_id: Tour being generated
+            content_data: Title, content and metadata of the tour
+            stops: Walkable stops in route order
+            voice: TTS voice
+            pipeline: TTS pipeline already fed (while streaming, or with reused segments)
+            sections: Narration already split by stop (split from the content otherwise)
+            language: Language of the narration, for the pipeline created here
+            
+        Returns:
+            Final tour status
+        """
+        final_status = "error"
+        logger.info("🎵 Step 3: Starting audio generation...")
+        # Regenerations must use the same voice to hit the segment cache
+        content_data["metadata"]["voice"] = voice
+
+        # ----------------- 2. Generate audio (TTS) ---------------------
+        audio_data: Optional[bytes] = None
+        try:
+            import asyncio, time
+            full_text = content_data["content"]
+
+            logger.info(f"🎤 Generating audio: voice={voice}, speed={settings.TTS_CANONICAL_SPEED}")
+
+            t0 = time.perf_counter()
+            async with self.ledger.stage(tour_id, "tts") as stage:
+                if pipeline:
+                    # Most chunks are already synthesized or in flight
+                    logger.info(f"🔀 Waiting for {len(pipeline.chunks)} pipelined TTS chunks")
+                    if sections is None:
+                        # Streamed chunks were cut before the stops were known
+                        pipeline.assign_stops(full_text, stops)
+                    stage["first_audio_ms"] = pipeline.first_audio_ms
                 else:
-                    # Use standard generation
-                    audio_data = await asyncio.wait_for(
-                        self.ai_service.generate_audio(
-                            text=audio_text,
-                            voice=voice,
-                            speed=1.2,
-                        ),
-                        timeout=180,  # 3 minutes for standard generation
-                    )
-                
-                duration_ms = int((time.perf_counter() - t0) * 1000)
-                audio_size = len(audio_data) if audio_data else 0
-                logger.info(f"✅ TTS generated successfully: {audio_size} bytes in {duration_ms}ms")
-                
-            except asyncio.TimeoutError:
-                timeout_duration = "300s" if len(content_data["content"]) > 4000 else "180s"
-                logger.warning(f"⏰ TTS generation timed out ({timeout_duration}) – proceeding without audio")
-            except Exception as e:
-                logger.exception(f"❌ TTS generation failed: {str(e)} – proceeding without audio")
+                    # One or more segments per stop so listeners can skip between stops
+                    sections = sections or split_narration_by_stops(full_text, stops)
+                    logger.info(f"📝 {len(full_text)} chars in {len(sections)} stop sections - generating segmented audio")
+                    pipeline = TTSPipeline(tour_id, voice=voice, speed=settings.TTS_CANONICAL_SPEED, language=language)
+                    pipeline.submit_sections(sections)
+                try:
+                    audio_data = await asyncio.wait_for(pipeline.finish(), timeout=settings.TTS_TIMEOUT_SECONDS)
+                finally:
+                    stage["retries"] = pipeline.retries
+                    stage["resumed"] = pipeline.resumed
+                    # Failover and hedging can spread a tour over several providers
+                    stage["provider"] = pipeline.provider
+                    stage["providers"] = pipeline.providers
+                stage["chunks"] = len(pipeline.chunks)
+                stage["bytes"] = len(audio_data) if audio_data else 0
+                stage["characters"] = len(full_text)
 
-            # Store audio file (for now, we'll use cache - in production, use cloud storage)
-            audio_key = f"audio:tour:{tour_id}"
-            import base64
-            audio_url: Optional[str] = None
-            if audio_data:
-                logger.info(f"💾 Caching audio data: {len(audio_data)} bytes")
-                audio_b64 = base64.b64encode(audio_data).decode('utf-8')
-                await self.cache.set(audio_key, audio_b64, ttl=86400 * 30)
-                audio_url = f"{settings.API_BASE_URL}/tours/{tour_id}/audio"
-                logger.info(f"🔗 Audio URL set: {audio_url}")
-            else:
-                logger.warning("⚠️  No audio data to cache - tour will be text-only")
+            duration_ms = int((time.perf_counter() - t0) * 1000)
+            audio_size = len(audio_data) if audio_data else 0
+            logger.info(f"✅ TTS generated successfully: {audio_size} bytes in {duration_ms}ms")
 
-            # ----------------- 3. Generate transcript segments -----------------
-            transcript_segments = None
-            try:
-                # Estimate audio duration (for transcript timing)
+        except asyncio.TimeoutError:
+            logger.warning(f"⏰ TTS generation timed out ({settings.TTS_TIMEOUT_SECONDS}s) – proceeding without audio, finished segments are kept for repair")
+            content_data["metadata"]["audio_error"] = "timeout"
+        except Exception as e:
+            logger.exception(f"❌ TTS generation failed: {str(e)} – proceeding without audio, finished segments are kept for repair")
+            content_data["metadata"]["audio_error"] = str(e)[:200]
+        else:
+            content_data["metadata"].pop("audio_error", None)
+
+        # Store audio file (for now, we'll use cache - in production, use cloud storage)
+        audio_url: Optional[str] = None
+        if audio_data:
+            logger.info(f"💾 Caching audio data: {len(audio_data)} bytes")
+            audio_data = await self.audio_storage.put_tour_audio(tour_id, audio_data)
+            # New listeners get the stored audio from now on
+            await self.audio_broadcaster.release(tour_id)
+            audio_url = f"{settings.API_BASE_URL}/tours/{tour_id}/audio"
+            logger.info(f"🔗 Audio URL set: {audio_url}")
+        else:
+            logger.warning("⚠️  No audio data to cache - tour will be text-only")
+
+        # ----------------- 3. Generate transcript segments -----------------
+        transcript_segments = None
+        try:
+            async with self.ledger.stage(tour_id, "transcript") as stage:
+                audio_chunks = self._measured_audio_chunks(pipeline, audio_data)
+                # Speech is synthesized at TTS_CANONICAL_SPEED, so the 150 WPM estimate is scaled too
                 estimated_duration = TranscriptGenerator.estimate_audio_duration(
                     content_data["content"], 
-                    words_per_minute=150
+                    words_per_minute=int(150 * settings.TTS_CANONICAL_SPEED)
                 )
-                
-                # Generate transcript segments
-                transcript_segments = TranscriptGenerator.generate_transcript_segments(
+                if audio_chunks:
+                    method = "mp3_frames"
+                else:
+                    method = "estimate"
+                    audio_chunks = [(content_data["content"], estimated_duration)]
+
+                # Anchor transcript timings to the synthesized TTS chunks
+                transcript_segments, alignment = TranscriptGenerator.align_transcript_segments(
                     content_data["content"],
-                    estimated_duration
+                    audio_chunks
                 )
-                
-                if transcript_segments and len(transcript_segments) > 0:
-                    logger.info(
-                        "Transcript generated",
-                        extra={
-                            "tour_id": str(tour_id),
-                            "segments": len(transcript_segments),
-                            "duration": estimated_duration
-                        }
-                    )
-                else:
-                    logger.warning(f"Transcript generation returned empty segments for tour {tour_id}")
-                    transcript_segments = []  # Set to empty array instead of None
-            except Exception as e:
-                logger.error(f"Transcript generation failed for tour {tour_id}: {e}")
+                alignment["method"] = method
+                if method == "mp3_frames" and "audio_duration" in alignment:
+                    # How far the word-rate estimate would have been off
+                    alignment["estimate_error_seconds"] = round(abs(estimated_duration - alignment["audio_duration"]), 2)
+                content_data["metadata"]["transcript_alignment"] = alignment
+                stage["segments"] = len(transcript_segments or [])
+                stage["alignment"] = method
+
+            if transcript_segments and len(transcript_segments) > 0:
+                logger.info(
+                    "Transcript generated",
+                    extra={
+                        "tour_id": str(tour_id),
+                        "segments": len(transcript_segments),
+                        "duration": alignment.get("audio_duration"),
+                        "alignment": method
+                    }
+                )
+            else:
+                logger.warning(f"Transcript generation returned empty segments for tour {tour_id}")
                 transcript_segments = []  # Set to empty array instead of None
-            
-            # Update tour in database
-            from app.database import AsyncSessionLocal
+        except Exception as e:
+            logger.error(f"Transcript generation failed for tour {tour_id}: {e}")
+            transcript_segments = []  # Set to empty array instead of None
+
+        # Update tour in database
+        from app.database import AsyncSessionLocal
+        async with self.ledger.stage(tour_id, "db") as stage:
             async with AsyncSessionLocal() as db:
                 result = await db.execute(select(Tour).where(Tour.id == tour_id))
                 tour = result.scalar_one_or_none()
-                
+
                 if tour:
                     tour.title = content_data["title"]
                     tour.content = content_data["content"]
@@ -395,35 +795,32 @@ class TourService:
                     tour.llm_provider = content_data["metadata"]["actual_provider"]
                     tour.llm_model = content_data["metadata"]["model"]
                     tour.generation_params = content_data["metadata"]
-                    
+
                     await db.commit()
+                    final_status = "ready"
                     logger.info(f"🎉 Tour generation completed successfully!")
                     logger.info(f"📊 Final metrics: {len(transcript_segments) if transcript_segments else 0} transcript segments")
                     logger.info(f"🔄 Status updated to 'ready' for tour {tour_id}")
-                    
+
                     # Verify the update was committed by re-reading
                     await db.refresh(tour)
                     logger.info(f"✅ Database commit verified: status={tour.status}, title='{tour.title}'")
                 else:
                     logger.error(f"❌ Tour {tour_id} not found during final update!")
-                    
-        except Exception as e:
-            logger.exception(f"Background generation failed for tour {tour_id}")
-            
-            # Update tour status to error
+
+        # ----------------- 4. Encode compact audio variants -----------------
+        # The tour is already playable; mobile variants are encoded afterwards
+        if audio_data and self.audio_transcoder.available:
             try:
-                from app.database import AsyncSessionLocal
-                async with AsyncSessionLocal() as db:
-                    result = await db.execute(select(Tour).where(Tour.id == tour_id))
-                    tour = result.scalar_one_or_none()
-                    
-                    if tour:
-                        tour.status = "error"
-                        tour.description = f"Generation failed: {str(e)}"
-                        await db.commit()
-                        
-            except Exception as update_error:
-                logger.error(f"Failed to update tour status to error: {str(update_error)}")
+                async with self.ledger.stage(tour_id, "transcode", provider="ffmpeg") as stage:
+                    sizes = await self.audio_transcoder.create_variants(tour_id, audio_data)
+                    stage["bytes"] = sum(sizes.values())
+                    stage["variants"] = sizes
+                logger.info(f"🗜️ Audio variants encoded from {len(audio_data)} bytes: {sizes}")
+            except Exception as e:
+                logger.error(f"❌ Audio transcoding failed: {e} – original audio will be served")
+
+        return final_status
     
     async def get_tour(
         self,
@@ -517,6 +914,7 @@ class TourService:
                     "estimated_walking_time": getattr(tour, 'estimated_walking_time', None),
                     "difficulty_level": getattr(tour, 'difficulty_level', None) or "easy",
                     "route_type": getattr(tour, 'route_type', None) or "walkable",
+                    "source_tour_id": str(tour.source_tour_id) if tour.source_tour_id else None,
                     "location": {
                         "id": str(tour.location.id),
                         "name": tour.location.name,
@@ -573,31 +971,28 @@ class TourService:
                 raise TourServiceError("Audio not available for this tour")
             
             # Get audio from cache
-            audio_key = f"audio:tour:{tour_id}"
+            audio_key = self.audio_storage.tour_key(tour_id)
             logger.info(f"Looking for audio in cache with key: {audio_key}")
-            audio_b64 = await self.cache.get(audio_key)
+            audio_bytes = await self.audio_storage.get_tour_audio(tour_id)
             
-            if not audio_b64:
+            if not audio_bytes:
                 logger.error(f"Audio data not found in cache for key: {audio_key}")
                 logger.info(f"Attempting to regenerate missing audio for tour {tour_id}")
                 
                 # Try to regenerate audio from existing content
                 if tour.content:
                     try:
-                        # Generate audio from existing content (truncate to TTS limit)
-                        audio_text = self._truncate_for_tts(tour.content)
-                        
-                        logger.info(f"Regenerating audio for {len(audio_text)} characters")
-                        audio_data = await self.ai_service.generate_audio(
-                            text=audio_text,
-                            voice=request.voice if hasattr(request, "voice") and request.voice else settings.OPENAI_TTS_VOICE,
-                            speed=1.2
+                        # Unchanged paragraphs come from the segment-level TTS cache
+                        logger.info(f"Regenerating audio for {len(tour.content)} characters")
+                        audio_data = await self.ai_service.generate_audio_chunked(
+                            text=tour.content,
+                            voice=self._tour_voice(tour),
+                            speed=settings.TTS_CANONICAL_SPEED,
+                            language=tour.language
                         )
                         
                         # Store regenerated audio
-                        import base64
-                        audio_b64 = base64.b64encode(audio_data).decode('utf-8')
-                        await self.cache.set(audio_key, audio_b64, ttl=86400 * 30)
+                        audio_data = await self.audio_storage.put_tour_audio(tour_id, audio_data)
                         
                         # Update audio_url so future calls skip regen
                         if not tour.audio_url:
@@ -605,7 +1000,7 @@ class TourService:
                             await db.commit()
                         
                         logger.info(f"Successfully regenerated and cached audio for tour {tour_id}")
-                        return base64.b64decode(audio_b64)
+                        return audio_data
                         
                     except Exception as regen_error:
                         logger.error(f"Failed to regenerate audio: {regen_error}")
@@ -613,15 +1008,8 @@ class TourService:
                 else:
                     raise TourServiceError("Audio data not found and no content available for regeneration")
             
-            logger.info(f"Found audio data in cache, length: {len(audio_b64)}")
-            import base64
-            try:
-                audio_bytes = base64.b64decode(audio_b64)
-                logger.info(f"Successfully decoded audio, byte length: {len(audio_bytes)}")
-                return audio_bytes
-            except Exception as decode_error:
-                logger.error(f"Failed to decode base64 audio: {decode_error}")
-                raise TourServiceError(f"Failed to decode audio data: {decode_error}")
+            logger.info(f"Found audio data in cache, byte length: {len(audio_bytes)}")
+            return audio_bytes
             
         except TourServiceError:
             raise
@@ -652,21 +1040,18 @@ class TourService:
             if not tour.content:
                 raise TourServiceError("Tour has no content to generate audio from")
             
-            # Generate audio from existing content (truncate to TTS limit)
-            audio_text = self._truncate_for_tts(tour.content)
-            
-            logger.info(f"Generating audio for {len(audio_text)} characters")
-            audio_data = await self.ai_service.generate_audio(
-                text=audio_text,
-                voice=request.voice if hasattr(request, "voice") and request.voice else settings.OPENAI_TTS_VOICE,
-                speed=1.2
+            # Only paragraphs that changed since the last synthesis reach the TTS provider
+            logger.info(f"Generating audio for {len(tour.content)} characters")
+            audio_data = await self.ai_service.generate_audio_chunked(
+                text=tour.content,
+                voice=self._tour_voice(tour),
+                speed=settings.TTS_CANONICAL_SPEED,
+                language=tour.language
             )
             
-            # Store audio file in cache
-            audio_key = f"audio:tour:{tour_id}"
-            import base64
-            audio_b64 = base64.b64encode(audio_data).decode('utf-8')
-            await self.cache.set(audio_key, audio_b64, ttl=86400 * 30)
+            # Replace the stored audio; old segments no longer match it
+            await self.audio_storage.delete_tour_audio(tour_id)
+            audio_data = await self.audio_storage.put_tour_audio(tour_id, audio_data)
             
             # Update audio_url in database if not set
             if not tour.audio_url:
@@ -674,6 +1059,7 @@ class TourService:
                 await db.commit()
             
             logger.info(f"Successfully regenerated audio for tour {tour_id}")
+            await self._invalidate_derived_tours(tour_id)
             
         except TourServiceError:
             raise
@@ -681,6 +1067,192 @@ class TourService:
             logger.error(f"Failed to regenerate tour audio {tour_id}: {str(e)}")
             raise TourServiceError(f"Failed to regenerate tour audio: {str(e)}")
     
+    async def find_tours_missing_audio(self, db: AsyncSession, limit: int = 100) -> List[uuid.UUID]:
+        """IDs of ready tours whose audio could not be generated, oldest first."""
+        result = await db.execute(
+            select(Tour.id)
+            .where(
+                and_(
+                    Tour.status == "ready",
+                    Tour.audio_url.is_(None),
+                    Tour.content.isnot(None),
+                )
+            )
+            .order_by(Tour.created_at.asc())
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    async def start_audio_repair(
+        self,
+        db: AsyncSession,
+        tour_id: uuid.UUID,
+        user: User
+    ) -> None:
+        """
+        Start repairing the audio of a tour that is ready without it.
+        
+        Args:
+            db: Database session
+            tour_id: Tour ID
+            user: Current user
+        """
+        tour = await self.get_tour(db, tour_id, user)
+        if tour.status != "ready" or not tour.content:
+            raise TourServiceError(f"Tour is not ready (status: {tour.status})")
+        if tour.audio_url and await self.audio_storage.get_tour_audio(tour_id):
+            raise TourServiceError("Tour already has audio")
+        if tour_id in self._repairing:
+            raise TourServiceError("Audio repair already in progress")
+        asyncio.create_task(self.repair_tour_audio(tour_id))
+    
+    async def repair_tour_audio(self, tour_id: uuid.UUID) -> bool:
+        """
+        Resume the audio of a tour from its checkpointed segments.
+        
+        The chunks of the interrupted run are submitted again; those already
+        stored are taken from storage and only the missing ones are
+        synthesized. If the narration changed since, it is re-segmented per
+        stop (unchanged paragraphs still come from the TTS cache).
+        
+        Args:
+            tour_id: Tour ID
+            
+        Returns:
+            True if the tour has audio now
+        """
+        if tour_id in self._repairing:
+            logger.info(f"Audio repair of tour {tour_id} already in progress")
+            return False
+        
+        from app.database import AsyncSessionLocal
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Tour).where(Tour.id == tour_id))
+            tour = result.scalar_one_or_none()
+        if not tour or not tour.content:
+            logger.error(f"Tour {tour_id} has no content to repair audio from")
+            return False
+        
+        self._repairing.add(tour_id)
+        final_status = "error"
+        await self.ledger.start_repair(tour_id, "audio", duration_minutes=tour.duration_minutes, language=tour.language)
+        try:
+            voice = self._tour_voice(tour)
+            stops = tour.walkable_stops or []
+            sections = split_narration_by_stops(tour.content, stops)
+            content_data = {
+                "title": tour.title,
+                "content": tour.content,
+                "metadata": {
+                    **(tour.generation_params or {}),
+                    "actual_provider": tour.llm_provider,
+                    "model": tour.llm_model,
+                },
+            }
+            
+            manifest = await self.audio_storage.get_manifest(tour_id)
+            pipeline = TTSPipeline(
+                tour_id, voice=voice, speed=settings.TTS_CANONICAL_SPEED, checkpoint=manifest, language=tour.language
+            )
+            if not (manifest and pipeline.resubmit(tour.content, manifest.get("segments", []))):
+                pipeline.submit_sections(sections)
+            logger.info(f"🩹 Repairing audio of tour {tour_id} from {len(pipeline.chunks)} segments")
+            
+            final_status = await self._finalize_tour(tour_id, content_data, stops, voice, pipeline=pipeline, sections=sections)
+            repaired = final_status == "ready" and "audio_error" not in content_data["metadata"]
+            logger.info(f"🩹 Audio repair of tour {tour_id} {'succeeded' if repaired else 'failed'}: {pipeline.resumed} segments resumed, {pipeline.retries} retries")
+            if repaired:
+                await self._invalidate_derived_tours(tour_id)
+            return repaired
+        except Exception as e:
+            logger.exception(f"Audio repair failed for tour {tour_id}: {str(e)}")
+            return False
+        finally:
+            self._repairing.discard(tour_id)
+            await self.audio_broadcaster.release(tour_id)
+            await self.ledger.finish_repair(tour_id, final_status)
+    
+    async def get_tour_bundle(
+        self,
+        db: AsyncSession,
+        tour_id: uuid.UUID,
+        user: User,
+        audio_format: Optional[str] = None
+    ) -> StreamingZip:
+        """
+        Package a tour for offline use.
+        
+        The archive contains ``tour.json`` (metadata and narration), the audio,
+        ``transcript.json`` and ``stops.geojson``. Entries are stored, not
+        compressed, so the archive can be streamed and resumed at any offset.
+        
+        Args:
+            db: Database session
+            tour_id: Tour ID
+            user: Current user
+            audio_format: Audio variant to include (original, mp3-low or opus)
+            
+        Returns:
+            StreamingZip archive
+        """
+        tour = await self.get_tour(db, tour_id, user)
+        if tour.status != "ready":
+            raise TourServiceError("Tour is not ready for download yet")
+        
+        variant_name = negotiate_variant(audio_format, None)
+        audio_bytes = None
+        if variant_name != ORIGINAL:
+            audio_bytes = await self.audio_transcoder.get_or_create(tour_id, variant_name)
+        if not audio_bytes:
+            variant_name = ORIGINAL
+            audio_bytes = await self.audio_storage.get_tour_audio(tour_id)
+        audio_name = None
+        if audio_bytes:
+            audio_name = "audio.ogg" if variant_name == "opus" else "audio.mp3"
+        
+        modified = tour.updated_at or tour.created_at
+        metadata = TourResponse.model_validate(tour).model_dump(mode="json")
+        metadata["bundle"] = {"audio": audio_name, "audio_format": variant_name if audio_name else None}
+        
+        entries = [ZipEntry("tour.json", json.dumps(metadata, ensure_ascii=False, indent=2).encode("utf-8"), modified)]
+        if audio_bytes:
+            entries.append(ZipEntry(audio_name, audio_bytes, modified))
+        entries.append(ZipEntry("transcript.json", json.dumps(tour.transcript or [], ensure_ascii=False).encode("utf-8"), modified))
+        entries.append(ZipEntry("stops.geojson", json.dumps(self._stops_geojson(tour), ensure_ascii=False).encode("utf-8"), modified))
+        return StreamingZip(entries)
+    
+    @staticmethod
+    def _stops_geojson(tour: Tour) -> Dict[str, Any]:
+        """Walkable stops as a GeoJSON FeatureCollection with the walking route."""
+        features = []
+        route = []
+        if tour.location and tour.location.coordinates:
+            lat, lng = tour.location.coordinates
+            route.append([lng, lat])
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [lng, lat]},
+                "properties": {"name": tour.location.name, "kind": "start"},
+            })
+        for index, stop in enumerate(tour.walkable_stops or []):
+            if stop.get("latitude") is None or stop.get("longitude") is None:
+                continue
+            point = [float(stop["longitude"]), float(stop["latitude"])]
+            route.append(point)
+            properties = {k: v for k, v in stop.items() if k not in ("latitude", "longitude")}
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": point},
+                "properties": {**properties, "kind": "stop", "stop_index": index},
+            })
+        if len(route) > 1:
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "LineString", "coordinates": route},
+                "properties": {"kind": "route"},
+            })
+        return {"type": "FeatureCollection", "features": features}
+    
     async def delete_tour(
         self,
         db: AsyncSession,
@@ -702,9 +1274,15 @@ class TourService:
             # Get tour to verify ownership
             tour = await self.get_tour(db, tour_id, user)
             
-            # Delete audio from cache
-            audio_key = f"audio:tour:{tour_id}"
-            await self.cache.delete(audio_key)
+            # Delete audio (and any segments) from cache
+            await self.audio_storage.delete_tour_audio(tour_id)
+            
+            # Unlink tours derived from this one (the FK does the same on Postgres).
+            # Their audio segments are copies and nothing can change the source's
+            # audio any more, so unlike regeneration this invalidates nothing
+            await db.execute(
+                update(Tour).where(Tour.source_tour_id == tour_id).values(source_tour_id=None)
+            )
             
             # Delete tour from database
             await db.delete(tour)
@@ -857,57 +1435,63 @@ class TourService:
                 tour.description = message[:255]
                 await db.commit()
 
-    def _truncate_for_tts(self, text: str) -> str:
-        """Trim text to OpenAI TTS character limit and end cleanly on a sentence."""
-        max_len = 4000  # OpenAI TTS limit is 4096, using 4000 for safety buffer
-        t = text[:max_len]
-        if len(text) > max_len:
-            # Try to avoid cutting words; backtrack to last period in the last 20% of slice
-            last_period = t.rfind('.')
-            if last_period > int(max_len * 0.8):  # 80% of 4000 = 3200
-                t = t[: last_period + 1]
-        return t
-    
-    def _chunk_text_for_tts(self, text: str, max_chunk_size: int = 4000) -> List[str]:
-        """Split long text into chunks suitable for TTS, preserving sentence boundaries."""
-        if len(text) <= max_chunk_size:
-            return [text]
+    async def _invalidate_derived_tours(self, source_tour_id: uuid.UUID) -> int:
+        """
+        Drop the audio of variants shortened from a tour whose audio changed.
         
-        chunks = []
-        remaining_text = text
+        Variants copy the source's audio segments, so once those are replaced the
+        copies are stale: their audio is deleted, audio_url cleared (which lists
+        them as missing audio) and a repair started that synthesizes them again,
+        mostly from the TTS cache. Translations have audio of their own.
         
-        while remaining_text:
-            if len(remaining_text) <= max_chunk_size:
-                chunks.append(remaining_text)
-                break
-                
-            # Find a good breaking point
-            chunk = remaining_text[:max_chunk_size]
-            
-            # Try to break at sentence boundary first
-            last_period = chunk.rfind('.')
-            last_exclamation = chunk.rfind('!')
-            last_question = chunk.rfind('?')
-            
-            # Use the latest sentence ending
-            sentence_break = max(last_period, last_exclamation, last_question)
-            
-            if sentence_break > int(max_chunk_size * 0.6):  # At least 60% through the chunk
-                split_point = sentence_break + 1
-            else:
-                # No good sentence break, try paragraph break
-                last_double_newline = chunk.rfind('\n\n')
-                if last_double_newline > int(max_chunk_size * 0.5):
-                    split_point = last_double_newline + 2
-                else:
-                    # Fall back to word boundary
-                    last_space = chunk.rfind(' ')
-                    split_point = last_space if last_space > int(max_chunk_size * 0.8) else max_chunk_size
-            
-            chunks.append(remaining_text[:split_point].strip())
-            remaining_text = remaining_text[split_point:].strip()
+        Returns:
+            Number of variants invalidated
+        """
+        from app.database import AsyncSessionLocal
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Tour).where(
+                    and_(
+                        Tour.source_tour_id == source_tour_id,
+                        Tour.status == "ready",
+                        Tour.audio_url.isnot(None),
+                    )
+                )
+            )
+            variants = [tour for tour in result.scalars().all() if (tour.generation_params or {}).get("derived_from")]
+            for tour in variants:
+                tour.audio_url = None
+            await db.commit()
         
-        return [chunk for chunk in chunks if chunk]  # Remove empty chunks
+        for tour in variants:
+            await self.audio_storage.delete_tour_audio(tour.id)
+            asyncio.create_task(self.repair_tour_audio(tour.id))
+        if variants:
+            logger.info(f"♻️ Audio of tour {source_tour_id} changed – re-synthesizing {len(variants)} variants")
+        return len(variants)
+
+    @staticmethod
+    def _measured_audio_chunks(pipeline: Optional[TTSPipeline], audio_data: Optional[bytes]) -> List[tuple]:
+        """
+        ``(text, duration)`` of every synthesized TTS chunk, with durations
+        measured from the MP3 frames. Empty when there is no usable audio.
+        """
+        if not audio_data or not pipeline or not pipeline.manifest.get("complete"):
+            return []
+        chunks = []
+        for text, segment in zip(pipeline.chunks, pipeline.manifest["segments"]):
+            if not segment.get("duration"):
+                return []  # a segment could not be measured – do not trust the others alone
+            chunks.append((text, segment["duration"]))
+        return chunks
+    
+    def _tour_voice(self, tour: Tour) -> str:
+        """TTS voice the tour was narrated with (recorded in its generation params)."""
+        return (tour.generation_params or {}).get("voice") or settings.OPENAI_TTS_VOICE
+    
+    def _chunk_text_for_tts(self, text: str, max_chunk_size: int = 4000) -> List[str]:
+        """Split long text into chunks suitable for TTS, preserving sentence boundaries."""
+        return chunk_text_for_tts(text, max_chunk_size)
 
     async def _save_content(self, tour_id: uuid.UUID, content_data: dict, status: str = "content_ready"):
         """Persist generated title/content and update status in one quick transaction."""
@@ -1137,8 +1721,6 @@ class TourService:
 
     def _calculate_walking_distance(self, loc1: dict, loc2: dict) -> float:
         """Calculate walking distance between two locations using Haversine formula"""
-        from math import radians, cos, sin, asin, sqrt
-        
         # Extract coordinates
         if 'coordinates' in loc1:
             lat1, lon1 = loc1['coordinates']
@@ -1151,17 +1733,7 @@ class TourService:
         if (lat1 == 0 and lon1 == 0) or (lat2 == 0 and lon2 == 0):
             return float('inf')  # Return infinite distance for invalid coordinates
         
-        # Convert to radians
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        
-        # Haversine formula
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * asin(sqrt(a))
-        r = 6371  # Radius of earth in kilometers
-        
-        return c * r * 1000  # Return distance in meters
+        return haversine_m(lat1, lon1, lat2, lon2)  # Distance in meters
 
     def _validate_walking_feasibility(self, route_locations: list, max_total_distance: float = 2000) -> dict:
         """Validate that route is feasible for walking"""
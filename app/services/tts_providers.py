@@ -0,0 +1,419 @@
+"""
+Text-to-speech providers.
+Each provider maps the app's (OpenAI) voice names to its own voices in the
+tour's language; the router tracks provider health, fails over between the
+providers that speak the language and optionally hedges chunks that exceed
+their latency budget. A local CPU provider gives
+guaranteed (if plainer) audio when the remote providers are down, and
+paid-call-free load tests.
+"""
+
+import asyncio
+import importlib.util
+import io
+import logging
+import os
+import shutil
+import subprocess
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+# Lazy import to avoid a hard dependency when Google TTS is not configured
+try:
+    from google.cloud import texttospeech  # type: ignore
+except ImportError:  # pragma: no cover
+    texttospeech = None  # provider reports itself unavailable
+
+logger = logging.getLogger(__name__)
+
+class TTSProviderError(Exception):
+    """Raised when no provider could synthesize a chunk"""
+    pass
+
+class TTSProvider:
+    """Interface of a speech synthesis backend."""
+
+    name = "base"
+    cost_per_1k_chars = 0.0
+    max_chars = 4000
+    voices: Dict[str, str] = {}
+    languages: Optional[Tuple[str, ...]] = None  # None: every language
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def supports(self, language: str) -> bool:
+        """Whether the provider has a voice for ``language`` (ISO 639-1 code)."""
+        return self.languages is None or language in self.languages
+
+    def voice_for(self, voice: str, language: str = "en") -> str:
+        """Provider voice for one of the app's voice names in ``language``."""
+        return self.voices.get(voice, voice)
+
+    async def synthesize(self, text: str, voice: str, speed: float) -> bytes:
+        """Synthesize ``text`` as MP3."""
+        raise NotImplementedError
+
+    async def stream(
+        self,
+        text: str,
+        voice: str,
+        speed: float,
+        on_chunk: Callable[[bytes], Awaitable[None]]
+    ) -> bytes:
+        """Synthesize ``text``, passing MP3 bytes on as they arrive (in one piece by default)."""
+        audio_data = await self.synthesize(text, voice, speed)
+        await on_chunk(audio_data)
+        return audio_data
+
+    def shutdown(self) -> None:
+        """Release workers or clients held by the provider."""
+        pass
+
+class OpenAITTSProvider(TTSProvider):
+    """OpenAI speech endpoint; the app's voice names are OpenAI voices, which speak every language."""
+
+    name = "openai"
+    cost_per_1k_chars = 0.015
+
+    def __init__(self, client: Callable[[], Any]):
+        # Resolved per call, so a replaced client (tests, key rotation) is picked up
+        self._client = client
+
+    async def synthesize(self, text: str, voice: str, speed: float) -> bytes:
+        response = await self._client().audio.speech.create(
+            model=settings.OPENAI_TTS_MODEL,
+            voice=voice,
+            input=text,
+            speed=speed
+        )
+        return response.content
+
+    async def stream(self, text, voice, speed, on_chunk):
+        parts = []
+        async with self._client().audio.speech.with_streaming_response.create(
+            model=settings.OPENAI_TTS_MODEL,
+            voice=voice,
+            input=text,
+            speed=speed
+        ) as response:
+            async for chunk in response.iter_bytes(chunk_size=8192):
+                parts.append(chunk)
+                await on_chunk(chunk)
+        return b"".join(parts)
+
+class GoogleTTSProvider(TTSProvider):
+    """Google Cloud Text-to-Speech (Neural2 voices)."""
+
+    name = "google"
+    cost_per_1k_chars = 0.016
+    max_chars = 4500  # 5000 byte request limit, with room for multi-byte characters
+    voices = {
+        "alloy": "en-US-Neural2-F",
+        "echo": "en-US-Neural2-D",
+        "fable": "en-GB-Neural2-B",
+        "onyx": "en-US-Neural2-J",
+        "nova": "en-US-Neural2-C",
+        "shimmer": "en-US-Neural2-H",
+    }
+    # Other languages: (female, male) voice, picked by the app voice's gender
+    language_voices = {
+        "de": ("de-DE-Neural2-C", "de-DE-Neural2-B"),
+        "es": ("es-ES-Neural2-A", "es-ES-Neural2-B"),
+        "fr": ("fr-FR-Neural2-A", "fr-FR-Neural2-B"),
+        "it": ("it-IT-Neural2-A", "it-IT-Neural2-C"),
+        "ja": ("ja-JP-Neural2-B", "ja-JP-Neural2-C"),
+        "pt": ("pt-BR-Neural2-A", "pt-BR-Neural2-B"),
+    }
+    male_voices = {"echo", "fable", "onyx"}
+    languages = ("en",) + tuple(language_voices)
+
+    def __init__(self):
+        self._client = None
+
+    @property
+    def available(self) -> bool:
+        return texttospeech is not None and bool(settings.GOOGLE_APPLICATION_CREDENTIALS)
+
+    def voice_for(self, voice: str, language: str = "en") -> str:
+        if language in self.language_voices:
+            female, male = self.language_voices[language]
+            return male if voice in self.male_voices else female
+        return self.voices.get(voice, self.voices["alloy"])
+
+    async def synthesize(self, text: str, voice: str, speed: float) -> bytes:
+        # ``voice`` is already a Google voice (see voice_for); its name starts with the locale
+        if self._client is None:
+            self._client = texttospeech.TextToSpeechAsyncClient()
+        response = await self._client.synthesize_speech(
+            input=texttospeech.SynthesisInput(text=text),
+            voice=texttospeech.VoiceSelectionParams(language_code="-".join(voice.split("-")[:2]), name=voice),
+            audio_config=texttospeech.AudioConfig(
+                audio_encoding=texttospeech.AudioEncoding.MP3,
+                speaking_rate=speed,
+            ),
+        )
+        return response.audio_content
+
+# Piper voice of a local TTS worker process, loaded once by the pool initializer
+_local_voice = None
+
+def _init_local_worker(model_path: str) -> None:
+    global _local_voice
+    from piper.voice import PiperVoice  # type: ignore
+    _local_voice = PiperVoice.load(model_path)
+
+def _local_synthesize(text: str, speed: float, ffmpeg: str) -> bytes:
+    """Synthesize ``text`` with the worker's voice and encode it as MP3 (runs in a worker process)."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        _local_voice.synthesize(text, wav_file, length_scale=1.0 / speed)
+    result = subprocess.run(
+        [ffmpeg, "-hide_banner", "-loglevel", "error", "-f", "wav", "-i", "pipe:0",
+         "-ac", "1", "-c:a", "libmp3lame", "-b:a", "64k", "-f", "mp3", "pipe:1"],
+        input=buffer.getvalue(),
+        capture_output=True,
+        check=True,
+    )
+    return result.stdout
+
+class LocalTTSProvider(TTSProvider):
+    """
+    Offline Piper voice on the CPU.
+
+    Synthesis is CPU-bound, so it runs in a process pool (LOCAL_TTS_WORKERS
+    processes, each loading the LOCAL_TTS_MODEL voice once) and never blocks
+    the event loop. Every app voice maps to the one local voice, which only
+    speaks the language in its model name (Piper's ``en_US-lessac-medium``).
+    """
+
+    name = "local"
+    max_chars = 20000  # no request limit; keeps a single job bounded
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._engine_installed = importlib.util.find_spec("piper") is not None
+
+    @property
+    def available(self) -> bool:
+        return bool(settings.LOCAL_TTS_MODEL) and self._engine_installed and shutil.which(settings.FFMPEG_PATH) is not None
+
+    @property
+    def languages(self) -> Tuple[str, ...]:
+        if not settings.LOCAL_TTS_MODEL:
+            return ()
+        return (os.path.basename(settings.LOCAL_TTS_MODEL).split("_")[0].lower(),)
+
+    def voice_for(self, voice: str, language: str = "en") -> str:
+        return settings.LOCAL_TTS_MODEL
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        # Created on first use so processes are only spawned where local TTS is used
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.LOCAL_TTS_WORKERS,
+                initializer=_init_local_worker,
+                initargs=(settings.LOCAL_TTS_MODEL,),
+            )
+        return self._pool
+
+    async def synthesize(self, text: str, voice: str, speed: float) -> bytes:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, _local_synthesize, text, speed, settings.FFMPEG_PATH)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+class ProviderHealth:
+    """Rolling health of one provider with a simple circuit breaker."""
+
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency_ms: Optional[float] = None  # EWMA of successful requests
+        self.open_until = 0.0
+        self.last_error: Optional[str] = None
+
+    @property
+    def circuit_open(self) -> bool:
+        return time.monotonic() < self.open_until
+
+    def record_success(self, latency_ms: float) -> None:
+        self.requests += 1
+        self.consecutive_failures = 0
+        self.latency_ms = latency_ms if self.latency_ms is None else 0.8 * self.latency_ms + 0.2 * latency_ms
+
+    def record_failure(self, error: Exception) -> None:
+        self.requests += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = str(error)[:200]
+        if self.consecutive_failures >= settings.TTS_CIRCUIT_FAILURES:
+            # Half-open after the cooldown: the next request is a trial
+            self.open_until = time.monotonic() + settings.TTS_CIRCUIT_COOLDOWN_SECONDS
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_ms": round(self.latency_ms) if self.latency_ms is not None else None,
+            "circuit_open": self.circuit_open,
+            "last_error": self.last_error,
+        }
+
+class TTSRouter:
+    """
+    Routes TTS requests across providers.
+
+    Features:
+    - Providers tried in TTS_PROVIDERS order, skipping unavailable ones and
+      those without a voice for the tour's language, so a failover or hedge
+      never switches a tour to a voice speaking another language
+    - Circuit breaker per provider; open circuits are only tried as a last
+      resort, so a local provider listed last takes over while the remote
+      circuits are open
+    - Hedging: with TTS_HEDGE_BUDGET_SECONDS set, a chunk that has not
+      finished within its budget is also sent to the next provider and the
+      first result wins
+    """
+
+    def __init__(self, providers: List[TTSProvider]):
+        self.providers = {provider.name: provider for provider in providers}
+        self.health = {provider.name: ProviderHealth() for provider in providers}
+
+    @property
+    def primary(self) -> str:
+        """Name of the configured first-choice provider."""
+        return settings.TTS_PROVIDERS.split(",")[0].strip()
+
+    def candidates(self, language: str = "en") -> List[TTSProvider]:
+        """Available providers for ``language`` in preference order, healthy ones first."""
+        order = [name.strip() for name in settings.TTS_PROVIDERS.split(",") if name.strip()]
+        providers = [
+            self.providers[name] for name in order
+            if name in self.providers and self.providers[name].available and self.providers[name].supports(language)
+        ]
+        return sorted(providers, key=lambda provider: self.health[provider.name].circuit_open)
+
+    async def synthesize(self, text: str, voice: str, speed: float, language: str = "en") -> Tuple[bytes, str]:
+        """
+        Synthesize a chunk in ``language`` with the best available provider.
+
+        Returns:
+            Tuple of (MP3 bytes, name of the provider that produced them)
+
+        Raises:
+            TTSProviderError: if every provider failed
+        """
+        candidates = [provider for provider in self.candidates(language) if len(text) <= provider.max_chars]
+        if not candidates:
+            raise TTSProviderError(f"No TTS provider available for language '{language}'")
+
+        errors = []
+        pending: Dict[asyncio.Task, TTSProvider] = {}
+        remaining = list(candidates)
+        try:
+            while remaining or pending:
+                if remaining and not pending:
+                    provider = remaining.pop(0)
+                    pending[asyncio.ensure_future(self._call(provider, text, voice, speed, language))] = provider
+
+                budget = self._hedge_budget(text) if remaining and len(pending) == 1 else None
+                done, _ = await asyncio.wait(pending, timeout=budget, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Over budget: race the next provider against the slow one
+                    provider = remaining.pop(0)
+                    logger.info(f"TTS chunk over {budget:.1f}s budget – hedging with {provider.name}")
+                    pending[asyncio.ensure_future(self._call(provider, text, voice, speed, language))] = provider
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    try:
+                        return task.result(), provider.name
+                    except Exception as e:
+                        errors.append(f"{provider.name}: {e}")
+        finally:
+            for task in pending:
+                task.cancel()
+        raise TTSProviderError("; ".join(errors))
+
+    async def stream(
+        self,
+        text: str,
+        voice: str,
+        speed: float,
+        on_chunk: Callable[[bytes], Awaitable[None]],
+        language: str = "en"
+    ) -> Tuple[bytes, str]:
+        """
+        Like ``synthesize``, passing bytes on as they arrive.
+
+        Fails over only while nothing has been passed on yet; streams are
+        never hedged, listeners cannot receive two of them.
+        """
+        errors = []
+        for provider in self.candidates(language):
+            if len(text) > provider.max_chars:
+                continue
+            sent = False
+
+            async def forward(chunk: bytes) -> None:
+                nonlocal sent
+                sent = True
+                await on_chunk(chunk)
+
+            t0 = time.perf_counter()
+            try:
+                audio_data = await provider.stream(text, provider.voice_for(voice, language), speed, forward)
+            except Exception as e:
+                self.health[provider.name].record_failure(e)
+                if sent:
+                    raise TTSProviderError(f"{provider.name} failed mid-stream: {e}") from e
+                errors.append(f"{provider.name}: {e}")
+                logger.warning(f"TTS provider {provider.name} failed ({e}) – failing over")
+                continue
+            self.health[provider.name].record_success((time.perf_counter() - t0) * 1000)
+            return audio_data, provider.name
+        raise TTSProviderError("; ".join(errors) or f"No TTS provider available for language '{language}'")
+
+    def shutdown(self) -> None:
+        """Release every provider's resources (worker processes)."""
+        for provider in self.providers.values():
+            provider.shutdown()
+
+    def status(self) -> Dict[str, Any]:
+        """Availability and health of every provider."""
+        return {
+            name: {"available": provider.available, **self.health[name].to_dict()}
+            for name, provider in self.providers.items()
+        }
+
+    async def _call(self, provider: TTSProvider, text: str, voice: str, speed: float, language: str) -> bytes:
+        t0 = time.perf_counter()
+        try:
+            audio_data = await provider.synthesize(text, provider.voice_for(voice, language), speed)
+        except asyncio.CancelledError:
+            raise  # lost a hedge race; not the provider's fault
+        except Exception as e:
+            self.health[provider.name].record_failure(e)
+            logger.warning(f"TTS provider {provider.name} failed: {e}")
+            raise
+        self.health[provider.name].record_success((time.perf_counter() - t0) * 1000)
+        return audio_data
+
+    def _hedge_budget(self, text: str) -> Optional[float]:
+        if settings.TTS_HEDGE_BUDGET_SECONDS <= 0:
+            return None
+        # Synthesis time grows with the chunk, so the budget is per 1k characters
+        return settings.TTS_HEDGE_BUDGET_SECONDS * max(1.0, len(text) / 1000)
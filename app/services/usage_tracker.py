@@ -6,16 +6,64 @@ Tracks usage across different services and providers with alerts and reporting.
 import json
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from enum import Enum
 
-from .cache_service import cache_service
+from .cache_service import CachePipeline, cache_service
 from app.config import settings, LLMProvider
 
 logger = logging.getLogger(__name__)
 
+def _name(value: Any) -> str:
+    """Plain name of a service or provider (enum members use their value)."""
+    return str(getattr(value, "value", value))
+
+def _to_float(value: Any) -> float:
+    """Counter value from Redis (bytes/str) or memory (number) as a float."""
+    if value is None:
+        return 0.0
+    if isinstance(value, bytes):
+        value = value.decode("utf-8")
+    return float(value)
+
+def _parse_json_value(value: Any) -> Optional[Any]:
+    if not value:
+        return None
+    try:
+        return json.loads(value) if isinstance(value, (str, bytes)) else value
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+def _empty_usage() -> Dict[str, Any]:
+    return {"total_requests": 0, "total_units": 0, "total_cost": 0.0, "services": {}, "providers": {}}
+
+def _usage_from_counters(counters: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild the nested usage report from the fields of a counter hash."""
+    usage = _empty_usage()
+    for field, value in counters.items():
+        parts = field.split(":")
+        number = _to_float(value)
+        if len(parts) == 1:
+            usage[field] = number if field == "total_cost" else int(number)
+        elif len(parts) == 3 and parts[0] in ("services", "providers"):
+            group, name, metric = parts
+            entry = usage[group].setdefault(name, {"requests": 0, "units": 0, "cost": 0.0})
+            entry[metric] = number if metric == "cost" else int(number)
+    return usage
+
+def _add_usage(total: Dict[str, Any], usage: Dict[str, Any]) -> None:
+    """Add a nested usage report into ``total``."""
+    for field in ("total_requests", "total_units", "total_cost"):
+        total[field] += usage.get(field, 0)
+    for group in ("services", "providers"):
+        for name, data in usage.get(group, {}).items():
+            entry = total[group].setdefault(name, {"requests": 0, "units": 0, "cost": 0.0})
+            for metric in ("requests", "units", "cost"):
+                entry[metric] += data.get(metric, 0)
+
 class UsageType(str, Enum):
     TOUR_CONTENT = "tour_content"
+    TRANSLATION = "translation"
     AUDIO_GENERATION = "audio_generation"
     IMAGE_RECOGNITION = "image_recognition"
     LOCATION_SEARCH = "location_search"
@@ -46,8 +94,14 @@ class UsageTracker:
                 LLMProvider.OPENAI: 0.000765,  # per 1k tokens
                 LLMProvider.ANTHROPIC: 0.001375,  # per 1k tokens
             },
+            UsageType.TRANSLATION: {
+                LLMProvider.OPENAI: 0.000765,  # per 1k tokens
+                LLMProvider.ANTHROPIC: 0.001375,  # per 1k tokens
+            },
             UsageType.AUDIO_GENERATION: {
                 LLMProvider.OPENAI: 0.015,  # per 1k characters
+                "google": 0.016,  # per 1k characters (Neural2)
+                "local": 0.0,  # CPU synthesis
             },
             UsageType.IMAGE_RECOGNITION: {
                 "google": 0.0015,  # per image
@@ -85,27 +139,26 @@ class UsageTracker:
             month = now.strftime("%Y-%m")
             hour = now.strftime("%Y-%m-%d:%H")
             
-            # Update daily usage
-            await self._update_usage_counter(
-                f"usage:daily:{today}",
-                service, provider, units_used, cost, 86400 * 2
+            # Daily, monthly and hourly (rate limiting) counters in one atomic round trip
+            periods = [
+                (self._counter_key("daily", today), 86400 * 2),
+                (self._counter_key("monthly", month), 86400 * 35),
+                (self._counter_key("hourly", hour), 3600 * 2),
+            ]
+            async with self.cache.pipeline() as pipe:
+                for key, ttl in periods:
+                    self._queue_usage_increments(pipe, key, service, provider, units_used, cost, ttl)
+            
+            # The increments return the new totals (requests, units, cost come first
+            # per period), so limits are checked without reading the counters back
+            step = len(pipe.results) // len(periods)
+            daily, monthly, hourly = (pipe.results[i:i + 3] for i in range(0, step * len(periods), step))
+            await self._check_usage_limits(
+                daily_units=daily[1],
+                monthly_cost=monthly[2],
+                hourly_requests=hourly[0],
             )
             
-            # Update monthly usage
-            await self._update_usage_counter(
-                f"usage:monthly:{month}",
-                service, provider, units_used, cost, 86400 * 35
-            )
-            
-            # Update hourly usage (for rate limiting)
-            await self._update_usage_counter(
-                f"usage:hourly:{hour}",
-                service, provider, units_used, cost, 3600 * 2
-            )
-            
-            # Check limits and send alerts if needed
-            await self._check_usage_limits(today, month, hour)
-            
             logger.info(
                 f"Usage recorded: {service} via {provider}, "
                 f"{units_used} units, ${cost:.4f}"
@@ -122,30 +175,20 @@ class UsageTracker:
         """Record a cache hit (cost savings)"""
         try:
             today = datetime.utcnow().strftime("%Y-%m-%d")
-            cache_key = f"cache_hits:{today}"
-            
-            # Get current cache hits
-            cache_data = await self.cache.get_json(cache_key) or {}
+            cache_key = self._cache_hits_key(today)
             
-            # Initialize service data if not exists
-            if service not in cache_data:
-                cache_data[service] = {}
-            if provider not in cache_data[service]:
-                cache_data[service][provider] = 0
-            
-            # Increment cache hit count
-            cache_data[service][provider] += 1
-            
-            # Store updated data
-            await self.cache.set_json(cache_key, cache_data, ttl=86400 * 2)
+            async with self.cache.pipeline() as pipe:
+                pipe.hincr(cache_key, f"{_name(service)}:{_name(provider)}", 1)
+                pipe.expire(cache_key, 86400 * 2)
             
             logger.debug(f"Cache hit recorded: {service} via {provider}")
             
         except Exception as e:
             logger.error(f"Failed to record cache hit: {str(e)}")
     
-    async def _update_usage_counter(
+    def _queue_usage_increments(
         self,
+        pipe: CachePipeline,
         key: str,
         service: UsageType,
         provider: LLMProvider,
@@ -153,48 +196,61 @@ class UsageTracker:
         cost: float,
         ttl: int
     ) -> None:
-        """Update usage counter for a specific time period"""
-        
-        # Get current usage data
-        usage_data = await self.cache.get_json(key) or {
-            "total_requests": 0,
-            "total_units": 0,
-            "total_cost": 0.0,
-            "services": {},
-            "providers": {}
-        }
-        
-        # Update totals
-        usage_data["total_requests"] += 1
-        usage_data["total_units"] += units_used
-        usage_data["total_cost"] += cost
-        
-        # Update service breakdown
-        if service not in usage_data["services"]:
-            usage_data["services"][service] = {
-                "requests": 0,
-                "units": 0,
-                "cost": 0.0
-            }
+        """
+        Queue the counter increments of one period on ``pipe``.
         
-        usage_data["services"][service]["requests"] += 1
-        usage_data["services"][service]["units"] += units_used
-        usage_data["services"][service]["cost"] += cost
+        The period is a hash of totals plus ``services:<name>:<metric>`` and
+        ``providers:<name>:<metric>`` breakdown fields; the totals
+        (requests, units, cost) are always queued first.
+        """
+        pipe.hincr(key, "total_requests", 1)
+        pipe.hincr(key, "total_units", units_used)
+        pipe.hincr(key, "total_cost", float(cost))
+        for group, name in (("services", _name(service)), ("providers", _name(provider))):
+            pipe.hincr(key, f"{group}:{name}:requests", 1)
+            pipe.hincr(key, f"{group}:{name}:units", units_used)
+            pipe.hincr(key, f"{group}:{name}:cost", float(cost))
+        pipe.expire(key, ttl)
+    
+    @staticmethod
+    def _counter_key(period: str, date_key: str) -> str:
+        return f"usage:counters:{period}:{date_key}"
+    
+    @staticmethod
+    def _cache_hits_key(date_key: str) -> str:
+        return f"cache_hits:counters:{date_key}"
+    
+    async def _get_usage(self, period: str, date_key: str, cache_hits: bool = False) -> Tuple[Dict[str, Any], int]:
+        """
+        Usage of a period in the nested report format, and its cache hits.
         
-        # Update provider breakdown
-        if provider not in usage_data["providers"]:
-            usage_data["providers"][provider] = {
-                "requests": 0,
-                "units": 0,
-                "cost": 0.0
-            }
+        Counters written before they became hashes are stored as JSON under
+        ``usage:<period>:<date>`` and ``cache_hits:<date>``; they are read in
+        the same round trip and added in.
+        """
+        async with self.cache.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self._counter_key(period, date_key))
+            pipe.get(f"usage:{period}:{date_key}")
+            if cache_hits:
+                pipe.hgetall(self._cache_hits_key(date_key))
+                pipe.get(f"cache_hits:{date_key}")
+        counters, legacy_usage = pipe.results[0], pipe.results[1]
         
-        usage_data["providers"][provider]["requests"] += 1
-        usage_data["providers"][provider]["units"] += units_used
-        usage_data["providers"][provider]["cost"] += cost
+        usage_data = _empty_usage()
+        _add_usage(usage_data, _parse_json_value(legacy_usage) or {})
+        _add_usage(usage_data, _usage_from_counters(counters or {}))
+        if not counters and not legacy_usage:
+            usage_data = {}
         
-        # Store updated data
-        await self.cache.set_json(key, usage_data, ttl=ttl)
+        hits = 0
+        if cache_hits:
+            hits = sum(int(_to_float(count)) for count in (pipe.results[2] or {}).values())
+            legacy_hits = _parse_json_value(pipe.results[3]) or {}
+            hits += sum(
+                sum(provider_hits.values()) if isinstance(provider_hits, dict) else provider_hits
+                for provider_hits in legacy_hits.values()
+            )
+        return usage_data, hits
     
     def _calculate_cost(
         self,
@@ -207,7 +263,7 @@ class UsageTracker:
             service_costs = self.service_costs.get(service, {})
             cost_per_unit = service_costs.get(provider, 0.0)
             
-            if service in [UsageType.TOUR_CONTENT]:
+            if service in [UsageType.TOUR_CONTENT, UsageType.TRANSLATION]:
                 # Cost per 1k tokens
                 return (units_used / 1000) * cost_per_unit
             elif service == UsageType.AUDIO_GENERATION:
@@ -225,41 +281,35 @@ class UsageTracker:
     
     async def _check_usage_limits(
         self,
-        today: str,
-        month: str,
-        hour: str
+        daily_units: Optional[float],
+        monthly_cost: Optional[float],
+        hourly_requests: Optional[float]
     ) -> None:
-        """Check usage limits and send alerts if exceeded"""
+        """Check usage limits against the current totals and send alerts if exceeded"""
         try:
             # Check monthly budget (80% threshold)
-            monthly_usage = await self.cache.get_json(f"usage:monthly:{month}")
-            if monthly_usage:
-                monthly_cost = monthly_usage.get("total_cost", 0.0)
-                if monthly_cost > self.monthly_budget * 0.8:
-                    await self._send_usage_alert(
-                        "monthly_budget",
-                        f"Monthly cost ${monthly_cost:.2f} exceeds 80% of budget ${self.monthly_budget:.2f}"
-                    )
+            monthly_cost = _to_float(monthly_cost)
+            if monthly_cost > self.monthly_budget * 0.8:
+                await self._send_usage_alert(
+                    "monthly_budget",
+                    f"Monthly cost ${monthly_cost:.2f} exceeds 80% of budget ${self.monthly_budget:.2f}"
+                )
             
             # Check daily token limit (90% threshold)
-            daily_usage = await self.cache.get_json(f"usage:daily:{today}")
-            if daily_usage:
-                daily_tokens = daily_usage.get("total_units", 0)
-                if daily_tokens > self.daily_token_limit * 0.9:
-                    await self._send_usage_alert(
-                        "daily_tokens",
-                        f"Daily tokens {daily_tokens} exceeds 90% of limit {self.daily_token_limit}"
-                    )
+            daily_tokens = int(_to_float(daily_units))
+            if daily_tokens > self.daily_token_limit * 0.9:
+                await self._send_usage_alert(
+                    "daily_tokens",
+                    f"Daily tokens {daily_tokens} exceeds 90% of limit {self.daily_token_limit}"
+                )
             
             # Check hourly request limit
-            hourly_usage = await self.cache.get_json(f"usage:hourly:{hour}")
-            if hourly_usage:
-                hourly_requests = hourly_usage.get("total_requests", 0)
-                if hourly_requests > self.hourly_request_limit:
-                    await self._send_usage_alert(
-                        "hourly_requests",
-                        f"Hourly requests {hourly_requests} exceeds limit {self.hourly_request_limit}"
-                    )
+            hourly_requests = int(_to_float(hourly_requests))
+            if hourly_requests > self.hourly_request_limit:
+                await self._send_usage_alert(
+                    "hourly_requests",
+                    f"Hourly requests {hourly_requests} exceeds limit {self.hourly_request_limit}"
+                )
                     
         except Exception as e:
             logger.error(f"Failed to check usage limits: {str(e)}")
@@ -293,37 +343,22 @@ class UsageTracker:
             now = datetime.utcnow()
             
             if period == "today":
-                date_key = now.strftime("%Y-%m-%d")
-                usage_key = f"usage:daily:{date_key}"
-                cache_key = f"cache_hits:{date_key}"
+                usage_period, date_key = "daily", now.strftime("%Y-%m-%d")
             elif period == "yesterday":
                 yesterday = now - timedelta(days=1)
-                date_key = yesterday.strftime("%Y-%m-%d")
-                usage_key = f"usage:daily:{date_key}"
-                cache_key = f"cache_hits:{date_key}"
+                usage_period, date_key = "daily", yesterday.strftime("%Y-%m-%d")
             elif period == "this_month":
-                date_key = now.strftime("%Y-%m")
-                usage_key = f"usage:monthly:{date_key}"
-                cache_key = None  # Calculate from daily cache hits
+                usage_period, date_key = "monthly", now.strftime("%Y-%m")
             elif period == "last_month":
                 last_month = now.replace(day=1) - timedelta(days=1)
-                date_key = last_month.strftime("%Y-%m")
-                usage_key = f"usage:monthly:{date_key}"
-                cache_key = None
+                usage_period, date_key = "monthly", last_month.strftime("%Y-%m")
             else:
                 raise ValueError(f"Invalid period: {period}")
             
-            # Get usage data
-            usage_data = await self.cache.get_json(usage_key) or {}
-            
-            # Get cache hits
-            cache_hits = 0
-            if cache_key:
-                cache_data = await self.cache.get_json(cache_key) or {}
-                cache_hits = sum(
-                    sum(provider_hits.values()) if isinstance(provider_hits, dict) else provider_hits
-                    for provider_hits in cache_data.values()
-                )
+            # Usage and cache hits (daily only) in one round trip
+            usage_data, cache_hits = await self._get_usage(
+                usage_period, date_key, cache_hits=usage_period == "daily"
+            )
             
             # Calculate cache hit rate
             total_requests = usage_data.get("total_requests", 0)
@@ -361,11 +396,10 @@ class UsageTracker:
         alerts = []
         
         try:
-            for i in range(7):
-                date = (datetime.utcnow() - timedelta(days=i)).strftime("%Y-%m-%d")
-                alert_key = f"alerts:{date}"
-                daily_alerts = await self.cache.get_json(alert_key) or []
-                alerts.extend(daily_alerts)
+            now = datetime.utcnow()
+            alert_keys = [f"alerts:{(now - timedelta(days=i)).strftime('%Y-%m-%d')}" for i in range(7)]
+            for daily_alerts in await self.cache.get_many_json(alert_keys):
+                alerts.extend(daily_alerts or [])
             
             # Sort by timestamp (newest first)
             alerts.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
@@ -424,17 +458,22 @@ class UsageTracker:
             now = datetime.utcnow()
             
             if period == "today":
+                date_key = now.strftime('%Y-%m-%d')
                 keys = [
-                    f"usage:daily:{now.strftime('%Y-%m-%d')}",
-                    f"cache_hits:{now.strftime('%Y-%m-%d')}"
+                    self._counter_key("daily", date_key),
+                    self._cache_hits_key(date_key),
+                    f"usage:daily:{date_key}",
+                    f"cache_hits:{date_key}"
                 ]
             elif period == "this_month":
-                keys = [f"usage:monthly:{now.strftime('%Y-%m')}"]
+                date_key = now.strftime('%Y-%m')
+                keys = [self._counter_key("monthly", date_key), f"usage:monthly:{date_key}"]
             else:
                 return False
             
-            for key in keys:
-                await self.cache.delete(key)
+            async with self.cache.pipeline() as pipe:
+                for key in keys:
+                    pipe.delete(key)
             
             logger.info(f"Usage counters reset for period: {period}")
             return True
@@ -0,0 +1,152 @@
+"""
+Shorter variants of existing tours.
+Selects and condenses the stops of a longer tour (per stop, in parallel),
+reuses its geocoded stops, and reuses the audio segments of every stop whose
+narration is kept verbatim.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from .ai_service import ai_service
+from .audio_storage import audio_storage
+from .audio_pipeline import TTSPipeline
+from app.config import settings
+from app.models.tour import Tour
+from app.utils.geo import format_distance, format_walking_time, route_distance_m
+from app.utils.stop_sections import split_narration_by_stops
+from app.utils.tour_variants import plan_variant, reusable_segments, segment_texts
+
+logger = logging.getLogger(__name__)
+
+class VariantService:
+    """
+    Derives a shorter tour from a longer one of the same location and language.
+
+    Features:
+    - Keeps the stops with the most content, in route order
+    - Condenses only sections that are over budget or whose walking directions changed
+    - Recomputes walking distance and time over the kept stops
+    - Marks verbatim sections for audio reuse from the source tour's segments
+    """
+
+    def __init__(self):
+        self.ai_service = ai_service
+        self.storage = audio_storage
+
+    async def derive(self, source: Tour, location: Dict[str, Any], target_minutes: int) -> Dict[str, Any]:
+        """
+        Build the content of a shorter variant of ``source``.
+
+        Args:
+            source: Ready source tour (content and walkable stops present)
+            location: Tour location dict (``coordinates`` as ``[lat, lng]``)
+            target_minutes: Duration of the variant
+
+        Returns:
+            Dict with ``title``, ``content``, ``sections`` (stop indexes
+            renumbered to the kept stops; verbatim sections carry ``reuse``),
+            ``walkable_stops``, walking metrics and ``metadata``
+        """
+        stops = source.walkable_stops or []
+        sections = split_narration_by_stops(source.content, stops)
+        plan = plan_variant(sections, stops, source.duration_minutes, target_minutes)
+
+        manifest = await self.storage.get_manifest(source.id)
+        segments = (manifest or {}).get("segments") or []
+        texts = segment_texts(source.content, segments)
+
+        semaphore = asyncio.Semaphore(max(1, settings.TRANSLATION_CONCURRENCY))
+
+        async def condense(entry: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+            if not entry["rewrite"]:
+                return entry["text"], None
+            async with semaphore:
+                return await self.ai_service.condense_section(
+                    entry["text"], entry["target_chars"], source.language, next_stop=entry["next_stop"]
+                )
+
+        t0 = time.perf_counter()
+        results = await asyncio.gather(*(condense(entry) for entry in plan))
+        latency_ms = int((time.perf_counter() - t0) * 1000)
+
+        kept_indexes = [entry["stop_index"] for entry in plan if entry["stop_index"] is not None]
+        renumber = {old: new for new, old in enumerate(kept_indexes)}
+        kept_stops = [{**stops[old], "order": new + 1} for new, old in enumerate(kept_indexes)]
+
+        variant_sections = []
+        for entry, (text, _) in zip(plan, results):
+            section = {
+                "stop_index": renumber.get(entry["stop_index"]),
+                "title": entry["title"],
+                "text": text.strip(),
+            }
+            if not entry["rewrite"]:
+                # Matched against the source manifest with the original stop index
+                section["reuse"] = reusable_segments(entry, texts, segments)
+            variant_sections.append(section)
+
+        coordinates = location.get("coordinates")
+        points = [tuple(coordinates) if coordinates else None]
+        points += [
+            (stop["latitude"], stop["longitude"]) if stop.get("latitude") is not None and stop.get("longitude") is not None else None
+            for stop in kept_stops
+        ]
+        distance = route_distance_m(points)
+
+        providers = [provider for _, provider in results if provider]
+        actual_provider = max(set(providers), key=providers.count) if providers else (source.llm_provider or self.ai_service.default_provider)
+        rewritten = sum(1 for entry in plan if entry["rewrite"])
+        logger.info(f"Planned {target_minutes}-minute variant of tour {source.id}: {len(kept_stops)}/{len(stops)} stops, {rewritten} sections condensed in {latency_ms} ms")
+
+        return {
+            "title": source.title,
+            "content": "\n\n".join(section["text"] for section in variant_sections),
+            "sections": variant_sections,
+            "walkable_stops": kept_stops,
+            "total_walking_distance": format_distance(distance) if distance else source.total_walking_distance,
+            "estimated_walking_time": format_walking_time(distance) if distance else source.estimated_walking_time,
+            "difficulty_level": source.difficulty_level or "easy",
+            "metadata": {
+                "actual_provider": actual_provider,
+                "model": self.ai_service.provider_configs[actual_provider]["translation_model"] if providers else source.llm_model,
+                "generation_timestamp": datetime.utcnow().isoformat(),
+                "language": source.language,
+                "derived_from": str(source.id),
+                "source_duration_minutes": source.duration_minutes,
+                "kept_stops": len(kept_stops),
+                "rewritten_sections": rewritten,
+                "condense_ms": latency_ms,
+            },
+        }
+
+    def submit(self, pipeline: TTSPipeline, variant: Dict[str, Any]) -> int:
+        """
+        Queue the variant's narration on a TTS pipeline.
+
+        Verbatim sections copy their audio from the source tour; the rest is
+        synthesized.
+
+        Returns:
+            Number of segments reused from the source tour
+        """
+        source_tour_id = variant["metadata"]["derived_from"]
+        reused = 0
+        for section in variant["sections"]:
+            matches = section.get("reuse")
+            if not matches:
+                pipeline.submit_sections([section])
+                continue
+            for match in matches:
+                pipeline.submit_reused(
+                    match["text"], source_tour_id, match["index"],
+                    stop_index=section["stop_index"], title=section["title"],
+                )
+                reused += 1
+        return reused
+
+# Global variant service instance
+variant_service = VariantService()
@@ -50,6 +50,7 @@ class TestAIService:
             service.usage_tracker = mock_tracker
             service.openai_client = mock_openai_client
             service.anthropic_client = mock_anthropic_client
+            service.audio_transcoder = MagicMock(available=False)
             return service
     
     @pytest.fixture
@@ -319,6 +320,40 @@ class TestAIService:
             
             assert "Failed to generate audio" in str(exc_info.value)
     
+    @pytest.mark.asyncio
+    async def test_generate_audio_other_speed_is_stretched_from_canonical(self, ai_service):
+        """Test that a non-canonical speed costs one TTS call at the canonical speed plus a local stretch"""
+        ai_service.cache.get.return_value = None
+        ai_service.tts.synthesize = AsyncMock(return_value=(b"canonical", ai_service.tts.primary))
+        ai_service.audio_transcoder = MagicMock(available=True)
+        ai_service.audio_transcoder.time_stretch = AsyncMock(return_value=b"faster")
+        
+        with patch('services.ai_service.settings.TTS_CANONICAL_SPEED', 1.2), \
+             patch('services.ai_service.settings.AUDIO_TIME_STRETCH_ENABLED', True):
+            result = await ai_service.generate_audio("Hello world", "alloy", 1.5)
+        
+        assert result == b"faster"
+        ai_service.tts.synthesize.assert_awaited_once_with("Hello world", "alloy", 1.2, "en")
+        assert ai_service.audio_transcoder.time_stretch.await_args.args[1] == pytest.approx(1.25)
+        # Canonical and stretched audio are both cached
+        assert ai_service.cache.set.call_count == 2
+        ai_service.usage_tracker.record_api_usage.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_generate_audio_failed_stretch_synthesizes_speed(self, ai_service):
+        """Test that audio is synthesized at the requested speed when the stretch fails"""
+        from services.audio_transcoder import TranscodeError
+        ai_service.cache.get.return_value = None
+        ai_service.tts.synthesize = AsyncMock(return_value=(b"audio", ai_service.tts.primary))
+        ai_service.audio_transcoder = MagicMock(available=True)
+        ai_service.audio_transcoder.time_stretch = AsyncMock(side_effect=TranscodeError("no libmp3lame"))
+        
+        with patch('services.ai_service.settings.TTS_CANONICAL_SPEED', 1.2), \
+             patch('services.ai_service.settings.AUDIO_TIME_STRETCH_ENABLED', True):
+            await ai_service.generate_audio("Hello world", "alloy", 1.5)
+        
+        assert [call.args[2] for call in ai_service.tts.synthesize.await_args_list] == [1.2, 1.5]
+    
     @pytest.mark.asyncio
     async def test_create_content_cache_key(self, ai_service, sample_location):
         """Test cache key generation for content"""
@@ -365,6 +400,29 @@ class TestAIService:
         
         # Different voice should produce different key
         assert key1 != key3
+        
+        # Reflowed text is the same speech
+        assert ai_service._create_audio_cache_key("Hello\n  world", "alloy", 1.0) == key1
+    
+    @pytest.mark.asyncio
+    async def test_generate_audio_chunked_synthesizes_each_paragraph_once(self, ai_service):
+        """Test that audio is assembled per paragraph and repeated paragraphs are synthesized once"""
+        transition = "Now follow the canal north for a few minutes until you reach the next stop."
+        text = "\n\n".join([
+            "The first stop is the old church, built in the thirteenth century on the river bank.",
+            transition,
+            "The second stop is the flower market, the only floating flower market in the world.",
+            transition,
+        ])
+        
+        async def fake_generate_audio(text, voice=None, speed=1.0, language="en"):
+            return f"<{text[:10]}>".encode()
+        
+        with patch.object(ai_service, 'generate_audio', side_effect=fake_generate_audio) as mock_generate:
+            result = await ai_service.generate_audio_chunked(text, voice="alloy")
+        
+        assert mock_generate.call_count == 3
+        assert result == b"<The first ><Now follow><The second><Now follow>"
     
     @pytest.mark.asyncio
     async def test_estimate_tokens(self, ai_service):
@@ -533,4 +591,70 @@ class TestAIService:
         assert "content" in result
         assert result["metadata"]["duration_minutes"] == duration
         assert result["metadata"]["interests"] == interests
-        assert result["metadata"]["language"] == language
\ No newline at end of file
+        assert result["metadata"]["language"] == language
+    
+    @pytest.mark.asyncio
+    async def test_translate_text_uses_cache(self, ai_service):
+        """Test that cached translations skip the provider call"""
+        ai_service.cache.get_json.return_value = {"text": "Bonjour", "provider": "openai"}
+        
+        translated, provider = await ai_service.translate_text("Hello", "en", "fr")
+        
+        assert translated == "Bonjour"
+        assert provider == LLMProvider.OPENAI
+        ai_service.openai_client.chat.completions.create.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_translate_text_falls_back_to_other_provider(self, ai_service):
+        """Test that translation falls back to the other provider on failure"""
+        ai_service.cache.get_json.return_value = None
+        ai_service.openai_client.chat.completions.create.side_effect = Exception("rate limited")
+        anthropic_response = MagicMock()
+        anthropic_response.content[0].text = "Hola"
+        ai_service.anthropic_client.messages.create.return_value = anthropic_response
+        
+        translated, provider = await ai_service.translate_text("Hello", "en", "es", provider=LLMProvider.OPENAI)
+        
+        assert (translated, provider) == ("Hola", LLMProvider.ANTHROPIC)
+        ai_service.cache.set_json.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_translate_tour_keeps_stops_and_structure(self, ai_service):
+        """Test that tour translation keeps stop order, names and coordinates"""
+        stops = [
+            {"name": "Dam Square", "description": "The main square", "highlights": ["Royal Palace"], "latitude": 52.373, "longitude": 4.893},
+            {"name": "Begijnhof", "description": "A hidden courtyard", "highlights": [], "latitude": 52.369, "longitude": 4.890},
+        ]
+        sections = [
+            {"stop_index": None, "title": "Introduction", "text": "Welcome."},
+            {"stop_index": 0, "title": "Dam Square", "text": "This is Dam Square."},
+            {"stop_index": 1, "title": "Begijnhof", "text": "This is the Begijnhof."},
+        ]
+        details = json.dumps({
+            "title": "Paseo por Ámsterdam",
+            "stops": [
+                {"description": "La plaza principal", "highlights": ["Palacio Real"]},
+                {"description": "Un patio escondido", "highlights": []},
+            ],
+        })
+        
+        async def fake_translate(text, source_language, target_language, json_values=False, provider=None):
+            return (details if json_values else f"[es] {text}"), LLMProvider.OPENAI
+        
+        with patch.object(ai_service, 'translate_text', side_effect=fake_translate):
+            result = await ai_service.translate_tour("Amsterdam Walk", sections, stops, "en", "es")
+        
+        assert result["title"] == "Paseo por Ámsterdam"
+        assert [s["stop_index"] for s in result["sections"]] == [None, 0, 1]
+        assert result["content"] == "[es] Welcome.\n\n[es] This is Dam Square.\n\n[es] This is the Begijnhof."
+        assert result["walkable_stops"][0]["name"] == "Dam Square"
+        assert result["walkable_stops"][0]["latitude"] == 52.373
+        assert result["walkable_stops"][0]["description"] == "La plaza principal"
+        assert result["metadata"]["source_language"] == "en"
+        assert result["metadata"]["translated_sections"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_translated_details_with_wrong_shape_are_ignored(self, ai_service):
+        """Test that stop details are kept when the translated JSON does not match"""
+        assert ai_service._parse_translated_details('{"title": "x", "stops": []}', 2) is None
+        assert ai_service._parse_translated_details("not json", 0) is None
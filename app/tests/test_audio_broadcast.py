@@ -0,0 +1,65 @@
+"""Tests for live fan-out of tour audio."""
+import asyncio
+import pytest
+
+from services.audio_broadcast import AudioBroadcast, AudioBroadcaster
+
+
+async def collect(broadcast: AudioBroadcast) -> bytes:
+    return b"".join([chunk async for chunk in broadcast.iter_bytes()])
+
+
+class TestAudioBroadcast:
+    """Test AudioBroadcast ordering and completion."""
+
+    @pytest.mark.asyncio
+    async def test_segments_are_delivered_in_order(self):
+        """Test that a later segment written first is held back until earlier ones finish."""
+        broadcast = AudioBroadcast("tour")
+        listener = asyncio.ensure_future(collect(broadcast))
+
+        await broadcast.write(1, b"B1")
+        await broadcast.write(0, b"A1")
+        await broadcast.finish_segment(1)
+        await broadcast.write(0, b"A2")
+        await broadcast.finish_segment(0)
+        await broadcast.complete(2)
+
+        assert await asyncio.wait_for(listener, timeout=1) == b"A1A2B1"
+
+    @pytest.mark.asyncio
+    async def test_listener_receives_bytes_before_segment_finishes(self):
+        """Test that bytes are passed through as soon as they are written."""
+        broadcast = AudioBroadcast("tour")
+        stream = broadcast.iter_bytes()
+
+        await broadcast.write(0, b"first")
+        assert await asyncio.wait_for(stream.__anext__(), timeout=1) == b"first"
+
+        await broadcast.fail()
+        with pytest.raises(StopAsyncIteration):
+            await asyncio.wait_for(stream.__anext__(), timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_late_listener_gets_everything(self):
+        """Test that a listener joining after synthesis started starts from the beginning."""
+        broadcast = AudioBroadcast("tour")
+        await broadcast.write(0, b"intro")
+        await broadcast.finish_segment(0)
+        await broadcast.complete(1)
+
+        assert await asyncio.wait_for(collect(broadcast), timeout=1) == b"intro"
+
+    @pytest.mark.asyncio
+    async def test_release_ends_unfinished_broadcast(self):
+        """Test that releasing an unfinished broadcast stops its listeners."""
+        broadcaster = AudioBroadcaster()
+        broadcast = broadcaster.open("tour")
+        listener = asyncio.ensure_future(collect(broadcast))
+        await broadcast.write(0, b"partial")
+        await asyncio.sleep(0.01)
+
+        await broadcaster.release("tour")
+
+        assert broadcaster.get("tour") is None
+        assert await asyncio.wait_for(listener, timeout=1) == b"partial"
@@ -0,0 +1,113 @@
+"""Tests for TTS pipeline retries and resuming from checkpointed segments."""
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from services.audio_pipeline import TTSPipeline
+from utils.tts_text import segment_hash
+
+TEXTS = ["The tour starts at the fountain.", "Then walk north to the old church."]
+
+
+def make_pipeline(checkpoint=None) -> TTSPipeline:
+    pipeline = TTSPipeline(uuid.uuid4(), voice="alloy", speed=1.2, checkpoint=checkpoint)
+    pipeline.broadcast = None
+    pipeline.ai_service = MagicMock()
+    pipeline.ai_service.synthesize_audio = AsyncMock(side_effect=lambda text, voice, speed, language: (text.encode(), "openai"))
+    pipeline.storage = MagicMock()
+    pipeline.storage.get_segment = AsyncMock(return_value=None)
+    pipeline.storage.put_segment = AsyncMock()
+    pipeline.storage.put_manifest = AsyncMock()
+    return pipeline
+
+
+def checkpoint_for(texts, ready=(True, False), voice="alloy"):
+    return {
+        "voice": voice,
+        "speed": 1.2,
+        "segments": [
+            {"index": i, "chars": len(text), "hash": segment_hash(text), "bytes": len(text) if done else None, "ready": done}
+            for i, (text, done) in enumerate(zip(texts, ready))
+        ],
+    }
+
+
+class TestRetries:
+    """Test per-segment retries."""
+
+    @pytest.mark.asyncio
+    async def test_failed_segment_is_retried_with_backoff(self):
+        """Test that a transient TTS error only retries the failed segment."""
+        pipeline = make_pipeline()
+        calls = []
+
+        async def flaky(text, voice, speed, language):
+            calls.append(text)
+            if len(calls) == 1:
+                raise RuntimeError("502 Bad Gateway")
+            return text.encode(), "openai"
+
+        pipeline.ai_service.synthesize_audio = AsyncMock(side_effect=flaky)
+
+        with patch("services.audio_pipeline.asyncio.sleep", new=AsyncMock()) as sleep:
+            pipeline.submit(TEXTS[0])
+            audio = await pipeline.finish()
+
+        assert audio == TEXTS[0].encode()
+        assert pipeline.retries == 1
+        sleep.assert_awaited_once()
+        assert pipeline.manifest["complete"] is True
+
+    @pytest.mark.asyncio
+    async def test_serving_providers_are_counted(self):
+        """Test that segments are counted per provider and the main one is reported."""
+        pipeline = make_pipeline()
+        served = iter([(b"a", "google"), (b"b", None), (b"c", "google"), (b"d", "openai")])
+        pipeline.ai_service.synthesize_audio = AsyncMock(side_effect=lambda **kwargs: next(served))
+
+        for text in "abcd":
+            pipeline.submit(text)
+        await pipeline.finish()
+
+        assert pipeline.providers == {"google": 2, "cache": 1, "openai": 1}
+        assert pipeline.provider == "google"
+
+
+class TestCheckpoints:
+    """Test resuming from stored segments."""
+
+    @pytest.mark.asyncio
+    async def test_resume_synthesizes_only_missing_segments(self):
+        """Test that checkpointed segments are read from storage instead of synthesized."""
+        checkpoint = checkpoint_for(TEXTS)
+        pipeline = make_pipeline(checkpoint)
+        pipeline.storage.get_segment = AsyncMock(side_effect=lambda tour_id, index: TEXTS[index].encode() if index == 0 else None)
+
+        assert pipeline.resubmit("\n\n".join(TEXTS), checkpoint["segments"])
+        audio = await pipeline.finish()
+
+        assert audio == "".join(TEXTS).encode()
+        assert pipeline.resumed == 1
+        pipeline.ai_service.synthesize_audio.assert_awaited_once()
+        assert pipeline.ai_service.synthesize_audio.await_args.kwargs["text"] == TEXTS[1]
+        pipeline.storage.put_segment.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_changed_text_or_voice_is_not_resumed(self):
+        """Test that a checkpoint for other text or another voice is ignored."""
+        pipeline = make_pipeline(checkpoint_for(TEXTS, voice="nova"))
+        pipeline.storage.get_segment = AsyncMock(return_value=b"stale")
+
+        pipeline.submit(TEXTS[0])
+        await pipeline.finish()
+
+        assert pipeline.resumed == 0
+        pipeline.storage.get_segment.assert_not_awaited()
+
+    def test_resubmit_rejects_edited_content(self):
+        """Test that chunks are not resubmitted when the narration changed."""
+        pipeline = make_pipeline()
+
+        assert pipeline.resubmit("The tour starts at the well. Then walk north.", checkpoint_for(TEXTS)["segments"]) is False
+        assert pipeline.chunks == []
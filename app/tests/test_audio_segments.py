@@ -0,0 +1,164 @@
+"""Tests for per-stop audio segmentation, MP3 seeking and HLS playlists."""
+import struct
+
+from services.audio_storage import AudioStorage
+from utils.mp3 import build_seek_index, iter_frames, mp3_duration, rebuild_vbr_header, seek_offset
+from utils.stop_sections import split_narration_by_stops
+
+# MPEG1 layer III, 128 kbps, 44.1 kHz, no padding: 417 byte frames of 1152 samples
+FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+FRAME_DURATION = 1152 / 44100
+# Same stream with the LAME "Info" tag after the 32 byte side info: a header frame, not audio
+INFO_FRAME = FRAME[:36] + b"Info" + FRAME[40:]
+
+
+def id3_tag(payload: bytes = b"\x00" * 20) -> bytes:
+    size = len(payload)
+    syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+    return b"ID3\x04\x00\x00" + syncsafe + payload
+
+
+class TestMP3Duration:
+    """Test frame-based MP3 duration measurement."""
+
+    def test_duration_sums_frames(self):
+        """Test that duration is the number of frames times samples per frame."""
+        assert abs(mp3_duration(FRAME * 100) - 100 * FRAME_DURATION) < 1e-9
+
+    def test_skips_id3_tags_between_concatenated_files(self):
+        """Test that ID3 tags at the start and between files are not counted as audio."""
+        data = id3_tag() + FRAME * 10 + id3_tag() + FRAME * 5
+        assert len(list(iter_frames(data))) == 15
+
+    def test_resyncs_after_garbage(self):
+        """Test that bytes between frames do not break frame walking."""
+        data = FRAME * 3 + b"\x00\xff\x12" + FRAME * 3
+        assert len(list(iter_frames(data))) == 6
+
+    def test_not_mp3(self):
+        """Test that data without frames has no duration."""
+        assert mp3_duration(b"not audio at all") == 0
+
+
+class TestSeekIndex:
+    """Test Xing header rebuilding and time to byte offset seeking."""
+
+    def chunked_tts_audio(self) -> bytes:
+        # Two TTS chunks, each a complete MP3 file with its own tag and Info frame
+        return id3_tag() + INFO_FRAME + FRAME * 100 + id3_tag() + INFO_FRAME + FRAME * 50
+
+    def test_info_frames_are_not_audio(self):
+        """Test that per-chunk Info frames do not count towards the duration."""
+        assert abs(mp3_duration(self.chunked_tts_audio()) - 150 * FRAME_DURATION) < 1e-9
+
+    def test_rebuilt_header_describes_whole_file(self):
+        """Test that chunk headers are replaced by one Xing frame counting every frame."""
+        rebuilt = rebuild_vbr_header(self.chunked_tts_audio())
+        frames = list(iter_frames(rebuilt))
+
+        assert len(frames) == 151
+        assert rebuilt[36:40] == b"Info"  # constant bitrate
+        flags, frame_count, byte_count = struct.unpack(">III", rebuilt[40:52])
+        assert (flags, frame_count, byte_count) == (7, 150, len(rebuilt))
+        toc = list(rebuilt[52:152])
+        assert toc == sorted(toc) and toc[0] == 0
+        assert rebuilt.count(b"Info") == 1 and b"ID3" not in rebuilt
+
+    def test_seek_is_frame_exact(self):
+        """Test that seeking returns the frame playing at the requested time."""
+        rebuilt = rebuild_vbr_header(self.chunked_tts_audio())
+        xing_length = list(iter_frames(rebuilt))[0][1].length
+        index = build_seek_index(rebuilt)
+
+        assert index["frames"] == 150
+        offset, start = seek_offset(index, 2.3, rebuilt)
+        frame = int(2.3 / FRAME_DURATION)
+        assert offset == xing_length + frame * len(FRAME)
+        assert abs(start - frame * FRAME_DURATION) < 1e-6
+
+    def test_seek_clamps_to_last_frame(self):
+        """Test that seeking past the end lands on the last frame."""
+        data = FRAME * 10
+        offset, _ = seek_offset(build_seek_index(data), 60, data)
+        assert offset == 9 * len(FRAME)
+
+
+class TestSplitNarrationByStops:
+    """Test aligning narration sections with walkable stops."""
+
+    STOPS = [{"name": "Dam Square"}, {"name": "Royal Palace"}, {"name": "Westerkerk (Western Church)"}]
+
+    def test_paragraphs_align_with_stops(self):
+        """Test that each stop starts at the paragraph introducing it."""
+        content = (
+            "Welcome to Amsterdam, a city built on water.\n\n"
+            "We begin at Dam Square, the heart of the city. Next we walk to the Royal Palace.\n\n"
+            "The Royal Palace was built as a city hall.\n\n"
+            "Our last stop is the Westerkerk, where Rembrandt is buried."
+        )
+        sections = split_narration_by_stops(content, self.STOPS)
+
+        assert [s["stop_index"] for s in sections] == [None, 0, 1, 2]
+        assert sections[0]["title"] == "Introduction"
+        assert sections[2]["text"] == "The Royal Palace was built as a city hall."
+        assert sections[3]["title"] == "Westerkerk (Western Church)"
+
+    def test_sentences_without_paragraphs(self):
+        """Test that stops start at a sentence when the narration has no paragraphs."""
+        content = "We begin at Dam Square. It is busy. Next we walk to the Royal Palace. It was a city hall."
+        sections = split_narration_by_stops(content, self.STOPS[:2])
+
+        assert [s["stop_index"] for s in sections] == [0, 1]
+        assert sections[1]["text"] == "Next we walk to the Royal Palace. It was a city hall."
+
+    def test_unmentioned_stop_is_folded_into_previous(self):
+        """Test that stops never mentioned do not create empty sections."""
+        content = "We begin at Dam Square. Finally, the Westerkerk."
+        sections = split_narration_by_stops(content, self.STOPS)
+
+        assert [s["stop_index"] for s in sections] == [0, 2]
+
+    def test_no_stops(self):
+        """Test that narration without stops is a single introduction section."""
+        sections = split_narration_by_stops("Just a story.", [])
+        assert sections == [{"stop_index": None, "title": "Introduction", "text": "Just a story."}]
+
+
+class TestPlaylist:
+    """Test HLS playlist and stop marker generation."""
+
+    SEGMENTS = [
+        {"index": 0, "stop_index": None, "title": "Introduction", "duration": 12.5, "ready": True},
+        {"index": 1, "stop_index": 0, "title": "Dam Square", "duration": 60.0, "ready": True},
+        {"index": 2, "stop_index": 0, "title": "Dam Square", "duration": 30.25, "ready": True},
+        {"index": 3, "stop_index": 1, "title": "Royal Palace", "duration": None, "ready": False},
+    ]
+
+    def test_complete_playlist(self):
+        """Test a finished tour gets a VOD playlist with an end tag."""
+        playlist = AudioStorage.build_playlist(self.SEGMENTS[:3], True, lambda s: f"seg/{s['index']}.mp3")
+        lines = playlist.splitlines()
+
+        assert lines[0] == "#EXTM3U"
+        assert "#EXT-X-TARGETDURATION:60" in lines
+        assert "#EXT-X-PLAYLIST-TYPE:VOD" in lines
+        assert lines[lines.index("seg/0.mp3") - 1] == "#EXTINF:12.500,Introduction"
+        assert lines[-1] == "#EXT-X-ENDLIST"
+
+    def test_in_progress_playlist(self):
+        """Test an unfinished tour gets an EVENT playlist that players keep polling."""
+        manifest = {"segments": self.SEGMENTS, "complete": False}
+        segments = AudioStorage.ready_prefix(manifest)
+        playlist = AudioStorage.build_playlist(segments, False, lambda s: f"seg/{s['index']}.mp3")
+
+        assert "#EXT-X-PLAYLIST-TYPE:EVENT" in playlist
+        assert "#EXT-X-ENDLIST" not in playlist
+        assert "seg/3.mp3" not in playlist
+
+    def test_stop_markers(self):
+        """Test that stops map to their first segment and start time."""
+        markers = AudioStorage.stop_markers(self.SEGMENTS)
+
+        assert [m["stop_index"] for m in markers] == [None, 0, 1]
+        assert markers[1] == {"stop_index": 0, "title": "Dam Square", "first_segment": 1, "start_time": 12.5}
+        assert markers[2]["start_time"] == 102.75
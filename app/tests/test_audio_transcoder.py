@@ -0,0 +1,131 @@
+"""Tests for audio variant negotiation and transcoding."""
+import pytest
+from unittest.mock import AsyncMock
+
+from services import audio_transcoder as transcoder_module
+from services.audio_transcoder import AudioTranscoder, atempo_filter, negotiate_variant, parse_accept, speed_variant_name
+
+
+class TestNegotiateVariant:
+    """Test choosing the audio variant for a request."""
+
+    @pytest.fixture(autouse=True)
+    def default_variant(self, monkeypatch):
+        monkeypatch.setattr(transcoder_module.settings, "AUDIO_DEFAULT_VARIANT", "mp3-low")
+
+    def test_query_parameter_wins(self):
+        """Test that an explicit format overrides the Accept header."""
+        assert negotiate_variant("original", "audio/ogg") == "original"
+        assert negotiate_variant("OPUS", "audio/mpeg") == "opus"
+
+    def test_unknown_format_is_ignored(self):
+        """Test that an unknown format falls back to negotiation."""
+        assert negotiate_variant("flac", "audio/ogg") == "opus"
+
+    def test_accept_ogg_selects_opus(self):
+        """Test that clients listing Ogg get Opus."""
+        accept = "audio/webm,audio/ogg,audio/wav,audio/*;q=0.9,*/*;q=0.5"
+        assert negotiate_variant(None, accept) == "opus"
+
+    def test_accept_prefers_mp3(self):
+        """Test that a higher quality value for MP3 keeps the MP3 ladder."""
+        assert negotiate_variant(None, "audio/ogg;q=0.5, audio/mpeg") == "mp3-low"
+
+    def test_rejected_media_type(self):
+        """Test that q=0 excludes a media type."""
+        assert negotiate_variant(None, "audio/ogg;q=0") == "mp3-low"
+
+    def test_generic_client_gets_default(self, monkeypatch):
+        """Test that */* clients get the configured default."""
+        assert negotiate_variant(None, "*/*") == "mp3-low"
+        monkeypatch.setattr(transcoder_module.settings, "AUDIO_DEFAULT_VARIANT", "original")
+        assert negotiate_variant(None, None) == "original"
+
+    def test_parse_accept_orders_by_quality(self):
+        """Test that Accept entries are sorted by q, keeping header order on ties."""
+        assert parse_accept("a/b;q=0.2, c/d, e/f;q=0.9, g/h") == [
+            ("c/d", 1.0), ("g/h", 1.0), ("e/f", 0.9), ("a/b", 0.2)
+        ]
+
+
+class TestAudioTranscoder:
+    """Test AudioTranscoder caching behaviour."""
+
+    @pytest.mark.asyncio
+    async def test_cached_variant_is_returned(self):
+        """Test that a stored variant is served without encoding."""
+        transcoder = AudioTranscoder()
+        transcoder.storage = AsyncMock()
+        transcoder.storage.get_variant.return_value = b"cached"
+        transcoder.transcode = AsyncMock()
+
+        assert await transcoder.get_or_create("tour", "opus") == b"cached"
+        transcoder.transcode.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_disabled_transcoding_returns_none(self, monkeypatch):
+        """Test that nothing is encoded when transcoding is disabled."""
+        monkeypatch.setattr(transcoder_module.settings, "AUDIO_TRANSCODE_ENABLED", False)
+        transcoder = AudioTranscoder()
+        transcoder.storage = AsyncMock()
+        transcoder.storage.get_variant.return_value = None
+
+        assert await transcoder.get_or_create("tour", "opus") is None
+        assert await transcoder.create_variants("tour", b"mp3") == {}
+
+    @pytest.mark.asyncio
+    async def test_missing_variant_is_encoded_and_stored(self, monkeypatch):
+        """Test that a missing variant is encoded from the original and stored."""
+        monkeypatch.setattr(AudioTranscoder, "available", property(lambda self: True))
+        transcoder = AudioTranscoder()
+        transcoder.storage = AsyncMock()
+        transcoder.storage.get_variant.return_value = None
+        transcoder.storage.get_tour_audio.return_value = b"original mp3"
+        transcoder.storage.put_variant.return_value = b"opus"
+        transcoder.transcode = AsyncMock(return_value=b"opus")
+
+        assert await transcoder.get_or_create("tour", "opus") == b"opus"
+        transcoder.storage.put_variant.assert_awaited_once_with("tour", "opus", b"opus")
+
+
+class TestSpeedVariants:
+    """Test playback speeds derived by time-stretching."""
+
+    def test_atempo_chains_factors_outside_filter_range(self):
+        """Test that factors beyond 0.5-2.0 are split into chained atempo stages."""
+        assert atempo_filter(1.25) == "atempo=1.25"
+        assert atempo_filter(3.0) == "atempo=2,atempo=1.5"
+        assert atempo_filter(0.3) == "atempo=0.5,atempo=0.6"
+
+    def test_speed_variant_name_rounds_to_steps(self):
+        """Test that nearby speeds share one cached variant."""
+        assert speed_variant_name(1.49) == "speed-1.5"
+        assert speed_variant_name(0.75) == "speed-0.75"
+
+    @pytest.mark.asyncio
+    async def test_missing_speed_is_stretched_and_stored(self, monkeypatch):
+        """Test that a missing speed variant is stretched from the original and stored."""
+        monkeypatch.setattr(AudioTranscoder, "available", property(lambda self: True))
+        transcoder = AudioTranscoder()
+        transcoder.storage = AsyncMock()
+        transcoder.storage.get_variant.return_value = None
+        transcoder.storage.get_tour_audio.return_value = b"original mp3"
+        transcoder.storage.put_variant.return_value = b"stretched"
+        transcoder.time_stretch = AsyncMock(return_value=b"stretched")
+
+        assert await transcoder.get_or_create_speed("tour", 1.49) == b"stretched"
+        transcoder.time_stretch.assert_awaited_once_with(b"original mp3", 1.5)
+        transcoder.storage.put_variant.assert_awaited_once_with("tour", "speed-1.5", b"stretched")
+
+    @pytest.mark.asyncio
+    async def test_new_audio_drops_speed_variants(self, monkeypatch):
+        """Test that speed variants of earlier audio are removed when variants are re-encoded."""
+        monkeypatch.setattr(AudioTranscoder, "available", property(lambda self: True))
+        transcoder = AudioTranscoder()
+        transcoder.storage = AsyncMock()
+        transcoder.storage.variant_names.return_value = ["opus", "speed-1.5"]
+        transcoder.transcode = AsyncMock(return_value=b"encoded")
+
+        await transcoder.create_variants("tour", b"new mp3")
+
+        transcoder.storage.delete_variant.assert_awaited_once_with("tour", "speed-1.5")
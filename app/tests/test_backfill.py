@@ -0,0 +1,105 @@
+"""Tests for the tour backfill framework."""
+import json
+import uuid
+
+from services.backfill import (
+    BackfillRunner,
+    TranscriptBackfill,
+    WalkingMetricsBackfill,
+    _chunks_from_manifest,
+    _process_rows,
+    compute_transcript,
+    compute_walking_metrics,
+)
+from utils.geo import format_distance, format_walking_time, haversine_m
+
+CONTENT = "Welcome to Amsterdam.\n\nWe begin at Dam Square. It is lively.\n\nThe Royal Palace was a city hall."
+
+
+class TestBackfillProcessors:
+    """Test the CPU-bound backfill functions."""
+
+    def test_chunks_rebuilt_from_manifest(self):
+        """Test that chunk texts are recovered from the lengths stored in the manifest."""
+        first = "Welcome to Amsterdam.\n\nWe begin at Dam Square. It is lively."
+        segments = [{"chars": len(first), "duration": 10.0}, {"chars": 33, "duration": 3.0}]
+
+        chunks = _chunks_from_manifest(CONTENT, segments)
+
+        assert chunks == [(first, 10.0), ("The Royal Palace was a city hall.", 3.0)]
+
+    def test_compute_transcript_uses_measured_segments(self):
+        """Test that transcripts are timed from measured audio segments."""
+        first = "Welcome to Amsterdam.\n\nWe begin at Dam Square. It is lively."
+        row = {
+            "id": uuid.uuid4(),
+            "content": CONTENT,
+            "generation_params": {"model": "gpt-4o-mini"},
+            "audio_segments": [{"chars": len(first), "duration": 10.0}, {"chars": 33, "duration": 3.0}],
+        }
+
+        values = compute_transcript(row)
+
+        assert values["transcript"][-1]["startTime"] == 10.0
+        assert values["transcript"][-1]["endTime"] == 13.0
+        assert values["generation_params"]["model"] == "gpt-4o-mini"
+        assert values["generation_params"]["transcript_alignment"]["method"] == "mp3_frames"
+
+    def test_compute_transcript_without_audio_estimates(self):
+        """Test that tours without audio fall back to an estimate."""
+        values = compute_transcript({"id": uuid.uuid4(), "content": CONTENT, "audio": None})
+        assert values["generation_params"]["transcript_alignment"]["method"] == "estimate"
+
+    def test_compute_walking_metrics(self):
+        """Test that distance and time are derived from the start point and stops."""
+        row = {
+            "id": uuid.uuid4(),
+            "start_latitude": 52.3731,
+            "start_longitude": 4.8926,
+            "walkable_stops": [{"name": "Royal Palace", "latitude": 52.3731, "longitude": 4.8910}],
+            "total_walking_distance": None,
+            "estimated_walking_time": None,
+        }
+
+        values = compute_walking_metrics(row)
+
+        assert values == {"total_walking_distance": "110 m", "estimated_walking_time": "1 minute"}
+        assert compute_walking_metrics({**row, **values}) is None  # unchanged rows are skipped
+
+    def test_process_rows_reports_errors_per_row(self):
+        """Test that one failing row does not fail the batch."""
+        def broken(row):
+            raise ValueError("bad row")
+
+        results = _process_rows(broken, [{"id": 1}])
+        assert results == [(1, None, "ValueError: bad row")]
+
+    def test_geo_helpers(self):
+        """Test distance and walking time formatting."""
+        assert round(haversine_m(52.3731, 4.8926, 52.3731, 4.8910)) == 109
+        assert format_distance(1234) == "1.2 km"
+        assert format_walking_time(1600) == "20 minutes"
+
+
+class TestBackfillRunner:
+    """Test BackfillRunner checkpointing and batching."""
+
+    def test_checkpoint_round_trip(self, tmp_path):
+        """Test that the last committed id is restored on resume."""
+        runner = BackfillRunner(TranscriptBackfill(), session_factory=None, checkpoint_dir=tmp_path)
+        last_id = uuid.uuid4()
+
+        runner.save_checkpoint(last_id)
+
+        assert runner.load_checkpoint() == last_id
+        checkpoint = json.loads((tmp_path / "transcript.json").read_text())
+        assert checkpoint["job"] == "transcript"
+        assert checkpoint["done"] is False
+
+    def test_limit_caps_batches(self):
+        """Test that the limit shrinks the final batch."""
+        runner = BackfillRunner(WalkingMetricsBackfill(), session_factory=None, batch_size=100, limit=250)
+
+        assert runner._next_batch_size(0) == 100
+        assert runner._next_batch_size(200) == 50
+        assert runner._next_batch_size(250) == 0
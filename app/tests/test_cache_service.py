@@ -1,10 +1,14 @@
 """Tests for cache service."""
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 from datetime import datetime, timedelta
+import asyncio
+import json
 import time
 
-from services.cache_service import CacheService
+from services.cache_service import (
+    LATENCY_BUCKETS_MS, CacheCodec, CacheService, Histogram, InMemoryCache, TieredCache, key_prefix, parse_l1_policies,
+)
 from models.cache import CacheEntry
 
 
@@ -294,4 +298,420 @@ class TestCacheService:
         
         retrieved = await cache_service.get("large_key")
         assert retrieved == large_data
-        assert len(retrieved["items"]) == 1000
\ No newline at end of file
+        assert len(retrieved["items"]) == 1000
+
+
+class TestInMemoryCache:
+    """Test the bounded in-memory LRU backend."""
+    
+    @pytest.mark.asyncio
+    async def test_least_recently_used_entry_is_evicted(self):
+        """Test that the byte budget evicts the entry read least recently."""
+        cache = InMemoryCache(max_bytes=1000, sweep_interval=0)
+        await cache.set("a", "x" * 200)
+        await cache.set("b", "x" * 200)
+        await cache.get("a")
+        await cache.set("c", "x" * 200)
+        
+        assert await cache.get("b") is None
+        assert await cache.get("a") is not None
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["bytes"] <= 1000
+    
+    @pytest.mark.asyncio
+    async def test_entry_over_budget_is_rejected(self):
+        """Test that a value larger than the whole budget is not stored."""
+        cache = InMemoryCache(max_bytes=1000, sweep_interval=0)
+        await cache.set("small", "x")
+        await cache.set("audio", "x" * 5000)
+        
+        assert await cache.get("audio") is None
+        assert await cache.get("small") == "x"
+        assert cache.stats()["rejected"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_sweep_removes_expired_entries_without_reads(self):
+        """Test that expired entries are removed by the sweeper, not only on read."""
+        cache = InMemoryCache(max_bytes=0, sweep_interval=0)
+        await cache.set("short", "x", ttl=10)
+        await cache.set("long", "x", ttl=1000)
+        await cache.set("short", "y", ttl=500)  # overwrite leaves a stale heap item
+        
+        assert cache.sweep(now=time.monotonic() + 100) == 0
+        assert cache.sweep(now=time.monotonic() + 600) == 1
+        assert cache.size() == 1
+        assert cache.stats()["expirations"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_sweeper_task_runs_in_background(self):
+        """Test that the sweeper task starts with the first write and stops on close."""
+        cache = InMemoryCache(max_bytes=0, sweep_interval=0.01)
+        await cache.set("key", "value", ttl=0.001)
+        await asyncio.sleep(0.05)
+        
+        assert cache.size() == 0
+        await cache.close()
+        assert cache._sweeper is None
+
+
+class TestTieredCache:
+    """Test the in-process L1 tier in front of Redis."""
+    
+    @pytest.fixture
+    def tiered(self):
+        """TieredCache over a fake Redis, with the invalidation channel marked live."""
+        store = {}
+        redis = AsyncMock()
+        redis.get.side_effect = lambda key: store.get(key)
+        redis.set.side_effect = lambda key, value, ttl=3600: store.__setitem__(key, value)
+        cache = TieredCache(
+            redis,
+            parse_l1_policies("location_search=300,tour:content=600"),
+            InMemoryCache(max_bytes=0, sweep_interval=0),
+            "cache:l1:invalidate",
+        )
+        cache._ensure_subscriber = lambda: None
+        cache._subscribed = True
+        store["location_search:paris"] = b"results"
+        return cache
+    
+    def test_parse_policies_prefers_longest_prefix(self):
+        """Test that the most specific prefix policy is listed first."""
+        policies = parse_l1_policies("tour=60, tour:content=600, bad, usage=x")
+        assert policies == [("tour:content", 600.0), ("tour", 60.0)]
+    
+    @pytest.mark.asyncio
+    async def test_hot_key_is_served_from_l1(self, tiered):
+        """Test that a policy key is read from Redis once and then from process memory."""
+        assert await tiered.get("location_search:paris") == b"results"
+        assert await tiered.get("location_search:paris") == b"results"
+        
+        tiered.redis.get.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_keys_without_policy_always_go_to_redis(self, tiered):
+        """Test that keys outside the L1 policies are not cached in-process."""
+        await tiered.get("audio:tts:abc")
+        await tiered.get("audio:tts:abc")
+        
+        assert tiered.redis.get.await_count == 2
+        assert tiered.l1.size() == 0
+    
+    @pytest.mark.asyncio
+    async def test_write_invalidates_and_publishes(self, tiered):
+        """Test that a write drops the L1 copy and tells the other workers."""
+        await tiered.get("location_search:paris")
+        await tiered.set("location_search:paris", b"new results")
+        
+        assert await tiered.get("location_search:paris") == b"new results"
+        tiered.redis.publish.assert_awaited_once_with("cache:l1:invalidate", f"{tiered.instance_id} location_search:paris")
+    
+    @pytest.mark.asyncio
+    async def test_invalidation_from_other_worker(self, tiered):
+        """Test that keys published by other workers are dropped and own messages are ignored."""
+        await tiered.get("location_search:paris")
+        
+        await tiered.handle_invalidation(f"{tiered.instance_id} location_search:paris")
+        assert tiered.l1.size() == 1
+        await tiered.handle_invalidation("other-worker location_search:paris")
+        assert tiered.l1.size() == 0
+    
+    @pytest.mark.asyncio
+    async def test_l1_is_bypassed_without_subscription(self, tiered):
+        """Test that L1 is not used while invalidations could be missed."""
+        tiered._subscribed = False
+        await tiered.get("location_search:paris")
+        await tiered.get("location_search:paris")
+        
+        assert tiered.redis.get.await_count == 2
+
+
+class TestBatchedOperations:
+    """Test multi-key, counter, hash and pipeline operations on the memory backend."""
+    
+    @pytest.fixture
+    def memory_cache(self):
+        """CacheService over a fresh in-memory backend."""
+        service = CacheService("memory")
+        service._cache = InMemoryCache(max_bytes=0, sweep_interval=0)
+        return service
+    
+    @pytest.mark.asyncio
+    async def test_get_many_keeps_key_order(self, memory_cache):
+        """Test that get_many returns values in key order with None for missing keys."""
+        await memory_cache.set_many_json({"alerts:1": [{"type": "a"}], "alerts:3": []})
+        
+        assert await memory_cache.get_many_json(["alerts:1", "alerts:2", "alerts:3"]) == [[{"type": "a"}], None, []]
+    
+    @pytest.mark.asyncio
+    async def test_counters_and_hashes(self, memory_cache):
+        """Test that increments return the new value and keep the key's expiry."""
+        assert await memory_cache.incr("hits", ttl=60) == 1
+        assert await memory_cache.incr("hits", 2) == 3
+        assert await memory_cache.hincr("usage", "total_cost", 0.5) == 0.5
+        await memory_cache.hset("usage", {"model": "tts-1"})
+        
+        assert await memory_cache.hgetall("usage") == {"total_cost": 0.5, "model": "tts-1"}
+        assert memory_cache._cache._expires_at("hits") is not None
+        
+        await memory_cache.hdel("usage", "model", "missing")
+        assert await memory_cache.hgetall("usage") == {"total_cost": 0.5}
+        await memory_cache.hdel("usage", "total_cost")
+        assert "usage" not in memory_cache._cache._cache
+    
+    @pytest.mark.asyncio
+    async def test_pipeline_results_in_order(self, memory_cache):
+        """Test that queued commands run together and report their results in order."""
+        async with memory_cache.pipeline() as pipe:
+            pipe.set("a", "1").incr("a", 4).get("a").delete("a").hgetall("missing")
+        
+        assert pipe.results == [True, 5, 5, 1, {}]
+    
+    @pytest.mark.asyncio
+    async def test_failed_pipeline_leaves_none_results(self, memory_cache):
+        """Test that backend errors are swallowed like single-key errors."""
+        await memory_cache.set("text", "not a hash")
+        async with memory_cache.pipeline() as pipe:
+            pipe.hincr("text", "field", 1)
+        
+        assert pipe.results == [None]
+
+
+class BytesBackend(InMemoryCache):
+    """In-memory backend that hands text back as bytes, like Redis."""
+    
+    def _store(self, key, value, expires_at):
+        super()._store(key, value.encode("utf-8") if isinstance(value, str) else value, expires_at)
+
+
+class TestCacheCodec:
+    """Test transparent compression of large values."""
+    
+    @pytest.fixture
+    def memory_cache(self):
+        """CacheService compressing values of 100 bytes or more with zlib."""
+        service = CacheService("memory")
+        service._cache = InMemoryCache(max_bytes=0, sweep_interval=0)
+        service.codec = CacheCodec(min_bytes=100, codec="zlib")
+        return service
+    
+    @pytest.mark.asyncio
+    async def test_large_value_is_stored_compressed(self, memory_cache):
+        """Test that a large JSON value is compressed in the backend and read back unchanged."""
+        content = {"script": "The old town hall was rebuilt after the fire. " * 50}
+        await memory_cache.set_json("tour:content:abc", content)
+        
+        stored = memory_cache._cache._cache["tour:content:abc"][0]
+        assert stored[0] == 0xC1
+        assert len(stored) < len(json.dumps(content)) / 5
+        assert await memory_cache.get_json("tour:content:abc") == content
+    
+    @pytest.mark.asyncio
+    async def test_small_and_uncompressed_values_are_stored_as_is(self, memory_cache):
+        """Test that values under the threshold, and values written before compression, stay plain."""
+        await memory_cache.set("nearby:1:2", "short")
+        await memory_cache._cache.set("tour:content:old", json.dumps({"title": "x" * 500}))
+        
+        assert memory_cache._cache._cache["nearby:1:2"][0] == "short"
+        assert await memory_cache.get_json("tour:content:old") == {"title": "x" * 500}
+    
+    @pytest.mark.asyncio
+    async def test_incompressible_value_is_not_compressed(self, memory_cache):
+        """Test that random bytes are stored as they are, escaped if they look like a header."""
+        import os
+        noise = b"\x00" + os.urandom(1000)
+        header_like = b"\xc1" + os.urandom(50)
+        await memory_cache.set("audio:tts:abc", noise)
+        await memory_cache.set("audio:tts:def", header_like)
+        
+        assert memory_cache._cache._cache["audio:tts:abc"][0] == noise
+        assert await memory_cache.get("audio:tts:abc") == noise
+        assert await memory_cache.get("audio:tts:def") == header_like
+    
+    @pytest.mark.asyncio
+    async def test_text_starting_with_non_ascii_round_trips(self, memory_cache):
+        """Test that text starting with characters encoded from 0xC2 is not mistaken for a header."""
+        memory_cache._cache = BytesBackend(max_bytes=0, sweep_interval=0)
+        texts = ["«Bonjour» et bienvenue", "¿Dónde está?", "£5 entry", "°C" + "\u00a0" * 200]
+        for i, text in enumerate(texts):
+            await memory_cache.set(f"location_search:{i}", text)
+        await memory_cache._cache.set("location_search:old", "«Salut»")
+        
+        assert await memory_cache.get_many([f"location_search:{i}" for i in range(len(texts))]) == texts
+        assert await memory_cache.get("location_search:old") == "«Salut»"
+    
+    @pytest.mark.asyncio
+    async def test_values_compressed_with_the_old_zstd_header_stay_readable(self, memory_cache):
+        """Test that zstd values written with the former 0xC2 header are still decompressed."""
+        zstandard = pytest.importorskip("zstandard")
+        memory_cache._cache = BytesBackend(max_bytes=0, sweep_interval=0)
+        await memory_cache._cache.set("tour:content:old", b"\xc2" + zstandard.ZstdCompressor().compress(b"walk " * 100))
+        
+        assert await memory_cache.get("tour:content:old") == "walk " * 100
+    
+    @pytest.mark.asyncio
+    async def test_ratio_is_reported_per_prefix(self, memory_cache):
+        """Test that the compression ratio is reported per key namespace."""
+        await memory_cache.set("tour:content:a", "walk " * 200)
+        await memory_cache.set("location_search:paris:10", "result " * 200)
+        
+        prefixes = memory_cache.stats()["compression"]["prefixes"]
+        assert set(prefixes) == {"tour:content", "location_search"}
+        assert prefixes["tour:content"]["ratio"] > 5
+    
+    def test_key_prefix(self):
+        """Test that known namespaces keep two segments and other keys one."""
+        assert key_prefix("audio:tour:123:variant:opus") == "audio:tour"
+        assert key_prefix("location_search:paris:None:10") == "location_search"
+
+
+
+class TestCacheMetrics:
+    """Test per-prefix metrics and the keyspace inspector."""
+    
+    @pytest.fixture
+    def memory_cache(self):
+        """CacheService over a fresh in-memory backend."""
+        service = CacheService("memory")
+        service._cache = InMemoryCache(max_bytes=0, sweep_interval=0)
+        return service
+    
+    @pytest.mark.asyncio
+    async def test_hits_misses_and_sizes_per_prefix(self, memory_cache):
+        """Test that lookups, writes and latency are counted under each key's prefix."""
+        await memory_cache.set_json("location_search:old town", {"total": 0})
+        await memory_cache.get_json("location_search:old town")
+        await memory_cache.get_json("location_search:new town")
+        await memory_cache.get_many(["nearby:1:2", "nearby:3:4"])
+        
+        prefixes = memory_cache.stats()["prefixes"]
+        assert prefixes["location_search"]["hit_rate"] == 0.5
+        assert prefixes["location_search"]["bytes_written"] == len('{"total": 0}')
+        assert prefixes["location_search"]["latency_ms"]["get"]["count"] == 2
+        assert prefixes["nearby"]["misses"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_backend_errors_are_counted(self, memory_cache):
+        """Test that swallowed backend errors show up in the prefix's counters."""
+        memory_cache._cache.get = AsyncMock(side_effect=ConnectionError("redis down"))
+        
+        assert await memory_cache.get("nearby:1:2") is None
+        assert memory_cache.stats()["prefixes"]["nearby"]["errors"] == 1
+    
+    def test_histogram_percentiles(self):
+        """Test that percentiles are reported as bucket upper bounds."""
+        histogram = Histogram(LATENCY_BUCKETS_MS)
+        for value in [0.3] * 90 + [40] * 9 + [3000]:
+            histogram.observe(value)
+        
+        assert (histogram.percentile(0.5), histogram.percentile(0.95), histogram.percentile(0.99)) == (0.5, 50, 50)
+        assert histogram.percentile(1.0) == 3000
+    
+    @pytest.mark.asyncio
+    async def test_keyspace_is_grouped_by_prefix(self, memory_cache):
+        """Test that sampled keys are grouped and extrapolated per prefix."""
+        for i in range(6):
+            await memory_cache.set(f"audio:tts:{i}", "x" * 5000, ttl=86400)
+        await memory_cache.set("nearby:1:2", "[]", ttl=1800)
+        
+        report = await memory_cache.inspect_keyspace(sample_size=100)
+        
+        assert report["total_keys"] == 7
+        assert list(report["prefixes"]) == ["audio:tts", "nearby"]
+        assert report["prefixes"]["audio:tts"]["estimated_keys"] == 6
+        assert 1700 <= report["prefixes"]["nearby"]["avg_ttl_seconds"] <= 1800
+
+
+class TestStaleWhileRevalidate:
+    """Test soft/hard TTL reads with background refresh."""
+    
+    @pytest.fixture
+    def memory_cache(self):
+        """CacheService over a fresh in-memory backend."""
+        service = CacheService("memory")
+        service._cache = InMemoryCache(max_bytes=0, sweep_interval=0)
+        return service
+    
+    @staticmethod
+    def loader(*results):
+        """AsyncMock loader returning ``results`` in turn after yielding to the event loop."""
+        values = iter(results)
+        
+        async def load():
+            await asyncio.sleep(0)
+            value = next(values)
+            if isinstance(value, Exception):
+                raise value
+            return value
+        
+        return AsyncMock(side_effect=load)
+    
+    @pytest.mark.asyncio
+    async def test_fresh_value_does_not_call_loader(self, memory_cache):
+        """Test that a value within its soft TTL is served from the cache."""
+        loader = self.loader({"total": 1})
+        
+        assert await memory_cache.get_or_refresh("location_search:a", loader, soft_ttl=60, hard_ttl=600) == {"total": 1}
+        assert await memory_cache.get_or_refresh("location_search:a", loader, soft_ttl=60, hard_ttl=600) == {"total": 1}
+        loader.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_stale_value_is_served_while_one_refresh_runs(self, memory_cache):
+        """Test that stale reads return at once and trigger a single background refresh."""
+        loader = self.loader({"total": 1}, {"total": 2})
+        await memory_cache.get_or_refresh("nearby:1:2", loader, soft_ttl=0, hard_ttl=600)
+        
+        stale = await asyncio.gather(*(
+            memory_cache.get_or_refresh("nearby:1:2", loader, soft_ttl=0, hard_ttl=600) for _ in range(5)
+        ))
+        await asyncio.gather(*memory_cache._refreshes.values())
+        
+        assert stale == [{"total": 1}] * 5
+        assert loader.await_count == 2
+        assert (await memory_cache.get_json("nearby:1:2"))["value"] == {"total": 2}
+    
+    @pytest.mark.asyncio
+    async def test_refresh_is_skipped_while_another_worker_holds_the_lock(self, memory_cache):
+        """Test that the SET NX lock deduplicates refreshes across workers."""
+        loader = self.loader({"total": 1}, {"total": 2})
+        await memory_cache.get_or_refresh("nearby:1:2", loader, soft_ttl=0, hard_ttl=600)
+        assert await memory_cache.set_if_absent("lock:refresh:nearby:1:2", "other-worker", 30)
+        
+        await memory_cache.get_or_refresh("nearby:1:2", loader, soft_ttl=0, hard_ttl=600)
+        await asyncio.gather(*memory_cache._refreshes.values())
+        
+        loader.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_stale_value(self, memory_cache):
+        """Test that a refresh error is logged and the stale value stays in place."""
+        loader = self.loader({"total": 1}, RuntimeError("nominatim timeout"))
+        await memory_cache.get_or_refresh("nearby:1:2", loader, soft_ttl=0, hard_ttl=600)
+        
+        await memory_cache.get_or_refresh("nearby:1:2", loader, soft_ttl=0, hard_ttl=600)
+        await asyncio.gather(*memory_cache._refreshes.values())
+        
+        assert memory_cache.refresh_failures == 1
+        assert (await memory_cache.get_json("nearby:1:2"))["value"] == {"total": 1}
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_load(self, memory_cache):
+        """Test that only one caller per worker waits on the loader for a missing key."""
+        loader = self.loader({"total": 1})
+        
+        results = await asyncio.gather(*(
+            memory_cache.get_or_refresh("location_search:b", loader, soft_ttl=60, hard_ttl=600) for _ in range(3)
+        ))
+        
+        assert results == [{"total": 1}] * 3
+        loader.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_plain_cached_value_counts_as_stale(self, memory_cache):
+        """Test that entries written before soft TTLs are served and then replaced."""
+        await memory_cache.set_json("location_search:c", {"total": 0})
+        loader = self.loader({"total": 3})
+        
+        assert await memory_cache.get_or_refresh("location_search:c", loader, soft_ttl=60, hard_ttl=600) == {"total": 0}
+        await asyncio.gather(*memory_cache._refreshes.values())
+        assert await memory_cache.get_or_refresh("location_search:c", loader, soft_ttl=60, hard_ttl=600) == {"total": 3}
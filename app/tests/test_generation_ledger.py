@@ -0,0 +1,116 @@
+"""Tests for the generation stage ledger."""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from services.cache_service import CacheService
+from services.generation_ledger import GenerationLedger
+
+
+class TestGenerationLedger:
+    """Test GenerationLedger stage recording and reporting."""
+
+    @pytest.fixture
+    def ledger(self):
+        """Create a ledger backed by an in-memory cache."""
+        ledger = GenerationLedger()
+        ledger.cache = CacheService(backend="memory")
+        return ledger
+
+    @pytest.mark.asyncio
+    async def test_stage_records_are_persisted(self, ledger):
+        """Test that stages are appended with provider, bytes and tokens."""
+        await ledger.start("tour-1", language="en")
+
+        async with ledger.stage("tour-1", "llm", provider="openai") as stage:
+            stage["tokens"] = 1200
+            stage["bytes"] = 4800
+
+        record = (await ledger.get_ledger("tour-1"))["stages"][0]
+        assert record["stage"] == "llm"
+        assert record["provider"] == "openai"
+        assert record["tokens"] == 1200
+        assert record["bytes"] == 4800
+        assert record["status"] == "ok"
+        assert record["duration_ms"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_failed_stage_is_recorded_and_reraised(self, ledger):
+        """Test that a failing stage keeps its error and status."""
+        await ledger.start("tour-2")
+
+        with pytest.raises(asyncio.TimeoutError):
+            async with ledger.stage("tour-2", "tts", provider="openai"):
+                raise asyncio.TimeoutError()
+
+        record = (await ledger.get_ledger("tour-2"))["stages"][0]
+        assert record["status"] == "timeout"
+
+        # Failed stages must not skew latency percentiles
+        report = await ledger.get_stage_percentiles()
+        assert report["tts"]["count"] == 0
+
+    @pytest.mark.asyncio
+    async def test_in_flight_tracks_current_stage(self, ledger):
+        """Test that in-flight generations report their current stage until finished."""
+        await ledger.start("tour-3")
+        async with ledger.stage("tour-3", "geocode"):
+            in_flight = await ledger.list_in_flight()
+            assert in_flight[0]["tour_id"] == "tour-3"
+            assert in_flight[0]["stage"] == "geocode"
+
+        await ledger.finish("tour-3", "ready")
+        assert await ledger.list_in_flight() == []
+        assert (await ledger.get_ledger("tour-3"))["status"] == "ready"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_generations_keep_their_own_entries(self, ledger):
+        """Test that interleaved updates of different tours never drop each other's entries."""
+        await asyncio.gather(*(ledger.start(f"tour-{i}") for i in range(5)))
+        await asyncio.gather(*(ledger._set_inflight_stage(f"tour-{i}", "tts", datetime.utcnow().isoformat()) for i in range(5)))
+        await ledger.finish("tour-0", "ready")
+
+        in_flight = await ledger.list_in_flight()
+        assert sorted(g["tour_id"] for g in in_flight) == [f"tour-{i}" for i in range(1, 5)]
+        assert {g["stage"] for g in in_flight} == {"tts"}
+
+    @pytest.mark.asyncio
+    async def test_repair_keeps_the_original_generation(self, ledger):
+        """Test that a repair is recorded next to the original generation instead of replacing it."""
+        await ledger.start("tour-4", language="en")
+        async with ledger.stage("tour-4", "llm", provider="openai"):
+            pass
+        await ledger.finish("tour-4", "ready")
+
+        await ledger.start_repair("tour-4", "audio", language="en")
+        assert [g["tour_id"] for g in await ledger.list_in_flight()] == ["tour-4"]
+        async with ledger.stage("tour-4", "tts", provider="google"):
+            pass
+        await ledger.finish_repair("tour-4", "error")
+
+        record = await ledger.get_ledger("tour-4")
+        assert record["status"] == "ready"
+        assert record["context"] == {"language": "en"}
+        assert [s["stage"] for s in record["stages"]] == ["llm", "tts"]
+        assert "repair" not in record["stages"][0]
+        assert record["stages"][1]["repair"] == "audio"
+        assert record["repairs"][0]["status"] == "error"
+        assert record["repairs"][0]["ended_at"] is not None
+        assert await ledger.list_in_flight() == []
+
+    @pytest.mark.asyncio
+    async def test_stale_entries_are_dropped(self, ledger):
+        """Test that tours of dead workers leave the in-flight index."""
+        await ledger.cache.hset(ledger.inflight_key, {"tour-dead": "2000-01-01T00:00:00"})
+
+        assert await ledger.list_in_flight() == []
+        assert await ledger.cache.hgetall(ledger.inflight_key) == {}
+
+    def test_percentile_nearest_rank(self):
+        """Test nearest-rank percentile calculation."""
+        samples = list(range(1, 101))
+        assert GenerationLedger._percentile(samples, 50) == 50
+        assert GenerationLedger._percentile(samples, 95) == 95
+        assert GenerationLedger._percentile(samples, 99) == 99
+        assert GenerationLedger._percentile([], 95) is None
@@ -0,0 +1,179 @@
+"""Tests for the write-behind, read-through cache tier on cache_entries."""
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from services.cache_service import CacheService, InMemoryCache
+from services.persistent_cache import PersistentCache, decode_row_value, encode_row_value
+
+
+@pytest.fixture
+def persistent():
+    """Enabled PersistentCache with its database statements mocked out."""
+    tier = PersistentCache()
+    tier.enabled = True
+    tier.prefixes = ("audio:tts", "tour:content")
+    tier.min_ttl = 3600
+    tier._select = AsyncMock(return_value=[])
+    tier._write = AsyncMock()
+    tier._delete_expired = AsyncMock(return_value=0)
+    tier._delete_tag = AsyncMock(return_value=0)
+    return tier
+
+
+@pytest.fixture
+def memory_cache(persistent):
+    """CacheService over a fresh in-memory backend with the persistent tier above."""
+    service = CacheService("memory")
+    service._cache = InMemoryCache(max_bytes=0, sweep_interval=0)
+    service.persistent = persistent
+    return service
+
+
+def row(key, value, expires_in=None, tags=None):
+    cache_value, cache_type = encode_row_value(value)
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires_in) if expires_in else None
+    return {"cache_key": key, "cache_value": cache_value, "cache_type": cache_type, "expires_at": expires_at, "tags": tags}
+
+
+class TestWriteBehind:
+    """Test queueing and flushing of persistent writes."""
+
+    @pytest.mark.asyncio
+    async def test_only_long_lived_expensive_keys_are_queued(self, persistent):
+        """Test that other prefixes and short TTLs stay out of the database."""
+        persistent.put("tour:content:abc", "{}", 86400)
+        persistent.put("tour:content:short", "{}", 60)
+        persistent.put("nearby:1:2", "[]", 86400)
+
+        assert list(persistent._pending) == ["tour:content:abc"]
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_the_latest_value_once(self, persistent):
+        """Test that repeated writes and deletes of a key coalesce into one statement."""
+        persistent.put("tour:content:a", "v1", 86400)
+        persistent.put("tour:content:a", "v2", 86400)
+        persistent.put("audio:tts:b", b"mp3", 86400)
+        persistent.remove("audio:tts:b")
+
+        assert await persistent.flush() == 2
+
+        upserts, deletes, hits = persistent._write.await_args.args
+        assert upserts == {"tour:content:a": ("v2", 86400, None)}
+        assert deletes == ["audio:tts:b"]
+        assert persistent._pending == {}
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_requeued_without_overwriting_newer_writes(self, persistent):
+        """Test that a failed batch is retried later unless the key was written again."""
+
+        async def fail(*args):
+            persistent.put("tour:content:a", "newer", 86400)
+            raise ConnectionError("database unavailable")
+
+        persistent._write = AsyncMock(side_effect=fail)
+        persistent.put("tour:content:a", "older", 86400)
+        persistent.put("tour:content:b", "b", 86400)
+
+        assert await persistent.flush() == 0
+        assert persistent._pending == {"tour:content:a": ("newer", 86400, None), "tour:content:b": ("b", 86400, None)}
+        assert persistent.errors == 1
+
+
+class TestReadThrough:
+    """Test reads that fall back to the database."""
+
+    @pytest.mark.asyncio
+    async def test_evicted_value_is_read_back_and_refilled(self, memory_cache, persistent):
+        """Test that a backend miss is answered from the table and copied back with its remaining TTL."""
+        persistent._select = AsyncMock(return_value=[row("audio:tts:abc", b"\xff\xfbmp3", expires_in=600)])
+
+        assert await memory_cache.get("audio:tts:abc") == b"\xff\xfbmp3"
+        assert await memory_cache.get("audio:tts:abc") == b"\xff\xfbmp3"
+
+        persistent._select.assert_awaited_once_with(["audio:tts:abc"])
+        assert 590 <= memory_cache._cache._expires_at("audio:tts:abc") - time.monotonic() <= 600
+        assert persistent._hits == {"audio:tts:abc": 1}
+
+    @pytest.mark.asyncio
+    async def test_unflushed_writes_are_read_back(self, memory_cache, persistent):
+        """Test that a value evicted before its write-behind flush is still found."""
+        await memory_cache.set_json("tour:content:abc", {"title": "Old Town"}, ttl=86400)
+        await memory_cache._cache.clear()
+
+        assert await memory_cache.get_json("tour:content:abc") == {"title": "Old Town"}
+        persistent._select.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_get_many_only_reads_missing_persisted_keys(self, memory_cache, persistent):
+        """Test that one query covers every missing persisted key and other keys are left alone."""
+        await memory_cache._cache.set("tour:content:hit", "cached")
+        persistent._select = AsyncMock(return_value=[row("tour:content:evicted", "stored")])
+
+        values = await memory_cache.get_many(["tour:content:hit", "tour:content:evicted", "nearby:1:2"])
+
+        assert values == ["cached", "stored", None]
+        persistent._select.assert_awaited_once_with(["tour:content:evicted"])
+
+    @pytest.mark.asyncio
+    async def test_delete_reaches_the_database(self, memory_cache, persistent):
+        """Test that a deleted key is neither read back nor left in the table."""
+        await memory_cache.set("audio:tts:abc", b"\xff\xfbmp3", ttl=86400)
+        await memory_cache.delete("audio:tts:abc")
+
+        assert await memory_cache.get("audio:tts:abc") is None
+        await persistent.flush()
+        assert persistent._write.await_args.args[1] == ["audio:tts:abc"]
+
+    def test_row_values_round_trip(self):
+        """Test that binary values survive the text column."""
+        for value in (b"\xc1compressed", "plain text"):
+            assert decode_row_value(*encode_row_value(value)) == value
+
+
+class TestTags:
+    """Test tag-based invalidation across the cache and the persistent tier."""
+
+    @pytest.mark.asyncio
+    async def test_invalidate_tag_deletes_only_tagged_entries(self, memory_cache, persistent):
+        """Test that every entry of a tag is deleted, page by page, and other entries stay."""
+        for i in range(3):
+            await memory_cache.set_json(f"tour:content:{i}", {"stop": i}, ttl=86400, tags=["location:abc"])
+        await memory_cache.set_json("location_search:old town", {"total": 1}, tags=["location:abc", "location:def"])
+        await memory_cache.set_json("tour:content:other", {"stop": 9}, ttl=86400, tags=["location:def"])
+
+        with patch("services.cache_service._TAG_SCAN_COUNT", 2):
+            assert await memory_cache.invalidate_tag("location:abc") == 4
+
+        assert await memory_cache.get_many(["tour:content:0", "location_search:old town"]) == [None, None]
+        assert await memory_cache.get_json("tour:content:other") == {"stop": 9}
+        persistent._delete_tag.assert_awaited_once_with("location:abc")
+
+    @pytest.mark.asyncio
+    async def test_tag_set_expires_with_its_longest_lived_member(self, memory_cache):
+        """Test that a short-lived entry does not shorten the life of its tag."""
+        await memory_cache.set("tour:content:long", "a", ttl=86400, tags=["location:abc"])
+        await memory_cache.set("location_search:short", "b", ttl=60, tags=["location:abc"])
+
+        assert memory_cache._cache._expires_at("cache:tag:location:abc") - time.monotonic() > 86000
+
+    @pytest.mark.asyncio
+    async def test_queued_tagged_writes_are_dropped(self, persistent):
+        """Test that an unflushed write with the tag becomes a delete."""
+        persistent.put("tour:content:a", "{}", 86400, tags=["location:abc"])
+        persistent.put("tour:content:b", "{}", 86400, tags=["location:def"])
+
+        await persistent.invalidate_tag("location:abc")
+
+        assert await persistent.get("tour:content:a") is None
+        assert await persistent.get("tour:content:b") == ("{}", 86400, ["location:def"])
+
+    @pytest.mark.asyncio
+    async def test_read_through_restores_tag_membership(self, memory_cache, persistent):
+        """Test that an entry read back from the table can still be invalidated by tag."""
+        persistent._select = AsyncMock(return_value=[row("tour:content:abc", "{}", expires_in=600, tags="location:abc")])
+        await memory_cache.get("tour:content:abc")
+
+        assert await memory_cache.invalidate_tag("location:abc") == 1
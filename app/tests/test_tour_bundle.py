@@ -0,0 +1,80 @@
+"""Tests for streaming tour bundle archives and HTTP range handling."""
+import io
+import zipfile
+from datetime import datetime
+
+import pytest
+
+from utils.http_range import RangeNotSatisfiable, etag_matches, parse_range
+from utils.zip_stream import StreamingZip, ZipEntry
+
+
+def make_archive() -> StreamingZip:
+    modified = datetime(2025, 5, 1, 12, 30, 10)
+    return StreamingZip([
+        ZipEntry("tour.json", b'{"title": "Old Town"}', modified),
+        ZipEntry("audio.mp3", bytes(range(256)) * 1000, modified),
+        ZipEntry("stops.geojson", b'{"type": "FeatureCollection", "features": []}', modified),
+    ], chunk_size=1000)
+
+
+class TestStreamingZip:
+    """Test StreamingZip layout and range streaming."""
+
+    def test_archive_is_valid_zip(self):
+        """Test that the streamed bytes form a ZIP that standard tools can read."""
+        archive = make_archive()
+        data = b"".join(archive.iter_bytes())
+
+        assert len(data) == archive.size
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            assert zf.testzip() is None
+            assert zf.namelist() == ["tour.json", "audio.mp3", "stops.geojson"]
+            assert zf.read("audio.mp3") == bytes(range(256)) * 1000
+            assert zf.getinfo("tour.json").date_time == (2025, 5, 1, 12, 30, 10)
+
+    def test_ranges_match_full_archive(self):
+        """Test that any byte range equals the same slice of the full archive."""
+        archive = make_archive()
+        data = b"".join(archive.iter_bytes())
+
+        for start, end in [(0, 0), (0, 29), (25, 5000), (archive.size - 22, archive.size - 1), (100, 10 ** 9)]:
+            assert b"".join(archive.iter_bytes(start, end)) == data[start:end + 1]
+
+    def test_etag_is_stable_and_content_sensitive(self):
+        """Test that identical content gives the same ETag and changes alter it."""
+        assert make_archive().etag == make_archive().etag
+        other = StreamingZip([ZipEntry("tour.json", b'{"title": "New Town"}')])
+        assert other.etag != make_archive().etag
+
+
+class TestHTTPRange:
+    """Test Range and ETag header parsing."""
+
+    def test_parse_range(self):
+        """Test the supported range forms."""
+        assert parse_range(None, 100) is None
+        assert parse_range("bytes=0-9", 100) == (0, 9)
+        assert parse_range("bytes=90-", 100) == (90, 99)
+        assert parse_range("bytes=-10", 100) == (90, 99)
+        assert parse_range("bytes=50-1000", 100) == (50, 99)
+
+    def test_unsupported_ranges_serve_everything(self):
+        """Test that multipart, invalid or foreign ranges are ignored."""
+        assert parse_range("bytes=0-1,5-6", 100) is None
+        assert parse_range("bytes=9-0", 100) is None
+        assert parse_range("items=0-1", 100) is None
+        assert parse_range("bytes=abc", 100) is None
+
+    def test_unsatisfiable_range(self):
+        """Test that a range past the end is rejected."""
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range("bytes=100-", 100)
+
+    def test_etag_matches(self):
+        """Test If-None-Match comparison."""
+        assert etag_matches('"abc"', '"abc"')
+        assert etag_matches('"x", W/"abc"', '"abc"')
+        assert etag_matches("*", '"abc"')
+        assert not etag_matches('"abd"', '"abc"')
+        assert not etag_matches(None, '"abc"')
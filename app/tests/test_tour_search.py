@@ -0,0 +1,87 @@
+"""Tests for tour full-text search cursors and result formatting."""
+import uuid
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from services.search_service import InvalidSearchCursor, SearchService, decode_cursor, encode_cursor
+
+
+def make_row(rank: float, matches=None) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "title": "Old Town Walk",
+        "description": None,
+        "status": "ready",
+        "duration_minutes": 30,
+        "created_at": datetime(2025, 5, 1, 12, 0),
+        "rank": rank,
+        "snippet": "the <mark>cathedral</mark> square",
+        "matches": matches if matches is not None else [],
+    }
+
+
+class TestSearchCursor:
+    """Test keyset cursor encoding."""
+
+    def test_round_trip(self):
+        """Test that a cursor decodes to the exact rank and id it was built from."""
+        tour_id = uuid.uuid4()
+        rank = 0.30000001192092896  # float4 rank as returned by Postgres
+
+        assert decode_cursor(encode_cursor(rank, tour_id)) == (rank, tour_id)
+
+    def test_cursor_is_url_safe(self):
+        """Test that cursors can be passed in a query string unescaped."""
+        cursor = encode_cursor(1.5, uuid.uuid4())
+
+        assert all(c.isalnum() or c in "-_" for c in cursor)
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", encode_cursor(1.0, "x")])
+    def test_invalid_cursor(self, cursor):
+        """Test that malformed cursors raise InvalidSearchCursor."""
+        with pytest.raises(InvalidSearchCursor):
+            decode_cursor(cursor)
+
+
+class TestSearchTours:
+    """Test SearchService paging over database rows."""
+
+    @pytest.mark.asyncio
+    async def test_next_cursor_points_at_last_returned_row(self):
+        """Test that an extra row yields a cursor for the last row of the page."""
+        rows = [make_row(0.9), make_row(0.5), make_row(0.1)]
+        result = MagicMock()
+        result.mappings.return_value.all.return_value = rows
+        db = AsyncMock()
+        db.execute.return_value = result
+        user = MagicMock(id=uuid.uuid4())
+
+        page = await SearchService().search_tours(db, user, "cathedral", limit=2)
+
+        assert [hit["tour_id"] for hit in page["results"]] == [str(rows[0]["id"]), str(rows[1]["id"])]
+        assert decode_cursor(page["next_cursor"]) == (0.5, rows[1]["id"])
+
+    @pytest.mark.asyncio
+    async def test_last_page_has_no_cursor(self):
+        """Test that a short page ends pagination."""
+        result = MagicMock()
+        result.mappings.return_value.all.return_value = [make_row(0.4)]
+        db = AsyncMock()
+        db.execute.return_value = result
+
+        page = await SearchService().search_tours(db, MagicMock(id=uuid.uuid4()), "cathedral", limit=2)
+
+        assert len(page["results"]) == 1
+        assert page["next_cursor"] is None
+
+    def test_format_hit_keeps_timed_transcript_matches(self):
+        """Test that transcript matches keep their timestamps and skip untimed segments."""
+        row = make_row(0.7, matches='[{"startTime": 12.5, "endTime": 18.0, "text": "The cathedral"},'
+                                    ' {"startTime": null, "endTime": null, "text": "cathedral"}]')
+
+        hit = SearchService._format_hit(row)
+
+        assert hit["transcript_matches"] == [{"startTime": 12.5, "endTime": 18.0, "text": "The cathedral"}]
+        assert hit["snippet"] == "the <mark>cathedral</mark> square"
@@ -0,0 +1,81 @@
+"""Tests for planning shorter tour variants and reusing source audio segments."""
+from utils.tour_variants import plan_variant, reusable_segments, segment_texts
+
+STOPS = [
+    {"name": "Cathedral", "highlights": ["nave", "crypt"]},
+    {"name": "Market Hall", "highlights": []},
+    {"name": "Old Bridge", "highlights": ["towers", "statues", "view"]},
+    {"name": "Town Hall", "highlights": []},
+]
+
+
+def make_sections(length: int = 400) -> list:
+    sections = [{"stop_index": None, "title": "Introduction", "text": "Welcome. " * 10}]
+    for i, stop in enumerate(STOPS):
+        sections.append({"stop_index": i, "title": stop["name"], "text": f"{stop['name']} story. " * (length // 20)})
+    return sections
+
+
+class TestPlanVariant:
+    """Test stop selection and condensing budgets."""
+
+    def test_keeps_first_stop_and_best_stops_in_route_order(self):
+        """Test that the first stop is always kept and the rest are picked by content."""
+        plan = plan_variant(make_sections(), STOPS, source_minutes=60, target_minutes=30)
+
+        assert [entry["stop_index"] for entry in plan] == [None, 0, 2]
+
+    def test_dropped_stop_forces_rewrite_of_transition(self):
+        """Test that a section whose next stop was dropped is rewritten with new directions."""
+        plan = plan_variant(make_sections(), STOPS, source_minutes=60, target_minutes=30)
+        by_stop = {entry["stop_index"]: entry for entry in plan}
+
+        assert by_stop[0]["next_stop"] == "Old Bridge"
+        assert by_stop[0]["rewrite"] is True
+        assert by_stop[2]["next_stop"] is None
+
+    def test_within_budget_sections_are_kept_verbatim(self):
+        """Test that sections are not rewritten when dropping stops nearly meets the budget."""
+        plan = plan_variant(make_sections(), STOPS, source_minutes=60, target_minutes=45)
+        introduction = plan[0]
+
+        assert introduction["stop_index"] is None
+        assert introduction["rewrite"] is False
+        assert introduction["target_chars"] >= 0.9 * len(introduction["text"])
+
+
+class TestSegmentReuse:
+    """Test matching source TTS segments to unchanged sections."""
+
+    def test_segment_texts_follow_stripped_chunks(self):
+        """Test that chunk texts are rebuilt from their lengths, skipping separators."""
+        content = "First chunk.\n\nSecond one."
+        segments = [{"index": 0, "chars": 12}, {"index": 1, "chars": 11}]
+
+        assert segment_texts(content, segments) == ["First chunk.", "Second one."]
+
+    def test_reusable_when_segments_speak_the_section(self):
+        """Test that ready segments covering exactly the section text are reused."""
+        section = {"stop_index": 1, "title": "Market Hall", "text": "Part one.\nPart two."}
+        texts = ["Intro.", "Part one.", "Part two."]
+        segments = [
+            {"index": 0, "stop_index": None, "ready": True},
+            {"index": 1, "stop_index": 1, "ready": True},
+            {"index": 2, "stop_index": 1, "ready": True},
+        ]
+
+        assert reusable_segments(section, texts, segments) == [
+            {"index": 1, "text": "Part one."},
+            {"index": 2, "text": "Part two."},
+        ]
+
+    def test_not_reusable_when_text_differs_or_audio_missing(self):
+        """Test that changed text or an unfinished segment disables reuse."""
+        section = {"stop_index": 1, "title": "Market Hall", "text": "Part one. Part two."}
+        texts = ["Part one.", "Part 2."]
+        segments = [{"index": 0, "stop_index": 1, "ready": True}, {"index": 1, "stop_index": 1, "ready": True}]
+
+        assert reusable_segments(section, texts, segments) is None
+
+        segments[1]["ready"] = False
+        assert reusable_segments(section, ["Part one.", "Part two."], segments) is None
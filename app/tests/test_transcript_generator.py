@@ -0,0 +1,47 @@
+"""Tests for transcript timing and alignment to synthesized audio."""
+from utils.transcript_generator import TranscriptGenerator
+
+INTRO = "Welcome to Amsterdam."
+DAM = "We begin at Dam Square, the heart of the city for centuries. " + "It is lively. " * 30
+PALACE = "The Royal Palace was built as a city hall."
+CONTENT = f"{INTRO}\n\n{DAM.strip()}\n\n{PALACE}"
+
+
+class TestTranscriptGenerator:
+    """Test TranscriptGenerator timing."""
+
+    def test_estimated_timings_end_at_duration(self):
+        """Test that short segments no longer push timings past the audio end."""
+        segments = TranscriptGenerator.generate_transcript_segments(CONTENT, 20.0)
+
+        assert segments[0]["startTime"] == 0
+        assert segments[-1]["endTime"] == 20.0
+        assert all(s["startTime"] <= s["endTime"] <= 20.0 for s in segments)
+        assert all(a["endTime"] == b["startTime"] for a, b in zip(segments, segments[1:]))
+
+    def test_chunk_boundaries_anchor_segments(self):
+        """Test that a segment starting a TTS chunk starts exactly at the chunk's measured time."""
+        chunks = [(f"{INTRO}\n\n{DAM.strip()}", 50.0), (PALACE, 4.0)]
+        segments, alignment = TranscriptGenerator.align_transcript_segments(CONTENT, chunks)
+
+        palace = next(s for s in segments if s["text"].startswith("The Royal Palace"))
+        assert palace["startTime"] == 50.0
+        assert palace["endTime"] == 54.0
+        assert alignment["anchors"] == 2
+        assert alignment["anchors_located"] == 2
+        assert alignment["audio_duration"] == 54.0
+        assert alignment["max_anchor_seconds"] == 50.0
+
+    def test_unlocated_chunk_continues_previous(self):
+        """Test that chunks whose text is not in the content still advance the timeline."""
+        chunks = [(f"{INTRO}\n\n{DAM.strip()}", 50.0), ("Something rephrased.", 4.0)]
+        segments, alignment = TranscriptGenerator.align_transcript_segments(CONTENT, chunks)
+
+        assert alignment["anchors_located"] == 1
+        assert segments[-1]["endTime"] == 54.0
+
+    def test_empty_content(self):
+        """Test that empty content produces no segments."""
+        segments, alignment = TranscriptGenerator.align_transcript_segments("", [("", 3.0)])
+        assert segments == []
+        assert alignment["anchors"] == 0
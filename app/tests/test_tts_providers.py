@@ -0,0 +1,218 @@
+"""Tests for TTS provider failover, circuit breaking, hedging and the local CPU provider."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from services.tts_providers import GoogleTTSProvider, LocalTTSProvider, TTSProvider, TTSProviderError, TTSRouter
+
+
+class FakeProvider(TTSProvider):
+    def __init__(self, name, audio=b"", error=None, delay=0.0, voices=None, languages=None):
+        self.name = name
+        self.audio = audio
+        self.error = error
+        self.delay = delay
+        self.voices = voices or {}
+        self.languages = languages
+        self.calls = []
+
+    async def synthesize(self, text, voice, speed):
+        self.calls.append(voice)
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.audio
+
+
+@pytest.fixture
+def tts_settings():
+    with patch("services.tts_providers.settings") as mock_settings:
+        mock_settings.TTS_PROVIDERS = "openai,google"
+        mock_settings.TTS_CIRCUIT_FAILURES = 2
+        mock_settings.TTS_CIRCUIT_COOLDOWN_SECONDS = 60
+        mock_settings.TTS_HEDGE_BUDGET_SECONDS = 0.0
+        mock_settings.LOCAL_TTS_MODEL = "voices/en_US-lessac-medium.onnx"
+        mock_settings.FFMPEG_PATH = "ffmpeg"
+        yield mock_settings
+
+
+class TestTTSRouter:
+    """Test routing chunks across TTS providers."""
+
+    @pytest.mark.asyncio
+    async def test_fails_over_with_mapped_voice(self, tts_settings):
+        """Test that a failing provider is skipped and the next one gets its own voice name."""
+        openai = FakeProvider("openai", error=RuntimeError("503"))
+        google = FakeProvider("google", audio=b"google-mp3", voices={"nova": "en-US-Neural2-C"})
+        router = TTSRouter([openai, google])
+
+        audio, provider = await router.synthesize("Hello.", "nova", 1.0)
+
+        assert (audio, provider) == (b"google-mp3", "google")
+        assert google.calls == ["en-US-Neural2-C"]
+        assert router.health["openai"].failures == 1
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_moves_provider_last(self, tts_settings):
+        """Test that a provider with an open circuit is only tried after healthy ones."""
+        openai = FakeProvider("openai", error=RuntimeError("timeout"))
+        google = FakeProvider("google", audio=b"google-mp3")
+        router = TTSRouter([openai, google])
+
+        for _ in range(2):
+            await router.synthesize("Hello.", "alloy", 1.0)
+        openai.calls.clear()
+        await router.synthesize("Hello.", "alloy", 1.0)
+
+        assert router.status()["openai"]["circuit_open"] is True
+        assert openai.calls == []
+
+    @pytest.mark.asyncio
+    async def test_slow_chunk_is_hedged(self, tts_settings):
+        """Test that a chunk over its latency budget is raced against the next provider."""
+        tts_settings.TTS_HEDGE_BUDGET_SECONDS = 0.01
+        openai = FakeProvider("openai", audio=b"slow", delay=1.0)
+        google = FakeProvider("google", audio=b"fast")
+        router = TTSRouter([openai, google])
+
+        audio, provider = await router.synthesize("Hello.", "alloy", 1.0)
+
+        assert (audio, provider) == (b"fast", "google")
+        assert router.health["openai"].failures == 0
+
+    @pytest.mark.asyncio
+    async def test_all_providers_failing_raises(self, tts_settings):
+        """Test that TTSProviderError lists every provider error."""
+        router = TTSRouter([
+            FakeProvider("openai", error=RuntimeError("503")),
+            FakeProvider("google", error=RuntimeError("quota")),
+        ])
+
+        with pytest.raises(TTSProviderError) as exc_info:
+            await router.synthesize("Hello.", "alloy", 1.0)
+
+        assert "openai: 503" in str(exc_info.value)
+        assert "google: quota" in str(exc_info.value)
+
+    @pytest.mark.asyncio
+    async def test_fails_over_only_to_providers_speaking_the_language(self, tts_settings):
+        """Test that a provider without a voice for the language is neither failed over nor hedged to."""
+        tts_settings.TTS_PROVIDERS = "openai,google,local"
+        tts_settings.TTS_HEDGE_BUDGET_SECONDS = 0.01
+        openai = FakeProvider("openai", error=RuntimeError("503"))
+        google = FakeProvider("google", audio=b"google-mp3", languages=("en", "de"))
+        local = FakeProvider("local", audio=b"local-mp3", languages=("en",))
+        router = TTSRouter([openai, google, local])
+
+        audio, provider = await router.synthesize("Guten Tag.", "nova", 1.0, language="de")
+        assert (audio, provider) == (b"google-mp3", "google")
+
+        with pytest.raises(TTSProviderError):
+            await router.synthesize("Bom dia.", "nova", 1.0, language="pt")
+        assert local.calls == []
+
+    def test_google_voice_follows_the_language(self):
+        """Test that Google voices match the tour language and the app voice's gender."""
+        google = GoogleTTSProvider()
+
+        assert google.voice_for("onyx", "de") == "de-DE-Neural2-B"
+        assert google.voice_for("nova", "de") == "de-DE-Neural2-C"
+        assert google.voice_for("nova") == "en-US-Neural2-C"
+        assert not google.supports("nl")
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("voice,language,name,language_code", [
+        ("onyx", "en", "en-US-Neural2-J", "en-US"),
+        ("alloy", "de", "de-DE-Neural2-C", "de-DE"),
+        ("echo", "fr", "fr-FR-Neural2-B", "fr-FR"),
+    ])
+    async def test_google_request_uses_the_routed_voice(self, tts_settings, voice, language, name, language_code):
+        """Test that the voice picked by the router reaches Google with its own locale."""
+        tts_settings.TTS_PROVIDERS = "google"
+        google = GoogleTTSProvider()
+        google._client = MagicMock()
+        google._client.synthesize_speech = AsyncMock(return_value=SimpleNamespace(audio_content=b"google-mp3"))
+        router = TTSRouter([google])
+
+        with patch("services.tts_providers.texttospeech") as texttospeech:
+            audio, provider = await router.synthesize("Hello.", voice, 1.0, language=language)
+
+        assert (audio, provider) == (b"google-mp3", "google")
+        texttospeech.VoiceSelectionParams.assert_called_once_with(language_code=language_code, name=name)
+
+    @pytest.mark.asyncio
+    async def test_stream_does_not_fail_over_after_bytes_were_sent(self, tts_settings):
+        """Test that a stream failing mid-way is not restarted on another provider."""
+
+        class BrokenStream(FakeProvider):
+            async def stream(self, text, voice, speed, on_chunk):
+                await on_chunk(b"partial")
+                raise RuntimeError("connection reset")
+
+        google = FakeProvider("google", audio=b"google-mp3")
+        router = TTSRouter([BrokenStream("openai"), google])
+        received = []
+
+        async def on_chunk(chunk):
+            received.append(chunk)
+
+        with pytest.raises(TTSProviderError):
+            await router.stream("Hello.", "alloy", 1.0, on_chunk)
+
+        assert received == [b"partial"]
+        assert google.calls == []
+
+
+class TestLocalTTSProvider:
+    """Test the offline CPU provider."""
+
+    def test_unavailable_without_a_voice_model(self, tts_settings):
+        """Test that the local provider stays out of rotation until a model is configured."""
+        tts_settings.LOCAL_TTS_MODEL = None
+
+        assert LocalTTSProvider().available is False
+
+    def test_speaks_only_the_language_of_its_model(self, tts_settings):
+        """Test that the language is read from the Piper model name."""
+        provider = LocalTTSProvider()
+
+        assert provider.supports("en")
+        assert not provider.supports("de")
+
+    @pytest.mark.asyncio
+    async def test_takes_over_while_remote_circuit_is_open(self, tts_settings):
+        """Test that a local provider listed last is used once the remote circuit opens."""
+        tts_settings.TTS_PROVIDERS = "openai,local"
+        openai = FakeProvider("openai", error=RuntimeError("503"))
+        local = FakeProvider("local", audio=b"local-mp3")
+        router = TTSRouter([openai, local])
+
+        for _ in range(2):
+            await router.synthesize("Hello.", "alloy", 1.0)
+        openai.calls.clear()
+        audio, provider = await router.synthesize("Hello.", "alloy", 1.0)
+
+        assert (audio, provider) == (b"local-mp3", "local")
+        assert openai.calls == []
+
+    @pytest.mark.asyncio
+    async def test_synthesis_runs_in_the_worker_pool(self, tts_settings):
+        """Test that synthesis is handed to the pool with the speed and encoder path."""
+        provider = LocalTTSProvider()
+        provider._pool = ThreadPoolExecutor(max_workers=1)
+        calls = []
+
+        def fake_synthesize(text, speed, ffmpeg):
+            calls.append((text, speed, ffmpeg))
+            return b"local-mp3"
+
+        with patch("services.tts_providers._local_synthesize", fake_synthesize):
+            audio = await provider.synthesize("Hello.", provider.voice_for("nova"), 1.2)
+        provider.shutdown()
+
+        assert audio == b"local-mp3"
+        assert calls == [("Hello.", 1.2, "ffmpeg")]
+        assert provider._pool is None
@@ -0,0 +1,111 @@
+"""Tests for TTS text chunking and streamed narration extraction."""
+import json
+
+from utils.tts_text import (
+    NarrationStreamExtractor,
+    SentenceChunker,
+    chunk_text_for_tts,
+    segment_hash,
+    split_tts_segments,
+)
+
+
+class TestChunkTextForTTS:
+    """Test chunk_text_for_tts splitting."""
+
+    def test_short_text_is_single_chunk(self):
+        """Test that text under the limit is not split."""
+        assert chunk_text_for_tts("Hello world.") == ["Hello world."]
+
+    def test_long_text_splits_on_sentences(self):
+        """Test that long text is split on sentence boundaries within the limit."""
+        text = "This is a sentence about the park. " * 300
+        chunks = chunk_text_for_tts(text, max_chunk_size=4000)
+
+        assert len(chunks) > 1
+        assert all(len(chunk) <= 4000 for chunk in chunks)
+        assert all(chunk.endswith(".") for chunk in chunks)
+
+
+
+class TestSplitTTSSegments:
+    """Test paragraph-aligned segments for the TTS cache."""
+
+    PARAGRAPHS = [
+        "Stop 1: The Square",
+        "The square was laid out in the twelfth century as the town's market place.",
+        "Its fountain dates from 1580 and still draws water from the hills above the town.",
+    ]
+
+    def test_segments_follow_paragraphs(self):
+        """Test that every paragraph, short headings included, is a segment of its own."""
+        segments = split_tts_segments("\n\n".join(self.PARAGRAPHS))
+
+        assert segments == self.PARAGRAPHS
+
+    def test_edit_only_changes_its_segment(self):
+        """Test that editing one paragraph keeps the hashes of the others."""
+        edited = self.PARAGRAPHS[:2] + ["Its fountain dates from 1581 and still draws water from the hills."]
+
+        before = [segment_hash(s) for s in split_tts_segments("\n\n".join(self.PARAGRAPHS))]
+        after = [segment_hash(s) for s in split_tts_segments("\n\n".join(edited))]
+
+        assert before[:2] == after[:2]
+        assert before[2] != after[2]
+
+    def test_segments_are_slices_of_the_text(self):
+        """Test that segments keep the original characters between them."""
+        text = "A heading\n \n" + "A long sentence about the square. " * 200
+
+        segments = split_tts_segments(text)
+
+        assert len(segments) > 1
+        assert all(segment in text for segment in segments)
+
+    def test_hash_ignores_whitespace(self):
+        """Test that reflowed text keeps its hash."""
+        assert segment_hash("Hello  world.\n") == segment_hash("Hello world.")
+
+
+class TestNarrationStreamExtractor:
+    """Test incremental extraction of the content field."""
+
+    def test_extracts_content_across_arbitrary_deltas(self):
+        """Test that escapes split across deltas are decoded correctly."""
+        tour = {
+            "title": "Old Town",
+            "content": "Welcome to the \"Old Town\".\n\nWalk north to the café – it's lovely.",
+            "walkable_stops": [{"name": "Square", "content_duration": "3 minutes"}],
+        }
+        raw = json.dumps(tour)
+
+        extractor = NarrationStreamExtractor()
+        narration = "".join(extractor.feed(raw[i:i + 3]) for i in range(0, len(raw), 3))
+
+        assert narration == tour["content"]
+        assert extractor.finished
+
+    def test_ignores_other_keys(self):
+        """Test that keys such as content_duration are not mistaken for content."""
+        extractor = NarrationStreamExtractor()
+        assert extractor.feed('{"content_duration": "3 minutes", ') == ""
+        assert not extractor.started
+
+
+class TestSentenceChunker:
+    """Test grouping streamed narration into TTS chunks."""
+
+    def test_first_chunk_is_emitted_early(self):
+        """Test that the first chunk is released once a sentence passes the first minimum."""
+        chunker = SentenceChunker(first_min_chars=20, min_chars=100)
+        chunks = chunker.feed("The tour starts at the fountain. Then we walk")
+
+        assert chunks == ["The tour starts at the fountain."]
+
+    def test_flush_returns_remaining_text(self):
+        """Test that nothing is lost when the stream ends mid-sentence."""
+        chunker = SentenceChunker(first_min_chars=20, min_chars=100)
+        text = "The tour starts at the fountain. Then we walk north to the old church and"
+        chunks = chunker.feed(text) + chunker.flush()
+
+        assert " ".join(chunks) == text
@@ -0,0 +1,68 @@
+"""Tests for usage counters kept as cache hashes."""
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from services.cache_service import CacheService, InMemoryCache
+from services.usage_tracker import UsageTracker
+
+
+@pytest.fixture
+def tracker():
+    """UsageTracker over a fresh in-memory cache."""
+    cache = CacheService("memory")
+    cache._cache = InMemoryCache(max_bytes=0, sweep_interval=0)
+    usage_tracker = UsageTracker()
+    usage_tracker.cache = cache
+    return usage_tracker
+
+
+class TestUsageCounters:
+    """Test recording and reporting usage."""
+    
+    @pytest.mark.asyncio
+    async def test_usage_is_summed_per_service_and_provider(self, tracker):
+        """Test that recorded usage is reported in the nested summary format."""
+        await tracker.record_api_usage("audio_generation", 1000, "openai", 0.015)
+        await tracker.record_api_usage("tour_content", 2000, "anthropic", 0.00275)
+        await tracker.record_cache_hit("audio_generation", "openai")
+        
+        summary = await tracker.get_usage_summary("today")
+        usage = summary["usage"]
+        
+        assert usage["total_requests"] == 2
+        assert usage["total_units"] == 3000
+        assert usage["total_cost"] == pytest.approx(0.01775)
+        assert usage["services"]["audio_generation"] == {"requests": 1, "units": 1000, "cost": pytest.approx(0.015)}
+        assert usage["providers"]["anthropic"]["units"] == 2000
+        assert summary["cache_hits"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_legacy_json_usage_is_added(self, tracker):
+        """Test that usage stored as JSON before the hash counters is still reported."""
+        summary = await tracker.get_usage_summary("this_month")
+        await tracker.cache.set(f"usage:monthly:{summary['date_key']}", json.dumps({
+            "total_requests": 3, "total_units": 300, "total_cost": 1.5,
+            "services": {"translation": {"requests": 3, "units": 300, "cost": 1.5}},
+            "providers": {"openai": {"requests": 3, "units": 300, "cost": 1.5}},
+        }))
+        await tracker.record_api_usage("translation", 100, "openai", 0.5)
+        
+        usage = (await tracker.get_usage_summary("this_month"))["usage"]
+        
+        assert usage["total_requests"] == 4
+        assert usage["services"]["translation"]["cost"] == pytest.approx(2.0)
+    
+    @pytest.mark.asyncio
+    async def test_limits_are_checked_from_increment_results(self, tracker):
+        """Test that a budget alert is raised from the new totals without reading them back."""
+        tracker.monthly_budget = 1.0
+        tracker.cache.get_json = AsyncMock(wraps=tracker.cache.get_json)
+        
+        with patch.object(tracker, "_send_usage_alert", new=AsyncMock()) as alert:
+            await tracker.record_api_usage("tour_content", 10, "openai", 0.9)
+        
+        alert.assert_awaited_once()
+        assert alert.await_args.args[0] == "monthly_budget"
+        tracker.cache.get_json.assert_not_awaited()
@@ -0,0 +1,44 @@
+"""
+Geographic helpers for walking routes.
+"""
+
+from math import asin, cos, radians, sin, sqrt
+from typing import Iterable, Optional, Tuple
+
+EARTH_RADIUS_M = 6371000
+WALKING_SPEED_M_PER_MIN = 80  # relaxed sightseeing pace
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in meters."""
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
+    return 2 * asin(sqrt(a)) * EARTH_RADIUS_M
+
+
+def route_distance_m(points: Iterable[Optional[Tuple[float, float]]]) -> float:
+    """Total length of a route through ``(lat, lng)`` points; missing points are skipped."""
+    total = 0.0
+    previous = None
+    for point in points:
+        if point is None:
+            continue
+        if previous is not None:
+            total += haversine_m(previous[0], previous[1], point[0], point[1])
+        previous = point
+    return total
+
+
+def format_distance(meters: float) -> str:
+    """Human readable distance, e.g. ``"850 m"`` or ``"1.2 km"``."""
+    if meters < 1000:
+        return f"{int(round(meters, -1))} m"
+    return f"{meters / 1000:.1f} km"
+
+
+def format_walking_time(meters: float) -> str:
+    """Walking time for a distance, e.g. ``"15 minutes"``."""
+    minutes = max(1, int(round(meters / WALKING_SPEED_M_PER_MIN)))
+    return f"{minutes} minute" if minutes == 1 else f"{minutes} minutes"
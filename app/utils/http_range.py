@@ -0,0 +1,62 @@
+"""
+HTTP conditional and range request helpers (RFC 9110).
+"""
+
+from typing import Optional, Tuple
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header cannot be served for the resource size."""
+    pass
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single ``bytes=`` range against a resource of ``size`` bytes.
+
+    Returns:
+        Inclusive ``(start, end)``, or None when the whole resource should be
+        served (no header, another unit, or several ranges)
+
+    Raises:
+        RangeNotSatisfiable: if the range lies outside the resource
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None  # multipart ranges are not worth supporting here
+
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+            if last and start > end:
+                return None  # syntactically invalid – ignore the header
+        else:
+            suffix = int(last)
+            if suffix == 0:
+                raise RangeNotSatisfiable(header)
+            start, end = max(size - suffix, 0), size - 1
+    except ValueError:
+        return None
+
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, min(end, size - 1)
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match``/``If-Range`` value matches ``etag`` (weak comparison)."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    normalized = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == normalized:
+            return True
+    return False
@@ -0,0 +1,293 @@
+"""
+MP3 frame header utilities.
+Walks MPEG audio frame headers to measure duration, build seek indexes and
+rewrite the Xing header of concatenated files without decoding audio.
+"""
+
+import struct
+from bisect import bisect_right
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# Bitrates in kbps indexed by [version_group][layer][bitrate_index]
+_BITRATES = {
+    "mpeg1": {
+        1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+        2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+        3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    },
+    "mpeg2": {
+        1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+        2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+        3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    },
+}
+
+# Sample rates in Hz indexed by version bits
+_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG 1
+    2: (22050, 24000, 16000),  # MPEG 2
+    0: (11025, 12000, 8000),   # MPEG 2.5
+}
+
+_LAYERS = {3: 1, 2: 2, 1: 3}  # layer bits -> layer number
+
+class FrameHeader(NamedTuple):
+    """Decoded MPEG audio frame header."""
+    version: int  # version bits: 3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5
+    layer: int
+    bitrate: int  # bits per second
+    sample_rate: int
+    samples: int  # samples per frame
+    length: int  # frame length in bytes, header included
+    channel_mode: int  # 3 = mono
+    protected: bool  # CRC follows the header
+
+    @property
+    def duration(self) -> float:
+        return self.samples / self.sample_rate
+
+
+def parse_frame_header(data: bytes, offset: int = 0) -> Optional[FrameHeader]:
+    """Decode the frame header at ``offset`` or return None if it is not one."""
+    if offset + 4 > len(data):
+        return None
+    b1, b2, b3, b4 = data[offset:offset + 4]
+    if b1 != 0xFF or (b2 & 0xE0) != 0xE0:
+        return None
+
+    version = (b2 >> 3) & 0x03
+    layer_bits = (b2 >> 1) & 0x03
+    bitrate_index = (b3 >> 4) & 0x0F
+    sample_rate_index = (b3 >> 2) & 0x03
+    if version == 1 or layer_bits == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None  # reserved, free-format or invalid
+
+    layer = _LAYERS[layer_bits]
+    group = "mpeg1" if version == 3 else "mpeg2"
+    bitrate = _BITRATES[group][layer][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (b3 >> 1) & 0x01
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or version == 3:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 576  # layer 3, MPEG 2/2.5
+        length = 72 * bitrate // sample_rate + padding
+
+    return FrameHeader(
+        version=version,
+        layer=layer,
+        bitrate=bitrate,
+        sample_rate=sample_rate,
+        samples=samples,
+        length=length,
+        channel_mode=(b4 >> 6) & 0x03,
+        protected=not (b2 & 0x01),
+    )
+
+
+def id3v2_size(data: bytes, offset: int = 0) -> int:
+    """Size of an ID3v2 tag at ``offset`` (0 if there is none)."""
+    if data[offset:offset + 3] != b"ID3" or offset + 10 > len(data):
+        return 0
+    flags = data[offset + 5]
+    size = 0
+    for byte in data[offset + 6:offset + 10]:
+        size = (size << 7) | (byte & 0x7F)  # syncsafe integer
+    footer = 10 if flags & 0x10 else 0
+    return 10 + size + footer
+
+
+def iter_frames(data: bytes) -> Iterator[Tuple[int, FrameHeader]]:
+    """
+    Yield ``(offset, header)`` for every audio frame.
+
+    ID3v2 tags (including ones in the middle of concatenated files) and a
+    trailing ID3v1 tag are skipped; garbage between frames is resynchronised
+    by requiring two consecutive valid headers.
+    """
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+
+    offset = 0
+    synced = False
+    while offset + 4 <= end:
+        tag_size = id3v2_size(data, offset)
+        if tag_size:
+            offset += tag_size
+            synced = False
+            continue
+
+        header = parse_frame_header(data, offset)
+        if header and offset + header.length <= end:
+            if not synced:
+                # Confirm with the next header to avoid false syncs inside audio data
+                next_offset = offset + header.length
+                if next_offset + 4 <= end and not (
+                    parse_frame_header(data, next_offset) or data[next_offset:next_offset + 3] == b"ID3"
+                ):
+                    offset += 1
+                    continue
+                synced = True
+            yield offset, header
+            offset += header.length
+        else:
+            synced = False
+            offset += 1
+
+
+def looks_like_mp3(data: bytes) -> bool:
+    """Whether ``data`` starts like an MP3 file (ID3v2 tag or a frame header)."""
+    return data[:3] == b"ID3" or parse_frame_header(data) is not None
+
+
+def _side_info_size(header: FrameHeader) -> int:
+    if header.version == 3:
+        return 17 if header.channel_mode == 3 else 32
+    return 9 if header.channel_mode == 3 else 17
+
+
+def is_info_frame(data: bytes, offset: int, header: FrameHeader) -> bool:
+    """
+    Whether the frame at ``offset`` is a Xing/Info or VBRI header frame.
+
+    Encoders put one at the start of every file; it carries no audio.
+    """
+    if header.layer != 3:
+        return False
+    xing = offset + 4 + _side_info_size(header)
+    return data[xing:xing + 4] in (b"Xing", b"Info") or data[offset + 36:offset + 40] == b"VBRI"
+
+
+def mp3_duration(data: bytes) -> float:
+    """Exact playback duration in seconds, summed over frame headers."""
+    return sum(
+        header.duration for offset, header in iter_frames(data)
+        if not is_info_frame(data, offset, header)
+    )
+
+
+def _xing_frame(template: FrameHeader, template_bytes: bytes, frames: int, size: int, toc: List[int], vbr: bool) -> bytes:
+    """Build a Layer III Xing/Info frame matching the stream parameters of ``template``."""
+    side_info = _side_info_size(template)
+    needed = 4 + side_info + 120  # tag, flags, frame count, byte count, 100 byte TOC
+    group = "mpeg1" if template.version == 3 else "mpeg2"
+    factor = 144 if template.version == 3 else 72
+    sample_rate_index = _SAMPLE_RATES[template.version].index(template.sample_rate)
+
+    for bitrate_index, kbps in enumerate(_BITRATES[group][3]):
+        length = factor * kbps * 1000 // template.sample_rate
+        if bitrate_index and length >= needed:
+            break
+    else:
+        raise ValueError("no bitrate is large enough for a Xing frame")
+
+    header = bytes([
+        0xFF,
+        0xE0 | (template.version << 3) | (1 << 1) | 0x01,  # layer III, no CRC
+        (bitrate_index << 4) | (sample_rate_index << 2),
+        template_bytes[3] & 0xCF,  # keep channel mode, mode extension cleared
+    ])
+    body = (b"Xing" if vbr else b"Info") + struct.pack(">III", 0x07, frames, size) + bytes(toc)
+    frame = header + b"\x00" * side_info + body
+    return frame + b"\x00" * (length - len(frame))
+
+
+def rebuild_vbr_header(data: bytes) -> bytes:
+    """
+    Rewrite concatenated MP3 chunks as one file with a correct Xing header.
+
+    Chunked TTS output is a series of complete MP3 files, each starting with
+    its own ID3 tag and Xing/Info (or VBRI) frame. Players trust the first
+    of those and get the duration and every seek position wrong. Tags and
+    per-chunk header frames are dropped and a single Xing frame with the
+    real frame count, byte count and a 100 point TOC is prepended.
+
+    Non Layer III input is returned unchanged.
+    """
+    frames = [
+        (offset, header) for offset, header in iter_frames(data)
+        if not is_info_frame(data, offset, header)
+    ]
+    if not frames or frames[0][1].layer != 3:
+        return data
+
+    audio = b"".join(data[offset:offset + header.length] for offset, header in frames)
+    starts = []
+    elapsed = 0.0
+    position = 0
+    for _, header in frames:
+        starts.append((elapsed, position))
+        elapsed += header.duration
+        position += header.length
+
+    template_offset, template = frames[0]
+    vbr = len({header.bitrate for _, header in frames}) > 1
+    # Placeholder pass to learn the Xing frame length, which shifts every offset
+    xing_length = len(_xing_frame(template, data[template_offset:template_offset + 4], 0, 0, [0] * 100, vbr))
+    total = xing_length + len(audio)
+
+    times = [start for start, _ in starts]
+    toc = []
+    for percent in range(100):
+        i = max(bisect_right(times, elapsed * percent / 100) - 1, 0)
+        toc.append(min(255, (xing_length + starts[i][1]) * 256 // total))
+
+    xing = _xing_frame(template, data[template_offset:template_offset + 4], len(frames), total, toc, vbr)
+    return xing + audio
+
+
+def build_seek_index(data: bytes, step: float = 1.0) -> Dict[str, Any]:
+    """
+    Map playback time to byte offsets of audio frames.
+
+    Keeps one ``[time, offset]`` point per ``step`` seconds; :func:`seek_offset`
+    walks the frames from the nearest point to be exact to the frame.
+    Header frames are not audio, so time 0 is the first audio frame.
+    """
+    points = []
+    elapsed = 0.0
+    next_point = 0.0
+    frames = 0
+    for offset, header in iter_frames(data):
+        if is_info_frame(data, offset, header):
+            continue
+        if elapsed >= next_point:
+            points.append([round(elapsed, 6), offset])
+            next_point = elapsed + step
+        elapsed += header.duration
+        frames += 1
+    return {
+        "duration": round(elapsed, 6),
+        "frames": frames,
+        "bytes": len(data),
+        "step": step,
+        "points": points,
+    }
+
+
+def seek_offset(index: Dict[str, Any], seconds: float, data: Optional[bytes] = None) -> Tuple[int, float]:
+    """
+    Byte offset and start time of the frame playing at ``seconds``.
+
+    Without ``data`` the nearest index point at or before ``seconds`` is
+    returned; with it, frames are walked from there to the exact frame.
+    """
+    points = index.get("points") or []
+    if not points:
+        return 0, 0.0
+    i = max(bisect_right([point[0] for point in points], seconds) - 1, 0)
+    elapsed, offset = points[i]
+    if data is None:
+        return offset, elapsed
+    while True:
+        header = parse_frame_header(data, offset)
+        if not header or elapsed + header.duration > seconds or offset + header.length >= len(data):
+            return offset, elapsed
+        elapsed += header.duration
+        offset += header.length
@@ -0,0 +1,121 @@
+"""
+Split tour narration into sections aligned with its walkable stops.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+_SENTENCE_START = re.compile(r'[.!?]["\')\]]?\s+')
+
+INTRODUCTION_TITLE = "Introduction"
+
+
+def _stop_search_names(stop: Dict[str, Any]) -> List[str]:
+    """Names a stop is likely to be mentioned by in the narration."""
+    name = (stop.get("name") or "").strip()
+    if not name:
+        return []
+    names = [name]
+    # "Rijksmuseum (Museum Square)" / "Dam Square, Amsterdam" -> leading part
+    short = re.split(r'[(,–-]', name)[0].strip()
+    if short and short != name and len(short) > 3:
+        names.append(short)
+    lowered = short.lower()
+    for prefix in ("back to the ", "return to the ", "back to ", "return to "):
+        if lowered.startswith(prefix):
+            names.append(short[len(prefix):])
+    return names
+
+
+def _paragraph_start(content: str, position: int) -> int:
+    """Start of the paragraph containing ``position``."""
+    return content.rfind("\n\n", 0, position) + 2 if "\n\n" in content[:position] else 0
+
+
+def _sentence_start(content: str, position: int, floor: int) -> int:
+    """Start of the sentence containing ``position``, never before ``floor``."""
+    start = floor
+    for match in _SENTENCE_START.finditer(content, floor, position):
+        start = match.end()
+    return start
+
+
+def locate_stop_sections(content: str, stops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Find where the narration for each stop begins.
+
+    Stops are searched in route order; a stop starts at the paragraph (or
+    sentence) where it is first mentioned after the previous stop. Stops that
+    are never mentioned are folded into the previous section.
+
+    Returns:
+        Ordered list of ``{"start", "stop_index", "title"}`` where ``stop_index``
+        is None for an introduction before the first stop
+    """
+    sections: List[Dict[str, Any]] = []
+    lowered = content.lower()
+    has_paragraphs = "\n\n" in content.strip()
+    floor = 0
+
+    for stop_index, stop in enumerate(stops):
+        previous_start = sections[-1]["start"] if sections else -1
+        mentions = []
+        for name in _stop_search_names(stop):
+            position = lowered.find(name.lower(), floor)
+            while position != -1:
+                mentions.append(position)
+                position = lowered.find(name.lower(), position + 1)
+        mentions.sort()
+
+        # Prefer the first mention in a new paragraph: a passing "next we walk
+        # to ..." at the end of the previous stop should not anchor this stop
+        start = None
+        if has_paragraphs:
+            start = next(
+                (p for p in (_paragraph_start(content, m) for m in mentions) if p > previous_start),
+                None
+            )
+        if start is None:
+            # No paragraph structure to follow – fall back to sentences
+            start = next(
+                (p for p in (_sentence_start(content, m, floor) for m in mentions) if p > previous_start),
+                None
+            )
+        if start is None:
+            continue  # never mentioned on its own – folded into the previous section
+
+        sections.append({"start": start, "stop_index": stop_index, "title": stop.get("name")})
+        floor = start
+
+    if not sections or content[:sections[0]["start"]].strip():
+        sections.insert(0, {"start": 0, "stop_index": None, "title": INTRODUCTION_TITLE})
+    else:
+        sections[0]["start"] = 0
+    return sections
+
+
+def split_narration_by_stops(content: str, stops: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Split narration into one section per walkable stop.
+
+    Returns:
+        Ordered list of ``{"stop_index", "title", "text"}``
+    """
+    sections = locate_stop_sections(content, stops or [])
+    result = []
+    for i, section in enumerate(sections):
+        end = sections[i + 1]["start"] if i + 1 < len(sections) else len(content)
+        text = content[section["start"]:end].strip()
+        if text:
+            result.append({"stop_index": section["stop_index"], "title": section["title"], "text": text})
+    return result
+
+
+def section_at(sections: List[Dict[str, Any]], offset: int) -> Dict[str, Any]:
+    """The section (from ``locate_stop_sections``) that contains character ``offset``."""
+    current = sections[0]
+    for section in sections:
+        if section["start"] > offset:
+            break
+        current = section
+    return current
@@ -0,0 +1,113 @@
+"""
+Planning shorter variants of an existing tour.
+Decides which stops to keep and how much each kept stop's narration has to
+be condensed, and finds source audio segments that can be reused unchanged.
+"""
+
+from typing import Any, Dict, List, Optional
+
+# Sections within this fraction of their budget are kept verbatim (and keep their audio)
+CONDENSE_TOLERANCE = 0.9
+
+
+def _stop_score(section: Dict[str, Any], stop: Dict[str, Any]) -> float:
+    """How much a stop contributes: narration length plus its listed highlights."""
+    return len(section["text"]) + 200 * len(stop.get("highlights") or [])
+
+
+def plan_variant(
+    sections: List[Dict[str, Any]],
+    stops: List[Dict[str, Any]],
+    source_minutes: int,
+    target_minutes: int,
+    min_stops: int = 2
+) -> List[Dict[str, Any]]:
+    """
+    Plan a shorter tour from the narration sections of a longer one.
+
+    Keeps the stops with the most content (always the first stop, so the
+    route starts where it did) in route order, then shrinks the narration to
+    ``target_minutes / source_minutes`` of its length. A section must be
+    rewritten when it is over budget or when the stop it walks on to was
+    dropped, since its closing directions would be wrong.
+
+    Args:
+        sections: ``split_narration_by_stops`` output of the source tour
+        stops: Source walkable stops
+        source_minutes: Duration of the source tour
+        target_minutes: Duration of the variant
+
+    Returns:
+        Ordered plan entries: the section plus ``target_chars``, ``next_stop``
+        (name of the following kept stop, None at the end) and ``rewrite``
+    """
+    ratio = min(1.0, target_minutes / source_minutes)
+    stop_sections = [s for s in sections if s["stop_index"] is not None and s["stop_index"] < len(stops)]
+    keep_count = max(min(min_stops, len(stop_sections)), round(len(stop_sections) * ratio))
+
+    ranked = sorted(
+        stop_sections[1:],
+        key=lambda s: _stop_score(s, stops[s["stop_index"]]),
+        reverse=True,
+    )
+    kept_stops = {s["stop_index"] for s in stop_sections[:1] + ranked[:max(keep_count - 1, 0)]}
+    kept = [s for s in sections if s["stop_index"] is None or s["stop_index"] in kept_stops]
+
+    budget = sum(len(s["text"]) for s in sections) * ratio
+    kept_chars = sum(len(s["text"]) for s in kept) or 1
+    factor = min(1.0, budget / kept_chars)
+
+    # Stop that originally followed each section, to detect broken transitions
+    original_next = {}
+    for i, section in enumerate(sections):
+        following = next((s["stop_index"] for s in sections[i + 1:] if s["stop_index"] is not None), None)
+        original_next[id(section)] = following
+
+    plan = []
+    for i, section in enumerate(kept):
+        following = next((s["stop_index"] for s in kept[i + 1:] if s["stop_index"] is not None), None)
+        transition_changed = following != original_next[id(section)]
+        plan.append({
+            **section,
+            "target_chars": int(len(section["text"]) * factor),
+            "next_stop": stops[following].get("name") if following is not None else None,
+            "rewrite": factor < CONDENSE_TOLERANCE or transition_changed,
+        })
+    return plan
+
+
+def segment_texts(content: str, segments: List[Dict[str, Any]]) -> List[str]:
+    """Rebuild TTS chunk texts from their lengths: chunks are stripped, consecutive slices of the content."""
+    texts = []
+    cursor = 0
+    for segment in segments:
+        while cursor < len(content) and content[cursor].isspace():
+            cursor += 1
+        texts.append(content[cursor:cursor + segment["chars"]])
+        cursor += segment["chars"]
+    return texts
+
+
+def reusable_segments(
+    section: Dict[str, Any],
+    texts: List[str],
+    segments: List[Dict[str, Any]]
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Source segments that together speak exactly ``section["text"]``.
+
+    Returns:
+        ``[{"index", "text"}]`` in order, or None if the section's audio
+        cannot be reused as-is
+    """
+    matches = [
+        {"index": segment["index"], "text": text}
+        for text, segment in zip(texts, segments)
+        if segment.get("stop_index") == section["stop_index"]
+    ]
+    if not matches or not all(segment.get("ready") for segment in segments if segment.get("stop_index") == section["stop_index"]):
+        return None
+    spoken = " ".join(" ".join(match["text"] for match in matches).split())
+    if spoken != " ".join(section["text"].split()):
+        return None
+    return matches
@@ -1,10 +1,10 @@
 """
 Transcript generation utilities for creating timestamped transcript segments
-from tour content and estimated audio duration.
+from tour content, aligned to the synthesized audio where it is available.
 """
 
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,45 +24,131 @@ class TranscriptGenerator:
         Returns:
             List of transcript segments with startTime, endTime, and text
         """
+        segments, _ = TranscriptGenerator.align_transcript_segments(
+            content, [(content, estimated_duration_seconds)]
+        )
+        return segments
+    
+    @staticmethod
+    def align_transcript_segments(
+        content: str,
+        audio_chunks: List[Tuple[str, float]]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Time transcript segments against the audio that was actually synthesized.
+        
+        Every TTS chunk is an anchor: its text is located in the content and
+        its start/end times come from the measured durations of the chunks
+        before it. Segment boundaries are interpolated by character position
+        inside the chunk they fall in, so timing errors cannot accumulate
+        past a chunk boundary.
+        
+        Args:
+            content: The tour content text
+            audio_chunks: ``(text, duration_seconds)`` of each TTS chunk in playback order
+            
+        Returns:
+            Tuple of (transcript segments, alignment report)
+        """
         try:
-            # Split content into logical segments (sentences/paragraphs)
             segments = TranscriptGenerator._split_content_into_segments(content)
+            anchors, located = TranscriptGenerator._locate_anchors(content, audio_chunks)
+            total_duration = sum(duration for _, duration in audio_chunks)
             
-            if not segments:
-                return []
+            if not segments or not anchors:
+                return [], {"anchors": 0, "audio_duration": round(total_duration, 2)}
             
-            # Calculate timing for each segment
-            transcript_segments = []
-            total_chars = sum(len(segment) for segment in segments)
-            
-            current_time = 0.0
+            starts = TranscriptGenerator._locate_segments(content, segments)
+            times = [TranscriptGenerator._time_at(anchors, position) for position in starts]
+            times[0] = 0.0
             
-            for segment in segments:
-                # Calculate segment duration based on character count ratio
-                segment_ratio = len(segment) / total_chars if total_chars > 0 else 0
-                segment_duration = estimated_duration_seconds * segment_ratio
-                
-                # Ensure minimum segment duration of 2 seconds
-                segment_duration = max(segment_duration, 2.0)
-                
+            transcript_segments = []
+            for i, segment in enumerate(segments):
+                end_time = times[i + 1] if i + 1 < len(segments) else total_duration
                 transcript_segments.append({
-                    "startTime": round(current_time, 2),
-                    "endTime": round(current_time + segment_duration, 2),
+                    "startTime": round(times[i], 2),
+                    "endTime": round(max(end_time, times[i]), 2),
                     "text": segment.strip()
                 })
-                
-                current_time += segment_duration
             
-            # Adjust final segment to match total duration
-            if transcript_segments:
-                transcript_segments[-1]["endTime"] = round(estimated_duration_seconds, 2)
+            anchored_chars = sum(end - start for start, end, _, _ in anchors)
+            rates = [(end - start) / (t1 - t0) for start, end, t0, t1 in anchors if t1 > t0]
+            alignment = {
+                "anchors": len(anchors),
+                "anchors_located": located,
+                "anchored_chars": round(anchored_chars / max(len(content.strip()), 1), 3),
+                "audio_duration": round(total_duration, 2),
+                # Interpolation only happens inside an anchor, so this bounds the drift
+                "max_anchor_seconds": round(max(t1 - t0 for _, _, t0, t1 in anchors), 2),
+                # Spread of the speaking rate between anchors; 0 means linear timing is exact
+                "rate_variation": round(TranscriptGenerator._coefficient_of_variation(rates), 3),
+            }
             
-            logger.info(f"Generated {len(transcript_segments)} transcript segments for {estimated_duration_seconds}s audio")
-            return transcript_segments
+            logger.info(f"Aligned {len(transcript_segments)} transcript segments to {len(anchors)} audio anchors ({total_duration:.1f}s)")
+            return transcript_segments, alignment
             
         except Exception as e:
             logger.error(f"Error generating transcript segments: {e}")
-            return []
+            return [], {"anchors": 0, "error": str(e)}
+    
+    @staticmethod
+    def _locate_anchors(
+        content: str,
+        audio_chunks: List[Tuple[str, float]]
+    ) -> Tuple[List[Tuple[int, int, float, float]], int]:
+        """
+        Character span and time span ``(start, end, t0, t1)`` of every TTS chunk,
+        plus how many chunks were found verbatim in the content.
+        """
+        anchors = []
+        located = 0
+        cursor = 0
+        elapsed = 0.0
+        for text, duration in audio_chunks:
+            text = text.strip()
+            found = content.find(text[:80], cursor) if text else -1
+            if found == -1:
+                # Not found verbatim: assume it continues where the previous chunk ended
+                found = cursor
+            else:
+                located += 1
+            end = min(found + len(text), len(content))
+            anchors.append((found, end, elapsed, elapsed + duration))
+            cursor = end
+            elapsed += duration
+        return anchors, located
+    
+    @staticmethod
+    def _locate_segments(content: str, segments: List[str]) -> List[int]:
+        """Character offset of every transcript segment in the content."""
+        starts = []
+        cursor = 0
+        for segment in segments:
+            probe = segment.strip()[:30]
+            found = content.find(probe, cursor) if probe else -1
+            if found == -1:
+                found = cursor
+            starts.append(found)
+            cursor = found + len(probe)
+        return starts
+    
+    @staticmethod
+    def _time_at(anchors: List[Tuple[int, int, float, float]], position: int) -> float:
+        """Playback time of a character position, interpolated inside its anchor."""
+        for start, end, t0, t1 in anchors:
+            if position < start:
+                return t0  # between chunks (whitespace the TTS never saw)
+            if position < end:
+                return t0 + (position - start) / (end - start) * (t1 - t0)
+        return anchors[-1][3]
+    
+    @staticmethod
+    def _coefficient_of_variation(values: List[float]) -> float:
+        if len(values) < 2:
+            return 0.0
+        mean = sum(values) / len(values)
+        variance = sum((v - mean) ** 2 for v in values) / len(values)
+        return (variance ** 0.5) / mean if mean else 0.0
     
     @staticmethod
     def _split_content_into_segments(content: str) -> List[str]:
@@ -112,6 +198,8 @@ class TranscriptGenerator:
         """
         Estimate audio duration based on content length and speaking rate.
         
+        Only used when no audio was synthesized; prefer measured durations.
+        
         Args:
             content: Text content
             words_per_minute: Average speaking rate (default: 150 WPM)
@@ -0,0 +1,209 @@
+"""
+Text utilities for text-to-speech: chunking narration into TTS-sized pieces
+and extracting narration incrementally from a streamed LLM JSON response.
+"""
+
+import hashlib
+import re
+from typing import List, Optional
+
+# OpenAI TTS limit is 4096 characters, 4000 leaves a safety buffer
+TTS_MAX_CHARS = 4000
+
+_CONTENT_KEY = re.compile(r'"content"\s*:\s*"')
+_JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_SENTENCE_END = re.compile(r'[.!?]["\')\]]?\s')
+
+
+def chunk_text_for_tts(text: str, max_chunk_size: int = TTS_MAX_CHARS) -> List[str]:
+    """Split long text into chunks suitable for TTS, preserving sentence boundaries."""
+    if len(text) <= max_chunk_size:
+        return [text]
+
+    chunks = []
+    remaining_text = text
+
+    while remaining_text:
+        if len(remaining_text) <= max_chunk_size:
+            chunks.append(remaining_text)
+            break
+
+        # Find a good breaking point
+        chunk = remaining_text[:max_chunk_size]
+
+        # Try to break at sentence boundary first
+        last_period = chunk.rfind('.')
+        last_exclamation = chunk.rfind('!')
+        last_question = chunk.rfind('?')
+
+        # Use the latest sentence ending
+        sentence_break = max(last_period, last_exclamation, last_question)
+
+        if sentence_break > int(max_chunk_size * 0.6):  # At least 60% through the chunk
+            split_point = sentence_break + 1
+        else:
+            # No good sentence break, try paragraph break
+            last_double_newline = chunk.rfind('\n\n')
+            if last_double_newline > int(max_chunk_size * 0.5):
+                split_point = last_double_newline + 2
+            else:
+                # Fall back to word boundary
+                last_space = chunk.rfind(' ')
+                split_point = last_space if last_space > int(max_chunk_size * 0.8) else max_chunk_size
+
+        chunks.append(remaining_text[:split_point].strip())
+        remaining_text = remaining_text[split_point:].strip()
+
+    return [chunk for chunk in chunks if chunk]  # Remove empty chunks
+
+
+def split_tts_segments(text: str, max_chars: int = TTS_MAX_CHARS) -> List[str]:
+    """
+    Split narration into paragraph-aligned TTS segments.
+
+    Unlike ``chunk_text_for_tts``, which packs text up to the limit so one
+    edit shifts every later boundary, a segment ends where its paragraph
+    ends. Boundaries only depend on the paragraph itself, so editing one
+    sentence changes one segment and every other segment keeps its hash
+    (and its cached audio). Short paragraphs such as headings or "Now follow
+    the canal north." stay segments of their own, so boilerplate repeated
+    across stops and tours is synthesized once. Paragraphs over the limit
+    are split on sentences.
+    """
+    segments = []
+    for match in re.finditer(r"\S(?:.*?\S)?(?=\s*(?:\n\s*\n|$))", text, re.S):
+        segments.extend(chunk_text_for_tts(match.group(), max_chars))
+    return segments
+
+
+def segment_hash(text: str) -> str:
+    """Stable hash of the spoken text of a segment; whitespace differences do not change it."""
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+class NarrationStreamExtractor:
+    """
+    Incrementally extracts the ``content`` string from a streamed JSON tour.
+
+    Feed raw LLM deltas in arrival order; every call returns the newly decoded
+    narration text (JSON escapes resolved). Text after the closing quote of the
+    ``content`` value is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0  # next undecoded character inside the content string
+        self.started = False
+        self.finished = False
+
+    def feed(self, delta: str) -> str:
+        """Consume a raw delta and return the narration text it completed."""
+        if self.finished:
+            return ""
+        self._buffer += delta
+
+        if not self.started:
+            match = _CONTENT_KEY.search(self._buffer)
+            if not match:
+                return ""
+            self.started = True
+            self._pos = match.end()
+
+        decoded = []
+        buf = self._buffer
+        while self._pos < len(buf):
+            ch = buf[self._pos]
+            if ch == '"':
+                self.finished = True
+                self._pos += 1
+                break
+            if ch != '\\':
+                decoded.append(ch)
+                self._pos += 1
+                continue
+
+            # Escape sequence – wait for the rest of it if it is split across deltas
+            if self._pos + 1 >= len(buf):
+                break
+            code = buf[self._pos + 1]
+            if code == 'u':
+                if self._pos + 6 > len(buf):
+                    break
+                try:
+                    decoded.append(chr(int(buf[self._pos + 2:self._pos + 6], 16)))
+                except ValueError:
+                    pass
+                self._pos += 6
+            else:
+                decoded.append(_JSON_ESCAPES.get(code, code))
+                self._pos += 2
+
+        return "".join(decoded)
+
+
+class SentenceChunker:
+    """
+    Groups streamed narration into TTS chunks that end on a paragraph or
+    sentence boundary.
+
+    The first chunk is kept short so synthesis can start early; later chunks
+    are larger to reduce the number of TTS calls.
+    """
+
+    def __init__(self, first_min_chars: int = 200, min_chars: int = 600, max_chars: int = TTS_MAX_CHARS):
+        self.first_min_chars = first_min_chars
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._pending = ""
+        self._emitted = 0
+
+    def feed(self, text: str) -> List[str]:
+        """Add narration text and return the chunks that are now complete."""
+        self._pending += text
+        chunks = []
+        while True:
+            chunk = self._take_chunk()
+            if chunk is None:
+                break
+            chunks.append(chunk)
+        return chunks
+
+    def flush(self) -> List[str]:
+        """Return whatever narration is left as final chunk(s)."""
+        remaining = self._pending.strip()
+        self._pending = ""
+        if not remaining:
+            return []
+        chunks = chunk_text_for_tts(remaining, self.max_chars)
+        self._emitted += len(chunks)
+        return chunks
+
+    def _take_chunk(self) -> Optional[str]:
+        min_chars = self.first_min_chars if self._emitted == 0 else self.min_chars
+        if len(self._pending) < min_chars:
+            return None
+
+        # Cut at the earliest paragraph or sentence boundary past the minimum
+        window = self._pending[:self.max_chars]
+        paragraph = window.find('\n\n', min_chars)
+        sentence = _SENTENCE_END.search(window, min_chars - 1)
+        candidates = []
+        if paragraph != -1:
+            candidates.append(paragraph + 2)
+        if sentence:
+            candidates.append(sentence.end())
+        if candidates:
+            split_point = min(candidates)
+        elif len(self._pending) >= self.max_chars:
+            # No boundary within the TTS limit – fall back to a word boundary
+            last_space = window.rfind(' ')
+            split_point = last_space if last_space > min_chars else self.max_chars
+        else:
+            return None  # wait for a boundary
+
+        chunk = self._pending[:split_point].strip()
+        self._pending = self._pending[split_point:].lstrip()
+        if not chunk:
+            return None
+        self._emitted += 1
+        return chunk
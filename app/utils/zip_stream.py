@@ -0,0 +1,101 @@
+"""
+Streaming ZIP archives with a precomputed layout.
+Entries are stored uncompressed, so every header, the central directory and
+the total size are known up front. The archive is never assembled in memory:
+any byte range is served by slicing the parts it overlaps.
+"""
+
+import hashlib
+import struct
+import zlib
+from datetime import datetime
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_OF_CENTRAL_DIR = struct.Struct("<IHHHHIIH")
+
+_VERSION = 20  # ZIP 2.0, enough for stored entries
+_MADE_BY_UNIX = (3 << 8) | _VERSION  # so the file mode in the external attributes is honoured
+_UTF8_FLAG = 0x0800
+
+class ZipEntry(NamedTuple):
+    """A file in the archive."""
+    name: str
+    data: bytes
+    modified: Optional[datetime] = None
+
+def _dos_datetime(value: Optional[datetime]) -> Tuple[int, int]:
+    value = value or datetime(1980, 1, 1)
+    if value.year < 1980:
+        value = datetime(1980, 1, 1)
+    dos_time = (value.hour << 11) | (value.minute << 5) | (value.second // 2)
+    dos_date = ((value.year - 1980) << 9) | (value.month << 5) | value.day
+    return dos_time, dos_date
+
+class StreamingZip:
+    """
+    A stored (uncompressed) ZIP archive that can be streamed from any offset.
+
+    Example:
+        archive = StreamingZip([ZipEntry("tour.json", b"{}")])
+        for chunk in archive.iter_bytes(0, archive.size - 1):
+            ...
+    """
+
+    def __init__(self, entries: List[ZipEntry], chunk_size: int = 64 * 1024):
+        self.entries = entries
+        self.chunk_size = chunk_size
+        self._parts: List[memoryview] = []
+        central_directory = []
+        offset = 0
+        digest = hashlib.sha1()
+
+        for entry in entries:
+            name = entry.name.encode("utf-8")
+            crc = zlib.crc32(entry.data) & 0xFFFFFFFF
+            size = len(entry.data)
+            dos_time, dos_date = _dos_datetime(entry.modified)
+
+            local_header = _LOCAL_HEADER.pack(
+                0x04034B50, _VERSION, _UTF8_FLAG, 0, dos_time, dos_date,
+                crc, size, size, len(name), 0,
+            ) + name
+            central_directory.append(_CENTRAL_HEADER.pack(
+                0x02014B50, _MADE_BY_UNIX, _VERSION, _UTF8_FLAG, 0, dos_time, dos_date,
+                crc, size, size, len(name), 0, 0, 0, 0, 0o100644 << 16, offset,
+            ) + name)
+
+            self._parts.append(memoryview(local_header))
+            self._parts.append(memoryview(entry.data))
+            offset += len(local_header) + size
+            digest.update(local_header)
+
+        central = b"".join(central_directory)
+        end_record = _END_OF_CENTRAL_DIR.pack(
+            0x06054B50, 0, 0, len(entries), len(entries), len(central), offset, 0,
+        )
+        if offset + len(central) > 0xFFFFFFFF:
+            raise ValueError("Archive too large for ZIP without ZIP64")
+        self._parts.append(memoryview(central))
+        self._parts.append(memoryview(end_record))
+
+        self.size = offset + len(central) + len(end_record)
+        # Headers carry name, CRC, size and timestamp of every entry, so they
+        # identify the archive bytes exactly
+        self.etag = f'"{digest.hexdigest()}"'
+
+    def iter_bytes(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Yield the archive bytes from ``start`` to ``end`` (inclusive)."""
+        end = self.size - 1 if end is None else min(end, self.size - 1)
+        position = 0
+        for part in self._parts:
+            part_end = position + len(part)
+            if part_end > start and position <= end:
+                lo = max(start - position, 0)
+                hi = min(end + 1 - position, len(part))
+                for chunk_start in range(lo, hi, self.chunk_size):
+                    yield bytes(part[chunk_start:min(chunk_start + self.chunk_size, hi)])
+            position = part_end
+            if position > end:
+                break
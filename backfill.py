@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Backfill derived tour data for existing tours.
+
+Examples:
+    python backfill.py transcript --batch-size 200 --workers 4
+    python backfill.py walking-metrics --only-missing --dry-run
+    python backfill.py transcript --resume
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add the app directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / "app"))
+
+from app.database import AsyncSessionLocal
+from app.services.backfill import JOBS, BackfillRunner
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Backfill derived data for existing tours")
+    parser.add_argument("job", choices=sorted(JOBS), help="; ".join(f"{name}: {job.description}" for name, job in sorted(JOBS.items())))
+    parser.add_argument("--batch-size", type=int, default=200, help="tours per keyset page (default: 200)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many tours")
+    parser.add_argument("--only-missing", action="store_true", help="only tours where the target column is empty")
+    parser.add_argument("--resume", action="store_true", help="continue after the last checkpointed tour")
+    parser.add_argument("--dry-run", action="store_true", help="compute everything but do not write")
+    parser.add_argument("--checkpoint-dir", type=Path, default=Path(".backfill"), help="where checkpoints are kept")
+    return parser.parse_args()
+
+def main() -> int:
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    job = JOBS[args.job](only_missing=args.only_missing)
+    runner = BackfillRunner(
+        job,
+        AsyncSessionLocal,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        checkpoint_dir=args.checkpoint_dir,
+        dry_run=args.dry_run,
+        limit=args.limit,
+    )
+
+    print(f"🔄 Starting {job.name} backfill{' (dry run)' if args.dry_run else ''} with {runner.workers} workers...")
+    try:
+        # On Ctrl+C asyncio.run cancels the run (the runner sees CancelledError)
+        # and raises KeyboardInterrupt here, not inside the coroutine
+        stats = asyncio.run(runner.run(resume=args.resume))
+    except KeyboardInterrupt:
+        print(f"⏸️  Interrupted – rerun with --resume to continue from {runner.checkpoint_path}")
+        return 130
+
+    print(f"✅ Backfill finished: {stats.report()}")
+    print(json.dumps(stats.to_dict(), indent=2))
+    if runner.failures:
+        print(f"⚠️  {len(runner.failures)} tours failed – see {runner.checkpoint_path}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Repair tours that are ready without audio.
+
+Audio is resumed from the segments checkpointed by the interrupted run, so
+only the missing segments are synthesized.
+
+Examples:
+    python repair_audio.py --limit 20
+    python repair_audio.py --tour <tour id> --dry-run
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import uuid
+from pathlib import Path
+
+# Add the app directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / "app"))
+
+from app.database import AsyncSessionLocal
+from app.services.tour_service import tour_service
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Resume audio generation for tours that are ready without audio")
+    parser.add_argument("--tour", type=uuid.UUID, action="append", default=[], help="repair this tour (repeatable)")
+    parser.add_argument("--limit", type=int, default=100, help="tours to repair when no --tour is given (default: 100)")
+    parser.add_argument("--concurrency", type=int, default=2, help="tours repaired at the same time (default: 2)")
+    parser.add_argument("--dry-run", action="store_true", help="only list the tours that would be repaired")
+    return parser.parse_args()
+
+async def main() -> int:
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    tour_ids = args.tour
+    if not tour_ids:
+        async with AsyncSessionLocal() as db:
+            tour_ids = await tour_service.find_tours_missing_audio(db, limit=args.limit)
+
+    print(f"🩹 {len(tour_ids)} tours to repair{' (dry run)' if args.dry_run else ''}")
+    if args.dry_run:
+        for tour_id in tour_ids:
+            print(f"   {tour_id}")
+        return 0
+
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+
+    async def repair(tour_id: uuid.UUID) -> bool:
+        async with semaphore:
+            return await tour_service.repair_tour_audio(tour_id)
+
+    results = await asyncio.gather(*(repair(tour_id) for tour_id in tour_ids))
+    failed = [tour_id for tour_id, repaired in zip(tour_ids, results) if not repaired]
+
+    print(f"✅ Repaired {len(tour_ids) - len(failed)}/{len(tour_ids)} tours")
+    if failed:
+        print(f"⚠️  Still without audio: {', '.join(str(tour_id) for tour_id in failed)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+TTS Benchmark Script
+Synthesizes a sample tour through the TTS provider router and reports chunk
+latency, throughput and real-time factor. With the local provider it runs
+offline and without paid calls:
+
+    LOCAL_TTS_MODEL=voices/en_US-lessac-medium.onnx python scripts/benchmark_tts.py --provider local
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Add the app directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.config import settings
+from app.services.ai_service import ai_service
+from app.utils.mp3 import mp3_duration
+from app.utils.tts_text import split_tts_segments
+
+SAMPLE_PARAGRAPH = (
+    "Welcome to the old market square. For eight centuries merchants have traded here, "
+    "and the gabled houses around you were built with the profits of the cloth trade. "
+    "Look up at the town hall tower: its clock has struck the hours since 1523, and on "
+    "the hour a procession of wooden figures still marches out above the entrance."
+)
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark text-to-speech providers")
+    parser.add_argument("--provider", default=None, help="provider order to use, e.g. local or openai,local (default: TTS_PROVIDERS)")
+    parser.add_argument("--paragraphs", type=int, default=12, help="paragraphs of sample narration (default: 12)")
+    parser.add_argument("--concurrency", type=int, default=settings.TTS_MAX_CONCURRENCY, help="parallel chunks")
+    parser.add_argument("--voice", default=settings.OPENAI_TTS_VOICE)
+    parser.add_argument("--speed", type=float, default=1.2)
+    return parser.parse_args()
+
+async def benchmark(args: argparse.Namespace) -> int:
+    if args.provider:
+        settings.TTS_PROVIDERS = args.provider
+    router = ai_service.tts
+    candidates = [provider.name for provider in router.candidates()]
+    if not candidates:
+        print(f"❌ No TTS provider available for '{settings.TTS_PROVIDERS}'")
+        return 1
+
+    # Numbered paragraphs so no chunk is a repeat of another
+    text = "\n\n".join(f"Stop {i + 1}. {SAMPLE_PARAGRAPH}" for i in range(args.paragraphs))
+    chunks = split_tts_segments(text)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    providers = []
+
+    async def synthesize(chunk: str) -> bytes:
+        # Straight to the router: no cache, no usage records
+        async with semaphore:
+            t0 = time.perf_counter()
+            audio_data, provider = await router.synthesize(chunk, args.voice, args.speed)
+            latencies.append(time.perf_counter() - t0)
+            providers.append(provider)
+            return audio_data
+
+    print(f"🎙️  {len(chunks)} chunks, {len(text)} characters, providers: {', '.join(candidates)}, concurrency {args.concurrency}")
+    t0 = time.perf_counter()
+    try:
+        parts = await asyncio.gather(*(synthesize(chunk) for chunk in chunks))
+    finally:
+        router.shutdown()
+    elapsed = time.perf_counter() - t0
+
+    audio_seconds = sum(mp3_duration(part) for part in parts)
+    latencies.sort()
+    print(f"⏱️  Wall time: {elapsed:.2f}s ({len(text) / elapsed:.0f} chars/s)")
+    print(f"📈 Chunk latency: p50 {statistics.median(latencies):.2f}s, p95 {latencies[int(len(latencies) * 0.95) - 1]:.2f}s, max {latencies[-1]:.2f}s")
+    print(f"🔊 Audio: {audio_seconds:.1f}s, {sum(len(part) for part in parts)} bytes, real-time factor {elapsed / audio_seconds:.3f}" if audio_seconds else "🔊 Audio: no measurable MP3 frames")
+    print(f"🔀 Chunks per provider: {dict((name, providers.count(name)) for name in sorted(set(providers)))}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(benchmark(parse_args())))